@@ -5,21 +5,98 @@ Provides learning capability to the CAV API by maintaining rolling 24-hour
 context and computing adaptive adjustments based on historical patterns.
 
 Algorithm:
-1. Store each CAV response in rolling buffer (24h) + SQLite DB
+1. Store each CAV response in a NumPy ring buffer (app.record_ring) + SQLite
+   DB (batched by a background writer, see app.memory_store)
 2. Compute hourly EWMA statistics (mean, variance, state distributions)
+   from streaming per-hour accumulators, kept over the window in time
+   buckets so recording and every query are O(1) in the buffer size
 3. Calculate contextual z-scores and adaptive adjustments
 4. Adjust sensitivity and environment weighting based on patterns
 """
 
-import sqlite3
 import math
-import statistics
+import threading
 from collections import deque
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 import json
 
+import numpy as np
+
+from app.memory_store import MemoryStore
+from app.record_ring import RECORD_DTYPE, STATES, STATE_CODES, UNKNOWN_STATE, RecordRing, decode_state
+
+# SQL expressions loading cav_memory rows straight into RECORD_DTYPE order
+_RING_SELECT = (
+    "timestamp",
+    "cav_smooth",
+    "CASE state " + " ".join(f"WHEN '{state}' THEN {code}" for state, code in STATE_CODES.items())
+    + f" ELSE {UNKNOWN_STATE} END",
+    "local_hour", "aqi", "parts_bio", "parts_env", "parts_circadian", "parts_p_stress", "temp_c", "humidity",
+)
+
+
+class _Accumulator:
+    """Count, mean, M2 (Welford) and state counts of CAV values; supports removal."""
+
+    __slots__ = ('n', 'mean', 'm2', 'states')
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.states: Dict[str, int] = dict.fromkeys(STATES, 0)
+
+    def add(self, cav: float, state: str):
+        self.n += 1
+        delta = cav - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (cav - self.mean)
+        if state in self.states:
+            self.states[state] += 1
+
+    def merge(self, other: "_Accumulator"):
+        n = self.n + other.n
+        if n == 0:
+            return
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.mean += delta * other.n / n
+        self.n = n
+        for state, count in other.states.items():
+            self.states[state] += count
+
+    def remove(self, other: "_Accumulator"):
+        """Inverse of merge(other) (expiring a time bucket)."""
+        n = self.n - other.n
+        if n <= 0:
+            self.__init__()
+            return
+        mean = (self.n * self.mean - other.n * other.mean) / n
+        delta = other.mean - mean
+        self.m2 = max(0.0, self.m2 - other.m2 - delta * delta * n * other.n / self.n)
+        self.mean = mean
+        self.n = n
+        for state, count in other.states.items():
+            self.states[state] -= count
+
+    def variance(self) -> Optional[float]:
+        """Sample variance, or None with fewer than 2 values."""
+        return self.m2 / (self.n - 1) if self.n > 1 else None
+
+
+class _Bucket:
+    """Records of one time bucket: per-hour accumulators + AQI counts."""
+
+    __slots__ = ('start', 'hours', 'records', 'bad_aqi')
+
+    def __init__(self, start: float):
+        self.start = start
+        self.hours: Dict[int, _Accumulator] = {}
+        self.records = 0
+        self.bad_aqi = 0
+
 
 class AdaptiveMemoryEngine:
     """
@@ -29,102 +106,123 @@ class AdaptiveMemoryEngine:
     based on historical CAV patterns and environmental conditions.
     """
     
-    def __init__(self, db_path: str = "data/memory.db", window_hours: int = 24):
+    # Bad-AQI ratio window for environment weighting
+    AQI_WINDOW_SECONDS = 6 * 3600
+    
+    def __init__(
+        self,
+        db_path: str = "data/memory.db",
+        window_hours: int = 24,
+        store: Optional[MemoryStore] = None,
+        bucket_s: float = 60.0,
+        buffer_size: int = 100_000,
+        tenant: str = "",
+    ):
         """
         Initialize the Adaptive Memory Engine.
         
         Args:
             db_path: Path to SQLite database for persistence
             window_hours: Rolling window size in hours (default: 24)
+            store: Persistence layer (default: MemoryStore.from_env(db_path));
+                a store passed in may be shared and is not closed by close()
+            bucket_s: Expiry granularity of the windowed statistics in seconds
+            buffer_size: Recent raw records kept in the ring buffer, 40 bytes
+                each (statistics cover the whole window regardless)
+            tenant: Device/user ID whose history this engine holds (see
+                app.memory_manager; "" for a single-tenant engine)
         """
         self.db_path = Path(db_path)
+        self.tenant = tenant
         self.window_hours = window_hours
         self.window_seconds = window_hours * 3600
+        self.bucket_s = float(bucket_s)
         
-        # In-memory rolling buffer (stores last 24h of records)
-        # Each record: (timestamp, cav, state, parts, temp_c, humidity, aqi, local_hour)
-        self.buffer: deque = deque(maxlen=10000)  # Reasonable upper bound
+        # In-memory rolling buffer (most recent records, RECORD_DTYPE rows;
+        # indexing/iteration gives record dicts)
+        self.buffer = RecordRing(buffer_size)
         
         # Hourly statistics cache (updated periodically)
         self.hourly_stats: Dict[int, Dict] = {}  # hour -> {mu, var, state_probs}
         
-        # Initialize database
-        self._init_database()
+        # Windowed accumulators, guarded by _lock
+        self._lock = threading.Lock()
+        self._reset_window()
+        
+        # Initialize database (schema is created by the store)
+        self._owns_store = store is None
+        self.store = store if store is not None else MemoryStore.from_env(str(self.db_path))
         
         # Load recent history from database
         self._load_recent_history()
     
-    def _init_database(self):
-        """Initialize SQLite database schema."""
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS cav_memory (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp REAL NOT NULL,
-                cav_raw INTEGER NOT NULL,
-                cav_smooth INTEGER NOT NULL,
-                state TEXT NOT NULL,
-                parts_bio REAL NOT NULL,
-                parts_env REAL NOT NULL,
-                parts_circadian REAL NOT NULL,
-                parts_p_stress REAL NOT NULL,
-                temp_c REAL NOT NULL,
-                humidity REAL NOT NULL,
-                aqi INTEGER NOT NULL,
-                local_hour INTEGER NOT NULL
-            )
-        """)
-        
-        # Index for efficient time-based queries
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_timestamp ON cav_memory(timestamp)
-        """)
-        
-        conn.commit()
-        conn.close()
-    
     def _load_recent_history(self):
         """Load recent history from database into memory buffer."""
         cutoff_time = datetime.now().timestamp() - self.window_seconds
         
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT timestamp, cav_smooth, state, parts_bio, parts_env, 
-                   parts_circadian, parts_p_stress, temp_c, humidity, aqi, local_hour
-            FROM cav_memory
-            WHERE timestamp >= ?
-            ORDER BY timestamp ASC
-        """, (cutoff_time,))
-        
-        for row in cursor.fetchall():
-            record = {
-                'timestamp': row[0],
-                'cav': row[1],
-                'state': row[2],
-                'parts': {
-                    'bio': row[3],
-                    'env': row[4],
-                    'circadian': row[5],
-                    'p_stress': row[6]
-                },
-                'temp_c': row[7],
-                'humidity': row[8],
-                'aqi': row[9],
-                'local_hour': row[10]
-            }
-            self.buffer.append(record)
-        
-        conn.close()
+        # One fetch, already in RECORD_DTYPE column order
+        rows = np.array(self.store.load_since(cutoff_time, columns=_RING_SELECT, tenant=self.tenant), dtype=RECORD_DTYPE)
+        self.buffer.extend(rows)
+        for timestamp, cav, state, hour, aqi in zip(
+            rows['timestamp'].tolist(), rows['cav'].tolist(), rows['state'].tolist(),
+            rows['local_hour'].tolist(), rows['aqi'].tolist(),
+        ):
+            self._add(timestamp, cav, decode_state(state), aqi, hour)
         
         # Recompute hourly statistics
         self._update_hourly_stats()
     
+    def _reset_window(self):
+        self._buckets: deque = deque()  # _Bucket, oldest first
+        self._aqi_buckets: deque = deque()  # [start, records, bad_aqi], last AQI_WINDOW_SECONDS
+        self._hour_totals: Dict[int, _Accumulator] = {h: _Accumulator() for h in range(24)}
+        self._total = _Accumulator()
+        self._aqi_records = 0
+        self._aqi_bad = 0
+        self._since_update = 0
+    
+    def _add(self, timestamp: float, cav: float, state: str, aqi: int, hour: int):
+        """Add a record to the windowed accumulators (O(1))."""
+        hour_total = self._hour_totals[hour]
+        start = timestamp - timestamp % self.bucket_s
+        bad = 1 if aqi > 100 else 0
+        with self._lock:
+            # Out-of-order timestamps join the newest bucket
+            if not self._buckets or start > self._buckets[-1].start:
+                self._buckets.append(_Bucket(start))
+            bucket = self._buckets[-1]
+            acc = bucket.hours.get(hour)
+            if acc is None:
+                acc = bucket.hours[hour] = _Accumulator()
+            acc.add(cav, state)
+            bucket.records += 1
+            bucket.bad_aqi += bad
+            hour_total.add(cav, state)
+            self._total.add(cav, state)
+            
+            if not self._aqi_buckets or start > self._aqi_buckets[-1][0]:
+                self._aqi_buckets.append([start, 0, 0])
+            self._aqi_buckets[-1][1] += 1
+            self._aqi_buckets[-1][2] += bad
+            self._aqi_records += 1
+            self._aqi_bad += bad
+    
+    def _expire(self, now: float):
+        """Drop buckets that left the 24h / 6h windows (amortized O(1))."""
+        with self._lock:
+            # A bucket expires once its newest possible record is past the cutoff
+            cutoff = now - self.window_seconds - self.bucket_s
+            while self._buckets and self._buckets[0].start < cutoff:
+                bucket = self._buckets.popleft()
+                for hour, acc in bucket.hours.items():
+                    self._hour_totals[hour].remove(acc)
+                    self._total.remove(acc)
+            cutoff = now - self.AQI_WINDOW_SECONDS - self.bucket_s
+            while self._aqi_buckets and self._aqi_buckets[0][0] < cutoff:
+                _, records, bad = self._aqi_buckets.popleft()
+                self._aqi_records -= records
+                self._aqi_bad -= bad
+    
     def record(
         self,
         cav_raw: int,
@@ -139,6 +237,9 @@ class AdaptiveMemoryEngine:
         """
         Record a new CAV response in memory.
         
+        Non-blocking: the row is queued for the store's background writer
+        (dropped from persistence, but still used in memory, if it is full).
+        
         Args:
             cav_raw: Raw CAV score
             cav_smooth: Smoothed CAV score
@@ -151,58 +252,25 @@ class AdaptiveMemoryEngine:
         """
         timestamp = datetime.now().timestamp()
         
-        # Create record
-        record = {
-            'timestamp': timestamp,
-            'cav': cav_smooth,  # Use smoothed CAV for statistics
-            'state': state,
-            'parts': parts,
-            'temp_c': temp_c,
-            'humidity': humidity,
-            'aqi': aqi,
-            'local_hour': local_hour
-        }
-        
-        # Add to in-memory buffer
-        self.buffer.append(record)
-        
-        # Persist to database
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
+        # Add to in-memory buffer and windowed statistics
+        # (smoothed CAV is used for statistics)
+        with self._lock:
+            self.buffer.append(timestamp, cav_smooth, state, parts, temp_c, humidity, aqi, local_hour)
+        self._add(timestamp, cav_smooth, state, aqi, local_hour)
         
-        cursor.execute("""
-            INSERT INTO cav_memory 
-            (timestamp, cav_raw, cav_smooth, state, parts_bio, parts_env, 
-             parts_circadian, parts_p_stress, temp_c, humidity, aqi, local_hour)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
+        # Persist to database (old records are cleaned up by the store's timer)
+        self.store.enqueue((
             timestamp, cav_raw, cav_smooth, state,
             parts.get('bio', 0.0), parts.get('env', 0.0),
             parts.get('circadian', 0.0), parts.get('p_stress', 0.0),
-            temp_c, humidity, aqi, local_hour
+            temp_c, humidity, aqi, local_hour, self.tenant
         ))
         
-        conn.commit()
-        conn.close()
-        
-        # Clean old records (keep only last 7 days)
-        self._cleanup_old_records()
-        
-        # Update hourly statistics periodically (every 10 records or hourly)
-        if len(self.buffer) % 10 == 0:
+        # Update hourly statistics periodically (every 10 records)
+        self._since_update += 1
+        if self._since_update >= 10:
             self._update_hourly_stats()
     
-    def _cleanup_old_records(self):
-        """Remove records older than 7 days from database."""
-        cutoff_time = datetime.now().timestamp() - (7 * 24 * 3600)
-        
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
-        
-        cursor.execute("DELETE FROM cav_memory WHERE timestamp < ?", (cutoff_time,))
-        conn.commit()
-        conn.close()
-    
     def _update_hourly_stats(self):
         """
         Update hourly statistics using EWMA (Exponential Weighted Moving Average).
@@ -211,27 +279,24 @@ class AdaptiveMemoryEngine:
         - cav_mu[hour]: Mean CAV (EWMA)
         - cav_var[hour]: Variance CAV (EWMA)
         - state_probs[hour]: State frequency distribution
-        """
-        # Filter to last 24 hours
-        cutoff_time = datetime.now().timestamp() - self.window_seconds
-        recent_records = [
-            r for r in self.buffer
-            if r['timestamp'] >= cutoff_time
-        ]
         
-        # Group by hour
-        hourly_data: Dict[int, List[Dict]] = {h: [] for h in range(24)}
-        for record in recent_records:
-            hour = record['local_hour']
-            hourly_data[hour].append(record)
+        Reads the windowed per-hour accumulators: O(24), whatever the
+        number of records in the window.
+        """
+        # Restrict to last 24 hours
+        self._expire(datetime.now().timestamp())
+        self._since_update = 0
         
         # Compute EWMA statistics for each hour
         alpha = 0.3  # EWMA smoothing factor
         
         for hour in range(24):
-            hour_records = hourly_data[hour]
+            with self._lock:
+                acc = self._hour_totals[hour]
+                total, current_mean, current_var = acc.n, acc.mean, acc.variance()
+                state_counts = dict(acc.states)
             
-            if not hour_records:
+            if total == 0:
                 # No data for this hour, use default or previous stats
                 if hour in self.hourly_stats:
                     # Keep previous stats
@@ -250,11 +315,7 @@ class AdaptiveMemoryEngine:
                     }
                 continue
             
-            # Extract CAV values
-            cav_values = [r['cav'] for r in hour_records]
-            
             # Compute mean (EWMA)
-            current_mean = statistics.mean(cav_values)
             if hour in self.hourly_stats:
                 prev_mean = self.hourly_stats[hour]['mu']
                 new_mean = alpha * current_mean + (1 - alpha) * prev_mean
@@ -262,7 +323,8 @@ class AdaptiveMemoryEngine:
                 new_mean = current_mean
             
             # Compute variance (EWMA)
-            current_var = statistics.variance(cav_values) if len(cav_values) > 1 else 2500000.0
+            if current_var is None:
+                current_var = 2500000.0
             if hour in self.hourly_stats:
                 prev_var = self.hourly_stats[hour]['var']
                 new_var = alpha * current_var + (1 - alpha) * prev_var
@@ -270,13 +332,6 @@ class AdaptiveMemoryEngine:
                 new_var = current_var
             
             # Compute state frequency distribution
-            state_counts = {'overload': 0, 'balanced': 0, 'focus': 0, 'restorative': 0}
-            for r in hour_records:
-                state = r['state']
-                if state in state_counts:
-                    state_counts[state] += 1
-            
-            total = len(hour_records)
             state_probs = {
                 state: count / total if total > 0 else 0.25
                 for state, count in state_counts.items()
@@ -333,17 +388,14 @@ class AdaptiveMemoryEngine:
         
         # Compute environment weight adjustment
         # If AQI consistently bad, lower environment weighting
-        # Check recent AQI patterns
-        cutoff_time = datetime.now().timestamp() - (6 * 3600)  # Last 6 hours
-        recent_records = [
-            r for r in self.buffer
-            if r['timestamp'] >= cutoff_time
-        ]
-        
-        if recent_records:
-            # Count bad AQI (AQI > 100)
-            bad_aqi_count = sum(1 for r in recent_records if r['aqi'] > 100)
-            bad_aqi_ratio = bad_aqi_count / len(recent_records)
+        # Check recent AQI patterns (last 6 hours, bucketed counter)
+        self._expire(datetime.now().timestamp())
+        with self._lock:
+            recent_count, bad_aqi_count = self._aqi_records, self._aqi_bad
+        
+        if recent_count:
+            # Bad AQI is AQI > 100
+            bad_aqi_ratio = bad_aqi_count / recent_count
             
             # If >50% of recent readings are bad AQI, reduce env weight
             if bad_aqi_ratio > 0.5:
@@ -372,14 +424,15 @@ class AdaptiveMemoryEngine:
         Returns:
             Dictionary with baselines, state probabilities, and current averages
         """
-        # Get recent records (last 24h)
-        cutoff_time = datetime.now().timestamp() - self.window_seconds
-        recent_records = [
-            r for r in self.buffer
-            if r['timestamp'] >= cutoff_time
-        ]
-        
-        if not recent_records:
+        # Recent records (last 24h)
+        self._expire(datetime.now().timestamp())
+        with self._lock:
+            total = self._total.n
+            cav_mean = self._total.mean
+            cav_var = self._total.variance()
+            state_counts = dict(self._total.states)
+        
+        if total == 0:
             return {
                 'total_records': 0,
                 'window_hours': self.window_hours,
@@ -392,18 +445,9 @@ class AdaptiveMemoryEngine:
             }
         
         # Overall statistics
-        cav_values = [r['cav'] for r in recent_records]
-        cav_mean = statistics.mean(cav_values)
-        cav_std = statistics.stdev(cav_values) if len(cav_values) > 1 else 0.0
+        cav_std = math.sqrt(cav_var) if cav_var is not None else 0.0
         
         # State distribution
-        state_counts = {'overload': 0, 'balanced': 0, 'focus': 0, 'restorative': 0}
-        for r in recent_records:
-            state = r['state']
-            if state in state_counts:
-                state_counts[state] += 1
-        
-        total = len(recent_records)
         state_distribution = {
             state: round(count / total, 3) if total > 0 else 0.0
             for state, count in state_counts.items()
@@ -423,7 +467,7 @@ class AdaptiveMemoryEngine:
                 }
         
         return {
-            'total_records': len(recent_records),
+            'total_records': total,
             'window_hours': self.window_hours,
             'hourly_stats': hourly_stats_formatted,
             'overall_stats': {
@@ -433,14 +477,35 @@ class AdaptiveMemoryEngine:
             }
         }
     
+    def history_summary(self, start: float, end: float, by_hour: bool = False) -> Dict:
+        """
+        Statistics of [start, end) from the database rollups (any horizon).
+        
+        With by_hour, one entry per local hour, e.g. a 30-day hour-of-day
+        baseline; see MemoryStore.rollup_summary.
+        """
+        return self.store.rollup_summary(start, end, tenant=self.tenant, by_hour=by_hour)
+    
+    def history_series(self, start: float, end: float, resolution: int) -> List[Dict]:
+        """Per-bucket statistics of [start, end) at a rollup resolution in seconds (60, 3600, 86400)."""
+        return self.store.rollup_series(start, end, resolution, tenant=self.tenant)
+    
     def clear(self):
         """Clear all memory (buffer and database)."""
         self.buffer.clear()
         self.hourly_stats.clear()
-        
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM cav_memory")
-        conn.commit()
-        conn.close()
+        with self._lock:
+            self._reset_window()
+        self.store.clear(self.tenant)
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until recorded responses are written to the database."""
+        return self.store.flush(timeout)
+    
+    def close(self):
+        """Write pending records and stop the background writer (of an own store)."""
+        if self._owns_store:
+            self.store.close()
+        else:
+            self.store.flush()
 
@@ -0,0 +1,141 @@
+"""
+Bounded executor with admission control for engine calls.
+
+CPU-bound scoring (NumPy, LightGBM, torch) must not run on the asyncio event
+loop, and must not queue without bound either: once the backlog is longer than
+clients are willing to wait, every request times out. INFERENCE runs engine
+calls on a dedicated thread pool and rejects new work with Overloaded when
+`workers + max_queue` calls are already pending; the HTTP layer turns that
+into 429 + Retry-After and the gRPC server into RESOURCE_EXHAUSTED.
+
+Configured with EDON_INFERENCE_THREADS (default: CPU count) and
+EDON_INFERENCE_MAX_QUEUE (default 64). Queue depth, in-flight calls, wait and
+service times are exposed via stats() on /health and /metrics.
+"""
+
+import asyncio
+import math
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from app.latency import observe_stage
+
+
+class Overloaded(Exception):
+    """Raised when the executor's queue is full."""
+
+    def __init__(self, name: str, retry_after_s: int):
+        super().__init__(f"{name} queue full; retry after {retry_after_s}s")
+        self.retry_after_s = retry_after_s
+
+
+class BoundedExecutor:
+    """
+    Thread pool that refuses work instead of queueing without bound.
+
+    Args:
+        workers: Threads running engine calls
+        max_queue: Calls allowed to wait for a thread before rejecting
+        name: Thread name prefix / label in errors and stats
+
+    Example:
+        >>> result = await INFERENCE.run(score, windows)   # may raise Overloaded
+    """
+
+    # Smoothing factor for the wait/service time averages
+    _EMA = 0.1
+
+    def __init__(self, workers: int, max_queue: int = 64, name: str = "inference"):
+        self.workers = max(1, int(workers))
+        self.max_queue = max(0, int(max_queue))
+        self.name = name
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._pending = 0      # queued + running
+        self._running = 0
+        self._rejected = 0
+        self._completed = 0
+        self._wait_ms = 0.0    # EMA of time spent queued
+        self._service_ms = 0.0  # EMA of time spent running
+        self._last_wait_ms = 0.0
+
+    @classmethod
+    def from_env(cls, name: str = "inference") -> "BoundedExecutor":
+        return cls(
+            workers=int(os.getenv("EDON_INFERENCE_THREADS", str(os.cpu_count() or 4))),
+            max_queue=int(os.getenv("EDON_INFERENCE_MAX_QUEUE", "64")),
+            name=name,
+        )
+
+    def retry_after_s(self) -> int:
+        """Seconds until the current backlog should have drained (at least 1)."""
+        with self._lock:
+            backlog = self._pending
+            service_s = self._service_ms / 1000.0
+        return max(1, math.ceil(backlog * service_s / self.workers))
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """Queue fn(*args, **kwargs); raises Overloaded if the queue is full."""
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                self._rejected += 1
+                full = True
+            else:
+                self._pending += 1
+                full = False
+        if full:
+            raise Overloaded(self.name, self.retry_after_s())
+
+        enqueued = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            with self._lock:
+                self._running += 1
+                self._last_wait_ms = (started - enqueued) * 1000.0
+                self._wait_ms += self._EMA * (self._last_wait_ms - self._wait_ms)
+            observe_stage("queue", started - enqueued)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                service_ms = (time.perf_counter() - started) * 1000.0
+                with self._lock:
+                    self._running -= 1
+                    self._pending -= 1
+                    self._completed += 1
+                    self._service_ms += self._EMA * (service_ms - self._service_ms)
+
+        try:
+            return self._pool.submit(task)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Await fn(*args, **kwargs) on the pool without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._running,
+                "queue_depth": self._pending - self._running,
+                "rejected": self._rejected,
+                "completed": self._completed,
+                "wait_ms_avg": round(self._wait_ms, 3),
+                "wait_ms_last": round(self._last_wait_ms, 3),
+                "service_ms_avg": round(self._service_ms, 3),
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+
+# Shared by all HTTP/WebSocket routes that call an engine
+INFERENCE = BoundedExecutor.from_env()
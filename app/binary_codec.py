@@ -0,0 +1,144 @@
+"""
+Compact binary frames for the batch endpoints.
+
+With JSON, most of a batch request's CPU goes into turning 6 x 240 floats
+per window into Python float objects and back. A frame carries those numbers
+as raw little-endian float32 arrays, which np.frombuffer reads with no copy
+and no per-element objects. The small, irregular fields (session id, states,
+errors, metadata) stay JSON:
+
+    offset  size  field
+    0       4     magic b"EDNF"
+    4       1     version (1)
+    5       1     number of arrays (A)
+    6       2     reserved (0)
+    8       4     length M of the JSON metadata in bytes
+    12      M     JSON metadata (UTF-8 object)
+    ...           A arrays, each:
+                    u8 name length, name (ASCII), u8 ndim, u32 x ndim shape,
+                    zero padding to a 4-byte offset, float32 data (C order)
+
+All integers are unsigned little-endian. Requests are sent as frames with
+Content-Type: application/x-edon-frame. The response is a frame when the
+Accept header names that media type.
+"""
+
+import json
+import struct
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import numpy as np
+
+MEDIA_TYPE = "application/x-edon-frame"
+MAGIC = b"EDNF"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sBBHI")
+_F32 = np.dtype("<f4")
+_MAX_NDIM = 8
+
+
+class FrameError(ValueError):
+    """Raised for malformed or truncated frames."""
+
+
+def encode_frame(meta: Mapping[str, Any], arrays: Optional[Mapping[str, np.ndarray]] = None) -> bytes:
+    """
+    Serialize JSON metadata plus named arrays (cast to float32) into a frame.
+
+    Example:
+        >>> body = encode_frame({"session_id": "dev-1"}, {"windows": raw})  # raw: (N, 6, 240)
+    """
+    arrays = arrays or {}
+    if len(arrays) > 255:
+        raise FrameError("a frame holds at most 255 arrays")
+    meta_bytes = json.dumps(meta, separators=(",", ":")).encode("utf-8")
+    parts = [_HEADER.pack(MAGIC, VERSION, len(arrays), 0, len(meta_bytes)), meta_bytes]
+    offset = _HEADER.size + len(meta_bytes)
+    for name, value in arrays.items():
+        data = np.ascontiguousarray(value, dtype=_F32)
+        name_bytes = name.encode("ascii")
+        if not name_bytes or len(name_bytes) > 255 or data.ndim > _MAX_NDIM:
+            raise FrameError(f"array {name!r}: name must be 1-255 bytes and ndim <= {_MAX_NDIM}")
+        head = struct.pack(f"<B{len(name_bytes)}sB{data.ndim}I", len(name_bytes), name_bytes, data.ndim, *data.shape)
+        offset += len(head)
+        pad = -offset % 4
+        parts += [head, b"\0" * pad, data.tobytes()]
+        offset += pad + data.nbytes
+    return b"".join(parts)
+
+
+def decode_frame(buf: bytes) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """
+    Parse a frame into (meta, arrays).
+
+    The arrays are read-only float32 views into `buf` (no copy); copy them
+    before writing.
+    """
+    view = memoryview(buf)
+    if len(view) < _HEADER.size:
+        raise FrameError("truncated header")
+    magic, version, n_arrays, _, meta_len = _HEADER.unpack_from(view, 0)
+    if magic != MAGIC:
+        raise FrameError("bad magic (not an EDON frame)")
+    if version != VERSION:
+        raise FrameError(f"unsupported frame version {version}")
+
+    offset = _HEADER.size
+    if offset + meta_len > len(view):
+        raise FrameError("truncated metadata")
+    try:
+        meta = json.loads(bytes(view[offset:offset + meta_len])) if meta_len else {}
+    except ValueError as e:
+        raise FrameError(f"invalid metadata JSON: {e}")
+    if not isinstance(meta, dict):
+        raise FrameError("metadata must be a JSON object")
+    offset += meta_len
+
+    arrays: Dict[str, np.ndarray] = {}
+    try:
+        for _ in range(n_arrays):
+            (name_len,) = struct.unpack_from("<B", view, offset)
+            name = bytes(view[offset + 1:offset + 1 + name_len]).decode("ascii")
+            offset += 1 + name_len
+            (ndim,) = struct.unpack_from("<B", view, offset)
+            if ndim > _MAX_NDIM:
+                raise FrameError(f"array {name!r}: ndim {ndim} > {_MAX_NDIM}")
+            shape = struct.unpack_from(f"<{ndim}I", view, offset + 1)
+            offset += 1 + 4 * ndim
+            offset += -offset % 4
+            count = int(np.prod(shape, dtype=np.int64))
+            if offset + count * _F32.itemsize > len(view):
+                raise FrameError(f"array {name!r}: truncated data")
+            arrays[name] = np.frombuffer(buf, dtype=_F32, count=count, offset=offset).reshape(shape)
+            offset += count * _F32.itemsize
+    except (struct.error, UnicodeDecodeError) as e:
+        raise FrameError(f"malformed array header: {e}")
+    if offset != len(view):
+        raise FrameError(f"{len(view) - offset} trailing bytes")
+    return meta, arrays
+
+
+def _media_ranges(header: Optional[str]):
+    """Yield (media type, q) pairs from a Content-Type/Accept header."""
+    for item in (header or "").split(","):
+        fields = [f.strip() for f in item.split(";")]
+        q = 1.0
+        for param in fields[1:]:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        yield fields[0].lower(), q
+
+
+def is_frame(content_type: Optional[str]) -> bool:
+    """True if a Content-Type header announces a frame body."""
+    return any(media == MEDIA_TYPE for media, _ in _media_ranges(content_type))
+
+
+def wants_frame(accept: Optional[str]) -> bool:
+    """True if an Accept header asks for frames (explicitly, with q > 0)."""
+    return any(media == MEDIA_TYPE and q > 0 for media, q in _media_ranges(accept))
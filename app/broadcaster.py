@@ -0,0 +1,186 @@
+"""
+Publish-on-change fan-out for WebSocket subscribers.
+
+A Broadcaster serializes each published event once and hands the same text
+to every subscriber through a bounded per-subscriber queue, instead of every
+connection polling and serializing on its own timer. Publishers only publish
+when their event changes (app.routes.streaming drops repeated states), so
+frames track changes rather than request rate. A subscriber whose queue
+is full (it reads slower than events arrive) is dropped: its queue is
+replaced by a single None, and the route closes the connection.
+
+Events may be published from any thread (sync routes run in the threadpool);
+delivery happens on each subscriber's event loop. When no event has been
+delivered for `heartbeat_s`, one heartbeat frame is rendered and fanned out,
+so idle subscribers cost nothing between heartbeats.
+
+Environment:
+    EDON_WS_QUEUE: Frames buffered per subscriber before it is dropped (default 16)
+    EDON_WS_HEARTBEAT_S: Idle time before a heartbeat is sent (default 1.0)
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Set
+
+
+class Subscriber:
+    """One connection's view of a Broadcaster: await get() for the next frame."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, queue_size: int):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+        self.dropped = False
+
+    async def get(self) -> Optional[str]:
+        """The next serialized frame, or None once this subscriber was dropped."""
+        return await self.queue.get()
+
+    def offer(self, text: str) -> bool:
+        """Queue a frame (on the subscriber's loop); False drops the subscriber."""
+        try:
+            self.queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            self.dropped = True
+            return False
+
+
+class _Channel:
+    """Subscribers on one event loop, plus that loop's heartbeat task."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.subscribers: Set[Subscriber] = set()
+        self.last_sent = time.monotonic()
+        self.ticker: Optional[asyncio.Task] = None
+
+
+class Broadcaster:
+    """
+    Serialize-once fan-out of events to WebSocket subscribers.
+
+    Args:
+        name: Used in stats and task names
+        heartbeat: Renders the heartbeat payload (called once per idle period)
+        queue_size: Frames buffered per subscriber before it is dropped
+        heartbeat_s: Idle time before a heartbeat is sent (<= 0 disables heartbeats)
+
+    Usage:
+        >>> sub = STATE.subscribe()          # on the connection's event loop
+        >>> text = await sub.get()           # None: dropped as a slow consumer
+        >>> STATE.unsubscribe(sub)
+        >>> STATE.publish({"state": "focus"})  # from any thread
+    """
+
+    def __init__(
+        self,
+        name: str,
+        heartbeat: Callable[[], Dict[str, Any]],
+        queue_size: int = 16,
+        heartbeat_s: float = 1.0,
+    ):
+        self.name = name
+        self.heartbeat = heartbeat
+        self.queue_size = int(queue_size)
+        self.heartbeat_s = float(heartbeat_s)
+        self._channels: Dict[asyncio.AbstractEventLoop, _Channel] = {}
+        self._lock = threading.Lock()
+        self.published = 0
+        self.heartbeats = 0
+        self.dropped = 0
+
+    @classmethod
+    def from_env(cls, name: str, heartbeat: Callable[[], Dict[str, Any]]) -> "Broadcaster":
+        return cls(
+            name,
+            heartbeat,
+            queue_size=int(os.getenv("EDON_WS_QUEUE", "16")),
+            heartbeat_s=float(os.getenv("EDON_WS_HEARTBEAT_S", "1.0")),
+        )
+
+    def subscribe(self, first: Optional[Dict[str, Any]] = None) -> Subscriber:
+        """Register a subscriber on the running loop; `first` is queued for it alone."""
+        loop = asyncio.get_running_loop()
+        sub = Subscriber(loop, self.queue_size)
+        if first is not None:
+            sub.offer(json.dumps(first))
+        with self._lock:
+            channel = self._channels.get(loop)
+            if channel is None:
+                channel = self._channels[loop] = _Channel(loop)
+            channel.subscribers.add(sub)
+            if self.heartbeat_s > 0 and (channel.ticker is None or channel.ticker.done()):
+                channel.ticker = loop.create_task(self._tick(channel), name=f"{self.name}-heartbeat")
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        with self._lock:
+            channel = self._channels.get(sub.loop)
+            if channel is None:
+                return
+            channel.subscribers.discard(sub)
+            if not channel.subscribers:
+                del self._channels[sub.loop]
+                if channel.ticker is not None:
+                    channel.ticker.cancel()
+
+    def publish(self, payload: Dict[str, Any]) -> int:
+        """
+        Serialize `payload` once and deliver it to every subscriber (thread-safe).
+
+        Returns:
+            Number of subscribers it was handed to (0 skips serialization)
+        """
+        with self._lock:
+            channels = [c for c in self._channels.values() if c.subscribers]
+            count = sum(len(c.subscribers) for c in channels)
+        if not channels:
+            return 0
+        text = json.dumps(payload)
+        self.published += 1
+        for channel in channels:
+            try:
+                channel.loop.call_soon_threadsafe(self._deliver, channel, text)
+            except RuntimeError:
+                # Loop closed under us (test clients, shutdown): forget its subscribers
+                with self._lock:
+                    self._channels.pop(channel.loop, None)
+        return count
+
+    def _deliver(self, channel: _Channel, text: str) -> None:
+        # On channel.loop; the set is only mutated under the lock
+        with self._lock:
+            subscribers = list(channel.subscribers)
+        channel.last_sent = time.monotonic()
+        slow = [sub for sub in subscribers if not sub.offer(text)]
+        if slow:
+            with self._lock:
+                channel.subscribers.difference_update(slow)
+                self.dropped += len(slow)
+
+    async def _tick(self, channel: _Channel) -> None:
+        """Send a heartbeat whenever the channel has been idle for heartbeat_s."""
+        while True:
+            wait = channel.last_sent + self.heartbeat_s - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            self.heartbeats += 1
+            self._deliver(channel, json.dumps(self.heartbeat()))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            subscribers = sum(len(c.subscribers) for c in self._channels.values())
+        return {
+            "subscribers": subscribers,
+            "published": self.published,
+            "heartbeats": self.heartbeats,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,534 @@
+"""Compiled tree-ensemble evaluator for the v3.2 CAV model.
+
+Flattens a trained LightGBM or XGBoost classifier into contiguous NumPy node
+arrays and evaluates every tree for every row at once, one tree level per
+step. The StandardScaler is folded into the split thresholds, so serving
+needs neither sklearn nor lightgbm/xgboost - only NumPy.
+
+Export (offline, needs the training libraries):
+    compiled = compile_model(model, scaler)
+    compiled.save("cav_state_v3_2.compiled.npz")
+
+Serve:
+    compiled = CompiledTreeModel.load("cav_state_v3_2.compiled.npz")
+    proba = compiled.predict_proba(X_raw)   # X in schema feature order, unscaled
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+COMPILED_MODEL_NAME = "cav_state_v3_2.compiled.npz"
+FORMAT_VERSION = 1
+
+# LightGBM treats |x| <= kZeroThreshold (1e-35f) as zero for missing_type=Zero splits
+_LGBM_ZERO_THRESHOLD = float(np.float32(1e-35))
+_SIGN_BIT = np.int64(-0x8000000000000000)
+
+_MISSING_NONE, _MISSING_ZERO, _MISSING_NAN = 0, 1, 2
+
+
+class CompiledTreeModel:
+    """
+    Vectorized evaluator over flattened tree arrays.
+
+    Mirrors the predict_proba/classes_ interface of the sklearn wrappers so it
+    can stand in for the joblib model in CAVEngine. Inputs are raw (unscaled)
+    features; non-finite values are replaced by the scaler mean, which matches
+    the engine's scale -> nan_to_num(0) -> model path.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]):
+        self.feature = arrays["feature"].astype(np.int32)
+        self.threshold = arrays["threshold"].astype(np.float64)
+        self.left = arrays["left"].astype(np.int32)
+        self.right = arrays["right"].astype(np.int32)
+        self.default_left = arrays["default_left"].astype(bool)
+        self.missing_type = arrays["missing_type"].astype(np.int8)
+        self.zero_lo = arrays["zero_lo"].astype(np.float64)
+        self.zero_hi = arrays["zero_hi"].astype(np.float64)
+        self.value = arrays["value"].astype(np.float64)
+        self.roots = arrays["roots"].astype(np.int32)
+        self.tree_class = arrays["tree_class"].astype(np.int32)
+        self.base_margin = arrays["base_margin"].astype(np.float64)
+        self.fill = arrays["fill"].astype(np.float64)
+        self.classes_ = np.asarray(arrays["classes"])
+
+        self.meta = dict(meta)
+        self.objective: str = meta["objective"]  # "softmax" | "sigmoid"
+        self.sigmoid_coef = float(meta.get("sigmoid_coef", 1.0))
+        self.max_depth = int(meta["max_depth"])
+        self.n_features = int(meta["n_features"])
+        self.n_classes = len(self.classes_)
+
+        n_groups = int(self.base_margin.shape[0])
+        self._has_zero_missing = bool((self.missing_type == _MISSING_ZERO).any())
+        self._has_nan_missing = bool((self.missing_type == _MISSING_NAN).any())
+        self._class_onehot = np.zeros((len(self.roots), n_groups), dtype=np.float64)
+        self._class_onehot[np.arange(len(self.roots)), self.tree_class] = 1.0
+        self._bitmask = self._build_bitmasks(n_groups)
+
+    # ------------------------------------------------------------------ eval
+
+    def _build_bitmasks(self, n_groups: int) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Precompute QuickScorer-style leaf bitmasks (trees with <= 64 leaves).
+
+        Leaves of each tree are numbered left to right. A split that sends a row
+        right clears the bits of its left subtree; the exit leaf is then the
+        lowest bit left set after AND-ing the masks of all right-going splits.
+        That evaluates every split with flat array ops and no per-level loop.
+        """
+        feature, left, right = self.feature, self.left, self.right
+        internal_nodes: List[int] = []
+        masks: List[int] = []
+        tree_start: List[int] = []
+        tree_index: List[int] = []
+        leaf_value: List[float] = []
+        leaf_offset: List[int] = []
+        const = np.zeros(n_groups, dtype=np.float64)
+
+        for t, root in enumerate(self.roots):
+            if feature[root] < 0:  # single-leaf tree: constant contribution
+                const[self.tree_class[t]] += self.value[root]
+                continue
+            # Iterative in-order walk assigning leaf ranks and subtree leaf ranges
+            ranges: Dict[int, Tuple[int, int]] = {}
+            tree_nodes: List[int] = []
+            offset = len(leaf_value)
+            stack: List[Tuple[int, bool]] = [(int(root), False)]
+            while stack:
+                node, expanded = stack.pop()
+                if feature[node] < 0:
+                    rank = len(leaf_value) - offset
+                    ranges[node] = (rank, rank)
+                    leaf_value.append(float(self.value[node]))
+                elif expanded:
+                    ranges[node] = (ranges[left[node]][0], ranges[right[node]][1])
+                else:
+                    tree_nodes.append(node)
+                    stack.append((node, True))
+                    stack.append((int(right[node]), False))
+                    stack.append((int(left[node]), False))
+            if len(leaf_value) - offset > 64:
+                return None
+            tree_start.append(len(internal_nodes))
+            tree_index.append(t)
+            leaf_offset.append(offset)
+            for node in tree_nodes:
+                lo, hi = ranges[left[node]]
+                span = ((1 << (hi - lo + 1)) - 1) << lo
+                masks.append(~span & 0xFFFFFFFFFFFFFFFF)
+                internal_nodes.append(node)
+
+        nodes = np.asarray(internal_nodes, dtype=np.intp)
+        return {
+            "feature": feature[nodes].astype(np.intp),
+            "threshold": self.threshold[nodes],
+            "mask": np.asarray(masks, dtype=np.uint64),
+            "default_right": ~self.default_left[nodes],
+            "missing_type": self.missing_type[nodes],
+            "zero_lo": self.zero_lo[nodes],
+            "zero_hi": self.zero_hi[nodes],
+            "tree_start": np.asarray(tree_start, dtype=np.intp),
+            "leaf_offset": np.asarray(leaf_offset, dtype=np.intp),
+            "leaf_value": np.asarray(leaf_value, dtype=np.float64),
+            "onehot": self._class_onehot[np.asarray(tree_index, dtype=np.intp)],
+            "const": const,
+        }
+
+    def _go_right(self, x, threshold, missing_type, default_right, zero_lo, zero_hi):
+        go_right = x > threshold
+        if self._has_zero_missing or self._has_nan_missing:
+            isnan = np.isnan(x)
+            missing = (missing_type == _MISSING_NAN) & isnan
+            if self._has_zero_missing:
+                missing |= (missing_type == _MISSING_ZERO) & (
+                    isnan | ((x > zero_lo) & (x <= zero_hi))
+                )
+            go_right = np.where(missing, default_right, go_right)
+        return go_right
+
+    def _margin_bitmask(self, X: np.ndarray) -> np.ndarray:
+        q = self._bitmask
+        out = np.empty((X.shape[0], self.base_margin.shape[0]), dtype=np.float64)
+        if not len(q["tree_start"]):
+            out[:] = q["const"]
+            return out
+        ones = np.uint64(0xFFFFFFFFFFFFFFFF)
+        # Bound the (rows x splits) temporaries to a few MB
+        chunk = max(1, 262144 // max(1, len(q["mask"])))
+        for s in range(0, X.shape[0], chunk):
+            x = X[s:s + chunk, q["feature"]]
+            go_right = self._go_right(
+                x, q["threshold"], q["missing_type"], q["default_right"], q["zero_lo"], q["zero_hi"]
+            )
+            acc = np.bitwise_and.reduceat(np.where(go_right, q["mask"], ones), q["tree_start"], axis=1)
+            lowest = acc & (~acc + np.uint64(1))
+            rank = np.frexp(lowest.astype(np.float64))[1] - 1
+            leaves = q["leaf_value"][q["leaf_offset"] + rank]
+            out[s:s + chunk] = leaves @ q["onehot"] + q["const"]
+        return out
+
+    def _margin_traverse(self, X: np.ndarray) -> np.ndarray:
+        """Level-by-level traversal; used when a tree has more than 64 leaves."""
+        n = X.shape[0]
+        idx = np.broadcast_to(self.roots, (n, len(self.roots))).copy()
+        rows = np.arange(n)[:, None]
+        for _ in range(self.max_depth):
+            f = self.feature[idx]
+            internal = f >= 0
+            if not internal.any():
+                break
+            x = X[rows, np.where(internal, f, 0)]
+            go_right = self._go_right(
+                x,
+                self.threshold[idx],
+                self.missing_type[idx],
+                ~self.default_left[idx],
+                self.zero_lo[idx],
+                self.zero_hi[idx],
+            )
+            # Leaves point at themselves, so finished trees stay put
+            idx = np.where(go_right, self.right[idx], self.left[idx])
+        return self.value[idx] @ self._class_onehot
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        """Raw margins, shape (N, n_groups) (1 group for binary models)."""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {X.shape[1]}")
+        X = np.where(np.isfinite(X), X, self.fill)
+        if self._bitmask is not None:
+            return self._margin_bitmask(X) + self.base_margin
+        return self._margin_traverse(X) + self.base_margin
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Class probabilities, columns ordered as classes_."""
+        margin = self.decision_function(X)
+        if self.objective == "sigmoid":
+            p = 1.0 / (1.0 + np.exp(-self.sigmoid_coef * margin[:, 0]))
+            return np.column_stack([1.0 - p, p])
+        margin = margin - margin.max(axis=1, keepdims=True)
+        e = np.exp(margin)
+        return e / e.sum(axis=1, keepdims=True)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    # ------------------------------------------------------------------- I/O
+
+    def _arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "left": self.left,
+            "right": self.right,
+            "default_left": self.default_left,
+            "missing_type": self.missing_type,
+            "zero_lo": self.zero_lo,
+            "zero_hi": self.zero_hi,
+            "value": self.value,
+            "roots": self.roots,
+            "tree_class": self.tree_class,
+            "base_margin": self.base_margin,
+            "fill": self.fill,
+            "classes": self.classes_,
+        }
+
+    def save(self, path: Union[str, Path]) -> Path:
+        path = Path(path)
+        meta = json.dumps(self.meta)
+        with open(path, "wb") as f:
+            np.savez(f, meta=np.array(meta), **self._arrays())
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "CompiledTreeModel":
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {k: data[k] for k in data.files if k != "meta"}
+            meta = json.loads(str(data["meta"]))
+        if int(meta.get("format_version", 0)) != FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported compiled model format {meta.get('format_version')} in {path}"
+            )
+        return cls(arrays, meta)
+
+
+# ---------------------------------------------------------------------- export
+
+
+class _Builder:
+    """Accumulates nodes from several trees into flat arrays."""
+
+    def __init__(self):
+        self.feature: List[int] = []
+        self.threshold: List[float] = []
+        self.left: List[int] = []
+        self.right: List[int] = []
+        self.default_left: List[bool] = []
+        self.missing_type: List[int] = []
+        self.value: List[float] = []
+        self.roots: List[int] = []
+        self.tree_class: List[int] = []
+        self.max_depth = 0
+
+    def node(self) -> int:
+        self.feature.append(-1)
+        self.threshold.append(0.0)
+        self.left.append(len(self.left))
+        self.right.append(len(self.right))
+        self.default_left.append(True)
+        self.missing_type.append(_MISSING_NONE)
+        self.value.append(0.0)
+        return len(self.feature) - 1
+
+
+def _to_ordered(x: np.ndarray) -> np.ndarray:
+    """Map float64 to int64 so that integer order equals float order."""
+    i = np.ascontiguousarray(x, dtype=np.float64).view(np.int64)
+    return np.where(i >= 0, i, -(i & ~_SIGN_BIT))
+
+
+def _from_ordered(o: np.ndarray) -> np.ndarray:
+    i = np.where(o >= 0, o, (-o) | _SIGN_BIT)
+    return np.ascontiguousarray(i, dtype=np.int64).view(np.float64)
+
+
+def _fold_cut(pred, guess: np.ndarray) -> np.ndarray:
+    """
+    Largest raw x with pred(x) True, for a predicate monotone decreasing in x.
+
+    Used to fold the scaler into thresholds exactly: ``x <= cut`` then agrees
+    with the model's test on the scaled value bit for bit, including rounding.
+    """
+    guess = np.asarray(guess, dtype=np.float64)
+    delta = np.maximum(np.abs(guess), 1.0) * 1e-6
+    lo, hi = guess - delta, guess + delta
+    for _ in range(64):
+        lo_bad = ~pred(lo)
+        hi_bad = pred(hi)
+        if not (lo_bad.any() or hi_bad.any()):
+            break
+        delta = delta * 16.0
+        lo = np.where(lo_bad, guess - delta, lo)
+        hi = np.where(hi_bad, guess + delta, hi)
+    lo_o, hi_o = _to_ordered(lo), _to_ordered(hi)
+    while True:
+        open_ = hi_o - lo_o > 1
+        if not open_.any():
+            break
+        mid_o = lo_o + (hi_o - lo_o) // 2
+        ok = pred(_from_ordered(mid_o))
+        lo_o = np.where(open_ & ok, mid_o, lo_o)
+        hi_o = np.where(open_ & ~ok, mid_o, hi_o)
+    return _from_ordered(lo_o)
+
+
+def _scaler_params(scaler, n_features: int) -> Tuple[np.ndarray, np.ndarray]:
+    mean = getattr(scaler, "mean_", None) if scaler is not None else None
+    scale = getattr(scaler, "scale_", None) if scaler is not None else None
+    mean = np.zeros(n_features) if mean is None else np.asarray(mean, dtype=np.float64)
+    scale = np.ones(n_features) if scale is None else np.asarray(scale, dtype=np.float64)
+    return mean, scale
+
+
+def _lgbm_trees(b: _Builder, dump: Dict[str, Any]) -> Tuple[int, str, float]:
+    objective = str(dump.get("objective", ""))
+    n_groups = int(dump.get("num_tree_per_iteration", dump.get("num_class", 1)))
+    if objective.startswith("multiclassova"):
+        raise ValueError("multiclassova objective is not supported")
+    if objective.startswith("binary"):
+        kind, coef = "sigmoid", 1.0
+        for tok in objective.split():
+            if tok.startswith("sigmoid:"):
+                coef = float(tok.split(":", 1)[1])
+    elif objective.startswith("multiclass"):
+        kind, coef = "softmax", 1.0
+    else:
+        raise ValueError(f"Unsupported LightGBM objective: {objective!r}")
+
+    missing_codes = {"None": _MISSING_NONE, "Zero": _MISSING_ZERO, "NaN": _MISSING_NAN}
+
+    for t, info in enumerate(dump["tree_info"]):
+        b.tree_class.append(t % n_groups)
+        stack = [(info["tree_structure"], b.node(), 0)]
+        b.roots.append(stack[0][1])
+        while stack:
+            src, i, depth = stack.pop()
+            b.max_depth = max(b.max_depth, depth)
+            if "leaf_value" in src:
+                b.value[i] = float(src["leaf_value"])
+                continue
+            if src.get("decision_type", "<=") != "<=":
+                raise ValueError("Categorical splits are not supported by the compiled evaluator")
+            b.feature[i] = int(src["split_feature"])
+            b.threshold[i] = float(src["threshold"])
+            b.default_left[i] = bool(src.get("default_left", True))
+            b.missing_type[i] = missing_codes[str(src.get("missing_type", "None"))]
+            left, right = b.node(), b.node()
+            b.left[i], b.right[i] = left, right
+            stack.append((src["left_child"], left, depth + 1))
+            stack.append((src["right_child"], right, depth + 1))
+    return n_groups, kind, coef
+
+
+def _xgb_trees(b: _Builder, booster) -> Tuple[int, str, float]:
+    config = json.loads(booster.save_config())
+    objective = config["learner"]["objective"]["name"]
+    model = json.loads(booster.save_raw("json"))
+    tree_info = model["learner"]["gradient_booster"]["model"]["tree_info"]
+    if objective == "binary:logistic":
+        kind = "sigmoid"
+    elif objective in ("multi:softprob", "multi:softmax"):
+        kind = "softmax"
+    else:
+        raise ValueError(f"Unsupported XGBoost objective: {objective!r}")
+
+    names = booster.feature_names
+    fmap = {name: j for j, name in enumerate(names)} if names else {}
+
+    def feature_index(split: str) -> int:
+        if split in fmap:
+            return fmap[split]
+        return int(split.lstrip("f"))
+
+    for t, tree_json in enumerate(booster.get_dump(dump_format="json")):
+        b.tree_class.append(int(tree_info[t]))
+        root_src = json.loads(tree_json)
+        stack = [(root_src, b.node(), 0)]
+        b.roots.append(stack[0][1])
+        while stack:
+            src, i, depth = stack.pop()
+            b.max_depth = max(b.max_depth, depth)
+            if "leaf" in src:
+                b.value[i] = float(src["leaf"])
+                continue
+            children = {c["nodeid"]: c for c in src["children"]}
+            b.feature[i] = feature_index(src["split"])
+            b.threshold[i] = float(src["split_condition"])
+            b.default_left[i] = src["missing"] == src["yes"]
+            b.missing_type[i] = _MISSING_NAN
+            left, right = b.node(), b.node()
+            b.left[i], b.right[i] = left, right
+            stack.append((children[src["yes"]], left, depth + 1))
+            stack.append((children[src["no"]], right, depth + 1))
+    n_groups = max(b.tree_class) + 1 if b.tree_class else 1
+    return n_groups, kind, 1.0
+
+
+def compile_model(model, scaler=None, n_features: Optional[int] = None) -> CompiledTreeModel:
+    """
+    Flatten a fitted LightGBM/XGBoost classifier (+ optional StandardScaler).
+
+    Args:
+        model: LGBMClassifier, XGBClassifier, or their raw Booster objects
+        scaler: StandardScaler applied before the model at training time
+        n_features: Feature count (inferred from the model when omitted)
+
+    Returns:
+        CompiledTreeModel whose predict_proba matches
+        model.predict_proba(nan_to_num(scaler.transform(X))) up to float
+        rounding at split boundaries.
+    """
+    b = _Builder()
+    xgb_rounding = False
+    margin_fn = None
+
+    lgbm_booster = getattr(model, "booster_", None)
+    if lgbm_booster is None and type(model).__module__.startswith("lightgbm"):
+        lgbm_booster = model
+    xgb_booster = None
+    if lgbm_booster is None:
+        get_booster = getattr(model, "get_booster", None)
+        xgb_booster = get_booster() if get_booster else model
+
+    if lgbm_booster is not None and hasattr(lgbm_booster, "dump_model"):
+        dump = lgbm_booster.dump_model()
+        n_groups, kind, coef = _lgbm_trees(b, dump)
+        n_features = n_features or int(dump.get("max_feature_idx", -1)) + 1
+        margin_fn = lambda Z: np.asarray(lgbm_booster.predict(Z, raw_score=True)).reshape(len(Z), -1)
+    elif hasattr(xgb_booster, "get_dump"):
+        import xgboost as xgb
+
+        n_groups, kind, coef = _xgb_trees(b, xgb_booster)
+        xgb_rounding = True
+        n_features = n_features or int(xgb_booster.num_features())
+        margin_fn = lambda Z: np.asarray(
+            xgb_booster.predict(xgb.DMatrix(Z, feature_names=xgb_booster.feature_names), output_margin=True)
+        ).reshape(len(Z), -1)
+    else:
+        raise TypeError(f"Unsupported model type: {type(model).__name__}")
+
+    mean, scale = _scaler_params(scaler, n_features)
+    feature = np.asarray(b.feature, dtype=np.int32)
+    split = feature >= 0
+    f_safe = np.where(split, feature, 0)
+    m, sc = mean[f_safe], scale[f_safe]
+    raw_threshold = np.asarray(b.threshold, dtype=np.float64)
+
+    def scaled(x):
+        # Same arithmetic as StandardScaler.transform
+        z = (x - m) / sc
+        return z.astype(np.float32) if xgb_rounding else z
+
+    # Fold the scaler: (x - mean) / scale <= t  <=>  x <= cut
+    if xgb_rounding:  # XGBoost: float32(z) < float32(t)
+        t32 = raw_threshold.astype(np.float32)
+        threshold = _fold_cut(lambda x: scaled(x) < t32, raw_threshold * sc + m)
+    else:  # LightGBM: z <= t in double precision
+        threshold = _fold_cut(lambda x: scaled(x) <= raw_threshold, raw_threshold * sc + m)
+    zero_hi = _fold_cut(lambda x: scaled(x) <= _LGBM_ZERO_THRESHOLD, m)
+    zero_lo = _fold_cut(lambda x: scaled(x) < -_LGBM_ZERO_THRESHOLD, m)
+    threshold = np.where(split, threshold, 0.0)
+
+    classes = getattr(model, "classes_", None)
+    if classes is None:
+        classes = np.arange(2 if kind == "sigmoid" else n_groups)
+
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "objective": kind,
+        "sigmoid_coef": coef,
+        "max_depth": b.max_depth,
+        "n_features": n_features,
+        "source": type(model).__name__,
+    }
+    arrays = {
+        "feature": feature,
+        "threshold": threshold,
+        "left": np.asarray(b.left, dtype=np.int32),
+        "right": np.asarray(b.right, dtype=np.int32),
+        "default_left": np.asarray(b.default_left, dtype=bool),
+        "missing_type": np.asarray(b.missing_type, dtype=np.int8),
+        "zero_lo": np.where(split, zero_lo, 0.0),
+        "zero_hi": np.where(split, zero_hi, 0.0),
+        "value": np.asarray(b.value, dtype=np.float64),
+        "roots": np.asarray(b.roots, dtype=np.int32),
+        "tree_class": np.asarray(b.tree_class, dtype=np.int32),
+        "base_margin": np.zeros(n_groups, dtype=np.float64),
+        "fill": mean,
+        "classes": np.asarray(classes),
+    }
+    compiled = CompiledTreeModel(arrays, meta)
+
+    # Calibrate the constant margin offset (XGBoost base_score, any init score)
+    # against the library itself at the scaler mean, i.e. scaled input zero.
+    probe = np.zeros((1, n_features))
+    offset = margin_fn(probe)[0] - compiled.decision_function(mean.reshape(1, -1))[0]
+    arrays["base_margin"] = offset.astype(np.float64)
+    return CompiledTreeModel(arrays, meta)
+
+
+def max_abs_error(
+    compiled: CompiledTreeModel, model, scaler, X: Sequence[Sequence[float]]
+) -> float:
+    """Largest |compiled - reference| predict_proba difference on X (raw features)."""
+    X = np.asarray(X, dtype=np.float64)
+    Z = scaler.transform(X) if scaler is not None else X
+    Z = np.nan_to_num(Z, nan=0.0, posinf=0.0, neginf=0.0)
+    return float(np.max(np.abs(compiled.predict_proba(X) - model.predict_proba(Z))))
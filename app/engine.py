@@ -1,8 +1,9 @@
 """CAV Fusion Engine - Core computation logic."""
 
+from dataclasses import dataclass
 from pathlib import Path
 import os
-from typing import Dict, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 
 import numpy as np
 import pandas as pd
@@ -10,6 +11,8 @@ from scipy import stats
 from scipy.signal import welch
 import warnings
 
+from app.latency import stage
+
 warnings.filterwarnings("ignore")
 
 # Configuration
@@ -28,6 +31,19 @@ FS = 4  # Sampling rate in Hz
 WINDOW_LEN = 240  # 60 seconds at 4 Hz
 STRESS_LABEL = 2  # Stress label ID
 
+# Channel order for stacked (N, 6, WINDOW_LEN) window arrays
+SIGNAL_KEYS = ("EDA", "TEMP", "BVP", "ACC_x", "ACC_y", "ACC_z")
+
+# Feature order produced by compute_window_features / compute_window_features_batch
+V32_FEATURE_NAMES = (
+    "eda_mean",
+    "eda_deriv_std",
+    "eda_deriv_pos_rate",
+    "bvp_std",
+    "acc_magnitude_mean",
+    "acc_var",
+)
+
 
 def load_artifacts():
     """Load model, scaler, and feature schema using robust discovery."""
@@ -209,6 +225,72 @@ def compute_window_features(window_dict: Dict) -> pd.DataFrame:
     return df
 
 
+def compute_window_features_batch(windows: np.ndarray) -> np.ndarray:
+    """
+    Compute the 6 v3.2 features for a stack of windows at once.
+
+    Args:
+        windows: Array of shape (N, 6, WINDOW_LEN) with channels ordered as SIGNAL_KEYS
+
+    Returns:
+        Array of shape (N, 6) with columns ordered as V32_FEATURE_NAMES.
+        Values match compute_window_features() row for row.
+    """
+    windows = np.asarray(windows, dtype=float)
+    if windows.ndim != 3 or windows.shape[1] != len(SIGNAL_KEYS):
+        raise ValueError(
+            f"Expected windows of shape (N, {len(SIGNAL_KEYS)}, T), got {windows.shape}"
+        )
+
+    n = windows.shape[0]
+    out = np.empty((n, len(V32_FEATURE_NAMES)), dtype=float)
+    if n == 0:
+        return out
+
+    eda = windows[:, 0, :]
+    bvp = windows[:, 2, :]
+    acc_mag = np.sqrt(
+        windows[:, 3, :] ** 2 + windows[:, 4, :] ** 2 + windows[:, 5, :] ** 2
+    )
+
+    # Rows with non-finite samples drop values per signal, which changes the
+    # derivative sequence; those go through the scalar path to stay exact.
+    finite = (
+        np.isfinite(eda).all(axis=1)
+        & np.isfinite(bvp).all(axis=1)
+        & np.isfinite(acc_mag).all(axis=1)
+    )
+
+    if finite.any() and windows.shape[2] >= 2:
+        eda_f = eda[finite]
+        eda_diff = np.diff(eda_f, axis=1)
+        out[finite, 0] = eda_f.mean(axis=1)
+        out[finite, 1] = eda_diff.std(axis=1)
+        out[finite, 2] = (eda_diff > 0).sum(axis=1) / eda_diff.shape[1]
+        out[finite, 3] = bvp[finite].std(axis=1)
+        out[finite, 4] = acc_mag[finite].mean(axis=1)
+        out[finite, 5] = acc_mag[finite].var(axis=1)
+    else:
+        finite = np.zeros(n, dtype=bool)
+
+    for i in np.flatnonzero(~finite):
+        window_dict = {key: windows[i, c, :] for c, key in enumerate(SIGNAL_KEYS)}
+        row = compute_window_features(window_dict).iloc[0]
+        out[i] = [row[name] for name in V32_FEATURE_NAMES]
+
+    return out
+
+
+def _per_window(value, n: int) -> list:
+    """Broadcast a scalar (or None) to n windows, or validate a per-window sequence."""
+    if value is None or np.isscalar(value):
+        return [value] * n
+    values = list(value)
+    if len(values) != n:
+        raise ValueError(f"Expected {n} per-window values, got {len(values)}")
+    return values
+
+
 def comfort_env(temp_c: float, humidity: float, aqi: int) -> float:
     """Compute environmental comfort score."""
     # Temperature comfort (20-24°C best)
@@ -298,8 +380,24 @@ def classify_state(cav_smooth: float, parts: dict) -> str:
     return "balanced"
 
 
+@dataclass
+class EngineSession:
+    """Mutable per-session state: EMA smoothing and state hysteresis."""
+
+    cav_prev: Optional[int] = None
+    cav_smooth: Optional[float] = None
+    last_state: Optional[str] = None
+
+
 class CAVEngine:
-    """CAV Fusion Engine for computing context-aware scores."""
+    """
+    CAV Fusion Engine for computing context-aware scores.
+
+    Model, scaler and schema are loaded once and only read afterwards. EMA and
+    hysteresis live in an EngineSession; methods accept an explicit session so
+    one engine can serve many devices, and fall back to the engine's own
+    default session when none is given.
+    """
 
     def __init__(self, stress_label: int = 2, alpha: float = 0.2):
         """Initialize CAV engine."""
@@ -308,12 +406,17 @@ class CAVEngine:
         self.model, self.scaler, self.schema = load_artifacts()
         self.feature_names = self.schema["feature_names"]
 
-        # EMA state (per-instance, not global)
-        self.cav_prev = None
-        self.cav_smooth = None
+        # Column mapping from V32_FEATURE_NAMES to the schema order (-1 = zero-fill)
+        self._feature_index = np.array(
+            [
+                V32_FEATURE_NAMES.index(name) if name in V32_FEATURE_NAMES else -1
+                for name in self.feature_names
+            ],
+            dtype=int,
+        )
 
-        # Hysteresis state
-        self._last_state = None
+        # EMA + hysteresis state used when callers don't pass a session
+        self.session = EngineSession()
 
         # Weights (default) — make names consistent with 'parts'
         self.weights = {
@@ -322,6 +425,31 @@ class CAVEngine:
             "circadian": 0.2,  # was "circ"
         }
 
+    # Default-session accessors (kept for existing single-stream callers)
+    @property
+    def cav_prev(self) -> Optional[int]:
+        return self.session.cav_prev
+
+    @cav_prev.setter
+    def cav_prev(self, value: Optional[int]) -> None:
+        self.session.cav_prev = value
+
+    @property
+    def cav_smooth(self) -> Optional[float]:
+        return self.session.cav_smooth
+
+    @cav_smooth.setter
+    def cav_smooth(self, value: Optional[float]) -> None:
+        self.session.cav_smooth = value
+
+    @property
+    def _last_state(self) -> Optional[str]:
+        return self.session.last_state
+
+    @_last_state.setter
+    def _last_state(self, value: Optional[str]) -> None:
+        self.session.last_state = value
+
     def cav_from_window(
         self,
         window: Dict,
@@ -329,18 +457,20 @@ class CAVEngine:
         humidity: Optional[float] = None,
         aqi: Optional[int] = None,
         local_hour: int = 12,
+        session: Optional[EngineSession] = None,
     ) -> Tuple[int, int, str, Dict]:
-        """Compute CAV score from window and environmental data."""
+        """Compute CAV score from window and environmental data.
+
+        EMA state is read from and written to ``session`` (default: self.session).
+        """
         # Validate window length
-        for key in ["EDA", "TEMP", "BVP", "ACC_x", "ACC_y", "ACC_z"]:
+        for key in SIGNAL_KEYS:
             if key not in window:
-                parts = {"bio": 0.0, "env": 0.0, "circadian": 0.0, "p_stress": 0.0}
-                return 0, 0, "overload", parts
+                return self._invalid_result()
 
             arr = np.asarray(window[key])
             if len(arr) != WINDOW_LEN:
-                parts = {"bio": 0.0, "env": 0.0, "circadian": 0.0, "p_stress": 0.0}
-                return 0, 0, "overload", parts
+                return self._invalid_result()
 
         # Check for missing values
         all_signals = np.concatenate(
@@ -355,11 +485,11 @@ class CAVEngine:
         )
 
         if np.sum(~np.isfinite(all_signals)) > len(all_signals) * 0.2:  # >20% missing
-            parts = {"bio": 0.0, "env": 0.0, "circadian": 0.0, "p_stress": 0.0}
-            return 0, 0, "overload", parts
+            return self._invalid_result()
 
         # Compute features
-        df_features = compute_window_features(window)
+        with stage("featurize"):
+            df_features = compute_window_features(window)
 
         # === DEBUG: check schema vs computed ===
         expected = list(self.feature_names)
@@ -397,33 +527,266 @@ class CAVEngine:
         # Reindex to match training feature order (safe now)
         df_features = df_features.reindex(columns=self.feature_names, fill_value=0.0)
 
-        # Standardize
-        X_scaled = self.scaler.transform(df_features.values)
-        X_scaled = np.nan_to_num(X_scaled, nan=0.0, posinf=0.0, neginf=0.0)
+        p_stress = float(self._predict_p_stress(df_features.values)[0])
 
-        # Predict
-        if hasattr(self.model, "predict_proba"):
-            proba = self.model.predict_proba(X_scaled)[0]
-
-            # Handle XGBoost (0-indexed) vs sklearn (1-indexed)
-            if hasattr(self.model, "classes_"):
-                classes = self.model.classes_
-                stress_idx = np.where(classes == self.stress_label)[0]
-                if len(stress_idx) > 0:
-                    stress_idx = stress_idx[0]
-                else:
-                    stress_idx = self.stress_label - 1
+        return self._fuse(p_stress, temp_c, humidity, aqi, local_hour, session or self.session)
+
+    def cav_from_windows_batch(
+        self,
+        windows: np.ndarray,
+        temp_c=None,
+        humidity=None,
+        aqi=None,
+        local_hour=12,
+        session: Optional[EngineSession] = None,
+    ) -> List[Tuple[int, int, str, Dict]]:
+        """
+        Compute CAV scores for a stack of windows with one model call.
+
+        Featurizes all windows with NumPy, runs a single scaler transform and a
+        single predict_proba over the batch, then applies env/circadian fusion,
+        EMA smoothing and state classification window by window, in order.
+
+        Args:
+            windows: Array of shape (N, 6, WINDOW_LEN), channels ordered as SIGNAL_KEYS
+            temp_c, humidity, aqi, local_hour: Scalars applied to every window,
+                or sequences with one value per window
+            session: EMA/hysteresis state to update (default: self.session)
+
+        Returns:
+            List of (cav_raw, cav_smooth, state, parts) tuples, one per window,
+            identical to calling cav_from_window() on each window in turn.
+        """
+        features, valid = self.featurize_windows(windows)
+        return self.cav_from_features_batch(
+            features,
+            temp_c=temp_c,
+            humidity=humidity,
+            aqi=aqi,
+            local_hour=local_hour,
+            valid=valid,
+            session=session,
+        )
+
+    def featurize_windows(self, windows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Featurize a stack of raw windows into the schema feature order.
+
+        Args:
+            windows: Array of shape (N, 6, WINDOW_LEN), channels ordered as SIGNAL_KEYS
+
+        Returns:
+            (features, valid): (N, len(feature_names)) matrix and a boolean mask
+            that is False for windows failing the >20% missing-data guard.
+        """
+        windows = np.asarray(windows, dtype=float)
+        if windows.ndim != 3 or windows.shape[1:] != (len(SIGNAL_KEYS), WINDOW_LEN):
+            raise ValueError(
+                f"Expected windows of shape (N, {len(SIGNAL_KEYS)}, {WINDOW_LEN}), "
+                f"got {windows.shape}"
+            )
+
+        # Same schema guard as cav_from_window (raw windows always yield V32 features)
+        overlap = int((self._feature_index >= 0).sum())
+        ratio = overlap / max(1, len(self.feature_names))
+        if ratio < 0.8 and os.getenv("EDON_RELAXED_GUARD", "0") != "1":
+            raise RuntimeError(
+                f"Only {ratio:.1%} of expected features present; schema mismatch. "
+                f"Expected features: {list(self.feature_names)[:10]}..."
+            )
+
+        n = windows.shape[0]
+
+        # Same >20% missing guard as cav_from_window
+        n_missing = (~np.isfinite(windows)).reshape(n, -1).sum(axis=1)
+        valid = n_missing <= len(SIGNAL_KEYS) * WINDOW_LEN * 0.2
+
+        features = np.zeros((n, len(self.feature_names)), dtype=float)
+        if valid.any():
+            with stage("featurize"):
+                features[valid] = self.to_schema_order(compute_window_features_batch(windows[valid]))
+        return features, valid
+
+    def cav_from_features(
+        self,
+        features,
+        temp_c: Optional[float] = None,
+        humidity: Optional[float] = None,
+        aqi: Optional[int] = None,
+        local_hour: int = 12,
+        session: Optional[EngineSession] = None,
+    ) -> Tuple[int, int, str, Dict]:
+        """
+        Compute CAV score from a precomputed feature vector.
+
+        Args:
+            features: Mapping keyed by feature name, or a sequence ordered as
+                self.feature_names (the v3.2 schema order)
+            temp_c, humidity, aqi, local_hour: Environmental context
+            session: EMA/hysteresis state to update (default: self.session)
+
+        Returns:
+            (cav_raw, cav_smooth, state, parts), same as cav_from_window().
+        """
+        if isinstance(features, dict):
+            features = [float(features.get(name, 0.0)) for name in self.feature_names]
+        return self.cav_from_features_batch(
+            np.asarray(features, dtype=float).reshape(1, -1),
+            temp_c=temp_c,
+            humidity=humidity,
+            aqi=aqi,
+            local_hour=local_hour,
+            session=session,
+        )[0]
+
+    def cav_from_features_batch(
+        self,
+        features: np.ndarray,
+        temp_c=None,
+        humidity=None,
+        aqi=None,
+        local_hour=12,
+        valid: Optional[np.ndarray] = None,
+        session: Optional[EngineSession] = None,
+    ) -> List[Tuple[int, int, str, Dict]]:
+        """
+        Compute CAV scores for precomputed feature vectors, skipping featurization.
+
+        Runs one scaler transform and one predict_proba over the batch, then the
+        same env/circadian fusion, EMA and state classification as the raw path.
+
+        Args:
+            features: Array of shape (N, len(feature_names)) in schema order
+            temp_c, humidity, aqi, local_hour: Scalars or per-window sequences
+            valid: Optional boolean mask; rows marked False return the invalid
+                result and leave EMA state untouched
+            session: EMA/hysteresis state to update (default: self.session)
+
+        Returns:
+            List of (cav_raw, cav_smooth, state, parts) tuples, one per row.
+        """
+        features = np.asarray(features, dtype=float)
+        if features.ndim != 2 or features.shape[1] != len(self.feature_names):
+            raise ValueError(
+                f"Expected features of shape (N, {len(self.feature_names)}), got {features.shape}"
+            )
+
+        valid = np.ones(features.shape[0], dtype=bool) if valid is None else np.asarray(valid, dtype=bool)
+        p_stress = self.predict_p_stress(features, valid)
+        return self.cav_from_p_stress_batch(
+            p_stress, temp_c, humidity, aqi, local_hour, valid=valid, session=session
+        )
+
+    def predict_p_stress(self, features: np.ndarray, valid: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        P(stress) per row of a schema-ordered feature matrix (stateless).
+
+        Rows marked False in `valid` are not sent to the model and get 0.0.
+        """
+        features = np.asarray(features, dtype=float)
+        n = features.shape[0]
+        valid = np.ones(n, dtype=bool) if valid is None else np.asarray(valid, dtype=bool)
+        p_stress = np.zeros(n, dtype=float)
+        if valid.any():
+            p_stress[valid] = self._predict_p_stress(features[valid])
+        return p_stress
+
+    def cav_from_p_stress_batch(
+        self,
+        p_stress: np.ndarray,
+        temp_c=None,
+        humidity=None,
+        aqi=None,
+        local_hour=12,
+        valid: Optional[np.ndarray] = None,
+        session: Optional[EngineSession] = None,
+    ) -> List[Tuple[int, int, str, Dict]]:
+        """
+        Fuse precomputed P(stress) values with env/circadian context, in order.
+
+        This is the stateful half of cav_from_features_batch(): it updates the
+        session's EMA/hysteresis state but never touches the model, so the
+        predict_p_stress() half can run elsewhere (e.g. in inference workers).
+        """
+        n = len(p_stress)
+        temp_c = _per_window(temp_c, n)
+        humidity = _per_window(humidity, n)
+        aqi = _per_window(aqi, n)
+        local_hour = _per_window(local_hour, n)
+        valid = np.ones(n, dtype=bool) if valid is None else np.asarray(valid, dtype=bool)
+
+        session = session or self.session
+        results = []
+        for i in range(n):
+            if not valid[i]:
+                results.append(self._invalid_result())
+                continue
+            results.append(
+                self._fuse(
+                    float(p_stress[i]), temp_c[i], humidity[i], aqi[i], local_hour[i], session
+                )
+            )
+        return results
+
+    def _invalid_result(self) -> Tuple[int, int, str, Dict]:
+        """Result returned for windows that fail validation."""
+        parts = {"bio": 0.0, "env": 0.0, "circadian": 0.0, "p_stress": 0.0}
+        return 0, 0, "overload", parts
+
+    def to_schema_order(self, features: np.ndarray) -> np.ndarray:
+        """Reorder (N, 6) V32_FEATURE_NAMES columns to the schema order, zero-filling gaps."""
+        out = np.zeros((features.shape[0], len(self._feature_index)), dtype=float)
+        present = self._feature_index >= 0
+        out[:, present] = features[:, self._feature_index[present]]
+        return out
+
+    def _stress_index(self, n_classes: int) -> int:
+        """Column of predict_proba holding P(stress)."""
+        # Handle XGBoost (0-indexed) vs sklearn (1-indexed)
+        if hasattr(self.model, "classes_"):
+            classes = self.model.classes_
+            stress_idx = np.where(classes == self.stress_label)[0]
+            if len(stress_idx) > 0:
+                stress_idx = stress_idx[0]
             else:
                 stress_idx = self.stress_label - 1
+        else:
+            stress_idx = self.stress_label - 1
+
+        if stress_idx < 0 or stress_idx >= n_classes:
+            stress_idx = 0
+        return int(stress_idx)
+
+    def _predict_p_stress(self, X: np.ndarray) -> np.ndarray:
+        """Standardize a (N, n_features) matrix and return P(stress) per row."""
+        # Standardize (compiled models have the scaler folded in: scaler is None,
+        # and they map non-finite inputs to the scaler mean themselves)
+        if self.scaler is not None:
+            with stage("scale"):
+                X_scaled = self.scaler.transform(X)
+                X_scaled = np.nan_to_num(X_scaled, nan=0.0, posinf=0.0, neginf=0.0)
+        else:
+            X_scaled = X
 
-            if stress_idx < 0 or stress_idx >= len(proba):
-                stress_idx = 0
+        # Predict
+        with stage("predict"):
+            if hasattr(self.model, "predict_proba"):
+                proba = self.model.predict_proba(X_scaled)
+                return proba[:, self._stress_index(proba.shape[1])].astype(float)
 
-            p_stress = float(proba[stress_idx])
-        else:
-            pred = self.model.predict(X_scaled)[0]
-            p_stress = 1.0 if pred == self.stress_label else 0.0
+            pred = np.asarray(self.model.predict(X_scaled))
+            return (pred == self.stress_label).astype(float)
 
+    def _fuse(
+        self,
+        p_stress: float,
+        temp_c: Optional[float],
+        humidity: Optional[float],
+        aqi: Optional[int],
+        local_hour: int,
+        session: EngineSession,
+    ) -> Tuple[int, int, str, Dict]:
+        """Fuse P(stress) with env/circadian context, update session EMA and classify."""
         # Bio score = 1 - P(stress)
         bio_score = 1.0 - p_stress
 
@@ -446,13 +809,13 @@ class CAVEngine:
         cav_raw_int = int(cav_clipped * 10000)
 
         # EMA smoothing
-        if self.cav_smooth is None:
-            self.cav_smooth = cav_clipped
+        if session.cav_smooth is None:
+            session.cav_smooth = cav_clipped
         else:
-            self.cav_smooth = self.alpha * cav_clipped + (1 - self.alpha) * self.cav_smooth
+            session.cav_smooth = self.alpha * cav_clipped + (1 - self.alpha) * session.cav_smooth
 
-        cav_smooth_int = int(self.cav_smooth * 10000)
-        self.cav_prev = cav_raw_int
+        cav_smooth_int = int(session.cav_smooth * 10000)
+        session.cav_prev = cav_raw_int
 
         parts = {
             "bio": float(bio_score),
@@ -466,9 +829,11 @@ class CAVEngine:
 
         return cav_raw_int, cav_smooth_int, state, parts
 
-    def state_from_cav(self, cav: int) -> str:
+    def state_from_cav(self, cav: int, session: Optional[EngineSession] = None) -> str:
         """Determine state from CAV using hysteresis."""
-        if self._last_state is None:
+        session = session or self.session
+        last_state = session.last_state
+        if last_state is None:
             if cav < 3000:
                 state = "overload"
             elif cav < 7000:
@@ -478,7 +843,7 @@ class CAVEngine:
             else:
                 state = "restorative"
         else:
-            if self._last_state == "overload":
+            if last_state == "overload":
                 if cav >= 3300:
                     if cav < 7000:
                         state = "balanced"
@@ -488,7 +853,7 @@ class CAVEngine:
                         state = "restorative"
                 else:
                     state = "overload"
-            elif self._last_state == "balanced":
+            elif last_state == "balanced":
                 if cav < 2700:
                     state = "overload"
                 elif cav >= 7300:
@@ -498,7 +863,7 @@ class CAVEngine:
                         state = "restorative"
                 else:
                     state = "balanced"
-            elif self._last_state == "focus":
+            elif last_state == "focus":
                 if cav < 6700:
                     if cav < 3000:
                         state = "overload"
@@ -520,5 +885,5 @@ class CAVEngine:
                 else:
                     state = "restorative"
 
-        self._last_state = state
+        session.last_state = state
         return state
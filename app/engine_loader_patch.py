@@ -36,6 +36,27 @@ def _find_artifact(name: str, also=None) -> Path:
             return c
     raise FileNotFoundError(f"{name} not found. Checked: " + ", ".join(map(str, cands[:10])))  # Limit error message length
 
+def _find_compiled(model_name: str = "cav_state_v3_2.joblib"):
+    """
+    Compiled tree artifact (see app.compiled_trees), if present and enabled.
+
+    Ignored when EDON_COMPILED_MODEL=0 or when the joblib model next to it is
+    newer (the export is stale).
+    """
+    if os.getenv("EDON_COMPILED_MODEL", "1") == "0":
+        return None
+    from app.compiled_trees import COMPILED_MODEL_NAME
+
+    try:
+        compiled_path = _find_artifact(COMPILED_MODEL_NAME)
+    except FileNotFoundError:
+        return None
+    source = compiled_path.with_name(model_name)
+    if source.exists() and source.stat().st_mtime > compiled_path.stat().st_mtime:
+        print(f"[loader] {compiled_path.name} is older than {source.name}; using joblib model", flush=True)
+        return None
+    return compiled_path
+
 def load_artifacts():
     """
     Returns: (model, scaler, schema_dict)
@@ -43,14 +64,23 @@ def load_artifacts():
       - cav_state_v3_2.joblib
       - cav_state_scaler_v3_2.joblib
       - cav_state_schema_v3_2.json
+
+    If cav_state_v3_2.compiled.npz is found it is used instead of the joblib
+    model and scaler; the scaler is folded into it, so scaler is None.
     """
     schema_path = _find_artifact("cav_state_schema_v3_2.json")
-    scaler_path = _find_artifact("cav_state_scaler_v3_2.joblib")
-    model_path  = _find_artifact("cav_state_v3_2.joblib")
-
     with open(schema_path, "r", encoding="utf-8") as f:
         schema = json.load(f)
 
+    compiled_path = _find_compiled()
+    if compiled_path is not None:
+        from app.compiled_trees import CompiledTreeModel
+
+        return CompiledTreeModel.load(compiled_path), None, schema
+
+    scaler_path = _find_artifact("cav_state_scaler_v3_2.joblib")
+    model_path  = _find_artifact("cav_state_v3_2.joblib")
+
     scaler = load(scaler_path)
     model  = load(model_path)
     return model, scaler, schema
@@ -0,0 +1,189 @@
+"""
+Process-pool inference workers.
+
+The server process loads the model artifacts first and then forks the pool, so
+every worker shares the already-loaded booster, scaler and feature schema
+copy-on-write instead of loading (and paying memory for) its own copy. Workers
+run the stateless CPU work:
+
+  - v1: featurization of raw windows + scaler/predict_proba  → P(stress)
+  - v2: multimodal feature extraction (fuse_multimodal_features)
+
+EMA/hysteresis fusion stays in the server process, where the per-session state
+lives, so results are identical to in-process scoring and keep request order.
+
+Enabled with EDON_INFERENCE_WORKERS=N (default 0: score in-process). Large
+batches are split into chunks of at least EDON_INFERENCE_MIN_CHUNK windows
+(default 32) and spread across workers.
+"""
+
+import logging
+import math
+import multiprocessing as mp
+import os
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.latency import stage
+
+LOGGER = logging.getLogger(__name__)
+
+# Objects shared with the workers. Populated in the server process right before
+# fork(); workers read them through inherited (copy-on-write) memory.
+_SHARED: Dict[str, Any] = {}
+
+
+def _init_worker() -> None:
+    """Keep each worker single-threaded; the pool provides the parallelism."""
+    model = getattr(_SHARED.get("engine"), "model", None)
+    if model is not None and hasattr(model, "set_params"):
+        try:
+            model.set_params(n_jobs=1)
+        except Exception:
+            pass
+
+
+def _featurize_predict(
+    features: np.ndarray,
+    valid: np.ndarray,
+    raw_rows: np.ndarray,
+    raw: Optional[np.ndarray],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Worker task: fill raw rows' features, then P(stress) for every valid row."""
+    engine = _SHARED["engine"]
+    if raw is not None and len(raw_rows):
+        features = features.copy()
+        valid = valid.copy()
+        raw_features, raw_valid = engine.featurize_windows(raw)
+        features[raw_rows] = raw_features
+        valid[raw_rows] = raw_valid
+    return features, valid, engine.predict_p_stress(features, valid)
+
+
+def _fuse_v2(windows: Sequence[Any]) -> List[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+    """Worker task: multimodal feature extraction, (fused, error) per window."""
+    from app.v2.multimodal_fusion import fuse_multimodal_features
+
+    out = []
+    for window in windows:
+        try:
+            out.append((fuse_multimodal_features(window), None))
+        except Exception as e:
+            out.append((None, str(e)))
+    return out
+
+
+class InferencePool:
+    """
+    Fork-based worker pool for the stateless half of CAV scoring.
+
+    Args:
+        workers: Number of worker processes (0 disables the pool)
+        min_chunk: Smallest number of windows sent to one worker
+        timeout_s: Max seconds to wait for a chunk (guards against dead workers)
+
+    Example:
+        >>> pool = InferencePool(workers=8)
+        >>> pool.start(engine=ENGINE)      # after the model is loaded
+        >>> features, valid, p_stress = pool.featurize_predict(features, valid, raw_idx, raw)
+    """
+
+    def __init__(self, workers: int = 0, min_chunk: int = 32, timeout_s: float = 30.0):
+        self.workers = max(0, int(workers))
+        self.min_chunk = max(1, int(min_chunk))
+        self.timeout_s = float(timeout_s)
+        self._pool = None
+
+    @classmethod
+    def from_env(cls) -> "InferencePool":
+        return cls(
+            workers=int(os.getenv("EDON_INFERENCE_WORKERS", "0")),
+            min_chunk=int(os.getenv("EDON_INFERENCE_MIN_CHUNK", "32")),
+            timeout_s=float(os.getenv("EDON_INFERENCE_TIMEOUT_S", "30")),
+        )
+
+    @property
+    def running(self) -> bool:
+        return self._pool is not None
+
+    def start(self, **shared: Any) -> bool:
+        """
+        Publish `shared` objects (e.g. engine=CAVEngine) and fork the workers.
+
+        Call once, after the artifacts are loaded and before the server starts
+        handling requests. Returns False (pool stays disabled) when workers=0
+        or the platform has no fork start method.
+        """
+        if self._pool is not None or self.workers == 0:
+            return self._pool is not None
+        if "fork" not in mp.get_all_start_methods():
+            LOGGER.warning("[EDON] fork start method unavailable; inference pool disabled")
+            return False
+        _SHARED.update(shared)
+        self._pool = mp.get_context("fork").Pool(processes=self.workers, initializer=_init_worker)
+        LOGGER.info(f"[EDON] Inference pool started with {self.workers} workers")
+        return True
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def _chunks(self, n: int) -> List[Tuple[int, int]]:
+        size = max(self.min_chunk, math.ceil(n / max(self.workers, 1)))
+        return [(a, min(a + size, n)) for a in range(0, n, size)]
+
+    def _run(self, fn: Callable, tasks: List[tuple]) -> List[Any]:
+        """Run tasks on the pool (in-process if not started); results in task order."""
+        if self._pool is None:
+            return [fn(*task) for task in tasks]
+        # Stage timings inside workers stay in the workers; record the round trip
+        with stage("pool"):
+            pending = [self._pool.apply_async(fn, task) for task in tasks]
+            return [p.get(timeout=self.timeout_s) for p in pending]
+
+    def featurize_predict(
+        self,
+        features: np.ndarray,
+        valid: np.ndarray,
+        raw_index: Sequence[int] = (),
+        raw: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        v1 scoring without the session state.
+
+        Args:
+            features: (N, n_features) schema-ordered matrix; rows in `raw_index`
+                are placeholders filled from `raw`
+            valid: (N,) boolean mask for the non-raw rows
+            raw_index: Row numbers of the raw windows
+            raw: (len(raw_index), 6, WINDOW_LEN) raw windows
+
+        Returns:
+            (features, valid, p_stress) for all N rows, in order
+        """
+        features = np.asarray(features, dtype=float)
+        valid = np.asarray(valid, dtype=bool)
+        raw_pos = np.full(len(features), -1, dtype=int)
+        raw_pos[np.asarray(raw_index, dtype=int)] = np.arange(len(raw_index))
+
+        tasks = []
+        for a, b in self._chunks(len(features)):
+            pos = raw_pos[a:b]
+            rows = np.flatnonzero(pos >= 0)
+            tasks.append((features[a:b], valid[a:b], rows, raw[pos[rows]] if len(rows) else None))
+
+        outs = self._run(_featurize_predict, tasks)
+        return (
+            np.concatenate([o[0] for o in outs]),
+            np.concatenate([o[1] for o in outs]),
+            np.concatenate([o[2] for o in outs]),
+        )
+
+    def fuse_v2(self, windows: Sequence[Any]) -> List[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+        """v2 multimodal feature extraction: (fused, error) per window, in order."""
+        windows = list(windows)
+        tasks = [(windows[a:b],) for a, b in self._chunks(len(windows))]
+        return [item for chunk in self._run(_fuse_v2, tasks) for item in chunk]
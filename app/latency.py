@@ -0,0 +1,196 @@
+"""
+Low-overhead latency histograms for routes and pipeline stages.
+
+Buckets are fixed and log-scale, HDR style: every power of two from 2**-20 s
+(~1 µs) to 2**6 s (64 s) is split into SUB linear sub-buckets, so any bucket
+is at most 1/SUB (25%) wide relative to its lower bound. An observation is a
+frexp(), a little integer math and an uncontended lock: well under a
+microsecond, cheap enough to leave on in production.
+
+    with stage("predict"):
+        proba = model.predict_proba(X)
+
+REQUEST_SECONDS (per route) and STAGE_SECONDS (per stage) are exported as
+Prometheus histograms on /metrics; quantiles are served on /telemetry.
+"""
+
+import math
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SUB = 4          # linear sub-buckets per power of two
+MIN_EXP = -20    # first bucket starts at 2**-20 s
+MAX_EXP = 6      # last finite bucket ends at 2**6 s
+N_BUCKETS = (MAX_EXP - MIN_EXP) * SUB  # finite buckets; index N_BUCKETS is +Inf
+
+# Upper bound (seconds) of every finite bucket, in order
+UPPER_BOUNDS: List[float] = [
+    math.ldexp(1.0 + (k + 1) / SUB, e) for e in range(MIN_EXP, MAX_EXP) for k in range(SUB)
+]
+LOWER_BOUNDS: List[float] = [0.0] + UPPER_BOUNDS[:-1]
+
+_frexp = math.frexp
+_perf_counter = time.perf_counter
+
+
+def bucket_index(seconds: float) -> int:
+    """Bucket holding `seconds` (0 for tiny/negative values, N_BUCKETS for overflow)."""
+    if seconds <= 0.0:
+        return 0
+    m, e = math.frexp(seconds)  # seconds = m * 2**e, 0.5 <= m < 1
+    idx = (e - 1 - MIN_EXP) * SUB + int((m + m - 1.0) * SUB)
+    if idx < 0:
+        return 0
+    return idx if idx < N_BUCKETS else N_BUCKETS
+
+
+class Histogram:
+    """Thread-safe fixed-bucket latency histogram (seconds)."""
+
+    __slots__ = ("counts", "count", "sum", "_lock")
+
+    def __init__(self):
+        self.counts = [0] * (N_BUCKETS + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        # bucket_index(), inlined: this is the hot path
+        if seconds > 0.0:
+            m, e = _frexp(seconds)
+            idx = (e - 1 - MIN_EXP) * SUB + int((m + m - 1.0) * SUB)
+            idx = 0 if idx < 0 else (idx if idx < N_BUCKETS else N_BUCKETS)
+        else:
+            idx = 0
+        with self._lock:
+            self.counts[idx] += 1
+            self.count += 1
+            self.sum += seconds
+
+    def snapshot(self) -> Tuple[List[int], int, float]:
+        with self._lock:
+            return list(self.counts), self.count, self.sum
+
+    @staticmethod
+    def quantile_from(counts: List[int], count: int, q: float) -> float:
+        """Estimate the q-quantile (seconds), interpolating inside the bucket."""
+        if count == 0:
+            return 0.0
+        rank = q * count
+        cum = 0
+        for idx, c in enumerate(counts):
+            if c and cum + c >= rank:
+                if idx == N_BUCKETS:
+                    return UPPER_BOUNDS[-1]
+                lo, hi = LOWER_BOUNDS[idx], UPPER_BOUNDS[idx]
+                return lo + (hi - lo) * (rank - cum) / c
+            cum += c
+        return UPPER_BOUNDS[-1]
+
+    def quantile(self, q: float) -> float:
+        counts, count, _ = self.snapshot()
+        return self.quantile_from(counts, count, q)
+
+
+class _Timer:
+    """Context manager recording elapsed perf_counter time into a histogram."""
+
+    __slots__ = ("hist", "t0")
+
+    def __init__(self, hist: Histogram):
+        self.hist = hist
+
+    def __enter__(self):
+        self.t0 = _perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observe(_perf_counter() - self.t0)
+        return False
+
+
+class HistogramFamily:
+    """
+    Histograms sharing a metric name, one per label value.
+
+    Args:
+        name: Prometheus metric name (e.g. edon_stage_duration_seconds)
+        help: HELP text
+        label: Label name (e.g. "stage")
+    """
+
+    def __init__(self, name: str, help: str, label: str):
+        self.name = name
+        self.help = help
+        self.label = label
+        self._children: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, value: str) -> Histogram:
+        hist = self._children.get(value)
+        if hist is None:
+            with self._lock:
+                hist = self._children.setdefault(value, Histogram())
+        return hist
+
+    def observe(self, value: str, seconds: float) -> None:
+        self.labels(value).observe(seconds)
+
+    def time(self, value: str) -> _Timer:
+        return _Timer(self.labels(value))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._children = {}
+
+    def summary(self, quantiles: Iterable[float] = (0.5, 0.95, 0.99)) -> Dict[str, Dict[str, float]]:
+        """{label: {count, mean_ms, p50_ms, p95_ms, p99_ms}} for every label seen."""
+        out = {}
+        for value, hist in sorted(self._children.items()):
+            counts, count, total = hist.snapshot()
+            row = {"count": count, "mean_ms": round(total / count * 1000.0, 4) if count else 0.0}
+            for q in quantiles:
+                row[f"p{round(q * 100):d}_ms"] = round(Histogram.quantile_from(counts, count, q) * 1000.0, 4)
+            out[value] = row
+        return out
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition (cumulative buckets, _sum, _count)."""
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for value, hist in sorted(self._children.items()):
+            counts, count, total = hist.snapshot()
+            label = f'{self.label}="{value}"'
+            cum = 0
+            for bound, c in zip(UPPER_BOUNDS, counts):
+                cum += c
+                lines.append(f'{self.name}_bucket{{{label},le="{bound:.9g}"}} {cum}')
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{label}}} {total:.9g}")
+            lines.append(f"{self.name}_count{{{label}}} {count}")
+        return "\n".join(lines) + "\n"
+
+
+REQUEST_SECONDS = HistogramFamily(
+    "edon_request_duration_seconds", "Request latency by route", "route"
+)
+STAGE_SECONDS = HistogramFamily(
+    "edon_stage_duration_seconds",
+    "Time spent per pipeline stage (decode, validate, featurize, scale, predict, pca, "
+    "neural_head, serialize, queue, pool)",
+    "stage",
+)
+
+
+def stage(name: str) -> _Timer:
+    """Time a pipeline stage: `with stage("featurize"): ...`."""
+    return STAGE_SECONDS.time(name)
+
+
+def observe_stage(name: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(name, seconds)
+
+
+def observe_request(route: Optional[str], seconds: float) -> None:
+    REQUEST_SECONDS.observe(route or "unmatched", seconds)
@@ -2,12 +2,16 @@
 
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse
 import time
 import os
 import logging
+import threading
+import numpy as np
 from pathlib import Path
 from app import __version__
+from app.admission import INFERENCE, Overloaded
+from app.model_manifest import MANIFEST
 from app.routes import batch, telemetry, memory, dashboard, metrics
 from app.routes.streaming import router as streaming_router
 from app.routes.ingest import router as ingest_router
@@ -42,17 +46,20 @@ logger.info(f"[EDON] Boot mode: {EDON_MODE}")
 
 # Initialize engines based on mode
 ENGINE_V2 = None
+PCA_FITTER = None
 NEURAL_LOADED = False
 PCA_LOADED = False
 
 if EDON_MODE == "v2":
     from app.v2.engine_v2 import CAVEngineV2
     from app.v2.device_profiles import get_profile
+    from app.v2.pca_fitter import PCAFitter
     
     # Get device profile from env if specified (must be non-empty)
     device_profile_env = os.getenv("EDON_DEVICE_PROFILE", None)
     device_profile = device_profile_env if device_profile_env and device_profile_env.strip() else None
-    ENGINE_V2 = CAVEngineV2(device_profile=device_profile)
+    PCA_FITTER = PCAFitter.from_env()
+    ENGINE_V2 = CAVEngineV2(device_profile=device_profile, pca_fitter=PCA_FITTER)
     if device_profile:
         logger.info(f"[EDON] Engine initialized with device profile: {device_profile}")
     else:
@@ -134,12 +141,19 @@ if EDON_MODE == "v2":
     else:
         logger.info(f"[EDON] PCA path not found (using default): {pca_path}")
     
-    # Load neural head from environment
+    # Without a fixed PCA, resume the background-fitted basis from its last snapshot
+    if not PCA_LOADED:
+        PCA_FITTER.load_latest()
+    
+    # Load neural head from environment: a torch checkpoint (.pt, needs torch
+    # to unpickle) or a NeuralHeadMLP.save_npz export (.npz, no torch)
     neural_weights_path = os.getenv("EDON_NEURAL_WEIGHTS", None)
     if neural_weights_path and os.path.exists(neural_weights_path):
         try:
-            import torch
-            if hasattr(ENGINE_V2.neural_head, 'model'):
+            if neural_weights_path.endswith(".npz"):
+                ENGINE_V2.neural_head.load_npz(neural_weights_path)
+            else:
+                import torch
                 saved_state = torch.load(neural_weights_path, map_location='cpu')
                 # Handle both direct state_dict and wrapped formats
                 if isinstance(saved_state, dict) and 'state_dict' in saved_state:
@@ -149,27 +163,25 @@ if EDON_MODE == "v2":
                 
                 # Try strict loading first
                 try:
-                    ENGINE_V2.neural_head.model.load_state_dict(saved_state, strict=True)
+                    ENGINE_V2.neural_head.load_state_dict(saved_state, strict=True)
                 except RuntimeError:
                     # If strict fails, try partial loading (ignore missing/unexpected keys)
-                    model_state = ENGINE_V2.neural_head.model.state_dict()
-                    # Filter to only load matching keys
-                    filtered_state = {k: v for k, v in saved_state.items() if k in model_state and model_state[k].shape == v.shape}
-                    if filtered_state:
-                        model_state.update(filtered_state)
-                        ENGINE_V2.neural_head.model.load_state_dict(model_state, strict=False)
-                        logger.info(f"[EDON] Loaded neural head (partial): {len(filtered_state)}/{len(model_state)} layers")
-                    else:
+                    loaded = ENGINE_V2.neural_head.load_state_dict(saved_state, strict=False)
+                    if not loaded:
                         raise ValueError("No matching layers found in saved state")
-                
-                ENGINE_V2.neural_head.model.eval()
-                NEURAL_LOADED = True
-                logger.info(f"[EDON] Loaded neural head: {neural_weights_path}")
+                    logger.info(f"[EDON] Loaded neural head (partial): {loaded}/{len(saved_state)} layers")
+            
+            NEURAL_LOADED = True
+            logger.info(f"[EDON] Loaded neural head ({ENGINE_V2.neural_head.backend} backend): {neural_weights_path}")
         except Exception as e:
             logger.warning(f"[EDON] Failed to load neural head from {neural_weights_path}: {e}")
     elif neural_weights_path:
         logger.info(f"[EDON] Neural weights path not found: {neural_weights_path}")
     
+    # Cap torch/BLAS intra-op threads (EDON_INTRA_OP_THREADS) next to the worker threads
+    from app.v2.neural_head import configure_threads
+    configure_threads()
+    
     # Import v2 routes (will be included below)
     from app.routes import v2_batch
     # Update v2_batch to use the global engine
@@ -225,6 +237,39 @@ if EDON_MODE == "v2":
         app.include_router(license.router)
 
 
+# Inference worker pool (EDON_INFERENCE_WORKERS > 0). Forked here, after the
+# v1/v2 artifacts are loaded, so workers share them copy-on-write.
+from app.inference_pool import InferencePool
+INFERENCE_POOL = InferencePool.from_env()
+if INFERENCE_POOL.start(engine=batch.ENGINE):
+    batch.POOL = INFERENCE_POOL
+    if EDON_MODE == "v2":
+        v2_batch.POOL = INFERENCE_POOL
+
+
+@app.on_event("shutdown")
+async def _close_inference_workers():
+    for batcher in (batch.BATCHER, v2_batch.BATCHER if EDON_MODE == "v2" else None):
+        if batcher is not None:
+            batcher.close()
+    INFERENCE.shutdown(wait=False)
+    INFERENCE_POOL.close()
+    if PCA_FITTER is not None:
+        PCA_FITTER.close()
+    # Flush adaptive-memory rows still queued for the database
+    memory.memory_engine.close()
+    memory.MEMORY.close()
+
+
+@app.exception_handler(Overloaded)
+async def _overloaded(request: Request, exc: Overloaded):
+    """Inference queue full: shed load with 429 instead of queueing without bound."""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc), "retry_after_s": exc.retry_after_s},
+        headers={"Retry-After": str(exc.retry_after_s)},
+    )
+
 # Mount dashboard
 # Note: Dash integration requires WSGI-to-ASGI adapter
 # For now, we'll serve it on a separate port or use a simpler approach
@@ -251,9 +296,11 @@ async def track_latency(request: Request, call_next):
     response = await call_next(request)
     latency_ms = (time.time() - start_time) * 1000.0
     
-    # Record latency for telemetry (only for CAV endpoints)
+    # Record latency for telemetry (only for CAV endpoints), labelled with the
+    # route template so the histogram label set stays bounded
     if request.url.path.startswith("/oem") or request.url.path.startswith("/v2"):
-        telemetry.record_request(latency_ms)
+        route = request.scope.get("route")
+        telemetry.record_request(latency_ms, route=getattr(route, "path", None))
     
     return response
 
@@ -267,6 +314,8 @@ async def root():
         },
         "common": {
             "health": "GET /health",
+            "livez": "GET /livez",
+            "readyz": "GET /readyz",
             "telemetry": "GET /telemetry",
             "memory_summary": "GET /memory/summary",
             "memory_clear": "POST /memory/clear",
@@ -293,6 +342,57 @@ async def root():
 # Track startup time for uptime
 _start_time = time.time()
 
+# Set once the artifacts are loaded, fingerprinted and warm (see /readyz)
+READY = threading.Event()
+
+
+def _warm_up():
+    """Fingerprint the model and run first predictions so /readyz means warm."""
+    try:
+        MANIFEST.get()
+        batch.ENGINE.predict_p_stress(np.zeros((1, len(batch.ENGINE.feature_names))))
+        if ENGINE_V2 is not None:
+            ENGINE_V2.neural_head.predict([0.0] * ENGINE_V2.neural_head.input_dim)
+        READY.set()
+        logger.info("[EDON] Warm-up complete; ready")
+    except Exception as e:
+        logger.error(f"[EDON] Warm-up failed; /readyz stays false: {e}")
+
+
+@app.on_event("startup")
+async def _start_warm_up():
+    # In the background so /livez answers while the model warms up
+    threading.Thread(target=_warm_up, name="warm-up", daemon=True).start()
+    # Started here, after the inference pool has forked
+    if PCA_FITTER is not None and not PCA_LOADED and PCAFitter.enabled_from_env():
+        PCA_FITTER.start()
+
+
+@app.get("/livez")
+async def livez():
+    """Liveness: the process is up and serving. Never touches the model."""
+    return {"ok": True}
+
+
+@app.get("/readyz")
+async def readyz():
+    """
+    Readiness: artifacts loaded and warm, and the inference queue has room.
+
+    Returns 503 while warming up or while the queue is full, so load balancers
+    route around this instance instead of piling more work on it.
+    """
+    stats = INFERENCE.stats()
+    saturated = stats["queue_depth"] >= stats["max_queue"] > 0
+    ready = READY.is_set() and not saturated
+    body = {
+        "ready": ready,
+        "warm": READY.is_set(),
+        "queue_depth": stats["queue_depth"],
+        "max_queue": stats["max_queue"],
+    }
+    return JSONResponse(status_code=200 if ready else 503, content=body)
+
 
 @app.get("/health")
 async def health():
@@ -325,15 +425,16 @@ async def health():
             "neural_loaded": NEURAL_LOADED,
             "pca_loaded": PCA_LOADED,
             "uptime_s": uptime_s,
-            "license": license_info
+            "ready": READY.is_set(),
+            "license": license_info,
+            "inference": INFERENCE.stats()
         }
         if not license_valid:
             raise HTTPException(status_code=403, detail=f"License validation failed: {license_info.get('error')}")
         return health_data
     else:
-        # v1 mode - return model info
-        from app.routes.models import _discover_model
-        model_data = _discover_model()
+        # v1 mode - return model info (cached manifest, no hashing per probe)
+        model_data = MANIFEST.get().info()
         model_info = f"{model_data['name']} sha256={model_data['sha256'][:16]}... features={model_data['features']} window={model_data['window']}Hz*{model_data['sample_rate_hz']} pca={model_data['pca_dim']}"
         
         return {
@@ -343,7 +444,9 @@ async def health():
             "model": model_info,
             "neural_loaded": False,
             "pca_loaded": False,
-            "uptime_s": uptime_s
+            "uptime_s": uptime_s,
+            "ready": READY.is_set(),
+            "inference": INFERENCE.stats()
         }
 
 
@@ -0,0 +1,142 @@
+"""
+Per-tenant adaptive memory: one AdaptiveMemoryEngine per device/user ID.
+
+A single engine mixes every device's history into one baseline. The
+MemoryManager keeps a separate engine (hourly baselines, ring buffer) per
+tenant, loaded lazily from disk on first use and held in an LRU of at most
+`max_tenants` engines, so memory stays bounded however many devices a node
+serves. An evicted tenant is reloaded from its last 24h of rows on its next
+request.
+
+On disk, tenants are hash-partitioned over `shards` SQLite files
+(shard-00.db, ...; crc32 of the tenant ID, stable across processes). Each
+shard has its own MemoryStore writer thread, so writes to different shards
+never contend for one file lock; rows carry the tenant and are indexed by
+(tenant, timestamp).
+
+Environment:
+    EDON_MEMORY_DIR: Directory of the shard files (default data/memory)
+    EDON_MEMORY_SHARDS: Number of shard files (default 16)
+    EDON_MEMORY_TENANTS: Tenants kept in memory (default 1024)
+    EDON_MEMORY_TENANT_BUFFER: Raw records kept per resident tenant (default 10000)
+"""
+
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.adaptive_memory import AdaptiveMemoryEngine
+from app.memory_store import MemoryStore
+
+
+class MemoryManager:
+    """
+    LRU of per-tenant AdaptiveMemoryEngines over hash-partitioned SQLite shards.
+
+    Args:
+        root: Directory of the shard files
+        shards: Number of shard files
+        max_tenants: Engines kept in memory (least recently used evicted first)
+        buffer_size: Raw records kept per resident tenant
+
+    Example:
+        >>> MEMORY = MemoryManager.from_env()
+        >>> MEMORY.get("robot-7").record(cav_raw, cav_smooth, state, parts, 22.0, 45.0, 20, 14)
+        >>> MEMORY.get("robot-7").get_summary()
+    """
+
+    def __init__(
+        self,
+        root: str = "data/memory",
+        shards: int = 16,
+        max_tenants: int = 1024,
+        buffer_size: int = 10_000,
+    ):
+        self.root = Path(root)
+        self.shards = max(1, int(shards))
+        self.max_tenants = max(1, int(max_tenants))
+        self.buffer_size = int(buffer_size)
+        self._stores: List[Optional[MemoryStore]] = [None] * self.shards
+        self._engines: "OrderedDict[str, AdaptiveMemoryEngine]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: Dict[str, threading.Lock] = {}
+        self.loads = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "MemoryManager":
+        return cls(
+            root=os.getenv("EDON_MEMORY_DIR", "data/memory"),
+            shards=int(os.getenv("EDON_MEMORY_SHARDS", "16")),
+            max_tenants=int(os.getenv("EDON_MEMORY_TENANTS", "1024")),
+            buffer_size=int(os.getenv("EDON_MEMORY_TENANT_BUFFER", "10000")),
+        )
+
+    def shard_of(self, tenant: str) -> int:
+        return zlib.crc32(tenant.encode("utf-8")) % self.shards
+
+    def store(self, shard: int) -> MemoryStore:
+        """The MemoryStore of one shard file (created on first use)."""
+        with self._lock:
+            store = self._stores[shard]
+            if store is None:
+                store = self._stores[shard] = MemoryStore.from_env(str(self.root / f"shard-{shard:02d}.db"))
+            return store
+
+    def get(self, tenant: str) -> AdaptiveMemoryEngine:
+        """The tenant's engine, loading its history on a miss (one load per tenant at a time)."""
+        with self._lock:
+            engine = self._engines.get(tenant)
+            if engine is not None:
+                self._engines.move_to_end(tenant)
+                return engine
+            loading = self._loading.setdefault(tenant, threading.Lock())
+
+        # Load outside the manager lock, so other tenants are not held up
+        with loading:
+            with self._lock:
+                engine = self._engines.get(tenant)
+            if engine is None:
+                store = self.store(self.shard_of(tenant))
+                # Rows of an evicted engine may still be queued: load them too
+                store.flush()
+                engine = AdaptiveMemoryEngine(
+                    db_path=str(store.db_path),
+                    store=store,
+                    buffer_size=self.buffer_size,
+                    tenant=tenant,
+                )
+                with self._lock:
+                    self.loads += 1
+                    self._engines[tenant] = engine
+                    while len(self._engines) > self.max_tenants:
+                        # Its rows are already queued on the shared shard store
+                        self._engines.popitem(last=False)
+                        self.evictions += 1
+                    self._loading.pop(tenant, None)
+        return engine
+
+    def clear(self, tenant: str) -> None:
+        """Clear one tenant's memory (resident engine and database rows)."""
+        self.get(tenant).clear()
+
+    def close(self) -> None:
+        """Write queued rows of every shard and stop their writers."""
+        with self._lock:
+            stores = [store for store in self._stores if store is not None]
+            self._engines.clear()
+        for store in stores:
+            store.close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "resident": len(self._engines),
+                "max_tenants": self.max_tenants,
+                "shards_open": sum(store is not None for store in self._stores),
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,176 @@
+"""
+Per-minute, per-hour and per-day rollups of adaptive-memory rows.
+
+Raw cav_memory rows are kept for a few days; long-horizon questions (30-day
+hour-of-day baselines, weekly trends) are answered from cav_rollup instead.
+Each rollup row aggregates one tenant's records of one time bucket and one
+local hour: count, sum and sum of squares of the smoothed CAV, state counts
+and env sums. The memory writer folds every batch of raw rows into all three
+resolutions in the same transaction (upserts), so rollups never lag the raw
+table. Minute and hour rollups expire after their own horizons; day rollups
+are kept, so disk grows by at most 24 rows per tenant-day.
+
+Queries over an arbitrary [start, end) read only rollups: the range is tiled
+with whole days in the middle, whole hours next to them and minutes at the
+ends (rounded out to whole minutes; ends older than the minute horizon fall
+back to whatever coarser buckets lie fully inside the range).
+"""
+
+import math
+import sqlite3
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.record_ring import STATES
+
+MINUTE, HOUR, DAY = 60, 3600, 86400
+RESOLUTIONS = (MINUTE, HOUR, DAY)
+RESOLUTION_NAMES = {"minute": MINUTE, "hour": HOUR, "day": DAY}
+
+_STATE_COLUMNS = tuple(f"n_{state}" for state in STATES)
+_SUM_COLUMNS = ("n", "cav_sum", "cav_sumsq") + _STATE_COLUMNS + ("temp_c_sum", "humidity_sum", "aqi_sum")
+
+SCHEMA = (
+    f"""
+    CREATE TABLE IF NOT EXISTS cav_rollup (
+        tenant TEXT NOT NULL,
+        resolution INTEGER NOT NULL,
+        start INTEGER NOT NULL,
+        local_hour INTEGER NOT NULL,
+        n INTEGER NOT NULL,
+        cav_sum REAL NOT NULL,
+        cav_sumsq REAL NOT NULL,
+        {", ".join(f"{column} INTEGER NOT NULL" for column in _STATE_COLUMNS)},
+        temp_c_sum REAL NOT NULL,
+        humidity_sum REAL NOT NULL,
+        aqi_sum REAL NOT NULL,
+        PRIMARY KEY (tenant, resolution, start, local_hour)
+    ) WITHOUT ROWID
+    """,
+    # Horizon expiry per resolution
+    "CREATE INDEX IF NOT EXISTS idx_rollup_expiry ON cav_rollup(resolution, start)",
+)
+
+_UPSERT = (
+    f"INSERT INTO cav_rollup (tenant, resolution, start, local_hour, {', '.join(_SUM_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * (4 + len(_SUM_COLUMNS)))}) "
+    "ON CONFLICT (tenant, resolution, start, local_hour) DO UPDATE SET "
+    + ", ".join(f"{column} = {column} + excluded.{column}" for column in _SUM_COLUMNS)
+)
+
+
+def create(conn: sqlite3.Connection) -> None:
+    """Create cav_rollup; a new table is backfilled from the raw rows still on disk."""
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'cav_rollup'").fetchone()
+    for statement in SCHEMA:
+        conn.execute(statement)
+    if exists:
+        return
+    state_sums = ", ".join(f"SUM(state = '{state}')" for state in STATES)
+    for resolution in RESOLUTIONS:
+        conn.execute(
+            f"INSERT INTO cav_rollup (tenant, resolution, start, local_hour, {', '.join(_SUM_COLUMNS)}) "
+            f"SELECT tenant, ?, CAST(timestamp / ? AS INTEGER) * ?, local_hour, COUNT(*), "
+            f"SUM(cav_smooth), SUM(cav_smooth * cav_smooth), {state_sums}, SUM(temp_c), SUM(humidity), SUM(aqi) "
+            "FROM cav_memory GROUP BY 1, 3, 4",
+            (resolution, resolution, resolution),
+        )
+
+
+def add_rows(conn: sqlite3.Connection, rows: Iterable[Tuple]) -> None:
+    """Fold raw rows (app.memory_store.COLUMNS order) into all resolutions."""
+    sums: Dict[Tuple, List[float]] = defaultdict(lambda: [0.0] * len(_SUM_COLUMNS))
+    state_index = {state: 3 + k for k, state in enumerate(STATES)}
+    for timestamp, _, cav, state, _, _, _, _, temp_c, humidity, aqi, local_hour, tenant in rows:
+        for resolution in RESOLUTIONS:
+            acc = sums[(tenant, resolution, int(timestamp // resolution) * resolution, local_hour)]
+            acc[0] += 1
+            acc[1] += cav
+            acc[2] += cav * cav
+            if state in state_index:
+                acc[state_index[state]] += 1
+            acc[-3] += temp_c
+            acc[-2] += humidity
+            acc[-1] += aqi
+    conn.executemany(_UPSERT, [key + tuple(acc) for key, acc in sums.items()])
+
+
+def expire(conn: sqlite3.Connection, now: float, horizons: Dict[int, Optional[float]]) -> int:
+    """Delete rollups older than their resolution's horizon in seconds (None: keep)."""
+    deleted = 0
+    for resolution, horizon in horizons.items():
+        if horizon is not None:
+            deleted += conn.execute(
+                "DELETE FROM cav_rollup WHERE resolution = ? AND start < ?", (resolution, now - horizon)
+            ).rowcount
+    return deleted
+
+
+def tiles(start: float, end: float, resolutions: Sequence[int] = (DAY, HOUR, MINUTE)) -> List[Tuple[int, int, int]]:
+    """Cover [start, end) (rounded out to whole minutes) with (resolution, start, end) bucket ranges."""
+    def split(lo: int, hi: int, levels: Sequence[int]) -> List[Tuple[int, int, int]]:
+        if lo >= hi:
+            return []
+        res, finer = levels[0], levels[1:]
+        if not finer:
+            return [(res, lo, hi)]
+        a, b = -(-lo // res) * res, hi // res * res
+        if a >= b:
+            return split(lo, hi, finer)
+        return split(lo, a, finer) + [(res, a, b)] + split(b, hi, finer)
+
+    if end <= start:
+        return []
+    finest = resolutions[-1]
+    return split(int(start // finest) * finest, int(-(-end // finest)) * finest, resolutions)
+
+
+def _stats(sums: Sequence[Any]) -> Dict[str, Any]:
+    n, cav_sum, cav_sumsq = sums[0], sums[1], sums[2]
+    states = sums[3:3 + len(STATES)]
+    temp_c_sum, humidity_sum, aqi_sum = sums[-3:]
+    if not n:
+        return {"n": 0}
+    var = max(0.0, (cav_sumsq - cav_sum * cav_sum / n) / (n - 1)) if n > 1 else 0.0
+    return {
+        "n": int(n),
+        "cav_mean": cav_sum / n,
+        "cav_var": var,
+        "cav_std": math.sqrt(var),
+        "state_probs": {state: count / n for state, count in zip(STATES, states)},
+        "temp_c": temp_c_sum / n,
+        "humidity": humidity_sum / n,
+        "aqi": aqi_sum / n,
+    }
+
+
+def _tiled(tenant: str, start: float, end: float) -> Tuple[str, List[Any]]:
+    """FROM-clause subquery of the rollup rows tiling [start, end), and its parameters."""
+    parts, params = [], []
+    for resolution, lo, hi in tiles(start, end):
+        parts.append("SELECT * FROM cav_rollup WHERE tenant = ? AND resolution = ? AND start >= ? AND start < ?")
+        params += [tenant, resolution, lo, hi]
+    if not parts:
+        parts.append("SELECT * FROM cav_rollup WHERE 0")
+    return "(" + " UNION ALL ".join(parts) + ")", params
+
+
+def summary(conn: sqlite3.Connection, tenant: str, start: float, end: float, by_hour: bool = False) -> Dict[Any, Any]:
+    """Statistics of [start, end): overall, or per local hour (an hour-of-day baseline)."""
+    source, params = _tiled(tenant, start, end)
+    sums = ", ".join(f"SUM({column})" for column in _SUM_COLUMNS)
+    if not by_hour:
+        return _stats(conn.execute(f"SELECT {sums} FROM {source}", params).fetchone())
+    rows = conn.execute(f"SELECT local_hour, {sums} FROM {source} GROUP BY local_hour", params).fetchall()
+    return {row[0]: _stats(row[1:]) for row in rows}
+
+
+def series(conn: sqlite3.Connection, tenant: str, start: float, end: float, resolution: int) -> List[Dict[str, Any]]:
+    """Per-bucket statistics at one resolution (e.g. day buckets for weekly trends)."""
+    sums = ", ".join(f"SUM({column})" for column in _SUM_COLUMNS)
+    rows = conn.execute(
+        f"SELECT start, {sums} FROM cav_rollup WHERE tenant = ? AND resolution = ? AND start >= ? AND start < ? "
+        "GROUP BY start ORDER BY start",
+        (tenant, resolution, int(start // resolution) * resolution, end),
+    ).fetchall()
+    return [{"start": row[0], **_stats(row[1:])} for row in rows]
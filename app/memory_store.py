@@ -0,0 +1,340 @@
+"""
+SQLite persistence for the Adaptive Memory Engine.
+
+Recording a CAV response must not cost a connection, an fsync and a range
+delete on the request path. MemoryStore keeps one long-lived connection (WAL
+journal, synchronous=NORMAL) owned by a background writer thread: record()
+only enqueues a row, and the writer drains the queue and inserts everything
+waiting in a single transaction. Rows older than the retention period are
+deleted on a timer instead of per record.
+
+The queue is bounded; when the writer falls that far behind, new rows are
+dropped from persistence (counted in stats()) rather than growing memory.
+close() (app shutdown, or interpreter exit) writes everything still queued.
+
+Every written batch is also folded into per-minute/hour/day rollups
+(app.memory_rollups), so raw rows past the retention period are only
+dropped at their original resolution; rollup_summary() and rollup_series()
+answer long-range queries from the rollups alone.
+
+Rows carry a tenant (device/user ID, "" for the single-tenant engine), so
+one database file can hold many tenants' histories; see app.memory_manager
+for hash-partitioning tenants over several files.
+
+Environment:
+    EDON_MEMORY_QUEUE: Rows waiting to be written before new ones are dropped (default 10000)
+    EDON_MEMORY_BATCH: Most rows written per transaction (default 1000)
+    EDON_MEMORY_RETENTION_DAYS: Days of history kept in the database (default 7)
+    EDON_MEMORY_CLEANUP_S: Seconds between retention cleanups (default 600)
+    EDON_MEMORY_MINUTE_ROLLUP_DAYS: Days of per-minute rollups kept (default 30)
+    EDON_MEMORY_HOUR_ROLLUP_DAYS: Days of per-hour rollups kept (default 400; day rollups are kept)
+"""
+
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app import memory_rollups
+
+LOGGER = logging.getLogger(__name__)
+
+COLUMNS = (
+    "timestamp", "cav_raw", "cav_smooth", "state", "parts_bio", "parts_env",
+    "parts_circadian", "parts_p_stress", "temp_c", "humidity", "aqi", "local_hour", "tenant",
+)
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS cav_memory (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp REAL NOT NULL,
+        cav_raw INTEGER NOT NULL,
+        cav_smooth INTEGER NOT NULL,
+        state TEXT NOT NULL,
+        parts_bio REAL NOT NULL,
+        parts_env REAL NOT NULL,
+        parts_circadian REAL NOT NULL,
+        parts_p_stress REAL NOT NULL,
+        temp_c REAL NOT NULL,
+        humidity REAL NOT NULL,
+        aqi INTEGER NOT NULL,
+        local_hour INTEGER NOT NULL,
+        tenant TEXT NOT NULL DEFAULT ''
+    )
+    """,
+    # Index for efficient time-based queries (retention cleanup)
+    "CREATE INDEX IF NOT EXISTS idx_timestamp ON cav_memory(timestamp)",
+    # One tenant's recent history (load_since)
+    "CREATE INDEX IF NOT EXISTS idx_tenant_timestamp ON cav_memory(tenant, timestamp)",
+)
+
+_STOP = object()  # queued by close()
+
+_INSERT = f"INSERT INTO cav_memory ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+
+class _Call:
+    """Work the writer runs in order with the queued rows (flush, clear)."""
+
+    def __init__(self, fn: Callable[[sqlite3.Connection], None]):
+        self.fn = fn
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+
+
+class MemoryStore:
+    """
+    cav_memory table behind a single background writer.
+
+    Args:
+        db_path: SQLite database file
+        max_queue: Rows waiting to be written before new ones are dropped
+        batch_size: Most rows written per transaction
+        retention_s: Rows older than this are deleted by the cleanup timer
+        cleanup_interval_s: Seconds between retention cleanups
+        minute_rollup_s: Per-minute rollups older than this are deleted
+        hour_rollup_s: Per-hour rollups older than this are deleted
+
+    Example:
+        >>> store = MemoryStore("data/memory.db")
+        >>> store.enqueue((time.time(), 5000, 5000, "balanced", 0.5, 0.5, 0.5, 0.2, 22.0, 45.0, 20, 14, "robot-7"))
+        >>> store.close()  # writes whatever is still queued
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_queue: int = 10000,
+        batch_size: int = 1000,
+        retention_s: float = 7 * 24 * 3600,
+        cleanup_interval_s: float = 600.0,
+        minute_rollup_s: float = 30 * 24 * 3600,
+        hour_rollup_s: float = 400 * 24 * 3600,
+    ):
+        self.db_path = Path(db_path)
+        self.batch_size = max(1, int(batch_size))
+        self.retention_s = float(retention_s)
+        self.cleanup_interval_s = float(cleanup_interval_s)
+        self.rollup_horizons = {
+            memory_rollups.MINUTE: float(minute_rollup_s),
+            memory_rollups.HOUR: float(hour_rollup_s),
+            memory_rollups.DAY: None,
+        }
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+        self.written = 0
+        self.transactions = 0
+        self.dropped = 0
+        self.cleaned = 0
+        self._init_database()
+
+    @classmethod
+    def from_env(cls, db_path: str) -> "MemoryStore":
+        return cls(
+            db_path,
+            max_queue=int(os.getenv("EDON_MEMORY_QUEUE", "10000")),
+            batch_size=int(os.getenv("EDON_MEMORY_BATCH", "1000")),
+            retention_s=float(os.getenv("EDON_MEMORY_RETENTION_DAYS", "7")) * 24 * 3600,
+            cleanup_interval_s=float(os.getenv("EDON_MEMORY_CLEANUP_S", "600")),
+            minute_rollup_s=float(os.getenv("EDON_MEMORY_MINUTE_ROLLUP_DAYS", "30")) * 24 * 3600,
+            hour_rollup_s=float(os.getenv("EDON_MEMORY_HOUR_ROLLUP_DAYS", "400")) * 24 * 3600,
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path))
+        # WAL: readers don't block the writer; NORMAL: fsync at checkpoints, not per commit
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _init_database(self) -> None:
+        """Create the schema (once, at startup, on a short-lived connection)."""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute(_SCHEMA[0])
+            # Databases from before tenants: existing rows belong to tenant ""
+            if "tenant" not in {row[1] for row in conn.execute("PRAGMA table_info(cav_memory)")}:
+                conn.execute("ALTER TABLE cav_memory ADD COLUMN tenant TEXT NOT NULL DEFAULT ''")
+            for statement in _SCHEMA[1:]:
+                conn.execute(statement)
+            memory_rollups.create(conn)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def load_since(self, cutoff: float, columns: Sequence[str] = COLUMNS, tenant: str = "") -> List[Tuple]:
+        """A tenant's rows with timestamp >= cutoff, oldest first; `columns` are SQL expressions to select."""
+        conn = self._connect()
+        try:
+            return conn.execute(
+                f"SELECT {', '.join(columns)} FROM cav_memory WHERE tenant = ? AND timestamp >= ? ORDER BY timestamp ASC",
+                (tenant, cutoff),
+            ).fetchall()
+        finally:
+            conn.close()
+
+    def rollup_summary(self, start: float, end: float, tenant: str = "", by_hour: bool = False) -> Dict[Any, Any]:
+        """
+        Statistics of [start, end) read from rollups only (committed rows).
+
+        Returns:
+            {n, cav_mean, cav_var, cav_std, state_probs, temp_c, humidity, aqi}
+            ({n: 0} without data), or with by_hour one such dict per local hour
+        """
+        conn = self._connect()
+        try:
+            return memory_rollups.summary(conn, tenant, start, end, by_hour=by_hour)
+        finally:
+            conn.close()
+
+    def rollup_series(self, start: float, end: float, resolution: int, tenant: str = "") -> List[Dict[str, Any]]:
+        """Per-bucket statistics of [start, end) at a resolution (memory_rollups.MINUTE/HOUR/DAY)."""
+        conn = self._connect()
+        try:
+            return memory_rollups.series(conn, tenant, start, end, resolution)
+        finally:
+            conn.close()
+
+    def _ensure_started(self) -> None:
+        # Started lazily so no thread exists when the inference pool forks
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="memory-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def enqueue(self, row: Tuple) -> bool:
+        """
+        Queue one row (COLUMNS order) for the writer without blocking.
+
+        Returns:
+            False if the row was dropped (queue full or store closed)
+        """
+        if self._closed:
+            self.dropped += 1
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(row)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _call(self, fn: Callable[[sqlite3.Connection], None], timeout: Optional[float]) -> bool:
+        if self._closed:
+            raise RuntimeError("memory store is closed")
+        self._ensure_started()
+        call = _Call(fn)
+        self._queue.put(call)  # blocks while full: never dropped
+        if not call.done.wait(timeout):
+            return False
+        if call.error is not None:
+            raise call.error
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every row queued so far is committed (False on timeout)."""
+        return self._call(lambda conn: None, timeout)
+
+    def clear(self, tenant: Optional[str] = None) -> None:
+        """Delete all rows (or one tenant's), including rows queued before this call."""
+        def delete(conn: sqlite3.Connection) -> None:
+            for table in ("cav_memory", "cav_rollup"):
+                if tenant is None:
+                    conn.execute(f"DELETE FROM {table}")
+                else:
+                    conn.execute(f"DELETE FROM {table} WHERE tenant = ?", (tenant,))
+            conn.commit()
+        self._call(delete, None)
+
+    def close(self) -> None:
+        """Write the rows still queued, then stop the writer and close its connection."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "transactions": self.transactions,
+            "dropped": self.dropped,
+            "cleaned": self.cleaned,
+        }
+
+    def _cleanup(self, conn: sqlite3.Connection) -> None:
+        cutoff = time.time() - self.retention_s
+        self.cleaned += conn.execute("DELETE FROM cav_memory WHERE timestamp < ?", (cutoff,)).rowcount
+        # Older history survives in the coarser rollups
+        memory_rollups.expire(conn, time.time(), self.rollup_horizons)
+        conn.commit()
+
+    def _write(self, conn: sqlite3.Connection, rows: List[Tuple]) -> None:
+        try:
+            with conn:  # one transaction per batch, rollups included
+                conn.executemany(_INSERT, rows)
+                memory_rollups.add_rows(conn, rows)
+            self.written += len(rows)
+            self.transactions += 1
+        except sqlite3.Error:
+            LOGGER.exception(f"[EDON] memory writer: lost {len(rows)} rows")
+
+    def _collect(self, item: Any) -> Tuple[List[Tuple], Any]:
+        """Rows waiting from `item` on (at most batch_size), and the _Call/_STOP that ended them."""
+        rows: List[Tuple] = []
+        while not (item is _STOP or isinstance(item, _Call)):
+            rows.append(item)
+            if len(rows) >= self.batch_size:
+                return rows, None
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return rows, None
+        return rows, item
+
+    def _run(self) -> None:
+        conn = self._connect()
+        next_cleanup = time.monotonic()
+        try:
+            while True:
+                if time.monotonic() >= next_cleanup:
+                    try:
+                        self._cleanup(conn)
+                    except sqlite3.Error:
+                        LOGGER.exception("[EDON] memory writer: retention cleanup failed")
+                    next_cleanup = time.monotonic() + self.cleanup_interval_s
+                try:
+                    item = self._queue.get(timeout=max(0.0, next_cleanup - time.monotonic()))
+                except queue.Empty:
+                    continue
+
+                # Everything already waiting goes into the same transaction
+                rows, control = self._collect(item)
+                if rows:
+                    self._write(conn, rows)
+                if control is _STOP:
+                    return
+                if control is not None:
+                    try:
+                        control.fn(conn)
+                    except BaseException as e:
+                        control.error = e
+                    control.done.set()
+        finally:
+            conn.close()
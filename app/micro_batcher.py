@@ -0,0 +1,161 @@
+"""
+Dynamic micro-batching for concurrent scoring requests.
+
+Many clients each sending one window means the model almost always sees a
+batch of one. A MicroBatcher sits between the routes and the engine: callers
+submit a job and block on its future; a dispatcher thread collects jobs until
+the oldest has waited `max_delay_ms` or `max_batch` rows are queued, then hands
+the whole list to `process` in one call and routes each result back.
+
+Jobs are passed to `process` in submission order, so a process function that
+applies per-session state job by job (EMA, hysteresis) sees every session's
+requests in the order they arrived.
+
+Configured per route with EDON_MICROBATCH_MS (0 disables, default) and
+EDON_MICROBATCH_MAX (max rows per model call, default 256).
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Generic, List, Optional, Tuple, TypeVar, Union
+
+LOGGER = logging.getLogger(__name__)
+
+J = TypeVar("J")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[J, R]):
+    """
+    Coalesce jobs from concurrent callers into one `process` call.
+
+    Args:
+        process: Called with a list of jobs (submission order); returns one
+            result per job. A returned Exception instance fails only that job;
+            a raised exception fails the whole batch.
+        max_delay_ms: Longest time the first job of a batch waits for company
+        max_batch: Stop collecting once this many rows are queued
+        rows: Rows contributed by a job (default 1 per job)
+
+    Example:
+        >>> batcher = MicroBatcher(score_jobs, max_delay_ms=2.0, rows=lambda j: len(j.features))
+        >>> result = batcher.submit(job).result()
+    """
+
+    def __init__(
+        self,
+        process: Callable[[List[J]], List[Union[R, Exception]]],
+        max_delay_ms: float = 2.0,
+        max_batch: int = 256,
+        rows: Optional[Callable[[J], int]] = None,
+        name: str = "microbatch",
+    ):
+        self.process = process
+        self.max_delay_s = max(0.0, float(max_delay_ms)) / 1000.0
+        self.max_batch = max(1, int(max_batch))
+        self.rows = rows or (lambda job: 1)
+        self.name = name
+        self._queue: "queue.Queue[Tuple[J, Future]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+        self._batches = 0
+        self._jobs = 0
+        self._rows = 0
+
+    @classmethod
+    def from_env(
+        cls,
+        process: Callable[[List[J]], List[Union[R, Exception]]],
+        rows: Optional[Callable[[J], int]] = None,
+        name: str = "microbatch",
+    ) -> Optional["MicroBatcher[J, R]"]:
+        """Batcher configured from EDON_MICROBATCH_MS / EDON_MICROBATCH_MAX, or None if disabled."""
+        delay_ms = float(os.getenv("EDON_MICROBATCH_MS", "0"))
+        if delay_ms <= 0:
+            return None
+        max_batch = int(os.getenv("EDON_MICROBATCH_MAX", "256"))
+        return cls(process, max_delay_ms=delay_ms, max_batch=max_batch, rows=rows, name=name)
+
+    def _ensure_started(self) -> None:
+        # Started lazily so no thread exists when the inference pool forks
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def submit(self, job: J) -> "Future[R]":
+        """Queue a job; the returned future resolves once its batch is processed."""
+        if self._closed:
+            raise RuntimeError(f"{self.name} is closed")
+        fut: "Future[R]" = Future()
+        self._ensure_started()
+        self._queue.put((job, fut))
+        return fut
+
+    def close(self) -> None:
+        """Stop the dispatcher after the jobs already queued are processed."""
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(None)  # type: ignore[arg-type]
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "batches": self._batches,
+            "jobs": self._jobs,
+            "rows": self._rows,
+            "mean_batch_rows": self._rows / self._batches if self._batches else 0.0,
+        }
+
+    def _collect(self, first: Tuple[J, Future]) -> Tuple[List[Tuple[J, Future]], bool]:
+        batch = [first]
+        rows = self.rows(first[0])
+        deadline = time.monotonic() + self.max_delay_s
+        while rows < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+            rows += self.rows(item[0])
+        return batch, False
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch, stop = self._collect(first)
+            # Skip jobs whose callers have already given up
+            batch = [(job, fut) for job, fut in batch if fut.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            self._batches += 1
+            self._jobs += len(batch)
+            self._rows += sum(self.rows(job) for job, _ in batch)
+            try:
+                results = self.process([job for job, _ in batch])
+            except Exception as e:
+                LOGGER.exception(f"[EDON] {self.name}: batch of {len(batch)} failed")
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+
+            for (_, fut), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    fut.set_exception(result)
+                else:
+                    fut.set_result(result)
@@ -0,0 +1,206 @@
+"""
+Cached model manifest: what model is being served, fingerprinted once.
+
+Discovery globs directories and the fingerprint is a SHA-256 over the whole
+model file, both far too expensive for liveness probes. MANIFEST computes them
+on first use and afterwards only stat()s the model file: the manifest is
+rebuilt when its mtime or size changes (or the file disappears).
+
+/health, /models/info and the v2 gRPC Health RPC all read MANIFEST.get().
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from app.engine import V32_FEATURE_NAMES, WINDOW_LEN
+
+ROOT = Path(__file__).resolve().parents[1]
+MODEL_NAME = "cav_state_v3_2.joblib"
+SCHEMA_NAME = "cav_state_schema_v3_2.json"
+SAMPLE_RATE_HZ = 4
+PCA_DIM = 128
+
+# How often to retry discovery when no model file was found
+_REDISCOVER_S = 30.0
+
+
+def _sha256_file(p: Path) -> str:
+    h = hashlib.sha256()
+    with p.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+@dataclass(frozen=True)
+class ModelManifest:
+    """Fingerprint and shape metadata of the served model."""
+
+    name: str = "cav_engine"
+    sha256: str = "unknown"
+    path: Optional[str] = None
+    size: int = 0
+    mtime: float = 0.0
+    features: int = len(V32_FEATURE_NAMES)
+    feature_names: Tuple[str, ...] = tuple(V32_FEATURE_NAMES)
+    window: int = WINDOW_LEN
+    sample_rate_hz: int = SAMPLE_RATE_HZ
+    pca_dim: int = PCA_DIM
+    classes: Tuple[int, ...] = (0, 1, 2, 3)
+    built_at: float = field(default_factory=time.time)
+
+    def info(self) -> Dict[str, Any]:
+        """JSON-ready dict (superset of the historical /models/info payload)."""
+        out = asdict(self)
+        out["feature_names"] = list(self.feature_names)
+        out["classes"] = list(self.classes)
+        return out
+
+
+def _hashes_line(path: Path) -> Optional[Tuple[str, str]]:
+    """(name, sha256) from the first line of a HASHES.txt, if well-formed."""
+    try:
+        line = path.read_text().splitlines()[0].strip()
+    except Exception:
+        return None
+    if line and not line.startswith("#"):
+        parts = line.split()
+        if len(parts) >= 2:
+            return Path(parts[0]).stem, parts[-1]
+    return None
+
+
+def _discover() -> Tuple[str, Optional[Path], Optional[str]]:
+    """
+    Locate the served model: (name, model file or None, known sha256 or None).
+
+    The artifact the engine actually loads (EDON_MODEL_DIR, ./models,
+    cav_engine_v3_2_*) wins; otherwise fall back to the historical search
+    order: v3.2 model dirs, HASHES.txt files, then any model file.
+    """
+    from app.engine_loader_patch import _find_artifact
+
+    try:
+        return "cav_state_v3_2", _find_artifact(MODEL_NAME), None
+    except FileNotFoundError:
+        pass
+
+    base_paths = [Path("."), ROOT]
+    for base in base_paths:
+        for v32_dir in base.glob("cav_engine_v3_2_*"):
+            model_file = v32_dir / MODEL_NAME
+            if v32_dir.is_dir() and model_file.exists():
+                return "cav_state_v3_2", model_file, None
+
+    models_dir = next((b / "models" for b in base_paths if (b / "models").exists()), None)
+    if models_dir is None:
+        return "cav_engine", None, None
+
+    subdirs = [d for d in models_dir.iterdir() if d.is_dir()]
+    for subdir in subdirs:
+        if "v3_2" in subdir.name.lower():
+            for ext in (".joblib", ".pkl"):
+                for f in subdir.glob(f"cav_state_v3_2{ext}"):
+                    return "cav_state_v3_2", f, None
+
+    for hashes in [d / "HASHES.txt" for d in subdirs] + [models_dir / "HASHES.txt"]:
+        if hashes.exists():
+            entry = _hashes_line(hashes)
+            if entry:
+                return entry[0], None, entry[1]
+
+    exts = (".pkl", ".bin", ".onnx", ".pt", ".joblib")
+    for subdir in subdirs:
+        for ext in exts:
+            for f in subdir.glob(f"*{ext}"):
+                if "embedder" not in f.stem.lower():  # Prefer non-embedder models
+                    return f.stem, f, None
+    for ext in exts:
+        for f in models_dir.glob(f"*{ext}"):
+            return f.stem, f, None
+    return "cav_engine", None, None
+
+
+def _feature_names(model_path: Optional[Path]) -> Tuple[str, ...]:
+    """Feature names from the schema next to the model (V32 order if absent)."""
+    if model_path is not None:
+        schema_path = model_path.with_name(SCHEMA_NAME)
+        if schema_path.exists():
+            try:
+                with open(schema_path, "r", encoding="utf-8") as f:
+                    names = json.load(f).get("feature_names")
+                if names:
+                    return tuple(names)
+            except Exception:
+                pass
+    return tuple(V32_FEATURE_NAMES)
+
+
+def build_manifest() -> ModelManifest:
+    """Discover and fingerprint the model (expensive: hashes the whole file)."""
+    name, path, sha = _discover()
+    if path is None:
+        return ModelManifest(name=name, sha256=sha or "unknown")
+    st = path.stat()
+    names = _feature_names(path)
+    return ModelManifest(
+        name=name,
+        sha256=sha or _sha256_file(path),
+        path=str(path),
+        size=st.st_size,
+        mtime=st.st_mtime,
+        features=len(names),
+        feature_names=names,
+    )
+
+
+class ManifestCache:
+    """Thread-safe manifest cache invalidated by the model file's mtime/size."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._manifest: Optional[ModelManifest] = None
+        self._key: Optional[Tuple[int, int]] = None
+
+    @staticmethod
+    def _stat_key(path: Optional[str]) -> Optional[Tuple[int, int]]:
+        if path is None:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _fresh(self, manifest: ModelManifest) -> bool:
+        if manifest.path is None:
+            return time.time() - manifest.built_at < _REDISCOVER_S
+        key = self._stat_key(manifest.path)
+        return key is not None and key == self._key
+
+    def get(self) -> ModelManifest:
+        """Current manifest; one stat() when cached, a rebuild when stale."""
+        manifest = self._manifest
+        if manifest is not None and self._fresh(manifest):
+            return manifest
+        with self._lock:
+            manifest = self._manifest
+            if manifest is None or not self._fresh(manifest):
+                manifest = build_manifest()
+                self._key = self._stat_key(manifest.path)
+                self._manifest = manifest
+            return manifest
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._manifest = None
+            self._key = None
+
+
+MANIFEST = ManifestCache()
@@ -87,4 +87,13 @@ class TelemetryResponse(BaseModel):
     request_count: int = Field(..., description="Total number of requests processed")
     avg_latency_ms: float = Field(..., description="Average latency in milliseconds")
     uptime_seconds: float = Field(..., description="Server uptime in seconds")
+    routes: Dict[str, Dict[str, float]] = Field(
+        default_factory=dict,
+        description="Per-route latency: count, mean_ms, p50_ms, p95_ms, p99_ms"
+    )
+    stages: Dict[str, Dict[str, float]] = Field(
+        default_factory=dict,
+        description="Per-stage latency (decode, validate, featurize, scale, predict, pca, "
+                    "neural_head, serialize, queue, pool): count, mean_ms, p50_ms, p95_ms, p99_ms"
+    )
 
@@ -0,0 +1,154 @@
+"""
+Fixed-size ring buffer of adaptive-memory records in a NumPy structured array.
+
+A record as a nested dict costs 1-2 KB; as a RECORD_DTYPE row it costs 40
+bytes, so an engine can keep days of history per device. State is stored as
+a uint8 code (STATES order; UNKNOWN_STATE for anything else), parts and
+environment as float32. Time-range queries are vectorized masks over the
+timestamp column; dicts are only built at API boundaries (get/iteration).
+
+Example:
+    >>> ring = RecordRing(100_000)
+    >>> ring.append(time.time(), 5000, "focus", {"bio": 0.4}, 22.0, 45.0, 20, 14)
+    >>> recent = ring.since(time.time() - 6 * 3600)   # structured array
+    >>> (recent["aqi"] > 100).mean()
+"""
+
+from typing import Any, Dict, Iterator, Optional
+
+import numpy as np
+
+STATES = ('overload', 'balanced', 'focus', 'restorative')
+STATE_CODES = {state: code for code, state in enumerate(STATES)}
+UNKNOWN_STATE = 255
+
+PARTS = ('bio', 'env', 'circadian', 'p_stress')
+
+RECORD_DTYPE = np.dtype([
+    ('timestamp', '<f8'),
+    ('cav', '<i4'),
+    ('state', 'u1'),
+    ('local_hour', 'u1'),
+    ('aqi', '<i2'),
+    ('parts_bio', '<f4'),
+    ('parts_env', '<f4'),
+    ('parts_circadian', '<f4'),
+    ('parts_p_stress', '<f4'),
+    ('temp_c', '<f4'),
+    ('humidity', '<f4'),
+])
+
+
+def encode_state(state: str) -> int:
+    return STATE_CODES.get(state, UNKNOWN_STATE)
+
+
+def decode_state(code: int) -> str:
+    return STATES[code] if code < len(STATES) else 'unknown'
+
+
+def to_dict(row: np.void) -> Dict[str, Any]:
+    """One RECORD_DTYPE row in the AdaptiveMemoryEngine record layout."""
+    return {
+        'timestamp': float(row['timestamp']),
+        'cav': int(row['cav']),
+        'state': decode_state(int(row['state'])),
+        'parts': {name: float(row[f'parts_{name}']) for name in PARTS},
+        'temp_c': float(row['temp_c']),
+        'humidity': float(row['humidity']),
+        'aqi': int(row['aqi']),
+        'local_hour': int(row['local_hour']),
+    }
+
+
+class RecordRing:
+    """
+    The newest `capacity` records, oldest overwritten first.
+
+    Records are expected in (roughly) increasing timestamp order; since()
+    masks on the timestamp column, so out-of-order rows are still handled.
+
+    Args:
+        capacity: Records kept (40 bytes each)
+    """
+
+    def __init__(self, capacity: int = 100_000):
+        self.capacity = max(1, int(capacity))
+        # np.zeros: pages are only committed as the ring fills
+        self._data = np.zeros(self.capacity, dtype=RECORD_DTYPE)
+        self._next = 0  # slot the next record goes to
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(
+        self,
+        timestamp: float,
+        cav: int,
+        state: str,
+        parts: Dict[str, float],
+        temp_c: float,
+        humidity: float,
+        aqi: int,
+        local_hour: int,
+    ) -> None:
+        self._data[self._next] = (
+            timestamp, cav, encode_state(state), local_hour, aqi,
+            parts.get('bio', 0.0), parts.get('env', 0.0),
+            parts.get('circadian', 0.0), parts.get('p_stress', 0.0),
+            temp_c, humidity,
+        )
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def extend(self, rows: np.ndarray) -> None:
+        """Append a RECORD_DTYPE array (oldest first) with one copy per wrap."""
+        rows = np.asarray(rows, dtype=RECORD_DTYPE)[-self.capacity:]
+        n = len(rows)
+        first = min(n, self.capacity - self._next)
+        self._data[self._next:self._next + first] = rows[:first]
+        self._data[:n - first] = rows[first:]
+        self._next = (self._next + n) % self.capacity
+        self._size = min(self._size + n, self.capacity)
+
+    def array(self) -> np.ndarray:
+        """All records, oldest first (a view when the ring has not wrapped)."""
+        if self._size < self.capacity:
+            return self._data[:self._size]
+        return np.concatenate((self._data[self._next:], self._data[:self._next]))
+
+    def time_mask(self, start: Optional[float] = None, end: Optional[float] = None) -> np.ndarray:
+        """Boolean mask over array() of records with start <= timestamp < end."""
+        timestamps = self.array()['timestamp']
+        mask = np.ones(len(timestamps), dtype=bool)
+        if start is not None:
+            mask &= timestamps >= start
+        if end is not None:
+            mask &= timestamps < end
+        return mask
+
+    def since(self, start: float) -> np.ndarray:
+        """Records with timestamp >= start, oldest first."""
+        records = self.array()
+        return records[records['timestamp'] >= start]
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        """Record `index` (oldest first; negative from the newest) as a dict."""
+        if not -self._size <= index < self._size:
+            raise IndexError("record index out of range")
+        if index < 0:
+            index += self._size
+        start = self._next if self._size == self.capacity else 0
+        return to_dict(self._data[(start + index) % self.capacity])
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return (to_dict(row) for row in self.array())
+
+    def clear(self) -> None:
+        self._next = 0
+        self._size = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self._data.nbytes
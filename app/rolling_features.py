@@ -0,0 +1,238 @@
+"""Rolling-window featurizer for continuous sensor streams.
+
+Keeps the last WINDOW_LEN samples of the six engine signals in a ring buffer
+and maintains running statistics for the six v3.2 model features, so each new
+sample costs O(1) instead of recomputing compute_window_features() over the
+whole 240-sample window. Values match compute_window_features() on the same
+window (non-finite samples are skipped exactly as there).
+"""
+
+import math
+from collections import deque
+from typing import Deque, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.engine import SIGNAL_KEYS, V32_FEATURE_NAMES, WINDOW_LEN
+
+_EDA, _TEMP, _BVP, _ACC_X, _ACC_Y, _ACC_Z = range(len(SIGNAL_KEYS))
+
+
+class _RunningStats:
+    """Welford mean/variance with removal (population variance, like np.var)."""
+
+    __slots__ = ("n", "mean", "m2")
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x: float) -> None:
+        self.n += 1
+        d = x - self.mean
+        self.mean += d / self.n
+        self.m2 += d * (x - self.mean)
+
+    def remove(self, x: float) -> None:
+        if self.n <= 1:
+            self.n, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        self.n -= 1
+        d = x - self.mean
+        self.mean -= d / self.n
+        self.m2 -= d * (x - self.mean)
+
+    def reset(self, values: np.ndarray) -> None:
+        self.n = int(values.size)
+        self.mean = float(np.mean(values)) if self.n else 0.0
+        self.m2 = float(np.var(values)) * self.n if self.n else 0.0
+
+    @property
+    def var(self) -> float:
+        return max(self.m2, 0.0) / self.n if self.n else 0.0
+
+
+class RollingWindowFeaturizer:
+    """
+    O(1)-per-sample featurizer over a sliding window.
+
+    Args:
+        window_len: Samples per window (default WINDOW_LEN = 240, 60 s @ 4 Hz)
+        hop: Emit features every `hop` samples once the window is full
+        resync_every: Recompute the running stats exactly from the buffer after
+            this many samples to cancel floating-point drift (amortized O(1))
+
+    Example:
+        >>> roller = RollingWindowFeaturizer(hop=4)
+        >>> for features, valid, _ in roller.extend(samples):   # samples: (k, 6)
+        ...     engine.cav_from_features(features)
+    """
+
+    def __init__(self, window_len: int = WINDOW_LEN, hop: int = 1, resync_every: Optional[int] = None):
+        if window_len < 2:
+            raise ValueError("window_len must be >= 2")
+        self.window_len = int(window_len)
+        self.hop = max(1, int(hop))
+        self.resync_every = int(resync_every or 16 * self.window_len)
+        self.reset()
+
+    def reset(self) -> None:
+        self._buf = np.full((self.window_len, len(SIGNAL_KEYS)), np.nan)
+        self._head = 0  # next write slot (== oldest sample once full)
+        self._count = 0
+        self._seen = 0
+        self._since_emit = 0
+        self._since_resync = 0
+        self._missing = 0  # non-finite values across all six channels in the window
+
+        self._eda = _RunningStats()
+        self._bvp = _RunningStats()
+        self._acc = _RunningStats()
+        self._diff = _RunningStats()
+        self._diff_pos = 0
+        # Finite EDA values in window order; consecutive pairs define the diffs
+        self._eda_finite: Deque[float] = deque()
+
+    # ------------------------------------------------------------------ state
+
+    @property
+    def ready(self) -> bool:
+        """True once a full window has been collected."""
+        return self._count == self.window_len
+
+    @property
+    def samples_seen(self) -> int:
+        return self._seen
+
+    @property
+    def valid(self) -> bool:
+        """Same >20% missing-data guard the engine applies to raw windows."""
+        return self._missing <= len(SIGNAL_KEYS) * self.window_len * 0.2
+
+    # ----------------------------------------------------------------- update
+
+    @staticmethod
+    def _acc_mag(row: List[float]) -> float:
+        x, y, z = row[_ACC_X], row[_ACC_Y], row[_ACC_Z]
+        return math.sqrt(x * x + y * y + z * z)
+
+    # Scalar math on Python floats: far cheaper per sample than NumPy scalars
+    def _evict(self, row: List[float]) -> None:
+        self._missing -= sum(1 for v in row if not math.isfinite(v))
+        if math.isfinite(row[_EDA]):
+            old = self._eda_finite.popleft()
+            self._eda.remove(old)
+            if self._eda_finite:
+                d = self._eda_finite[0] - old
+                self._diff.remove(d)
+                self._diff_pos -= d > 0
+        if math.isfinite(row[_BVP]):
+            self._bvp.remove(row[_BVP])
+        mag = self._acc_mag(row)
+        if math.isfinite(mag):
+            self._acc.remove(mag)
+
+    def _admit(self, row: List[float]) -> None:
+        self._missing += sum(1 for v in row if not math.isfinite(v))
+        eda = row[_EDA]
+        if math.isfinite(eda):
+            if self._eda_finite:
+                d = eda - self._eda_finite[-1]
+                self._diff.add(d)
+                self._diff_pos += d > 0
+            self._eda_finite.append(eda)
+            self._eda.add(eda)
+        if math.isfinite(row[_BVP]):
+            self._bvp.add(row[_BVP])
+        mag = self._acc_mag(row)
+        if math.isfinite(mag):
+            self._acc.add(mag)
+
+    def _resync(self) -> None:
+        """Recompute all running stats exactly from the buffer."""
+        window = self.window()
+        eda = window[:, _EDA][np.isfinite(window[:, _EDA])]
+        bvp = window[:, _BVP][np.isfinite(window[:, _BVP])]
+        mag = np.sqrt(window[:, _ACC_X] ** 2 + window[:, _ACC_Y] ** 2 + window[:, _ACC_Z] ** 2)
+        mag = mag[np.isfinite(mag)]
+        diff = np.diff(eda)
+        self._eda.reset(eda)
+        self._bvp.reset(bvp)
+        self._acc.reset(mag)
+        self._diff.reset(diff)
+        self._diff_pos = int(np.count_nonzero(diff > 0))
+        self._eda_finite = deque(eda.tolist())
+        self._since_resync = 0
+
+    def push(self, sample: Sequence[float]) -> bool:
+        """
+        Add one sample (EDA, TEMP, BVP, ACC_x, ACC_y, ACC_z).
+
+        Returns True when the window is full and a hop boundary was reached,
+        i.e. when the caller should score features().
+        """
+        row = [float(v) for v in sample]
+        if len(row) != len(SIGNAL_KEYS):
+            raise ValueError(f"sample must have {len(SIGNAL_KEYS)} values ordered as {SIGNAL_KEYS}")
+        if self._count == self.window_len:
+            self._evict(self._buf[self._head].tolist())
+        else:
+            self._count += 1
+        self._buf[self._head] = row
+        self._head = (self._head + 1) % self.window_len
+        self._admit(row)
+
+        self._seen += 1
+        self._since_resync += 1
+        if self._since_resync >= self.resync_every:
+            self._resync()
+
+        if not self.ready:
+            return False
+        self._since_emit += 1
+        if self._since_emit >= self.hop or self._seen == self.window_len:
+            self._since_emit = 0
+            return True
+        return False
+
+    def extend(self, samples) -> List[Tuple[np.ndarray, bool, int]]:
+        """
+        Add a (k, 6) block of samples.
+
+        Returns:
+            List of (features, valid, samples_seen) for every hop boundary
+            reached in the block
+        """
+        block = np.asarray(samples, dtype=float).reshape(-1, len(SIGNAL_KEYS))
+        out = []
+        for row in block.tolist():
+            if self.push(row):
+                out.append((self.features(), self.valid, self._seen))
+        return out
+
+    # ----------------------------------------------------------------- output
+
+    def window(self) -> np.ndarray:
+        """Current window in time order, shape (n, 6)."""
+        if self._count < self.window_len:
+            return self._buf[: self._count].copy()
+        return np.roll(self._buf, -self._head, axis=0)
+
+    def features(self) -> np.ndarray:
+        """Current features in V32_FEATURE_NAMES order."""
+        has_diff = self._diff.n > 0
+        return np.array(
+            [
+                self._eda.mean if self._eda.n else 0.0,
+                math.sqrt(self._diff.var) if has_diff else 0.0,
+                self._diff_pos / self._diff.n if has_diff else 0.5,
+                math.sqrt(self._bvp.var) if self._bvp.n else 0.0,
+                self._acc.mean if self._acc.n else 0.0,
+                self._acc.var if self._acc.n else 0.0,
+            ],
+            dtype=float,
+        )
+
+    def feature_map(self) -> dict:
+        return dict(zip(V32_FEATURE_NAMES, self.features().tolist()))
@@ -1,13 +1,23 @@
 """Batch CAV computation routes."""
 
+import json
 import os
 import time
-import threading
-from typing import Any, Dict, List
-from fastapi import APIRouter, HTTPException, Body
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from fastapi import APIRouter, HTTPException, Header, Request, Response
 from app.models import BatchResponse, BatchResponseItem
-from app.engine import CAVEngine, STRESS_LABEL
-from app.utils.feature_ingest import looks_raw, featurize_raw, normalize_feature_map
+from app.engine import CAVEngine, EngineSession, STRESS_LABEL, SIGNAL_KEYS, WINDOW_LEN
+from app.admission import INFERENCE
+from app.binary_codec import MEDIA_TYPE, FrameError, decode_frame, encode_frame, is_frame, wants_frame
+from app.inference_pool import InferencePool
+from app.latency import observe_stage, stage
+from app.micro_batcher import MicroBatcher
+from app.session_store import DEFAULT_SESSION_ID, SessionStore
+from app.utils.feature_ingest import (
+    feature_overlap, looks_raw, normalize_feature_map, normalize_to_engine_format
+)
 from app import __version__
 import logging
 from time import gmtime, strftime
@@ -25,16 +35,88 @@ router = APIRouter(prefix="/oem/cav/batch", tags=["Batch"])
 
 ENGINE = CAVEngine(stress_label=STRESS_LABEL)  # ensure we're not re-creating this per request
 
-EXPECTED = ["eda_mean", "eda_std", "bvp_mean", "bvp_std", "acc_mean", "acc_std"]
+# The engine's model/scaler/schema are shared and read-only. EMA + hysteresis
+# state is kept per session_id, so different devices never share smoothing
+# and only requests for the same session serialize on that session's lock.
+SESSIONS: SessionStore[EngineSession] = SessionStore(EngineSession)
 
-# Note: For batch processing, we use a shared engine instance
-# The engine maintains EMA state, so we need thread safety for concurrent requests
-# Using a lock to ensure thread-safe access to the engine
-_engine_lock = threading.Lock()
+# Worker pool for featurization + predict_proba; set by main.py when
+# EDON_INFERENCE_WORKERS > 0 (None: score in-process)
+POOL: Optional[InferencePool] = None
 
 LOGGER = logging.getLogger(__name__)
 RELAXED_GUARD = os.getenv("EDON_RELAXED_GUARD", "0") == "1"
 
+# Column order of the "parts" array in binary responses
+PARTS_KEYS = ("bio", "env", "circadian", "p_stress")
+
+
+@dataclass
+class _ScoreJob:
+    """Rows of one request that passed parsing, ready for the model."""
+    session_id: str
+    features: np.ndarray            # (n, n_features); raw rows are placeholders
+    valid: np.ndarray               # (n,)
+    raw_index: List[int]            # rows filled from `raw`
+    raw: Optional[np.ndarray]       # (len(raw_index), 6, WINDOW_LEN)
+    env: Dict[str, List[Any]]       # per-row temp_c/humidity/aqi/local_hour
+
+
+def _predict_rows(jobs: List[_ScoreJob], offsets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Featurize + model over all jobs' rows at once: (valid, p_stress)."""
+    features = np.concatenate([j.features for j in jobs])
+    valid = np.concatenate([j.valid for j in jobs])
+    raw_index = [off + i for j, off in zip(jobs, offsets) for i in j.raw_index]
+    raws = [j.raw for j in jobs if j.raw is not None]
+    raw = np.concatenate(raws) if raws else None
+
+    if POOL is not None and POOL.running:
+        features, valid, p_stress = POOL.featurize_predict(features, valid, raw_index, raw)
+    else:
+        if raw is not None:
+            features[raw_index], valid[raw_index] = ENGINE.featurize_windows(raw)
+        p_stress = ENGINE.predict_p_stress(features, valid)
+    return valid, p_stress
+
+
+def _score_jobs(jobs: List[_ScoreJob]) -> List[Any]:
+    """
+    Score one or more requests with a single featurize + model call.
+
+    The stateless half runs once over all rows (in the worker pool when one is
+    configured); fusion + EMA then run job by job in submission order, each
+    under its own session lock. Returns a result list (or Exception) per job.
+    If the shared step fails for coalesced jobs, each job is retried on its
+    own, so one bad request only fails itself.
+    """
+    offsets = np.cumsum([0] + [len(j.features) for j in jobs])
+    try:
+        valid, p_stress = _predict_rows(jobs, offsets)
+    except Exception as e:
+        if len(jobs) == 1:
+            return [e]
+        return [_score_jobs([job])[0] for job in jobs]
+
+    out: List[Any] = []
+    for job, a, b in zip(jobs, offsets[:-1], offsets[1:]):
+        try:
+            with SESSIONS.acquire(job.session_id) as session:
+                out.append(
+                    ENGINE.cav_from_p_stress_batch(
+                        p_stress[a:b], valid=valid[a:b], session=session, **job.env
+                    )
+                )
+        except Exception as e:
+            out.append(e)
+    return out
+
+
+# Coalesces windows from concurrent requests into one model call when
+# EDON_MICROBATCH_MS > 0 (None: each request is scored on its own)
+BATCHER: Optional[MicroBatcher[_ScoreJob, Any]] = MicroBatcher.from_env(
+    _score_jobs, rows=lambda job: len(job.features), name="cav-batch"
+)
+
 
 def _guard_features_when_needed(fmaps: List[Dict[str, Any]], any_raw: bool) -> None:
     """
@@ -48,31 +130,130 @@ def _guard_features_when_needed(fmaps: List[Dict[str, Any]], any_raw: bool) -> N
         return
     
     keys = {k.lower() for k in fmaps[0].keys()} if fmaps else set()
-    missing = [k for k in EXPECTED if k not in keys]
-    if missing:
+    missing = [k for k in ENGINE.feature_names if k.lower() not in keys]
+    if missing and not RELAXED_GUARD:
         raise HTTPException(
             status_code=400,
             detail=f"Feature schema mismatch: missing={missing}"
         )
 
 
-@router.post("", response_model=BatchResponse)  # keep the same final URL (prefix + "")
-async def cav_batch(req: Dict[str, List[Dict[str, Any]]]):
+def _feature_vector(w: Dict[str, Any]) -> np.ndarray:
+    """
+    Convert a feature-map window to a vector in ENGINE.feature_names order.
+
+    Accepts either named features ({"eda_mean": ..., ...}) or a precomputed
+    list under "features" already in schema order.
+    """
+    expected = list(ENGINE.feature_names)
+    if isinstance(w.get("features"), (list, tuple)):
+        vec = np.asarray(w["features"], dtype=float)
+        if vec.shape != (len(expected),):
+            raise ValueError(
+                f"'features' must have {len(expected)} values in order {expected}"
+            )
+        return vec
+
+    ratio = feature_overlap(w, expected)
+    if ratio < 0.8:
+        if not RELAXED_GUARD:
+            raise ValueError(f"Feature mismatch: overlap {ratio:.2%} < 80%")
+        LOGGER.warning("Relaxed guard: feature overlap=%s", f"{ratio:.2%}")
+    fmap = normalize_feature_map(w, order=expected)
+    return np.asarray([fmap[k] for k in expected], dtype=float)
+
+
+def _env_fields(w: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "temp_c": w.get('temp_c') or w.get('TEMP_C'),
+        "humidity": w.get('humidity') or w.get('HUMIDITY'),
+        "aqi": w.get('aqi') or w.get('AQI') or w.get('air_quality'),
+        "local_hour": w.get('local_hour') or w.get('LOCAL_HOUR') or 12,
+    }
+
+
+# The body is decoded on the inference thread (timed as the "decode" stage),
+# so it is documented here instead of declared as a Body parameter.
+_REQUEST_BODY_DOC = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {"schema": {"type": "object", "additionalProperties": True}},
+            MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+        },
+    }
+}
+
+
+@router.post("", response_model=BatchResponse, openapi_extra=_REQUEST_BODY_DOC)  # keep the same final URL (prefix + "")
+async def cav_batch(
+    request: Request,
+    x_session_id: Optional[str] = Header(None),
+):
     """
     Accepts either:
       - RAW windows: {EDA,TEMP,BVP,ACC_x,ACC_y,ACC_z} (each 240 floats) + env fields
-      - FEATURE maps: {eda_mean, eda_std, bvp_mean, bvp_std, acc_mean, acc_std} (+ optional env)
+      - FEATURE maps: the v3.2 schema features by name
+        {eda_mean, eda_deriv_std, eda_deriv_pos_rate, bvp_std, acc_magnitude_mean, acc_var},
+        or {"features": [...]} in ENGINE.feature_names order (+ optional env)
     
-    RAW → featurize here → run feature pipeline
-    FEATURE → normalize → run feature pipeline
+    RAW → featurize here (vectorized) ─┐
+    FEATURE → normalize to schema order ┴→ one scaler/model call → fusion + EMA in request order
+
+    With EDON_INFERENCE_WORKERS > 0 the featurize + model step runs in forked
+    worker processes (see app.inference_pool); fusion + EMA stay here. With
+    EDON_MICROBATCH_MS > 0 concurrent requests share one model call (see
+    app.micro_batcher) and are fused in arrival order.
+
+    EMA state is keyed by "session_id" in the body or the X-Session-ID header
+    (falls back to a shared "default" session).
+
+    Content-Type: application/x-edon-frame sends the windows (or features) as
+    float32 arrays instead of JSON (see _parse_frame / app.binary_codec);
+    Accept: application/x-edon-frame returns cav_raw, cav_smooth and parts
+    as float32 arrays. Either side may be used without the other.
+
+    Scoring runs on the bounded INFERENCE executor, so sessions score
+    concurrently off the event loop; a full queue returns 429 with Retry-After.
     """
-    start_time = time.time()
+    body = await request.body()
+    return await INFERENCE.run(
+        _cav_batch, body, x_session_id,
+        request.headers.get("content-type"), request.headers.get("accept"),
+    )
+
+
+@dataclass
+class _ParsedBatch:
+    """A decoded request: rows that failed parsing plus the columns to score."""
+    session_id: str
+    results: List[Optional[BatchResponseItem]]  # set for rows that failed parsing
+    features: np.ndarray            # (n, n_features); raw rows are placeholders
+    valid: np.ndarray               # (n,)
+    raw_index: List[int]            # rows filled from `raw`
+    raw: Any                        # (len(raw_index), 6, WINDOW_LEN) array or list of rows
+    env: Dict[str, List[Any]]       # per-row temp_c/humidity/aqi/local_hour
+
+
+def _parse_json(body: bytes, x_session_id: Optional[str]) -> _ParsedBatch:
+    """Decode a JSON batch (raw windows and/or feature maps)."""
+    with stage("decode"):
+        try:
+            req = json.loads(body)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=f"Invalid JSON: {e}")
+    if not isinstance(req, dict):
+        raise HTTPException(status_code=422, detail="request body must be an object")
     
+    t_validate = time.perf_counter()
     windows = req.get("windows", [])
     if not isinstance(windows, list) or not windows:
         raise HTTPException(status_code=422, detail="windows must be a non-empty list")
+    if not all(isinstance(w, dict) for w in windows):
+        raise HTTPException(status_code=422, detail="each window must be an object")
+    session_id = str(req.get("session_id") or x_session_id or DEFAULT_SESSION_ID)
     
-    fmaps: List[Dict[str, float]] = []
+    fmaps: List[Dict[str, Any]] = []
     any_raw = False
     is_raw_list = []  # Track which windows are raw
     
@@ -80,80 +261,171 @@ async def cav_batch(req: Dict[str, List[Dict[str, Any]]]):
         is_raw = looks_raw(w)
         is_raw_list.append(is_raw)
         if is_raw:
-            any_raw = True
-            fmaps.append(featurize_raw(w))          # compute 6 features from arrays
-        else:
-            fmaps.append(normalize_feature_map(w))  # normalize keys/casing for feature maps
+            any_raw = True                          # featurized in one batch below
+        elif not isinstance(w.get("features"), (list, tuple)):
+            fmaps.append(w)
     
     # Only enforce strict feature-guard if ALL windows were feature-maps
     _guard_features_when_needed(fmaps, any_raw)
     
-    # Convert to vectors in engine's expected order
-    X = [[float(f.get(k, 0.0)) for k in EXPECTED] for f in fmaps]
+    # Raw windows and feature maps share one feature matrix, so the model runs
+    # once per request and results keep request order (EMA matches per-window).
+    n = len(windows)
+    results: List[Optional[BatchResponseItem]] = [None] * n
+    features = np.zeros((n, len(ENGINE.feature_names)), dtype=float)
+    valid = np.zeros(n, dtype=bool)
+    env: Dict[str, List[Any]] = {"temp_c": [], "humidity": [], "aqi": [], "local_hour": []}
+    raw_indices: List[int] = []
+    raw_arrays: List[np.ndarray] = []
+
+    for idx, w in enumerate(windows):
+        for key, value in _env_fields(w).items():
+            env[key].append(value)
+        try:
+            if is_raw_list[idx]:
+                normalized_win = normalize_to_engine_format(w)
+                raw_arrays.append(
+                    np.asarray([normalized_win[k] for k in SIGNAL_KEYS], dtype=float)
+                )
+                raw_indices.append(idx)
+            else:
+                features[idx] = _feature_vector(w)
+                valid[idx] = True
+        except Exception as e:
+            results[idx] = BatchResponseItem(ok=False, error=str(e))
+
+    observe_stage("validate", time.perf_counter() - t_validate)
+    return _ParsedBatch(session_id, results, features, valid, raw_indices, raw_arrays, env)
+
+
+def _parse_frame(body: bytes, x_session_id: Optional[str]) -> _ParsedBatch:
+    """
+    Decode a binary frame (see app.binary_codec).
+
+    Arrays: exactly one of "windows" (N, 6, WINDOW_LEN), channels in
+    SIGNAL_KEYS order, or "features" (N, n_features) in ENGINE.feature_names
+    order; optionally per-window "temp_c", "humidity", "aqi", "local_hour"
+    (N,) with NaN for missing values. Metadata: optional "session_id" and an
+    "env" object applied to every window without a per-window value.
+    """
+    with stage("decode"):
+        try:
+            meta, arrays = decode_frame(body)
+        except FrameError as e:
+            raise HTTPException(status_code=422, detail=f"Invalid frame: {e}")
     
-    # Run feature-based inference
-    # Since ENGINE.cav_from_features_batch doesn't exist yet, we'll call cav_from_window
-    # for each window. For feature maps, we need to reconstruct raw windows or use a different path.
-    # For now, we'll process sequentially with the engine (which expects raw windows)
-    results = []
-    with _engine_lock:  # Thread-safe access to shared engine
-        for idx, w in enumerate(windows):
-            try:
-                # If it was raw, use the original window; otherwise we need to handle feature maps
-                if is_raw_list[idx]:
-                    # Use original raw window
-                    from app.utils.feature_ingest import normalize_to_engine_format
-                    normalized_win = normalize_to_engine_format(w)
-                    temp_c = w.get('temp_c') or w.get('TEMP_C')
-                    humidity = w.get('humidity') or w.get('HUMIDITY')
-                    aqi = w.get('aqi') or w.get('AQI') or w.get('air_quality')
-                    local_hour = w.get('local_hour') or w.get('LOCAL_HOUR') or 12
-                    
-                    cav_raw, cav_smooth, state, parts = ENGINE.cav_from_window(
-                        normalized_win,
-                        temp_c=temp_c,
-                        humidity=humidity,
-                        aqi=aqi,
-                        local_hour=local_hour
-                    )
-                else:
-                    # Feature map - compute overlap against expected engine schema if available
-                    try:
-                        # Build a faux raw window dict to compute features using engine for overlap
-                        if hasattr(ENGINE, "feature_names"):
-                            expected = list(ENGINE.feature_names)
-                            # Normalize feature-map keys
-                            keys = {k.lower() for k in w.keys()}
-                            overlap = [k for k in expected if k.lower() in keys]
-                            ratio = (len(overlap) / max(1, len(expected)))
-                            if ratio < 0.8:
-                                if not RELAXED_GUARD:
-                                    raise HTTPException(
-                                        status_code=400,
-                                        detail=f"Feature mismatch: overlap {ratio:.2%} < 80%"
-                                    )
-                                else:
-                                    LOGGER.warning("Relaxed guard: feature overlap=%s", f"{ratio:.2%}")
-                                    results.append(BatchResponseItem(ok=False, error=f"Schema mismatch (relaxed): overlap {ratio:.1%}"))
-                                    continue
-                    except HTTPException:
-                        raise
-                    # Engine currently requires raw windows for full inference
-                    raise ValueError("Feature map inference not yet supported - engine requires raw windows")
-                
-                results.append(BatchResponseItem(
+    t_validate = time.perf_counter()
+    windows, feats = arrays.get("windows"), arrays.get("features")
+    if (windows is None) == (feats is None):
+        raise HTTPException(status_code=422, detail="frame must carry exactly one of 'windows' or 'features'")
+    n_features = len(ENGINE.feature_names)
+    if windows is not None:
+        expected = (len(SIGNAL_KEYS), WINDOW_LEN)
+        if windows.ndim != 3 or windows.shape[1:] != expected:
+            raise HTTPException(status_code=422, detail=f"'windows' must have shape (N, {expected[0]}, {expected[1]})")
+        n = len(windows)
+        features = np.zeros((n, n_features), dtype=float)
+        valid = np.zeros(n, dtype=bool)
+        raw_index, raw = list(range(n)), windows
+    else:
+        if feats.ndim != 2 or feats.shape[1] != n_features:
+            raise HTTPException(status_code=422, detail=f"'features' must have shape (N, {n_features}) in order {list(ENGINE.feature_names)}")
+        n = len(feats)
+        features = feats.astype(float)
+        valid = np.ones(n, dtype=bool)
+        raw_index, raw = [], None
+    if n == 0:
+        raise HTTPException(status_code=422, detail="windows must be a non-empty list")
+
+    defaults = meta.get("env") if isinstance(meta.get("env"), dict) else {}
+    env: Dict[str, List[Any]] = {}
+    for key in ("temp_c", "humidity", "aqi", "local_hour"):
+        column = arrays.get(key)
+        if column is None:
+            env[key] = [defaults.get(key)] * n
+        elif column.shape != (n,):
+            raise HTTPException(status_code=422, detail=f"'{key}' must have shape ({n},)")
+        else:
+            env[key] = [None if v != v else v for v in column.tolist()]  # NaN → missing
+    env["local_hour"] = [12 if v is None else v for v in env["local_hour"]]
+
+    session_id = str(meta.get("session_id") or x_session_id or DEFAULT_SESSION_ID)
+    observe_stage("validate", time.perf_counter() - t_validate)
+    return _ParsedBatch(session_id, [None] * n, features, valid, raw_index, raw, env)
+
+
+def _frame_response(results: List[BatchResponseItem], latency_ms: float) -> bytes:
+    """Results as a frame: cav_raw/cav_smooth (N,), parts (N, 4); NaN for failed rows."""
+    n = len(results)
+    cav = np.full((n, 2), np.nan, dtype=np.float32)
+    parts = np.full((n, len(PARTS_KEYS)), np.nan, dtype=np.float32)
+    items = []
+    for i, r in enumerate(results):
+        if r.ok:
+            cav[i] = (r.cav_raw, r.cav_smooth)
+            parts[i] = [(r.parts or {}).get(k, np.nan) for k in PARTS_KEYS]
+            items.append({"ok": True, "state": r.state})
+        else:
+            items.append({"ok": False, "error": r.error})
+    meta = {
+        "results": items,
+        "parts": list(PARTS_KEYS),
+        "latency_ms": latency_ms,
+        "server_version": f"EDON CAV Engine v{__version__}",
+    }
+    return encode_frame(meta, {"cav_raw": cav[:, 0], "cav_smooth": cav[:, 1], "parts": parts})
+
+
+def _cav_batch(
+    body: bytes,
+    x_session_id: Optional[str],
+    content_type: Optional[str] = None,
+    accept: Optional[str] = None,
+) -> Response:
+    """Decode, score and serialize one batch request (blocking)."""
+    start_time = time.time()
+    
+    parse = _parse_frame if is_frame(content_type) else _parse_json
+    parsed = parse(body, x_session_id)
+    results = parsed.results
+
+    # Non-finite features (JSON 1e400 parses to inf) would make the scaler
+    # raise for every request coalesced into the same model call
+    finite = np.isfinite(parsed.features).all(axis=1)
+    for idx in np.flatnonzero(parsed.valid & ~finite):
+        if results[idx] is None:
+            results[idx] = BatchResponseItem(ok=False, error="feature values must be finite")
+
+    scored = [i for i in range(len(results)) if results[i] is None]
+    if scored:
+        try:
+            pos = {idx: j for j, idx in enumerate(scored)}
+            job = _ScoreJob(
+                session_id=parsed.session_id,
+                features=parsed.features[scored],
+                valid=parsed.valid[scored],
+                raw_index=[pos[i] for i in parsed.raw_index],
+                raw=np.stack(parsed.raw) if len(parsed.raw_index) else None,
+                env={k: [v[i] for i in scored] for k, v in parsed.env.items()},
+            )
+            if BATCHER is not None:
+                batch_out = BATCHER.submit(job).result()
+            else:
+                batch_out = _score_jobs([job])[0]
+                if isinstance(batch_out, Exception):
+                    raise batch_out
+            for idx, (cav_raw, cav_smooth, state, parts) in zip(scored, batch_out):
+                results[idx] = BatchResponseItem(
                     ok=True,
                     cav_raw=cav_raw,
                     cav_smooth=cav_smooth,
                     state=state,
                     parts=parts
-                ))
-            except Exception as e:
-                results.append(BatchResponseItem(
-                    ok=False,
-                    error=str(e)
-                ))
-    
+                )
+        except Exception as e:
+            for idx in scored:
+                results[idx] = BatchResponseItem(ok=False, error=str(e))
+
     # Update state bus with the last successful window's result
     # This ensures _debug/state reflects the latest processed state
     if set_state and results:
@@ -183,9 +455,13 @@ async def cav_batch(req: Dict[str, List[Dict[str, Any]]]):
     
     latency_ms = (time.time() - start_time) * 1000.0
     
-    return BatchResponse(
-        results=results,
-        latency_ms=latency_ms,
-        server_version=f"EDON CAV Engine v{__version__}"
-    )
+    with stage("serialize"):
+        if wants_frame(accept):
+            return Response(content=_frame_response(results, latency_ms), media_type=MEDIA_TYPE)
+        content = BatchResponse(
+            results=results,
+            latency_ms=latency_ms,
+            server_version=f"EDON CAV Engine v{__version__}"
+        ).model_dump_json()
+    return Response(content=content, media_type="application/json")
 
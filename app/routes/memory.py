@@ -1,20 +1,33 @@
 """Memory management routes for Adaptive Memory Engine."""
 
+import time
 from fastapi import APIRouter, HTTPException
-from typing import Dict
+from typing import Dict, Optional
 from app.adaptive_memory import AdaptiveMemoryEngine
+from app.memory_manager import MemoryManager
+from app.memory_rollups import RESOLUTION_NAMES
 
 router = APIRouter(prefix="/memory", tags=["Memory"])
 
-# Shared memory engine instance
+# Shared memory engine instance (requests without a tenant)
 memory_engine = AdaptiveMemoryEngine()
 
+# Per-device/user engines (requests with ?tenant=)
+MEMORY = MemoryManager.from_env()
+
+
+def _engine(tenant: Optional[str]) -> AdaptiveMemoryEngine:
+    return MEMORY.get(tenant) if tenant else memory_engine
+
 
 @router.get("/summary")
-async def get_memory_summary() -> Dict:
+async def get_memory_summary(tenant: Optional[str] = None) -> Dict:
     """
     Get 24-hour summary of memory statistics.
     
+    Args:
+        tenant: Device/user ID; omitted for the shared (all-device) memory
+    
     Returns:
         Dictionary with:
         - total_records: Number of records in last 24h
@@ -23,25 +36,59 @@ async def get_memory_summary() -> Dict:
         - overall_stats: Overall statistics (mean, std, state distribution)
     """
     try:
-        summary = memory_engine.get_summary()
+        summary = _engine(tenant).get_summary()
         return summary
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting memory summary: {str(e)}")
 
 
+@router.get("/history")
+async def get_memory_history(
+    days: float = 30.0,
+    resolution: Optional[str] = None,
+    by_hour: bool = False,
+    tenant: Optional[str] = None,
+) -> Dict:
+    """
+    Long-horizon statistics from the per-minute/hour/day rollups.
+    
+    Args:
+        days: Length of the range, ending now
+        resolution: "minute", "hour" or "day" for a per-bucket series (trends);
+            omitted for one summary of the whole range
+        by_hour: Summary per local hour (hour-of-day baseline)
+        tenant: Device/user ID; omitted for the shared (all-device) memory
+    
+    Returns:
+        {"start", "end", "series": [...]} with a resolution, otherwise
+        {"start", "end", "stats": {...}} (keyed by local hour with by_hour)
+    """
+    if resolution is not None and resolution not in RESOLUTION_NAMES:
+        raise HTTPException(status_code=400, detail=f"resolution must be one of {sorted(RESOLUTION_NAMES)}")
+    end = time.time()
+    start = end - days * 86400
+    try:
+        engine = _engine(tenant)
+        if resolution is not None:
+            return {"start": start, "end": end, "series": engine.history_series(start, end, RESOLUTION_NAMES[resolution])}
+        return {"start": start, "end": end, "stats": engine.history_summary(start, end, by_hour=by_hour)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting memory history: {str(e)}")
+
+
 @router.post("/clear")
-async def clear_memory() -> Dict:
+async def clear_memory(tenant: Optional[str] = None) -> Dict:
     """
     Clear all memory (buffer and database).
     
-    WARNING: This will delete all stored CAV history.
-    Use for testing or resetting the adaptive engine.
+    WARNING: This will delete all stored CAV history (of `tenant` only, if
+    given). Use for testing or resetting the adaptive engine.
     
     Returns:
         Confirmation message
     """
     try:
-        memory_engine.clear()
+        _engine(tenant).clear()
         return {
             "status": "success",
             "message": "Memory cleared successfully"
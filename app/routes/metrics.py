@@ -2,7 +2,9 @@
 
 from fastapi import APIRouter
 from fastapi.responses import PlainTextResponse
-from app.routes.telemetry import _request_count, _latency_sum, get_uptime_seconds
+from app.admission import INFERENCE
+from app.latency import REQUEST_SECONDS, STAGE_SECONDS
+from app.routes import telemetry
 
 router = APIRouter(tags=["System"])
 
@@ -15,12 +17,15 @@ async def metrics():
     Returns:
         Prometheus-formatted metrics
     """
-    uptime_s = get_uptime_seconds()
-    avg_latency_ms = _latency_sum / _request_count if _request_count > 0 else 0.0
+    uptime_s = telemetry.get_uptime_seconds()
+    # Read through the module: these counters are rebound on every request
+    request_count = telemetry._request_count
+    avg_latency_ms = telemetry._latency_sum / request_count if request_count > 0 else 0.0
+    inference = INFERENCE.stats()
     
     metrics_text = f"""# HELP edon_requests_total Total number of requests
 # TYPE edon_requests_total counter
-edon_requests_total {_request_count}
+edon_requests_total {request_count}
 
 # HELP edon_latency_ms Average request latency in milliseconds
 # TYPE edon_latency_ms gauge
@@ -29,7 +34,29 @@ edon_latency_ms {avg_latency_ms:.2f}
 # HELP edon_uptime_seconds Server uptime in seconds
 # TYPE edon_uptime_seconds gauge
 edon_uptime_seconds {uptime_s:.2f}
-"""
+
+# HELP edon_inference_queue_depth Engine calls waiting for an inference thread
+# TYPE edon_inference_queue_depth gauge
+edon_inference_queue_depth {inference["queue_depth"]}
+
+# HELP edon_inference_in_flight Engine calls currently running
+# TYPE edon_inference_in_flight gauge
+edon_inference_in_flight {inference["in_flight"]}
+
+# HELP edon_inference_queue_capacity Max queued engine calls before 429
+# TYPE edon_inference_queue_capacity gauge
+edon_inference_queue_capacity {inference["max_queue"]}
+
+# HELP edon_inference_wait_ms Average time engine calls spend queued (EMA)
+# TYPE edon_inference_wait_ms gauge
+edon_inference_wait_ms {inference["wait_ms_avg"]:.3f}
+
+# HELP edon_inference_rejected_total Engine calls rejected with 429
+# TYPE edon_inference_rejected_total counter
+edon_inference_rejected_total {inference["rejected"]}
+
+{REQUEST_SECONDS.prometheus()}
+{STAGE_SECONDS.prometheus()}"""
     
     return metrics_text
 
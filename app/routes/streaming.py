@@ -1,13 +1,16 @@
 ﻿from __future__ import annotations
-import asyncio, json, time, uuid
-from typing import Any, Dict, Optional
+import json, threading, time, uuid
+from typing import Any, Dict, List, Optional
+import numpy as np
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
+from app.broadcaster import Broadcaster
+
 #  Prefer in-process bus (updated by /v1/ingest), fallback to edge bridge
 try:
-    from app.state_bus import get_state as sb_get_state, get_adapt as sb_get_adapt
+    from app.state_bus import get_state as sb_get_state, get_adapt as sb_get_adapt, add_listener as sb_add_listener
 except Exception:
-    sb_get_state = sb_get_adapt = None  # type: ignore
+    sb_get_state = sb_get_adapt = sb_add_listener = None  # type: ignore
 
 try:
     from app.edge_bridge import get_latest_state as edge_get_state, get_latest_adapt as edge_get_adapt
@@ -16,84 +19,225 @@ except Exception:
 
 router = APIRouter()
 SCHEMA = "1.0.0"
-DEFAULT_HZ = 5.0
+STATE_KEYS = ("state", "drift", "confidence", "user_id", "place_id")
 
 def _ts_iso() -> str:
     return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
 
+def _latest(bus_get, edge_get) -> Optional[Dict[str, Any]]:
+    for get in (bus_get, edge_get):
+        if callable(get):
+            try:
+                latest = get()
+            except Exception:
+                latest = None
+            if latest:
+                return latest
+    return None
+
+def _state_frame(latest: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Live-state frame: the latest state over a "balanced" baseline (also the heartbeat)."""
+    if latest is None:
+        latest = _latest(sb_get_state, edge_get_state)
+    payload: Dict[str, Any] = {
+        "schema": SCHEMA,
+        "ts": _ts_iso(),
+        "state": "balanced",
+        "drift": 0.0,
+        "confidence": 0.0,
+    }
+    if isinstance(latest, dict) and latest:
+        payload.update({k: latest[k] for k in STATE_KEYS if k in latest})
+    return payload
+
+def _has_recs(evt: Any) -> bool:
+    return isinstance(evt, dict) and isinstance(evt.get("recommendations"), list) and len(evt["recommendations"]) > 0
+
+def _adapt_frame(evt: Dict[str, Any]) -> Dict[str, Any]:
+    out = dict(evt)
+    out.setdefault("schema", SCHEMA)
+    out.setdefault("ts", _ts_iso())
+    out.setdefault("event_id", str(uuid.uuid4()))
+    out.setdefault("ttl_ms", 1500)
+    return out
+
+def _adapt_heartbeat() -> Dict[str, Any]:
+    # Edge (MQTT) adapt events bypass the state bus listeners: send the
+    # latest one here if no subscriber has seen it yet
+    evt = _latest_adapt()
+    if evt is not None and _mark_adapt_sent(evt):
+        return _adapt_frame(evt)
+    return {
+        "schema": SCHEMA,
+        "ts": _ts_iso(),
+        "event_id": str(uuid.uuid4()),
+        "ttl_ms": 1500,
+        "recommendations": [],
+    }
+
+def _latest_adapt() -> Optional[Dict[str, Any]]:
+    # Prefer in-process adapt event; fall back to edge only if the bus has no recs
+    evt = sb_get_adapt() if callable(sb_get_adapt) else None
+    if not _has_recs(evt) and callable(edge_get_adapt):
+        try:
+            evt = edge_get_adapt()
+        except Exception:
+            evt = None
+    return evt if _has_recs(evt) else None
+
+# Each state / adapt event is serialized once for all subscribers
+STATE_BROADCASTER = Broadcaster.from_env("state", _state_frame)
+ADAPT_BROADCASTER = Broadcaster.from_env("adapt", _adapt_heartbeat)
+
+_PUBLISHED_LOCK = threading.Lock()
+_published_state: Optional[Dict[str, Any]] = None
+
+def _publish_state(latest: Dict[str, Any]) -> None:
+    # Publish on change only: set_state runs on every ingest/batch request,
+    # and repeats would fill slow subscribers' queues; idle ones get heartbeats
+    global _published_state
+    key = {k: latest[k] for k in STATE_KEYS if k in latest}
+    with _PUBLISHED_LOCK:
+        if key == _published_state:
+            return
+        _published_state = key
+        STATE_BROADCASTER.publish(_state_frame(latest))
+
+_sent_adapt: Optional[Dict[str, Any]] = None
+
+def _mark_adapt_sent(evt: Dict[str, Any]) -> bool:
+    """Record evt as the last adapt event sent; False if it already was."""
+    global _sent_adapt
+    with _PUBLISHED_LOCK:
+        if evt == _sent_adapt:
+            return False
+        _sent_adapt = dict(evt)
+        return True
+
+def _publish_adapt(evt: Dict[str, Any]) -> None:
+    # Events without recs are not news; idle subscribers get heartbeats
+    if _has_recs(evt) and _mark_adapt_sent(evt):
+        ADAPT_BROADCASTER.publish(_adapt_frame(evt))
+
+if sb_add_listener is not None:
+    sb_add_listener("state", _publish_state)
+    sb_add_listener("adapt", _publish_adapt)
+
 async def _tick(ws: WebSocket, kind: str = "state") -> None:
+    """
+    Forward broadcast frames to one subscriber until it disconnects.
+
+    New subscribers first get the current state (or pending adapt event);
+    after that frames are pushed when the state bus changes, with heartbeats
+    while idle (the adapt heartbeat also picks up new edge events). A subscriber that falls EDON_WS_QUEUE frames behind is closed
+    with 1013 (try again later).
+    """
     await ws.accept()
-    period = 1.0 / DEFAULT_HZ
+    if kind == "state":
+        broadcaster, first = STATE_BROADCASTER, _state_frame()
+    else:  # kind == "adapt"
+        evt = _latest_adapt()
+        broadcaster, first = ADAPT_BROADCASTER, _adapt_frame(evt) if evt else None
+    sub = broadcaster.subscribe(first)
     try:
         while True:
-            now_iso = _ts_iso()
+            text = await sub.get()
+            if text is None:
+                await ws.close(code=1013)
+                return
+            await ws.send_text(text)
+    except (WebSocketDisconnect, RuntimeError):
+        # RuntimeError: sent after the client closed
+        return
+    finally:
+        broadcaster.unsubscribe(sub)
 
-            if kind == "state":
-                # Heartbeat baseline
-                payload: Dict[str, Any] = {
-                    "schema": SCHEMA,
-                    "ts": now_iso,
-                    "state": "balanced",
-                    "drift": 0.0,
-                    "confidence": 0.0,
-                }
-                latest = None
-                if callable(sb_get_state):
-                    try:
-                        latest = sb_get_state()
-                    except Exception:
-                        latest = None
-                if not latest and callable(edge_get_state):
-                    try:
-                        latest = edge_get_state()
-                    except Exception:
-                        latest = None
-                if isinstance(latest, dict) and latest:
-                    payload.update({k: latest[k] for k in ("state","drift","confidence","user_id","place_id") if k in latest})
-
-                await ws.send_text(json.dumps(payload))
-
-            else:  # kind == "adapt"
-                # Heartbeat baseline (empty recs)
-                heartbeat: Dict[str, Any] = {
+def _parse_samples(msg: Dict[str, Any]) -> List[List[float]]:
+    """Samples as rows of (EDA, TEMP, BVP, ACC_x, ACC_y, ACC_z).
+
+    Accepts {"samples": [[...6 floats], ...]} or per-signal lists
+    {"EDA": [...], "TEMP": [...], ...} of equal length.
+    """
+    from app.engine import SIGNAL_KEYS
+
+    if "samples" in msg:
+        rows = msg["samples"]
+        if rows and not isinstance(rows[0], (list, tuple)):
+            rows = [rows]
+        return [[float(v) for v in row] for row in rows]
+    cols = []
+    for key in SIGNAL_KEYS:
+        col = msg.get(key, msg.get(key.lower()))
+        if col is None:
+            raise ValueError(f"missing signal {key}")
+        cols.append(col if isinstance(col, (list, tuple)) else [col])
+    if len({len(c) for c in cols}) != 1:
+        raise ValueError("signal chunks must have equal length")
+    return [[float(v) for v in row] for row in zip(*cols)]
+
+
+@router.websocket("/v1/stream/samples/ws")
+async def stream_samples_ws(ws: WebSocket, hop: int = 4, session_id: Optional[str] = None):
+    """
+    Push raw samples at sensor rate; receive a CAV every `hop` samples.
+
+    Features are kept up to date by a RollingWindowFeaturizer, so each sample
+    costs O(1) instead of re-featurizing the full 240-sample window. Env fields
+    (temp_c, humidity, aqi, local_hour) may be sent with any message and stick
+    until changed. EMA state lives in the per-session store when session_id is
+    given, otherwise it is private to this connection.
+    """
+    from app.admission import INFERENCE, Overloaded
+    from app.engine import EngineSession
+    from app.rolling_features import RollingWindowFeaturizer
+    from app.routes.batch import ENGINE, SESSIONS
+
+    await ws.accept()
+    roller = RollingWindowFeaturizer(hop=hop)
+    own_session = EngineSession()
+    env: Dict[str, Any] = {"temp_c": None, "humidity": None, "aqi": None, "local_hour": 12}
+    try:
+        while True:
+            try:
+                msg = json.loads(await ws.receive_text())
+                for key in env:
+                    if msg.get(key) is not None:
+                        env[key] = msg[key]
+                emitted = roller.extend(_parse_samples(msg))
+            except (ValueError, TypeError, KeyError, AttributeError) as e:
+                await ws.send_text(json.dumps({"schema": SCHEMA, "ok": False, "error": str(e)}))
+                continue
+            if not emitted:
+                continue
+
+            features = ENGINE.to_schema_order(np.stack([e[0] for e in emitted]))
+            valid = np.array([e[1] for e in emitted], dtype=bool)
+
+            def score(env=dict(env)):
+                if session_id:
+                    with SESSIONS.acquire(session_id) as session:
+                        return ENGINE.cav_from_features_batch(features, valid=valid, session=session, **env)
+                return ENGINE.cav_from_features_batch(features, valid=valid, session=own_session, **env)
+
+            try:
+                results = await INFERENCE.run(score)
+            except Overloaded as e:
+                await ws.send_text(json.dumps({
+                    "schema": SCHEMA, "ok": False, "error": str(e), "retry_after_s": e.retry_after_s,
+                }))
+                continue
+
+            for (cav_raw, cav_smooth, state, parts), (_, ok, seen) in zip(results, emitted):
+                await ws.send_text(json.dumps({
                     "schema": SCHEMA,
-                    "ts": now_iso,
-                    "event_id": str(uuid.uuid4()),
-                    "ttl_ms": 1500,
-                    "recommendations": [],
-                }
-
-                # Prefer in-process adapt evt
-                adapt_evt: Optional[Dict[str, Any]] = None
-                if callable(sb_get_adapt):
-                    try:
-                        adapt_evt = sb_get_adapt()
-                    except Exception:
-                        adapt_evt = None
-
-                # Fallback to edge only if bus has nothing/empty
-                if not (isinstance(adapt_evt, dict) and isinstance(adapt_evt.get("recommendations"), list) and len(adapt_evt["recommendations"]) > 0):
-                    if callable(edge_get_adapt):
-                        try:
-                            adapt_evt = edge_get_adapt()
-                        except Exception:
-                            adapt_evt = None
-
-                # If we have non-empty recs, SEND THEM and SKIP heartbeat
-                if isinstance(adapt_evt, dict) and isinstance(adapt_evt.get("recommendations"), list) and len(adapt_evt["recommendations"]) > 0:
-                    out = dict(adapt_evt)
-                    out.setdefault("schema", SCHEMA)
-                    out.setdefault("ts", now_iso)
-                    out.setdefault("event_id", str(uuid.uuid4()))
-                    out.setdefault("ttl_ms", adapt_evt.get("ttl_ms", 1500))
-                    await ws.send_text(json.dumps(out))
-                    await asyncio.sleep(period)
-                    continue  #  critical: do NOT send the empty heartbeat too
-
-                # Otherwise, send heartbeat
-                await ws.send_text(json.dumps(heartbeat))
-
-            await asyncio.sleep(period)
+                    "ts": _ts_iso(),
+                    "ok": bool(ok),
+                    "samples_seen": seen,
+                    "cav_raw": cav_raw,
+                    "cav_smooth": cav_smooth,
+                    "state": state,
+                    "parts": parts,
+                }))
     except WebSocketDisconnect:
         return
 
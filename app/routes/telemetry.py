@@ -2,6 +2,7 @@
 
 import time
 from fastapi import APIRouter
+from app.latency import REQUEST_SECONDS, STAGE_SECONDS, observe_request
 from app.models import TelemetryResponse
 
 router = APIRouter(tags=["System"])
@@ -17,11 +18,12 @@ def get_uptime_seconds() -> float:
     return time.time() - _start_time
 
 
-def record_request(latency_ms: float):
-    """Record a request for telemetry."""
+def record_request(latency_ms: float, route: str = None):
+    """Record a request for telemetry (totals + per-route histogram)."""
     global _request_count, _latency_sum
     _request_count += 1
     _latency_sum += latency_ms
+    observe_request(route, latency_ms / 1000.0)
 
 
 @router.get("/telemetry", response_model=TelemetryResponse)
@@ -30,7 +32,8 @@ async def telemetry() -> TelemetryResponse:
     Telemetry endpoint with request statistics.
     
     Returns:
-        TelemetryResponse with request count, average latency, and uptime
+        TelemetryResponse with request count, average latency, uptime, and
+        p50/p95/p99 latency per route and per pipeline stage
     """
     uptime_seconds = time.time() - _start_time
     avg_latency_ms = _latency_sum / _request_count if _request_count > 0 else 0.0
@@ -38,7 +41,9 @@ async def telemetry() -> TelemetryResponse:
     return TelemetryResponse(
         request_count=_request_count,
         avg_latency_ms=avg_latency_ms,
-        uptime_seconds=uptime_seconds
+        uptime_seconds=uptime_seconds,
+        routes=REQUEST_SECONDS.summary(),
+        stages=STAGE_SECONDS.summary(),
     )
 
 
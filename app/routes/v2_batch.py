@@ -1,17 +1,29 @@
 """v2 Batch CAV computation routes."""
 
+import json
 import time
-import threading
-from typing import Any, Dict, List
-from fastapi import APIRouter, HTTPException
+from contextlib import ExitStack
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+import numpy as np
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
 from app.v2.schemas_v2 import (
     V2CavBatchRequest, V2CavBatchResponse, V2CavResult, V2CavWindow,
     InfluenceFields,
     # Backward compatibility aliases
     BatchRequestV2, BatchResponseV2, BatchResponseItemV2
 )
-from app.v2.engine_v2 import CAVEngineV2
+from app.v2.engine_v2 import CAVEngineV2, EngineSessionV2
+from app.v2.multimodal_fusion import fuse_multimodal_features_batch
 from app.v2 import __version__ as v2_version
+from app.admission import INFERENCE
+from app.binary_codec import MEDIA_TYPE, FrameError, decode_frame, encode_frame, is_frame, wants_frame
+from app.inference_pool import InferencePool
+from app.latency import stage
+from app.micro_batcher import MicroBatcher
+from app.session_store import DEFAULT_SESSION_ID, SessionStore
 from app import __version__ as app_version
 import logging
 
@@ -27,14 +39,224 @@ router = APIRouter(prefix="/v2/oem/cav/batch", tags=["v2", "Batch"])
 # Engine will be set by main.py during startup
 ENGINE_V2 = None
 
-# Thread lock for engine access
-_engine_lock = threading.Lock()
+# The engine is read-only while scoring. The EMA of the embedding is kept per
+# session_id, so different devices never share smoothing and only requests
+# for the same session serialize on that session's lock.
+SESSIONS: SessionStore[EngineSessionV2] = SessionStore(EngineSessionV2)
+
+# Worker pool for multimodal feature extraction; set by main.py when
+# EDON_INFERENCE_WORKERS > 0 (None: extract in-process, batched)
+POOL: Optional[InferencePool] = None
 
 LOGGER = logging.getLogger(__name__)
 
 
-@router.post("", response_model=V2CavBatchResponse)
-async def cav_batch_v2(req: V2CavBatchRequest):
+def _engine() -> CAVEngineV2:
+    """Engine set by main.py (fallback: a fresh default engine)."""
+    global ENGINE_V2
+    if ENGINE_V2 is None:
+        ENGINE_V2 = CAVEngineV2()
+    return ENGINE_V2
+
+
+def _to_result(result: Any) -> V2CavResult:
+    """Engine output (result dict, or the window's Exception) → V2CavResult."""
+    try:
+        if isinstance(result, Exception):
+            raise result
+        
+        # Build influence fields
+        influences = InfluenceFields(
+            speed_scale=result['influences']['speed_scale'],
+            torque_scale=result['influences']['torque_scale'],
+            safety_scale=result['influences']['safety_scale'],
+            caution_flag=result['influences']['caution_flag'],
+            emergency_flag=result['influences']['emergency_flag'],
+            focus_boost=result['influences']['focus_boost'],
+            recovery_recommended=result['influences']['recovery_recommended']
+        )
+        
+        # Build result with ok=true (all fields required)
+        return V2CavResult(
+            ok=True,
+            error=None,
+            cav_vector=result['cav_vector'],
+            state_class=result['state_class'],
+            p_stress=result['p_stress'],
+            p_chaos=result['p_chaos'],
+            influences=influences,
+            confidence=result['confidence'],
+            metadata=result['metadata']
+        )
+    except Exception as e:
+        # Per-window error handling: return ok=false with error message
+        LOGGER.exception(f"Error processing v2 window: {e}")
+        return V2CavResult(
+            ok=False,
+            error=str(e),
+            cav_vector=None,
+            state_class=None,
+            p_stress=None,
+            p_chaos=None,
+            influences=None,
+            confidence=None,
+            metadata=None
+        )
+
+
+@dataclass
+class _ScoreJob:
+    """Windows of one request and the session whose EMA they advance."""
+    session_id: str
+    windows: List[V2CavWindow]
+
+
+def _compute_windows(jobs: List[_ScoreJob], windows: List[V2CavWindow]) -> List[Any]:
+    """Featurize + score all jobs' windows in one engine call (a result or Exception per window)."""
+    if POOL is not None and POOL.running:
+        fused = [f if err is None else ValueError(err) for f, err in POOL.fuse_v2(windows)]
+    else:
+        with stage("featurize"):
+            fused = fuse_multimodal_features_batch(windows)
+
+    engine = _engine()
+    with ExitStack() as stack:
+        sessions = {
+            sid: stack.enter_context(SESSIONS.acquire(sid))
+            for sid in sorted({job.session_id for job in jobs})
+        }
+        return engine.compute_cav_v2_batch(
+            windows, fused=fused,
+            sessions=[sessions[job.session_id] for job in jobs for _ in job.windows],
+        )
+
+
+def _score_jobs(jobs: List[_ScoreJob]) -> List[List[V2CavResult]]:
+    """
+    Score the windows of one or more requests.
+
+    Feature extraction is stateless and runs batched (or in the worker pool
+    when one is configured); the engine then scores all windows with one
+    compute_cav_v2_batch call, in submission order, holding only the locks of
+    the sessions involved (taken in sorted order, so overlapping calls cannot
+    deadlock). If the shared call fails for coalesced jobs, each job is
+    retried on its own, so one bad request only fails itself.
+    """
+    windows = [w for job in jobs for w in job.windows]
+    try:
+        flat = _compute_windows(jobs, windows)
+    except Exception as e:
+        if len(jobs) > 1:
+            return [_score_jobs([job])[0] for job in jobs]
+        LOGGER.exception(f"Error processing v2 batch: {e}")
+        flat = [e] * len(windows)
+    flat = [_to_result(r) for r in flat]
+    
+    out, pos = [], 0
+    for job in jobs:
+        out.append(flat[pos:pos + len(job.windows)])
+        pos += len(job.windows)
+    return out
+
+
+# Coalesces windows from concurrent requests when EDON_MICROBATCH_MS > 0
+BATCHER: Optional[MicroBatcher[_ScoreJob, List[V2CavResult]]] = MicroBatcher.from_env(
+    _score_jobs, rows=lambda job: len(job.windows), name="cav-batch-v2"
+)
+
+
+def _score_request(job: _ScoreJob) -> List[V2CavResult]:
+    """Score one request's windows, through the micro-batcher when enabled (blocking)."""
+    if BATCHER is not None:
+        return BATCHER.submit(job).result()
+    return _score_jobs([job])[0]
+
+
+def _frame_to_payload(meta: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """
+    Merge a frame's arrays into its JSON metadata (the request minus its bulk arrays).
+
+    An array named "<section>.<field>" of shape (N, L) sets
+    windows[i][section][field] for each of the N windows, e.g. "physio.EDA"
+    (N, 240) or "vision.embedding" (N, 512). All-NaN rows are left unset.
+    Embedding rows are passed on as array views, not lists.
+    """
+    n = len(next(iter(arrays.values()))) if arrays else 0
+    windows = meta.get("windows", [{} for _ in range(n)])
+    if not isinstance(windows, list) or not all(isinstance(w, dict) for w in windows):
+        raise HTTPException(status_code=422, detail="frame metadata 'windows' must be a list of objects")
+    for name, column in arrays.items():
+        section, _, field = name.partition(".")
+        if not field or column.ndim != 2 or len(column) != len(windows):
+            raise HTTPException(
+                status_code=422,
+                detail=f"array {name!r} must be named '<section>.<field>' with shape ({len(windows)}, L)",
+            )
+        missing = np.isnan(column).all(axis=1)
+        # Embeddings stay array rows (validated as float32 without a copy)
+        rows = column if field == "embedding" else column.tolist()
+        for window, row, skip in zip(windows, rows, missing):
+            if not skip:
+                section_obj = window.setdefault(section, {})
+                if not isinstance(section_obj, dict):
+                    raise HTTPException(status_code=422, detail=f"window field {section!r} must be an object")
+                section_obj[field] = row
+    return {**meta, "windows": windows}
+
+
+def _parse_request(body: bytes, content_type: Optional[str]) -> V2CavBatchRequest:
+    """Decode a JSON or frame body and validate it as a V2CavBatchRequest."""
+    with stage("decode"):
+        if is_frame(content_type):
+            try:
+                payload = _frame_to_payload(*decode_frame(body))
+            except FrameError as e:
+                raise HTTPException(status_code=422, detail=f"Invalid frame: {e}")
+        else:
+            try:
+                payload = json.loads(body)
+            except ValueError as e:
+                raise HTTPException(status_code=422, detail=f"Invalid JSON: {e}")
+    with stage("validate"):
+        try:
+            return V2CavBatchRequest.model_validate(payload)
+        except ValidationError as e:
+            # Same 422 body FastAPI produces for a typed request body
+            raise RequestValidationError(
+                [{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)]
+            )
+
+
+def _frame_response(results: List[V2CavResult], latency_ms: float) -> bytes:
+    """Results as a frame: cav_vector as an (N, dim) float32 array (NaN rows for failures)."""
+    dim = max((len(r.cav_vector) for r in results if r.cav_vector), default=0)
+    vectors = np.full((len(results), dim), np.nan, dtype=np.float32)
+    for i, r in enumerate(results):
+        if r.cav_vector:
+            vectors[i] = r.cav_vector
+    meta = {
+        "results": [r.model_dump(mode="json", exclude={"cav_vector"}) for r in results],
+        "latency_ms": latency_ms,
+        "server_version": f"EDON CAV Engine v{app_version} (v2 API: {v2_version})",
+    }
+    return encode_frame(meta, {"cav_vector": vectors})
+
+
+# The body is decoded on the inference thread, so it is documented here
+# instead of declared as a typed parameter.
+_REQUEST_BODY_DOC = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {"schema": V2CavBatchRequest.model_json_schema()},
+            MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+        },
+    }
+}
+
+
+@router.post("", response_model=V2CavBatchResponse, openapi_extra=_REQUEST_BODY_DOC)
+async def cav_batch_v2(request: Request):
     """
     v2 Multimodal CAV batch endpoint.
     
@@ -46,6 +268,20 @@ async def cav_batch_v2(req: V2CavBatchRequest):
     - audio: Audio embeddings and keywords
     - task: Task metadata
     - system: System/robotics signals
+
+    The body is JSON, or a binary frame (Content-Type: application/x-edon-frame)
+    whose signal/embedding arrays are float32 (see _frame_to_payload). With
+    Accept: application/x-edon-frame the response carries cav_vector as an
+    (N, dim) float32 array and everything else as JSON metadata.
+
+    Scoring runs on the bounded INFERENCE executor (429 + Retry-After when its
+    queue is full), never on the event loop. All windows are scored with one
+    vectorized compute_cav_v2_batch call (feature extraction in workers when
+    an inference pool is configured). With EDON_MICROBATCH_MS > 0 windows
+    from concurrent requests are scored together in arrival order.
+
+    The EMA of the embedding is keyed by "session_id" in the body or the
+    X-Session-ID header (default: one shared "default" session).
     """
     # License validation
     if LICENSING_AVAILABLE:
@@ -54,7 +290,19 @@ async def cav_batch_v2(req: V2CavBatchRequest):
         except LicenseError as e:
             raise HTTPException(status_code=403, detail=f"License validation failed: {e}")
     
+    body = await request.body()
+    return await INFERENCE.run(
+        _cav_batch_v2, body, request.headers.get("content-type"), request.headers.get("accept"),
+        request.headers.get("x-session-id"),
+    )
+
+
+def _cav_batch_v2(
+    body: bytes, content_type: Optional[str], accept: Optional[str], x_session_id: Optional[str] = None
+) -> Response:
+    """Decode, score and serialize one v2 batch request (blocking)."""
     start_time = time.time()
+    req = _parse_request(body, content_type)
     
     if not req.windows:
         raise HTTPException(status_code=422, detail="windows must be a non-empty list")
@@ -62,64 +310,17 @@ async def cav_batch_v2(req: V2CavBatchRequest):
     if len(req.windows) > 10:
         raise HTTPException(status_code=422, detail="Maximum 10 windows per batch")
     
-    results = []
-    
-    # Get engine (should be set by main.py)
-    engine = ENGINE_V2
-    if engine is None:
-        # Fallback: create engine if not set
-        engine = CAVEngineV2()
-    
-    with _engine_lock:  # Thread-safe access to shared engine
-        for window in req.windows:
-            try:
-                # Compute CAV v2 (with optional device profile)
-                device_profile = getattr(window, 'device_profile', None)
-                result = engine.compute_cav_v2(window, device_profile=device_profile)
-                
-                # Build influence fields
-                influences = InfluenceFields(
-                    speed_scale=result['influences']['speed_scale'],
-                    torque_scale=result['influences']['torque_scale'],
-                    safety_scale=result['influences']['safety_scale'],
-                    caution_flag=result['influences']['caution_flag'],
-                    emergency_flag=result['influences']['emergency_flag'],
-                    focus_boost=result['influences']['focus_boost'],
-                    recovery_recommended=result['influences']['recovery_recommended']
-                )
-                
-                # Build result with ok=true (all fields required)
-                results.append(V2CavResult(
-                    ok=True,
-                    error=None,
-                    cav_vector=result['cav_vector'],
-                    state_class=result['state_class'],
-                    p_stress=result['p_stress'],
-                    p_chaos=result['p_chaos'],
-                    influences=influences,
-                    confidence=result['confidence'],
-                    metadata=result['metadata']
-                ))
-            except Exception as e:
-                # Per-window error handling: return ok=false with error message
-                LOGGER.exception(f"Error processing v2 window: {e}")
-                results.append(V2CavResult(
-                    ok=False,
-                    error=str(e),
-                    cav_vector=None,
-                    state_class=None,
-                    p_stress=None,
-                    p_chaos=None,
-                    influences=None,
-                    confidence=None,
-                    metadata=None
-                ))
+    session_id = req.session_id or x_session_id or DEFAULT_SESSION_ID
+    results = _score_request(_ScoreJob(session_id, list(req.windows)))
     
     latency_ms = (time.time() - start_time) * 1000.0
     
-    return V2CavBatchResponse(
-        results=results,
-        latency_ms=latency_ms,
-        server_version=f"EDON CAV Engine v{app_version} (v2 API: {v2_version})"
-    )
-
+    with stage("serialize"):
+        if wants_frame(accept):
+            return Response(content=_frame_response(results, latency_ms), media_type=MEDIA_TYPE)
+        content = V2CavBatchResponse(
+            results=results,
+            latency_ms=latency_ms,
+            server_version=f"EDON CAV Engine v{app_version} (v2 API: {v2_version})"
+        ).model_dump_json()
+    return Response(content=content, media_type="application/json")
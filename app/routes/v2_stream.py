@@ -1,13 +1,33 @@
-"""v2 Streaming CAV computation routes (WebSocket)."""
+"""
+v2 Streaming CAV computation routes (WebSocket).
 
+Each connection runs a small pipeline: a receive task reads and parses
+frames into a bounded inbox, and a compute task scores them on the
+INFERENCE executor and sends the results. The drop policy decides what
+happens when windows arrive faster than they are scored:
+
+    latest    - the inbox keeps only the newest windows (default size 1);
+                older ones are dropped, so control clients always get
+                influences computed from fresh data
+    lossless  - every window is scored in order; when the inbox is full the
+                receiver stops reading (TCP backpressure)
+
+Environment:
+    EDON_STREAM_POLICY: Default drop policy (default "lossless")
+    EDON_STREAM_INBOX: Default inbox size for the lossless policy (default 16)
+"""
+
+import asyncio
+import os
 import time
 import json
-import threading
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException
-from app.v2.schemas_v2 import V2CavWindow, V2CavResult, InfluenceFields
-from app.v2.engine_v2 import CAVEngineV2
+from pydantic import ValidationError
+from app.v2.schemas_v2 import V2CavWindow, V2CavResult, InfluenceFields, WINDOW_LEN
+from app.v2.engine_v2 import CAVEngineV2, EngineSessionV2
 from app.v2 import __version__ as v2_version
+from app.admission import INFERENCE, Overloaded
 from app import __version__ as app_version
 import logging
 
@@ -23,17 +43,185 @@ router = APIRouter(prefix="/v2/stream", tags=["v2", "Streaming"])
 # Engine will be set by main.py during startup
 ENGINE_V2 = None
 
-# Thread lock for engine access
-_engine_lock = threading.Lock()
+POLICIES = ("latest", "lossless")
+
+# Signals a delta frame extends with new samples (all other fields replace)
+DELTA_SIGNALS = {
+    "physio": ("EDA", "TEMP", "BVP"),
+    "motion": ("ACC_x", "ACC_y", "ACC_z"),
+}
 
 LOGGER = logging.getLogger(__name__)
 
+# Keys of a response frame that carry a result (None in error frames)
+_RESULT_KEYS = (
+    "cav_vector", "state_class", "p_stress", "p_chaos", "influences", "confidence", "metadata",
+)
+
+
+def _compute(
+    engine: CAVEngineV2, window: Dict[str, Any], session: EngineSessionV2, session_id: Optional[str]
+) -> Dict[str, Any]:
+    """
+    Validate and score one window (runs on the INFERENCE executor).
+
+    The engine is read-only; with a session_id the EMA state is the batch
+    route's stored session (under its lock), otherwise the connection's own.
+    Raises pydantic.ValidationError for a malformed window.
+    """
+    from app.routes.v2_batch import SESSIONS
+
+    window = V2CavWindow(**window)
+    device_profile = getattr(window, 'device_profile', None)
+    if session_id:
+        with SESSIONS.acquire(session_id) as stored:
+            return engine.compute_cav_v2(window, device_profile=device_profile, session=stored)
+    return engine.compute_cav_v2(window, device_profile=device_profile, session=session)
+
+
+def apply_delta(previous: Optional[Dict[str, Any]], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The full window described by a delta frame.
+
+    Samples given for DELTA_SIGNALS are appended to the previous window's
+    signal, keeping the last WINDOW_LEN; other fields of physio/motion and
+    whole other sections replace the previous values; sections the delta
+    leaves out are carried over.
+
+    Raises:
+        ValueError: no previous window, or a signal that the previous window lacks
+    """
+    if previous is None:
+        raise ValueError("delta frame before any full window")
+    window = dict(previous)
+    for section, value in delta.items():
+        if section == "delta":
+            continue
+        signals = DELTA_SIGNALS.get(section)
+        if signals is None or not isinstance(value, dict):
+            window[section] = value
+            continue
+        merged = dict(window.get(section) or {})
+        for field, samples in value.items():
+            if field not in signals:
+                merged[field] = samples
+                continue
+            prior = merged.get(field)
+            if not isinstance(prior, list):
+                raise ValueError(f"delta for {section}.{field} without a previous full signal")
+            if not isinstance(samples, list):
+                raise ValueError(f"delta {section}.{field} must be a list of new samples")
+            merged[field] = (prior + samples)[-WINDOW_LEN:]
+        window[section] = merged
+    return window
+
+
+def _error_frame(seq: int, error: str, **extra: Any) -> Dict[str, Any]:
+    return {"ok": False, "error": error, "seq": seq, **extra, **{key: None for key in _RESULT_KEYS}}
+
+
+class _StreamPipeline:
+    """Receive/compute tasks of one connection, joined by a bounded inbox."""
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        engine: CAVEngineV2,
+        policy: str,
+        inbox_size: int,
+        session_id: Optional[str],
+    ):
+        self.websocket = websocket
+        self.engine = engine
+        self.policy = policy
+        self.inbox: asyncio.Queue = asyncio.Queue(maxsize=max(1, inbox_size))
+        self.session = EngineSessionV2()
+        self.session_id = session_id
+        self.dropped = 0  # windows dropped since the last result frame
+        self._send_lock = asyncio.Lock()
+
+    async def send(self, frame: Dict[str, Any]) -> None:
+        async with self._send_lock:
+            await self.websocket.send_text(json.dumps(frame))
+
+    async def offer(self, item: Any) -> None:
+        """Queue a parsed (seq, window) according to the drop policy."""
+        if self.policy == "lossless":
+            await self.inbox.put(item)
+            return
+        while self.inbox.full():
+            self.inbox.get_nowait()
+            self.dropped += 1
+        self.inbox.put_nowait(item)
+
+    async def receive_loop(self) -> None:
+        """Read frames until the client disconnects; parse errors are answered here."""
+        seq = 0
+        previous: Optional[Dict[str, Any]] = None
+        while True:
+            try:
+                data = await self.websocket.receive_text()
+            except WebSocketDisconnect:
+                LOGGER.info("[v2 stream] Client disconnected")
+                return
+            seq += 1
+            try:
+                message = json.loads(data)
+                if not isinstance(message, dict):
+                    raise ValueError("frame must be a JSON object")
+                window = apply_delta(previous, message) if message.get("delta") else message
+            except json.JSONDecodeError as e:
+                await self.send(_error_frame(seq, f"Invalid JSON: {e}"))
+                continue
+            except ValueError as e:
+                await self.send(_error_frame(seq, str(e)))
+                continue
+            previous = window
+            await self.offer((seq, window))
+
+    async def compute_loop(self) -> None:
+        """Score queued windows in order and send one frame per scored window."""
+        while True:
+            seq, window = await self.inbox.get()
+            dropped, self.dropped = self.dropped, 0
+            try:
+                # Off the event loop, so other connections keep flowing
+                result = await INFERENCE.run(_compute, self.engine, window, self.session, self.session_id)
+                frame = {"ok": True, "error": None, "seq": seq, "dropped": dropped}
+                frame.update({key: result[key] for key in _RESULT_KEYS})
+            except ValidationError as e:
+                frame = _error_frame(seq, f"Invalid window format: {e}", dropped=dropped)
+            except Overloaded as e:
+                # Server is shedding load: tell the client when to resend
+                frame = _error_frame(seq, str(e), dropped=dropped, retry_after_s=e.retry_after_s)
+            except Exception as e:
+                LOGGER.exception(f"[v2 stream] Error processing window: {e}")
+                frame = _error_frame(seq, str(e), dropped=dropped)
+            try:
+                await self.send(frame)
+            except Exception as e:
+                # Client gone: keep draining so a blocked receiver sees the disconnect
+                LOGGER.debug(f"[v2 stream] Could not send frame {seq}: {e}")
+
 
 @router.websocket("/cav")
-async def stream_cav_v2(websocket: WebSocket):
+async def stream_cav_v2(
+    websocket: WebSocket,
+    session_id: Optional[str] = None,
+    policy: Optional[str] = None,
+    inbox: Optional[int] = None,
+):
     """
     WebSocket endpoint for streaming v2 CAV computation.
-    
+
+    Query parameters:
+        session_id: Share the embedding EMA with /v2/oem/cav/batch requests
+            carrying the same session_id (default: private to the connection)
+        policy: "latest" (drop stale windows) or "lossless" (score every
+            window); default EDON_STREAM_POLICY
+        inbox: Windows waiting to be scored (default 1 for latest,
+            EDON_STREAM_INBOX for lossless)
+
     Client sends JSON messages with v2 window format:
     {
         "physio": {"EDA": [...], "BVP": [...]},
@@ -42,11 +230,20 @@ async def stream_cav_v2(websocket: WebSocket):
         "task": {"id": "work", "complexity": 0.5},
         "device_profile": "humanoid_full"  // optional
     }
-    
-    Server responds with JSON messages:
+
+    or delta frames carrying only the samples since the previous window
+    (see apply_delta):
+    {"delta": true, "physio": {"EDA": [...new samples...]}, "env": {...}}
+
+    Server responds with JSON messages; `seq` is the 1-based number of the
+    frame answered, `dropped` the windows skipped (latest policy) since the
+    previous result. Parse errors are answered as soon as they are read, so
+    frames may arrive out of seq order:
     {
         "ok": true,
         "error": null,
+        "seq": 7,
+        "dropped": 2,
         "cav_vector": [...],
         "state_class": "focus",
         "p_stress": 0.325,
@@ -65,107 +262,37 @@ async def stream_cav_v2(websocket: WebSocket):
             await websocket.send_json({"ok": False, "error": f"License validation failed: {e}"})
             await websocket.close()
             return
-    
+
+    policy = policy or os.getenv("EDON_STREAM_POLICY", "lossless")
+    if policy not in POLICIES:
+        await websocket.accept()
+        await websocket.send_json({"ok": False, "error": f"policy must be one of {POLICIES}, got {policy!r}"})
+        await websocket.close()
+        return
+    if inbox is None:
+        inbox = 1 if policy == "latest" else int(os.getenv("EDON_STREAM_INBOX", "16"))
+
     await websocket.accept()
-    LOGGER.info("[v2 stream] WebSocket connection established")
-    
+    LOGGER.info(f"[v2 stream] WebSocket connection established (policy={policy}, inbox={inbox})")
+
     # Get engine (should be set by main.py)
     engine = ENGINE_V2
     if engine is None:
         # Fallback: create engine if not set
         engine = CAVEngineV2()
         LOGGER.warning("[v2 stream] Engine not set, created new instance")
-    
+
+    pipeline = _StreamPipeline(websocket, engine, policy, inbox, session_id)
+    compute = asyncio.create_task(pipeline.compute_loop())
     try:
-        while True:
-            # Receive message from client
-            try:
-                data = await websocket.receive_text()
-            except WebSocketDisconnect:
-                LOGGER.info("[v2 stream] Client disconnected")
-                break
-            
-            try:
-                # Parse JSON
-                window_dict = json.loads(data)
-                
-                # Validate and convert to Pydantic model
-                try:
-                    window = V2CavWindow(**window_dict)
-                except Exception as e:
-                    # Send error but keep connection alive
-                    error_response = {
-                        "ok": False,
-                        "error": f"Invalid window format: {str(e)}",
-                        "cav_vector": None,
-                        "state_class": None,
-                        "p_stress": None,
-                        "p_chaos": None,
-                        "influences": None,
-                        "confidence": None,
-                        "metadata": None
-                    }
-                    await websocket.send_text(json.dumps(error_response))
-                    continue
-                
-                # Compute CAV v2
-                try:
-                    with _engine_lock:
-                        device_profile = getattr(window, 'device_profile', None)
-                        result = engine.compute_cav_v2(window, device_profile=device_profile)
-                    
-                    # Build response
-                    response = {
-                        "ok": True,
-                        "error": None,
-                        "cav_vector": result['cav_vector'],
-                        "state_class": result['state_class'],
-                        "p_stress": result['p_stress'],
-                        "p_chaos": result['p_chaos'],
-                        "influences": result['influences'],
-                        "confidence": result['confidence'],
-                        "metadata": result['metadata']
-                    }
-                    
-                    await websocket.send_text(json.dumps(response))
-                    
-                except Exception as e:
-                    LOGGER.exception(f"[v2 stream] Error processing window: {e}")
-                    # Send error but keep connection alive
-                    error_response = {
-                        "ok": False,
-                        "error": str(e),
-                        "cav_vector": None,
-                        "state_class": None,
-                        "p_stress": None,
-                        "p_chaos": None,
-                        "influences": None,
-                        "confidence": None,
-                        "metadata": None
-                    }
-                    await websocket.send_text(json.dumps(error_response))
-                    
-            except json.JSONDecodeError as e:
-                # Invalid JSON - send error but keep connection alive
-                error_response = {
-                    "ok": False,
-                    "error": f"Invalid JSON: {str(e)}",
-                    "cav_vector": None,
-                    "state_class": None,
-                    "p_stress": None,
-                    "p_chaos": None,
-                    "influences": None,
-                    "confidence": None,
-                    "metadata": None
-                }
-                await websocket.send_text(json.dumps(error_response))
-                
+        # Until the client disconnects; windows still queued then are dropped
+        await pipeline.receive_loop()
     except Exception as e:
         LOGGER.exception(f"[v2 stream] WebSocket error: {e}")
     finally:
+        compute.cancel()
         try:
             await websocket.close()
         except Exception:
             pass
         LOGGER.info("[v2 stream] WebSocket connection closed")
-
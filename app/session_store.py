@@ -0,0 +1,127 @@
+"""Session-keyed store for per-device engine state.
+
+The model, scaler and schema are shared and read-only; only small mutable
+state (EMA, hysteresis) lives per session. Sessions are spread over sharded
+locks so lookups for different devices rarely contend, each session carries
+its own lock to keep its updates ordered, and idle sessions are evicted by
+TTL and LRU.
+"""
+
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Generic, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_SESSION_ID = "default"
+
+
+class _Entry(Generic[T]):
+    __slots__ = ("state", "lock", "last_seen")
+
+    def __init__(self, state: T):
+        self.state = state
+        self.lock = threading.Lock()
+        self.last_seen = time.monotonic()
+
+
+class SessionStore(Generic[T]):
+    """
+    Thread-safe map of session_id -> state object with LRU/TTL eviction.
+
+    Args:
+        factory: Zero-arg callable creating fresh state for a new session
+        max_sessions: Upper bound on live sessions (split evenly across shards)
+        ttl_s: Idle seconds after which a session is dropped (0 disables TTL)
+        shards: Number of independently locked shards
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], T],
+        max_sessions: Optional[int] = None,
+        ttl_s: Optional[float] = None,
+        shards: int = 16,
+    ):
+        if max_sessions is None:
+            max_sessions = int(os.getenv("EDON_SESSION_MAX", "10000"))
+        if ttl_s is None:
+            ttl_s = float(os.getenv("EDON_SESSION_TTL_S", "3600"))
+        self._factory = factory
+        self._ttl_s = ttl_s
+        self._n_shards = max(1, int(shards))
+        self._per_shard = max(1, int(max_sessions) // self._n_shards)
+        self._shards: List["OrderedDict[str, _Entry[T]]"] = [
+            OrderedDict() for _ in range(self._n_shards)
+        ]
+        self._locks = [threading.Lock() for _ in range(self._n_shards)]
+
+    def _shard(self, session_id: str) -> int:
+        return zlib.crc32(session_id.encode("utf-8")) % self._n_shards
+
+    def _evict(self, shard: "OrderedDict[str, _Entry[T]]", now: float) -> None:
+        """Drop expired sessions from the LRU end, then trim to capacity."""
+        if self._ttl_s > 0:
+            while shard:
+                sid, entry = next(iter(shard.items()))
+                if now - entry.last_seen < self._ttl_s:
+                    break
+                del shard[sid]
+        while len(shard) > self._per_shard:
+            shard.popitem(last=False)
+
+    def _entry(self, session_id: str) -> _Entry[T]:
+        idx = self._shard(session_id)
+        now = time.monotonic()
+        with self._locks[idx]:
+            shard = self._shards[idx]
+            entry = shard.get(session_id)
+            if entry is None:
+                entry = _Entry(self._factory())
+                shard[session_id] = entry
+            else:
+                shard.move_to_end(session_id)
+            entry.last_seen = now
+            self._evict(shard, now)
+            return entry
+
+    def get(self, session_id: str) -> T:
+        """Return the state for session_id, creating it if needed."""
+        return self._entry(session_id).state
+
+    @contextmanager
+    def acquire(self, session_id: str) -> Iterator[T]:
+        """Hold the session's own lock while using its state."""
+        entry = self._entry(session_id)
+        with entry.lock:
+            yield entry.state
+
+    def discard(self, session_id: str) -> bool:
+        """Remove a session. Returns True if it existed."""
+        idx = self._shard(session_id)
+        with self._locks[idx]:
+            return self._shards[idx].pop(session_id, None) is not None
+
+    def __contains__(self, session_id: str) -> bool:
+        idx = self._shard(session_id)
+        with self._locks[idx]:
+            return session_id in self._shards[idx]
+
+    def __len__(self) -> int:
+        total = 0
+        for lock, shard in zip(self._locks, self._shards):
+            with lock:
+                total += len(shard)
+        return total
+
+    def stats(self) -> Dict[str, float]:
+        """Session counts for telemetry/debug endpoints."""
+        return {
+            "sessions": len(self),
+            "capacity": self._per_shard * self._n_shards,
+            "ttl_s": self._ttl_s,
+        }
@@ -1,20 +1,37 @@
 ﻿# app/state_bus.py
 from __future__ import annotations
-from typing import Optional, Dict, Any
-import threading, time
+from typing import Callable, Optional, Dict, Any, List
+import logging, threading, time
 
 _STATE_LOCK = threading.Lock()
 _latest_state: Optional[Dict[str, Any]] = None
 _latest_adapt: Optional[Dict[str, Any]] = None
 
+# Called with a copy of every new state / adapt event (e.g. WS broadcasters)
+_LISTENERS: Dict[str, List[Callable[[Dict[str, Any]], None]]] = {"state": [], "adapt": []}
+LOGGER = logging.getLogger(__name__)
+
 def _now_iso() -> str:
     return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
 
+def add_listener(kind: str, fn: Callable[[Dict[str, Any]], None]) -> None:
+    """Call fn(event) after each set_state (kind "state") or set_adapt (kind "adapt")."""
+    _LISTENERS[kind].append(fn)
+
+def _notify(kind: str, d: Dict[str, Any]) -> None:
+    for fn in _LISTENERS[kind]:
+        try:
+            fn(dict(d))
+        except Exception as e:
+            LOGGER.warning(f"state_bus {kind} listener failed: {e}")
+
 def set_state(d: Dict[str, Any]) -> None:
     global _latest_state
     with _STATE_LOCK:
         _latest_state = dict(d)
         _latest_state.setdefault("ts", _now_iso())
+        latest = _latest_state
+    _notify("state", latest)
 
 def get_state() -> Optional[Dict[str, Any]]:
     with _STATE_LOCK:
@@ -25,6 +42,8 @@ def set_adapt(d: Dict[str, Any]) -> None:
     with _STATE_LOCK:
         _latest_adapt = dict(d)
         _latest_adapt.setdefault("ts", _now_iso())
+        latest = _latest_adapt
+    _notify("adapt", latest)
 
 def get_adapt() -> Optional[Dict[str, Any]]:
     with _STATE_LOCK:
@@ -1,7 +1,7 @@
 # app/utils/feature_ingest.py
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Sequence
 
 import math
 
@@ -54,16 +54,25 @@ def featurize_raw(win: Dict[str, Any]) -> Dict[str, float]:
     }
 
 
-def normalize_feature_map(win: Dict[str, Any]) -> Dict[str, float]:
-    """Lowercase keys and coerce to float; ignore extras."""
+def normalize_feature_map(
+    win: Dict[str, Any], order: Sequence[str] = MODEL_FEATURE_ORDER
+) -> Dict[str, float]:
+    """Lowercase keys and coerce to float; ignore extras. Missing keys default to 0.0."""
     f = {k.lower(): win[k] for k in win}
     out = {}
-    for k in MODEL_FEATURE_ORDER:
-        v = f.get(k, 0.0)
-        out[k] = float(v)
+    for k in order:
+        v = f.get(k.lower(), 0.0)
+        out[k] = float(v if v is not None else 0.0)
     return out
 
 
+def feature_overlap(win: Dict[str, Any], order: Sequence[str]) -> float:
+    """Fraction of ``order`` names present (case-insensitive) in a feature map."""
+    keys = {k.lower() for k in win.keys()}
+    present = [k for k in order if k.lower() in keys]
+    return len(present) / max(1, len(order))
+
+
 def to_vector(fmap: Dict[str, float]) -> List[float]:
     return [float(fmap.get(k, 0.0)) for k in MODEL_FEATURE_ORDER]
 
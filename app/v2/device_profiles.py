@@ -1,9 +1,19 @@
-"""Device profiles for EDON v2 - define sensor availability and weighting."""
+"""
+Device profiles for EDON v2 - define sensor availability and weighting.
 
-from typing import Dict, List, Optional, Set, Tuple
+A profile's modality weights are renormalized over the modalities present in
+each window. All of those variants are precomputed at import time: one
+read-only weight vector per (profile, modality-presence bitmask), looked up
+with modality_weights() / WEIGHT_TABLE instead of being rebuilt per request.
+"""
+
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
+import numpy as np
+
 
 class DeviceProfile(str, Enum):
     """Device profile types."""
@@ -109,6 +119,80 @@ DEVICE_PROFILES: Dict[DeviceProfile, DeviceProfileConfig] = {
 }
 
 
+# Modality order of weight vectors and presence bitmasks (bit k = MODALITIES[k])
+MODALITIES: Tuple[str, ...] = ('physio', 'motion', 'env', 'vision', 'audio', 'task', 'system')
+ALL_MODALITIES_MASK = (1 << len(MODALITIES)) - 1
+
+# Weights used when no profile applies (not renormalized by presence)
+DEFAULT_MODALITY_WEIGHTS: Mapping[str, float] = MappingProxyType({
+    'physio': 0.4,
+    'motion': 0.15,
+    'env': 0.15,
+    'vision': 0.1,
+    'audio': 0.1,
+    'task': 0.05,
+    'system': 0.05
+})
+
+
+def modality_mask(modalities: Iterable[str]) -> int:
+    """Presence bitmask of `modalities` (names outside MODALITIES are ignored)."""
+    mask = 0
+    for k, m in enumerate(MODALITIES):
+        if m in modalities:
+            mask |= 1 << k
+    return mask
+
+
+def _normalized_weights(weights: Mapping[str, float], mask: int) -> Dict[str, float]:
+    """
+    Profile weights with the present modalities rescaled to sum to 1.0.
+    
+    Weights of absent modalities are kept as they are; if the present ones sum
+    to zero nothing is rescaled.
+    """
+    out = dict(weights)
+    present = [m for k, m in enumerate(MODALITIES) if mask >> k & 1 and m in out]
+    total_weight = sum(out[m] for m in present)
+    if total_weight > 0:
+        for m in present:
+            out[m] = out[m] / total_weight
+    return out
+
+
+def _build_weight_tables() -> Tuple[Dict[Optional[str], int], np.ndarray, Tuple[Tuple[Mapping[str, float], ...], ...]]:
+    """(row index per profile name, (P, 2**M, M) weight vectors, the same as read-only dicts)."""
+    index: Dict[Optional[str], int] = {None: 0}
+    rows = [[dict(DEFAULT_MODALITY_WEIGHTS)] * (ALL_MODALITIES_MASK + 1)]
+    for config in DEVICE_PROFILES.values():
+        index[config.name] = len(rows)
+        rows.append([
+            _normalized_weights(config.modality_weights, mask) for mask in range(ALL_MODALITIES_MASK + 1)
+        ])
+    table = np.array([[[w.get(m, 0.0) for m in MODALITIES] for w in row] for row in rows])
+    table.setflags(write=False)
+    mappings = tuple(tuple(MappingProxyType(w) for w in row) for row in rows)
+    return index, table, mappings
+
+
+# WEIGHT_TABLE[PROFILE_INDEX[name], mask] is the weight vector (MODALITIES
+# order) for profile `name` (None: no profile) and presence bitmask `mask`
+PROFILE_INDEX, WEIGHT_TABLE, _WEIGHT_MAPPINGS = _build_weight_tables()
+
+
+def modality_weights(profile: Optional[DeviceProfileConfig], modalities_present: Iterable[str]) -> Mapping[str, float]:
+    """
+    Read-only modality weights for a window.
+    
+    Args:
+        profile: The window's device profile (None: DEFAULT_MODALITY_WEIGHTS)
+        modalities_present: Modalities the window carries
+    """
+    if profile is None:
+        return DEFAULT_MODALITY_WEIGHTS
+    return _WEIGHT_MAPPINGS[PROFILE_INDEX[profile.name]][modality_mask(modalities_present)]
+
+
 def get_profile(profile_name: str) -> Optional[DeviceProfileConfig]:
     """Get device profile by name."""
     try:
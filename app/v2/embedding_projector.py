@@ -0,0 +1,119 @@
+"""
+Fixed-size reductions of vision/audio embeddings for EDON v2.
+
+Vision and audio embeddings arrive at whatever width the OEM's model emits
+(up to 10,000 floats). EmbeddingProjector reduces each one to `dim` float32
+values with a Gaussian random projection per (source, input width). The
+projections are seeded from the source name and width, so every process
+(inference workers, restarts) reduces an embedding the same way. Embeddings no
+wider than `dim` are zero-padded instead.
+
+Robots resend the same scene embedding many times per second, so reductions
+are cached by a hash of the embedding's float32 bytes (LRU).
+
+Environment:
+    EDON_EMBED_DIM: Width of reduced embeddings (default 32)
+    EDON_EMBED_CACHE: Cached reductions (default 256; 0 disables the cache)
+"""
+
+import hashlib
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Tuple
+
+import numpy as np
+
+
+class ReducedEmbedding(NamedTuple):
+    """A reduced embedding: unit-norm float32 vector (read-only) + the input's L2 norm."""
+    vector: np.ndarray
+    norm: float
+
+
+class EmbeddingProjector:
+    """
+    Per-source random projections of embeddings to `dim` floats, with a content-hash cache.
+
+    Args:
+        dim: Width of reduced embeddings
+        cache_size: Reductions kept in the LRU cache (0 disables it)
+        seed: Base seed of the projection matrices
+    """
+
+    def __init__(self, dim: int = 32, cache_size: int = 256, seed: int = 0):
+        self.dim = int(dim)
+        self.cache_size = int(cache_size)
+        self.seed = int(seed)
+        self._matrices: Dict[Tuple[str, int], np.ndarray] = {}
+        self._cache: "OrderedDict[Tuple[str, bytes], ReducedEmbedding]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "EmbeddingProjector":
+        return cls(
+            dim=int(os.getenv("EDON_EMBED_DIM", "32")),
+            cache_size=int(os.getenv("EDON_EMBED_CACHE", "256")),
+        )
+
+    def matrix(self, source: str, width: int) -> np.ndarray:
+        """The (width, dim) float32 projection for `source` embeddings of `width` floats."""
+        key = (source, width)
+        m = self._matrices.get(key)
+        if m is None:
+            rng = np.random.default_rng([self.seed, zlib.crc32(source.encode("utf-8")), width])
+            m = (rng.standard_normal((width, self.dim)) / np.sqrt(self.dim)).astype(np.float32)
+            m.setflags(write=False)
+            with self._lock:
+                m = self._matrices.setdefault(key, m)
+        return m
+
+    def reduce(self, source: str, embedding: np.ndarray) -> ReducedEmbedding:
+        """
+        Reduce one embedding (1-D float32; other dtypes are converted).
+
+        Returns:
+            ReducedEmbedding(vector (dim,) float32 with unit L2 norm or zeros,
+            norm of the original embedding)
+        """
+        emb = np.ascontiguousarray(embedding, dtype=np.float32).reshape(-1)
+        key = None
+        if self.cache_size > 0:
+            key = (source, hashlib.blake2b(emb, digest_size=16).digest())
+            with self._lock:
+                hit = self._cache.get(key)
+                if hit is not None:
+                    self._cache.move_to_end(key)
+                    self.hits += 1
+                    return hit
+
+        norm = float(np.linalg.norm(emb.astype(np.float64)))
+        if len(emb) <= self.dim:
+            vector = np.zeros(self.dim, dtype=np.float32)
+            vector[:len(emb)] = emb
+        else:
+            vector = emb @ self.matrix(source, len(emb))
+        length = np.linalg.norm(vector)
+        if length > 0:
+            vector /= length
+        vector.setflags(write=False)
+        reduced = ReducedEmbedding(vector, norm)
+
+        if key is not None:
+            with self._lock:
+                self.misses += 1
+                self._cache[key] = reduced
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return reduced
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "cached": len(self._cache)}
+
+
+# Shared by extract_vision_features / extract_audio_features
+PROJECTOR = EmbeddingProjector.from_env()
@@ -2,65 +2,136 @@
 
 import numpy as np
 import math
-from typing import Dict, Any, List, Optional, Tuple, Set
+from dataclasses import asdict, dataclass
+from typing import Dict, Any, List, Mapping, Optional, Sequence, Tuple, Set
 from app.v2.schemas_v2 import CAVRequestV2, CAVResponseV2, InfluenceFields
-from app.v2.multimodal_fusion import fuse_multimodal_features
+from app.v2.multimodal_fusion import fuse_multimodal_features, fuse_multimodal_features_batch
 from app.v2.state_classifier_v2 import classify_state_v2, compute_influence_fields
 from app.v2.device_profiles import (
     DeviceProfile, DeviceProfileConfig, get_profile,
-    get_available_modalities
+    get_available_modalities, modality_mask, modality_weights,
+    MODALITIES as _MODALITIES, PROFILE_INDEX, WEIGHT_TABLE
 )
 from app.v2.pca_fusion import PCAFusion, create_default_pca_fusion
+from app.v2.pca_fitter import PCAFitter
 from app.v2.neural_head import NeuralHeadMLP, create_default_neural_head
+from app.latency import stage
+
+
+@dataclass
+class EngineSessionV2:
+    """Mutable per-stream state: EMA of the 128-dim CAV embedding."""
+    
+    cav_smooth: Optional[np.ndarray] = None
+
+
+@dataclass
+class ScoringContext:
+    """
+    Every intermediate of one window's rule-based scoring, each computed once.
+    
+    Built by CAVEngineV2._score_window (or column-wise by the batch path),
+    consumed by state classification and influence fields, and reported as
+    metadata['scoring'].
+    """
+    scores: Dict[str, float]
+    env_score: float
+    circadian_score: float
+    system_stress: float
+    p_stress: float
+    p_focus: float
+    p_chaos: float
+    emergency_indicators: Dict[str, bool]
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+# Scalar features read by the scoring rules; columns of the batch path
+_SCORED_FEATURES = (
+    'eda_mean', 'bvp_mean', 'bvp_std', 'torque_mean', 'velocity_mag', 'acc_std',
+    'temp_c', 'humidity', 'aqi', 'local_hour', 'vision_embedding_norm',
+    'has_stress_keywords', 'emotion', 'task_stress', 'task_complexity',
+    'task_difficulty', 'system_stress', 'error_rate',
+)
+
+
+def _pymin(a, b):
+    """Elementwise builtin min(a, b): `a` unless b < a (so NaN `b` keeps `a`)."""
+    return np.where(b < a, b, a)
+
+
+def _pymax(a, b):
+    """Elementwise builtin max(a, b): `a` unless b > a."""
+    return np.where(b > a, b, a)
+
+
+class _FeatureColumns:
+    """The _SCORED_FEATURES of N feature dicts as (values, present) column pairs."""
+    
+    def __init__(self, feature_dicts: List[Dict[str, Any]]):
+        n = len(feature_dicts)
+        self.n = n
+        self._values = {name: np.zeros(n) for name in _SCORED_FEATURES}
+        self._present = {name: np.zeros(n, dtype=bool) for name in _SCORED_FEATURES}
+        for i, features in enumerate(feature_dicts):
+            for name in _SCORED_FEATURES:
+                if name in features:
+                    self._values[name][i] = features[name]
+                    self._present[name][i] = True
+    
+    def __call__(self, name: str) -> Tuple[np.ndarray, np.ndarray]:
+        return self._values[name], self._present[name]
+
+
+def _weighted_mean(components, fallback: np.ndarray) -> np.ndarray:
+    """Row-wise sum(value * weight) / sum(weight) over present components, else fallback."""
+    num = 0.0
+    den = 0.0
+    any_present = np.zeros(len(fallback), dtype=bool)
+    for present, value, weight in components:
+        num = num + np.where(present, value * weight, 0.0)
+        den = den + np.where(present, weight, 0.0)
+        any_present |= present
+    return np.where(any_present, num / np.where(any_present, den, 1.0), fallback)
 
 
 class CAVEngineV2:
-    """EDON v2 CAV Engine with multimodal fusion, PCA, and neural head."""
+    """
+    EDON v2 CAV Engine with multimodal fusion, PCA, and neural head.
+    
+    Scoring only reads engine state: profile weights come from the immutable
+    per-(profile, modality bitmask) tables in device_profiles, and the EMA of
+    the embedding lives in an EngineSessionV2. Methods accept an explicit
+    session, so one engine can serve many streams from many threads without
+    a global lock; without one they fall back to the engine's own default
+    session (single-stream callers).
+    """
     
-    def __init__(self, device_profile: Optional[str] = None):
+    def __init__(self, device_profile: Optional[str] = None, pca_fitter: Optional[PCAFitter] = None):
         """
         Initialize v2 engine.
         
         Args:
             device_profile: Device profile name (humanoid_full, wearable_limited, drone_nav)
+            pca_fitter: Collects features and publishes fitted PCA bases off the
+                request path (a memory-only fitter with no thread if omitted)
         """
         import os
         import logging
         logger = logging.getLogger(__name__)
         
-        # Device profile - only set if explicitly provided
+        # Device profile - only set if explicitly provided (an invalid name
+        # means no profile: default weights)
         self.device_profile: Optional[DeviceProfileConfig] = None
         if device_profile:
-            profile_obj = get_profile(device_profile)
-            if profile_obj:
-                self.device_profile = profile_obj
-                self.weights = profile_obj.modality_weights.copy()
-            else:
-                # Invalid profile name - use default weights
-                self.weights = {
-                    'physio': 0.4,
-                    'motion': 0.15,
-                    'env': 0.15,
-                    'vision': 0.1,
-                    'audio': 0.1,
-                    'task': 0.05,
-                    'system': 0.05
-                }
-        else:
-            # No profile - use default weights
-            self.weights = {
-                'physio': 0.4,
-                'motion': 0.15,
-                'env': 0.15,
-                'vision': 0.1,
-                'audio': 0.1,
-                'task': 0.05,
-                'system': 0.05
-            }
+            self.device_profile = get_profile(device_profile)
         
-        # PCA fusion for 128-dim embeddings
+        # PCA fusion for 128-dim embeddings: a fixed basis loaded at startup
+        # (main.py, EDON_PCA_PATH), else the fitter's latest published basis
         self.pca_fusion = create_default_pca_fusion()
         self.pca_fitted = False
+        self.pca_fitter = pca_fitter if pca_fitter is not None else PCAFitter()
         
         # Try to load PCA from environment (handled in main.py, skip here to avoid duplicate loading)
         # PCA will be loaded in main.py if needed
@@ -70,21 +141,36 @@ class CAVEngineV2:
         
         # Neural weights loading handled in main.py to avoid duplicate loading
         
-        # EMA smoothing for CAV vector
-        self.cav_smooth = None
+        # EMA smoothing for CAV vector; state used when callers don't pass a session
+        self.session = EngineSessionV2()
         self.alpha = 0.3  # EMA smoothing factor
-        
-        # Store recent feature vectors for PCA fitting
-        self.recent_features: List[Dict[str, float]] = []
-        self.max_recent_features = 100
     
-    def compute_cav_v2(self, request: CAVRequestV2, device_profile: Optional[str] = None) -> Dict[str, Any]:
+    # Default-session accessor (kept for existing single-stream callers)
+    @property
+    def cav_smooth(self) -> Optional[np.ndarray]:
+        return self.session.cav_smooth
+    
+    @cav_smooth.setter
+    def cav_smooth(self, value: Optional[np.ndarray]) -> None:
+        self.session.cav_smooth = value
+    
+    def compute_cav_v2(
+        self,
+        request: CAVRequestV2,
+        device_profile: Optional[str] = None,
+        fused: Optional[Dict[str, Any]] = None,
+        session: Optional[EngineSessionV2] = None,
+    ) -> Dict[str, Any]:
         """
         Compute CAV v2 from multimodal inputs with PCA fusion and neural head.
         
         Args:
             request: CAV request with multimodal inputs
             device_profile: Optional device profile override
+            fused: Precomputed fuse_multimodal_features(request) output (e.g.
+                from an inference worker); computed here when omitted
+            session: EMA state of the caller's stream (default: the engine's
+                own session). Calls sharing a session must not overlap.
             
         Returns:
             Dictionary with:
@@ -96,84 +182,34 @@ class CAVEngineV2:
             - confidence: float - Overall confidence
             - metadata: Dict - Additional metadata
         """
-        # Handle device profile (OEM-friendly: weighting only, no validation)
-        # Use profile from request first, then from parameter, then engine default
-        profile = None
-        profile_name = None
-        
-        # Check if profile is explicitly in request
-        if hasattr(request, 'device_profile'):
-            request_profile_value = getattr(request, 'device_profile', None)
-            if request_profile_value is not None and request_profile_value != "":
-                profile = get_profile(request_profile_value)
-                if profile:
-                    profile_name = profile.name
-        
-        # Use explicit device_profile parameter if provided
-        if not profile and device_profile:
-            profile = get_profile(device_profile)
-            if profile:
-                profile_name = profile.name
-        
-        # Use engine default if no explicit profile
-        if not profile and self.device_profile:
-            profile = self.device_profile
-            profile_name = profile.name
-        
-        # Apply profile weights (if available) - profile is a hint, not a contract
-        # Never reject requests based on missing modalities
-        if profile:
-            self.weights = profile.modality_weights.copy()
+        profile, profile_name = self._resolve_profile(request, device_profile)
         
         # Fuse multimodal features
-        fused = fuse_multimodal_features(request)
+        if fused is None:
+            with stage("featurize"):
+                fused = fuse_multimodal_features(request)
         features = fused['features']
         embeddings = fused['embeddings']
         modalities_present = fused['modalities_present']
         
-        # Update weights based on profile if available
-        if profile:
-            # Normalize weights to sum to 1.0
-            total_weight = sum(self.weights.get(m, 0.0) for m in modalities_present)
-            if total_weight > 0:
-                for m in modalities_present:
-                    if m in self.weights:
-                        self.weights[m] = self.weights[m] / total_weight
-        
-        # Store features for PCA fitting
-        self.recent_features.append(features.copy())
-        if len(self.recent_features) > self.max_recent_features:
-            self.recent_features.pop(0)
-        
-        # Fit PCA if not fitted and we have enough samples
-        if not self.pca_fitted and len(self.recent_features) >= 2:
-            try:
-                self.pca_fusion.fit(self.recent_features)
-                self.pca_fitted = True
-            except Exception as e:
-                # PCA fitting failed, will use fallback
-                pass
+        # Profile weights renormalized over the modalities present (a
+        # precomputed read-only table entry) - profile is a hint, not a contract
+        weights = modality_weights(profile, modalities_present)
         
-        # Compute base scores from each modality (weighted by profile)
-        scores = self._compute_modality_scores(features, embeddings, modalities_present)
+        # Record features for the background PCA fit; never fit here
+        self.pca_fitter.observe(features)
+        pca, pca_version = self._pca_basis()
         
-        # Compute probabilities
-        p_stress = self._compute_p_stress(scores, features)
-        p_focus = self._compute_p_focus(scores, features)
-        p_chaos = self._compute_p_chaos(scores, features)
-        
-        # Compute environmental and circadian scores
-        env_score = self._compute_env_score(features)
-        circadian_score = self._compute_circadian_score(features)
-        system_stress = features.get('system_stress', 0.0)
-        
-        # Check for emergency indicators
-        emergency_indicators = self._check_emergency_indicators(features, request)
+        # Modality scores, env/circadian scores, p_stress/p_focus/p_chaos and
+        # emergency flags (weighted by profile), each computed once
+        ctx = self._score_window(features, embeddings, modalities_present, request, weights)
+        scores = ctx.scores
         
         # Generate 128-dim CAV embedding using PCA
         try:
-            if self.pca_fitted:
-                cav_embedding_128 = self.pca_fusion.transform(features)
+            if pca is not None:
+                with stage("pca"):
+                    cav_embedding_128 = pca.transform(features)
             else:
                 # Fallback: create embedding from features directly
                 cav_embedding_128 = self._create_fallback_embedding(features, scores)
@@ -182,31 +218,390 @@ class CAVEngineV2:
             cav_embedding_128 = self._create_fallback_embedding(features, scores)
         
         # Apply EMA smoothing to embedding
-        if self.cav_smooth is None:
-            self.cav_smooth = cav_embedding_128.copy()
+        cav_vector_smooth = self._smooth(session if session is not None else self.session, cav_embedding_128).tolist()
+        
+        # Use neural head for state prediction and action recommendations
+        with stage("neural_head"):
+            neural_pred = self.neural_head.predict(cav_vector_smooth)
+        
+        return self._build_result(
+            cav_vector_smooth, neural_pred, ctx, features, embeddings,
+            modalities_present, profile, profile_name, pca is not None, pca_version,
+        )
+    
+    def compute_cav_v2_batch(
+        self,
+        requests: List[CAVRequestV2],
+        device_profile: Optional[str] = None,
+        fused: Optional[List[Any]] = None,
+        session: Optional[EngineSessionV2] = None,
+        sessions: Optional[Sequence[EngineSessionV2]] = None,
+    ) -> List[Any]:
+        """
+        compute_cav_v2 for N windows, vectorized across the batch.
+        
+        Feature extraction stacks the physio/accelerometer signals into
+        (N, 240) matrices; modality scores, p_stress, p_focus and p_chaos are
+        NumPy expressions over the batch; PCA projection and the neural head
+        run once on (N, d) matrices. Profile weights are gathered from
+        WEIGHT_TABLE by (profile, modality bitmask); the EMA of the embedding
+        is applied in request order, so results match calling compute_cav_v2
+        window by window.
+        
+        Args:
+            requests: Windows to score, in order
+            device_profile: Optional device profile override
+            fused: Precomputed fuse_multimodal_features output per window (an
+                Exception instance marks a window whose extraction failed)
+            session: EMA state shared by all windows (default: the engine's
+                own session)
+            sessions: EMA state per window instead (e.g. windows of several
+                streams scored together); overrides `session`
+        
+        Returns:
+            One compute_cav_v2 result dict per window, or the Exception for
+            windows that failed feature extraction
+        """
+        if fused is None:
+            with stage("featurize"):
+                fused = fuse_multimodal_features_batch(requests)
+        out: List[Any] = list(fused)
+        rows = [i for i, f in enumerate(fused) if not isinstance(f, Exception)]
+        if not rows:
+            return out
+        
+        reqs = [requests[i] for i in rows]
+        features_list = [fused[i]['features'] for i in rows]
+        modalities_list = [fused[i]['modalities_present'] for i in rows]
+        profiles = [self._resolve_profile(r, device_profile) for r in reqs]
+        
+        # Profile weights per window: one gather from the precomputed table
+        weight_values = WEIGHT_TABLE[
+            [PROFILE_INDEX[profile.name if profile else None] for profile, _ in profiles],
+            [modality_mask(mods) if profile else 0 for (profile, _), mods in zip(profiles, modalities_list)],
+        ]
+        
+        # Vectorized scoring
+        col = _FeatureColumns(features_list)
+        present = {
+            m: np.array([m in mods for mods in modalities_list], dtype=bool) for m in _MODALITIES
+        }
+        env_score = self._env_score_batch(col)
+        circadian_score = self._circadian_score_batch(col)
+        scores = self._modality_scores_batch(col, present, env_score)
+        components = self._stress_components_batch(col)
+        p_stress = self._p_stress_batch(components, scores, col, weight_values)
+        p_focus = self._p_focus_batch(scores, p_stress)
+        p_chaos = self._p_chaos_batch(scores, col, p_stress)
+        # The emergency check judges p_stress with neutral modality scores
+        neutral = {m: np.full(col.n, 0.5) for m in _MODALITIES}
+        p_stress_neutral = self._p_stress_batch(components, neutral, col, weight_values)
+        system_stress_values, system_stress_present = col('system_stress')
+        system_stress = np.where(system_stress_present, system_stress_values, 0.0)
+        scores_list = [
+            {m: float(scores[m][j]) for m in _MODALITIES} for j in range(col.n)
+        ]
+        
+        # Record features for the background PCA fit; one basis for the whole batch
+        for features in features_list:
+            self.pca_fitter.observe(features)
+        pca, pca_version = self._pca_basis()
+        
+        # Generate 128-dim CAV embeddings: one PCA transform for the batch
+        embeddings_128: List[Optional[np.ndarray]] = [None] * col.n
+        if pca is not None:
+            try:
+                with stage("pca"):
+                    embeddings_128 = list(pca.transform_batch(features_list))
+            except Exception:
+                for j in range(col.n):
+                    try:
+                        embeddings_128[j] = pca.transform(features_list[j])
+                    except Exception:
+                        pass
+        for j in range(col.n):
+            if embeddings_128[j] is None:
+                embeddings_128[j] = self._create_fallback_embedding(features_list[j], scores_list[j])
+        
+        # Apply EMA smoothing to the embeddings, in request order
+        if sessions is not None:
+            window_sessions = [sessions[i] for i in rows]
         else:
-            # Ensure same dimension
-            if len(self.cav_smooth) == len(cav_embedding_128):
-                self.cav_smooth = self.alpha * cav_embedding_128 + (1 - self.alpha) * self.cav_smooth
-            else:
-                self.cav_smooth = cav_embedding_128.copy()
+            window_sessions = [session if session is not None else self.session] * col.n
+        smoothed = [self._smooth(s, e) for s, e in zip(window_sessions, embeddings_128)]
+        
+        with stage("neural_head"):
+            neural_preds = self.neural_head.predict_batch(np.array(smoothed, dtype=np.float32))
+        
+        emergency_keywords = ['emergency', 'help', 'stop', 'danger', 'critical']
+        for j, i in enumerate(rows):
+            request = reqs[j]
+            has_emergency = bool(system_stress[j] > 0.9 or p_stress_neutral[j] > 0.95)
+            if request.audio and request.audio.keywords:
+                if any(kw.lower() in emergency_keywords for kw in request.audio.keywords):
+                    has_emergency = True
+            emergency_indicators = {
+                'has_emergency': has_emergency,
+                'system_critical': bool(system_stress[j] > 0.9),
+            }
+            ctx = ScoringContext(
+                scores=scores_list[j],
+                env_score=float(env_score[j]),
+                circadian_score=float(circadian_score[j]),
+                system_stress=features_list[j].get('system_stress', 0.0),
+                p_stress=float(p_stress[j]),
+                p_focus=float(p_focus[j]),
+                p_chaos=float(p_chaos[j]),
+                emergency_indicators=emergency_indicators,
+            )
+            profile, profile_name = profiles[j]
+            out[i] = self._build_result(
+                smoothed[j].tolist(), neural_preds[j], ctx, features_list[j], fused[i]['embeddings'],
+                modalities_list[j], profile, profile_name, pca is not None, pca_version,
+            )
+        return out
+    
+    def _modality_scores_batch(
+        self, col: _FeatureColumns, present: Dict[str, np.ndarray], env_score: np.ndarray
+    ) -> Dict[str, np.ndarray]:
+        """_compute_modality_scores over a batch."""
+        ones = np.ones(col.n)
+        scores = {}
         
-        cav_vector_smooth = self.cav_smooth.tolist()
+        s = ones
+        v, has = col('eda_mean')
+        s = np.where(has, 1.0 - _pymin(1.0, v / 2.0) * 0.5, s)
+        v, has = col('bvp_mean')
+        s = np.where(has, _pymin(s, 1.0 - _pymin(1.0, v / 1.0) * 0.3), s)
+        scores['physio'] = np.where(present['physio'], _pymax(0.0, s), 0.5)
+        
+        s = ones
+        v, has = col('torque_mean')
+        s = np.where(has, 1.0 - _pymin(1.0, v / 100.0) * 0.4, s)
+        v, has = col('velocity_mag')
+        s = np.where(has, _pymin(s, 1.0 - _pymin(1.0, v / 10.0) * 0.2), s)
+        v, has = col('acc_std')
+        s = np.where(has, _pymin(s, 1.0 - _pymin(1.0, v / 10.0) * 0.5), s)
+        scores['motion'] = np.where(present['motion'], _pymax(0.0, s), 0.5)
+        
+        scores['env'] = np.where(present['env'], env_score, 0.5)
+        
+        v, has = col('vision_embedding_norm')
+        s = np.where(has, 1.0 - _pymin(1.0, v / 10.0) * 0.3, ones)
+        scores['vision'] = np.where(present['vision'], _pymax(0.0, s), 0.5)
+        
+        v, has = col('has_stress_keywords')
+        s = np.where(has & (v > 0.5), 0.3, ones)
+        v, has = col('emotion')
+        s = np.where(has & (v == 1), 0.4, np.where(has & (v == 0), 0.9, s))
+        scores['audio'] = np.where(present['audio'], _pymax(0.0, s), 0.5)
+        
+        stress, has_stress = col('task_stress')
+        complexity, has_complexity = col('task_complexity')
+        s = np.where(has_stress, 1.0 - stress, np.where(has_complexity, 1.0 - complexity * 0.5, ones))
+        scores['task'] = np.where(present['task'], _pymax(0.0, s), 0.5)
+        
+        v, has = col('system_stress')
+        s = np.where(has, 1.0 - v, ones)
+        scores['system'] = np.where(present['system'], _pymax(0.0, s), 0.5)
+        return scores
+    
+    def _stress_components_batch(self, col: _FeatureColumns) -> List[Tuple[np.ndarray, np.ndarray, float]]:
+        """_stress_components over a batch, as (present, stress, weight) columns."""
+        K_EDA = 3.0
+        K_BVP = 2.0
+        components = []
+        
+        v, has = col('eda_mean')
+        components.append((has, 1.0 - np.exp(-K_EDA * _pymax(0.0, v)), 0.5))
+        v, has = col('bvp_std')
+        components.append((has, 1.0 - np.exp(-K_BVP * _pymax(0.0, v)), 0.2))
+        
+        stress_env = np.zeros(col.n)
+        t, has = col('temp_c')
+        stress_env = np.select(
+            [has & ((t < 10) | (t > 35)), has & ((t < 15) | (t > 30)), has & ((t < 18) | (t > 28))],
+            [0.4, 0.2, 0.1],
+            stress_env,
+        )
+        h, has = col('humidity')
+        stress_env = np.where(
+            has & ((h < 20) | (h > 80)), _pymax(stress_env, 0.2),
+            np.where(has & ((h < 30) | (h > 70)), _pymax(stress_env, 0.1), stress_env),
+        )
+        a, has = col('aqi')
+        stress_env = np.where(
+            has & (a > 150), _pymax(stress_env, 0.3),
+            np.where(has & (a > 100), _pymax(stress_env, 0.15), stress_env),
+        )
+        components.append((stress_env > 0, stress_env, 0.15))
         
-        # Use neural head for state prediction and action recommendations
-        neural_pred = self.neural_head.predict(cav_vector_smooth)
+        stress_task = np.zeros(col.n)
+        for name, scale in (('task_complexity', 0.3), ('task_difficulty', 0.3), ('task_stress', 0.4)):
+            v, has = col(name)
+            stress_task = np.where(has, _pymax(stress_task, v * scale), stress_task)
+        components.append((stress_task > 0, stress_task, 0.1))
         
+        v, has = col('system_stress')
+        components.append((has, v, 0.05))
+        return components
+    
+    def _p_stress_batch(
+        self,
+        components: List[Tuple[np.ndarray, np.ndarray, float]],
+        scores: Dict[str, np.ndarray],
+        col: _FeatureColumns,
+        weight_values: np.ndarray,
+    ) -> np.ndarray:
+        """_combine_stress over a batch (weight_values: (N, M) WEIGHT_TABLE rows)."""
+        # Fallback: modality scores weighted by the profile weights
+        weighted_stress = 0.0
+        total_weight = 0.0
+        for k, m in enumerate(_MODALITIES):
+            weighted_stress = weighted_stress + (1.0 - scores[m]) * weight_values[:, k]
+            total_weight = total_weight + weight_values[:, k]
+        fallback = np.where(total_weight > 0, weighted_stress / np.where(total_weight > 0, total_weight, 1.0), 0.5)
+        
+        p_stress = _weighted_mean(components, fallback)
+        
+        # Audio stress keywords boost
+        v, has = col('has_stress_keywords')
+        p_stress = np.where(has & (v > 0.5), _pymin(1.0, p_stress + 0.15), p_stress)
+        return np.clip(p_stress, 0.0, 1.0)
+    
+    def _p_focus_batch(self, scores: Dict[str, np.ndarray], p_stress: np.ndarray) -> np.ndarray:
+        """_compute_p_focus over a batch."""
+        env_score = scores['env']
+        system_score = scores['system']
+        physio_score = scores['physio']
+        focused = (0.2 <= p_stress) & (p_stress <= 0.5) & (env_score >= 0.8) & (system_score >= 0.7)
+        p_focus = np.where(focused, env_score * 0.4 + system_score * 0.3 + physio_score * 0.3, 0.0)
+        return np.clip(p_focus, 0.0, 1.0)
+    
+    def _p_chaos_batch(
+        self, scores: Dict[str, np.ndarray], col: _FeatureColumns, p_stress: np.ndarray
+    ) -> np.ndarray:
+        """_compute_p_chaos over a batch."""
+        K_MOTION = 4.0
+        K_BVP_CHAOS = 3.0
+        components = []
+        
+        v, has = col('acc_std')
+        components.append((has, 1.0 - np.exp(-K_MOTION * _pymax(0.0, v)), 0.6))
+        v, has = col('bvp_std')
+        components.append((has, 1.0 - np.exp(-K_BVP_CHAOS * _pymax(0.0, v)), 0.2))
+        
+        system_stress, has_system_stress = col('system_stress')
+        system_chaos = np.where(has_system_stress, system_stress * 0.5, 0.0)
+        v, has = col('error_rate')
+        system_chaos = np.where(has, _pymax(system_chaos, v * 0.4), system_chaos)
+        components.append((system_chaos > 0, system_chaos, 0.2))
+        
+        system_stress = np.where(has_system_stress, system_stress, 0.0)
+        fallback = p_stress * 0.4 + system_stress * 0.3 + (1.0 - scores['motion']) * 0.3
+        p_chaos = _weighted_mean(components, fallback)
+        
+        # Amplify chaos when stress is already high (stress + chaos = overload)
+        p_chaos = np.where(p_stress > 0.7, _pymin(1.0, p_chaos + (p_stress - 0.7) * 0.5), p_chaos)
+        return np.clip(p_chaos, 0.0, 1.0)
+    
+    def _env_score_batch(self, col: _FeatureColumns) -> np.ndarray:
+        """_compute_env_score over a batch."""
+        t, has_t = col('temp_c')
+        h, has_h = col('humidity')
+        a, has_a = col('aqi')
+        temp_score = np.select([(t < 18) | (t > 28), (t < 20) | (t > 25)], [0.5, 0.7], 1.0)
+        humidity_score = np.select([(h < 30) | (h > 70), (h < 40) | (h > 60)], [0.5, 0.7], 1.0)
+        aqi_score = np.select([a > 100, a > 50], [0.3, 0.7], 1.0)
+        return np.where(has_t & has_h & has_a, (temp_score + humidity_score + aqi_score) / 3.0, 0.5)
+    
+    def _circadian_score_batch(self, col: _FeatureColumns) -> np.ndarray:
+        """_compute_circadian_score over a batch."""
+        v, has = col('local_hour')
+        hour = np.trunc(v)
+        score = np.select(
+            [((8 <= hour) & (hour <= 12)) | ((14 <= hour) & (hour <= 18)), (6 <= hour) & (hour <= 22)],
+            [1.0, 0.8],
+            0.5,
+        )
+        return np.where(has, score, 0.5)
+    
+    def _smooth(self, session: EngineSessionV2, cav_embedding_128: np.ndarray) -> np.ndarray:
+        """Fold one embedding into the session's EMA and return the smoothed vector."""
+        prev = session.cav_smooth
+        if prev is None or len(prev) != len(cav_embedding_128):
+            session.cav_smooth = cav_embedding_128.copy()
+        else:
+            session.cav_smooth = self.alpha * cav_embedding_128 + (1 - self.alpha) * prev
+        return session.cav_smooth
+    
+    def _pca_basis(self) -> Tuple[Optional[PCAFusion], Optional[int]]:
+        """
+        (basis, version) to project with, read once per call.
+        
+        A basis loaded at startup wins; otherwise the fitter's latest published
+        snapshot. (None, None) until one exists (fallback embedding).
+        """
+        if self.pca_fitted:
+            return self.pca_fusion, None
+        snapshot = self.pca_fitter.current
+        if snapshot is None:
+            return None, None
+        return snapshot.fusion, snapshot.version
+    
+    def _resolve_profile(
+        self, request: CAVRequestV2, device_profile: Optional[str]
+    ) -> Tuple[Optional[DeviceProfileConfig], Optional[str]]:
+        """Profile for a window: the request's, then the argument, then the engine default."""
+        # Handle device profile (OEM-friendly: weighting only, no validation)
+        profile = None
+        profile_name = None
+        
+        # Check if profile is explicitly in request
+        if hasattr(request, 'device_profile'):
+            request_profile_value = getattr(request, 'device_profile', None)
+            if request_profile_value is not None and request_profile_value != "":
+                profile = get_profile(request_profile_value)
+                if profile:
+                    profile_name = profile.name
+        
+        # Use explicit device_profile parameter if provided
+        if not profile and device_profile:
+            profile = get_profile(device_profile)
+            if profile:
+                profile_name = profile.name
+        
+        # Use engine default if no explicit profile
+        if not profile and self.device_profile:
+            profile = self.device_profile
+            profile_name = profile.name
+        return profile, profile_name
+    
+    def _build_result(
+        self,
+        cav_vector_smooth: List[float],
+        neural_pred: Dict[str, Any],
+        ctx: ScoringContext,
+        features: Dict[str, Any],
+        embeddings: Dict[str, np.ndarray],
+        modalities_present: List[str],
+        profile: Optional[DeviceProfileConfig],
+        profile_name: Optional[str],
+        pca_fitted: bool,
+        pca_version: Optional[int],
+    ) -> Dict[str, Any]:
+        """Classify, blend influences and build the compute_cav_v2 result dict."""
         # Combine neural head predictions with rule-based classification
         # Use neural head state if confidence is high, otherwise use rule-based
         neural_confidence = neural_pred['confidence']
         rule_based_state = classify_state_v2(
-            p_stress=p_stress,
-            p_focus=p_focus,
-            p_chaos=p_chaos,
-            env_score=env_score,
-            circadian_score=circadian_score,
-            system_stress=system_stress,
-            emergency_indicators=emergency_indicators
+            p_stress=ctx.p_stress,
+            p_focus=ctx.p_focus,
+            p_chaos=ctx.p_chaos,
+            env_score=ctx.env_score,
+            circadian_score=ctx.circadian_score,
+            system_stress=ctx.system_stress,
+            emergency_indicators=ctx.emergency_indicators
         )
         
         # Use rule-based classification for state_class (deterministic, demo-friendly)
@@ -216,11 +611,11 @@ class CAVEngineV2:
         # Use rule-based influences but blend with neural recommendations
         rule_influences = compute_influence_fields(
             state=state_class,
-            p_stress=p_stress,
-            p_focus=p_focus,
-            p_chaos=p_chaos,
-            env_score=env_score,
-            system_stress=system_stress
+            p_stress=ctx.p_stress,
+            p_focus=ctx.p_focus,
+            p_chaos=ctx.p_chaos,
+            env_score=ctx.env_score,
+            system_stress=ctx.system_stress
         )
         neural_influences = neural_pred['action_recommendations']
         # Blend: 70% rule-based, 30% neural
@@ -246,17 +641,19 @@ class CAVEngineV2:
             'num_features': len(features),
             'has_embeddings': len(embeddings) > 0,
             'scores': {
-                'physio': float(scores.get('physio', 0.5)),
-                'motion': float(scores.get('motion', 0.5)),
-                'env': float(scores.get('env', 0.5)),
-                'vision': float(scores.get('vision', 0.5)),
-                'audio': float(scores.get('audio', 0.5)),
-                'task': float(scores.get('task', 0.5)),
-                'system': float(scores.get('system', 0.5))
+                'physio': float(ctx.scores.get('physio', 0.5)),
+                'motion': float(ctx.scores.get('motion', 0.5)),
+                'env': float(ctx.scores.get('env', 0.5)),
+                'vision': float(ctx.scores.get('vision', 0.5)),
+                'audio': float(ctx.scores.get('audio', 0.5)),
+                'task': float(ctx.scores.get('task', 0.5)),
+                'system': float(ctx.scores.get('system', 0.5))
             },
             'device_profile': profile_name,  # None if no profile
-            'pca_fitted': self.pca_fitted,
+            'pca_fitted': pca_fitted,
+            'pca_version': pca_version,  # None for a basis loaded from EDON_PCA_PATH
             'neural_confidence': float(neural_confidence),
+            'scoring': ctx.as_dict(),
             'neural_state_probs': neural_pred.get('state_probs', {
                 'restorative': 0.0,
                 'focus': 0.0,
@@ -270,8 +667,8 @@ class CAVEngineV2:
         return {
             'cav_vector': cav_vector_smooth,  # 128-dim embedding
             'state_class': state_class,
-            'p_stress': float(p_stress),
-            'p_chaos': float(p_chaos),  # Note: p_focus not in v2 spec, only in metadata if needed
+            'p_stress': float(ctx.p_stress),
+            'p_chaos': float(ctx.p_chaos),  # Note: p_focus not in v2 spec; see metadata['scoring']
             'influences': influences_dict,
             'confidence': float(confidence),
             'metadata': metadata
@@ -302,13 +699,63 @@ class CAVEngineV2:
         
         return embedding
     
+    def _score_window(
+        self,
+        features: Dict[str, Any],
+        embeddings: Dict[str, np.ndarray],
+        modalities_present: List[str],
+        request: CAVRequestV2,
+        weights: Mapping[str, float],
+    ) -> ScoringContext:
+        """
+        Score one window in a single pass (weights: modality_weights() entry).
+        
+        The stress components are extracted once and p_stress is combined
+        once; p_focus, p_chaos and the emergency check reuse it instead of
+        recomputing it (and the modality scores) from the features.
+        """
+        env_score = self._compute_env_score(features)
+        scores = self._compute_modality_scores(features, embeddings, modalities_present, env_score=env_score)
+        components = self._stress_components(features)
+        p_stress = self._combine_stress(components, scores, features, weights)
+        return ScoringContext(
+            scores=scores,
+            env_score=env_score,
+            circadian_score=self._compute_circadian_score(features),
+            system_stress=features.get('system_stress', 0.0),
+            p_stress=p_stress,
+            p_focus=self._compute_p_focus(scores, features, p_stress=p_stress),
+            p_chaos=self._compute_p_chaos(scores, features, p_stress=p_stress),
+            emergency_indicators=self._check_emergency_indicators(
+                features, request, p_stress=self._emergency_p_stress(components, p_stress, features, weights)
+            ),
+        )
+    
+    def _emergency_p_stress(
+        self,
+        components: List[Tuple[float, float]],
+        p_stress: float,
+        features: Dict[str, Any],
+        weights: Mapping[str, float],
+    ) -> float:
+        """
+        p_stress as the emergency check sees it: with every modality score neutral.
+        
+        The modality scores only enter p_stress through the fallback used when
+        no stress component is present, so otherwise this is p_stress itself.
+        """
+        if components:
+            return p_stress
+        return self._combine_stress(components, self._compute_modality_scores(features, {}, []), features, weights)
+    
     def _compute_modality_scores(
         self, 
         features: Dict[str, Any], 
-        embeddings: Dict[str, List[float]],
-        modalities_present: List[str]
+        embeddings: Dict[str, np.ndarray],
+        modalities_present: List[str],
+        env_score: Optional[float] = None,
     ) -> Dict[str, float]:
-        """Compute scores for each modality."""
+        """Compute scores for each modality (env_score: precomputed _compute_env_score)."""
         scores = {}
         
         # Physiological score
@@ -348,7 +795,8 @@ class CAVEngineV2:
         
         # Environment score
         if 'env' in modalities_present:
-            env_score = self._compute_env_score(features)
+            if env_score is None:
+                env_score = self._compute_env_score(features)
             scores['env'] = env_score
         else:
             scores['env'] = 0.5
@@ -413,6 +861,10 @@ class CAVEngineV2:
         Returns:
             p_stress in [0, 1]
         """
+        return self._combine_stress(self._stress_components(features), scores, features)
+    
+    def _stress_components(self, features: Dict[str, Any]) -> List[Tuple[float, float]]:
+        """(stress, weight) pairs of the stress contributors present in the features."""
         # Exponential sensitivity constants
         K_EDA = 3.0  # EDA stress coefficient
         K_BVP = 2.0  # BVP volatility coefficient
@@ -486,20 +938,37 @@ class CAVEngineV2:
             stress_components.append(system_stress)
             weights.append(0.05)
         
+        return list(zip(stress_components, weights))
+    
+    def _combine_stress(
+        self,
+        components: List[Tuple[float, float]],
+        scores: Dict[str, float],
+        features: Dict[str, Any],
+        weights: Optional[Mapping[str, float]] = None,
+    ) -> float:
+        """
+        p_stress from _stress_components, falling back to the modality scores.
+        
+        weights: modality weights of the fallback (default: the engine
+        profile's, all modalities present)
+        """
         # Combine components with weights
-        if stress_components and weights:
-            total_weight = sum(weights)
+        if components:
+            total_weight = sum(w for _, w in components)
             if total_weight > 0:
-                p_stress = sum(s * w for s, w in zip(stress_components, weights)) / total_weight
+                p_stress = sum(s * w for s, w in components) / total_weight
             else:
                 p_stress = 0.5
         else:
             # Fallback: use modality scores if no direct features
+            if weights is None:
+                weights = modality_weights(self.device_profile, _MODALITIES)
             weighted_stress = 0.0
             total_weight = 0.0
             for modality, score in scores.items():
-                if modality in self.weights:
-                    weight = self.weights[modality]
+                if modality in weights:
+                    weight = weights[modality]
                     stress_contrib = (1.0 - score) * weight
                     weighted_stress += stress_contrib
                     total_weight += weight
@@ -511,15 +980,18 @@ class CAVEngineV2:
         
         return float(np.clip(p_stress, 0.0, 1.0))
     
-    def _compute_p_focus(self, scores: Dict[str, float], features: Dict[str, Any]) -> float:
-        """Compute probability of focus."""
+    def _compute_p_focus(
+        self, scores: Dict[str, float], features: Dict[str, Any], p_stress: Optional[float] = None
+    ) -> float:
+        """Compute probability of focus (p_stress: precomputed _compute_p_stress)."""
         # Focus requires good environment, moderate stress, good system state
         env_score = scores.get('env', 0.5)
         system_score = scores.get('system', 0.5)
         physio_score = scores.get('physio', 0.5)
         
         # Focus = moderate stress (0.2-0.5) + good environment + good system
-        p_stress = self._compute_p_stress(scores, features)
+        if p_stress is None:
+            p_stress = self._compute_p_stress(scores, features)
         
         if 0.2 <= p_stress <= 0.5 and env_score >= 0.8 and system_score >= 0.7:
             p_focus = (env_score * 0.4 + system_score * 0.3 + physio_score * 0.3)
@@ -528,7 +1000,9 @@ class CAVEngineV2:
         
         return float(np.clip(p_focus, 0.0, 1.0))
     
-    def _compute_p_chaos(self, scores: Dict[str, float], features: Dict[str, Any]) -> float:
+    def _compute_p_chaos(
+        self, scores: Dict[str, float], features: Dict[str, Any], p_stress: Optional[float] = None
+    ) -> float:
         """
         Compute probability of chaos/overload using exponential sensitivity.
         
@@ -538,9 +1012,15 @@ class CAVEngineV2:
         - System issues: high error rates, network latency
         - Combined with high stress: chaos amplifies when stress is already high
         
+        Args:
+            p_stress: Precomputed _compute_p_stress(scores, features)
+        
         Returns:
             p_chaos in [0, 1]
         """
+        if p_stress is None:
+            p_stress = self._compute_p_stress(scores, features)
+        
         # Exponential sensitivity constants
         K_MOTION = 4.0  # Motion chaos coefficient
         K_BVP_CHAOS = 3.0  # BVP chaos coefficient
@@ -583,13 +1063,11 @@ class CAVEngineV2:
                 p_chaos = 0.0
         else:
             # Fallback: derive from stress and motion if no direct features
-            p_stress = self._compute_p_stress(scores, features)
             system_stress = features.get('system_stress', 0.0)
             motion_score = scores.get('motion', 0.5)
             p_chaos = p_stress * 0.4 + system_stress * 0.3 + (1.0 - motion_score) * 0.3
         
         # Amplify chaos when stress is already high (stress + chaos = overload)
-        p_stress = self._compute_p_stress(scores, features)
         if p_stress > 0.7:
             # High stress amplifies chaos
             p_chaos = min(1.0, p_chaos + (p_stress - 0.7) * 0.5)
@@ -646,9 +1124,10 @@ class CAVEngineV2:
     def _check_emergency_indicators(
         self, 
         features: Dict[str, Any], 
-        request: CAVRequestV2
+        request: CAVRequestV2,
+        p_stress: Optional[float] = None,
     ) -> Dict[str, bool]:
-        """Check for emergency conditions."""
+        """Check for emergency conditions (p_stress: precomputed _emergency_p_stress)."""
         indicators = {
             'has_emergency': False,
             'system_critical': False
@@ -665,11 +1144,12 @@ class CAVEngineV2:
             if any(kw.lower() in emergency_keywords for kw in request.audio.keywords):
                 indicators['has_emergency'] = True
         
-        # Check for very high stress
-        p_stress = self._compute_p_stress(
-            self._compute_modality_scores(features, {}, []),
-            features
-        )
+        # Check for very high stress (judged with neutral modality scores)
+        if p_stress is None:
+            p_stress = self._compute_p_stress(
+                self._compute_modality_scores(features, {}, []),
+                features
+            )
         if p_stress > 0.95:
             indicators['has_emergency'] = True
         
@@ -1,11 +1,19 @@
-"""Multimodal context fusion for EDON v2."""
+"""
+Multimodal context fusion for EDON v2.
+
+Vision/audio embeddings stay float32 arrays end to end: they are validated
+into ndarrays (schemas_v2.Float32Embedding) and reduced by
+embedding_projector.PROJECTOR to a fixed width, so 'embeddings' holds small
+read-only float32 vectors rather than lists of Python floats.
+"""
 
 import numpy as np
-from typing import Dict, Optional, List, Any
+from typing import Dict, Optional, List, Any, Union
 from app.v2.schemas_v2 import (
     PhysioInput, MotionInput, EnvInput, VisionInput, 
     AudioInput, TaskInput, SystemInput, CAVRequestV2
 )
+from app.v2.embedding_projector import PROJECTOR
 
 
 def extract_physio_features(physio: Optional[PhysioInput]) -> Dict[str, float]:
@@ -56,6 +64,12 @@ def extract_motion_features(motion: Optional[MotionInput]) -> Dict[str, float]:
         features['acc_std'] = float(np.nanstd(acc_mag))
         features['acc_max'] = float(np.nanmax(acc_mag))
     
+    _add_motion_extras(motion, features)
+    return features
+
+
+def _add_motion_extras(motion: MotionInput, features: Dict[str, float]) -> None:
+    """Velocity/torque/force features (everything but the accelerometer)."""
     # Use pre-computed features if available
     if motion.velocity_magnitude is not None:
         features['velocity_mag'] = motion.velocity_magnitude
@@ -86,8 +100,6 @@ def extract_motion_features(motion: Optional[MotionInput]) -> Dict[str, float]:
     if motion.acceleration:
         acc_arr = np.array(motion.acceleration)
         features['accel_mag'] = float(np.linalg.norm(acc_arr) if acc_arr.ndim == 1 else np.nanmean(acc_arr))
-    
-    return features
 
 
 def extract_env_features(env: Optional[EnvInput]) -> Dict[str, float]:
@@ -131,14 +143,11 @@ def extract_vision_features(vision: Optional[VisionInput]) -> Dict[str, Any]:
     
     features = {}
     
-    if vision.embedding:
-        # Use embedding directly (normalized)
-        emb = np.array(vision.embedding)
-        if len(emb) > 0:
-            # Normalize embedding
-            emb_norm = emb / (np.linalg.norm(emb) + 1e-8)
-            features['vision_embedding'] = emb_norm.tolist()
-            features['vision_embedding_norm'] = float(np.linalg.norm(emb))
+    if vision.embedding is not None and len(vision.embedding) > 0:
+        # Reduced, unit-norm float32 embedding (cached by content)
+        reduced = PROJECTOR.reduce('vision', vision.embedding)
+        features['vision_embedding'] = reduced.vector
+        features['vision_embedding_norm'] = reduced.norm
     
     if vision.objects:
         features['num_objects'] = len(vision.objects)
@@ -164,14 +173,11 @@ def extract_audio_features(audio: Optional[AudioInput]) -> Dict[str, Any]:
     
     features = {}
     
-    if audio.embedding:
-        # Use embedding directly (normalized)
-        emb = np.array(audio.embedding)
-        if len(emb) > 0:
-            # Normalize embedding
-            emb_norm = emb / (np.linalg.norm(emb) + 1e-8)
-            features['audio_embedding'] = emb_norm.tolist()
-            features['audio_embedding_norm'] = float(np.linalg.norm(emb))
+    if audio.embedding is not None and len(audio.embedding) > 0:
+        # Reduced, unit-norm float32 embedding (cached by content)
+        reduced = PROJECTOR.reduce('audio', audio.embedding)
+        features['audio_embedding'] = reduced.vector
+        features['audio_embedding_norm'] = reduced.norm
     
     if audio.keywords:
         features['num_keywords'] = len(audio.keywords)
@@ -265,21 +271,32 @@ def fuse_multimodal_features(request: CAVRequestV2) -> Dict[str, Any]:
     Returns:
         Dictionary with:
         - 'features': Dict of scalar features
-        - 'embeddings': Dict of embedding vectors
+        - 'embeddings': Dict of reduced float32 embedding vectors (vision, audio)
         - 'modalities_present': List of present modalities
     """
+    return _fuse_window(
+        request,
+        extract_physio_features(request.physio) if request.physio else None,
+        extract_motion_features(request.motion) if request.motion else None,
+    )
+
+
+def _fuse_window(
+    request: CAVRequestV2,
+    physio_feat: Optional[Dict[str, float]],
+    motion_feat: Optional[Dict[str, float]],
+) -> Dict[str, Any]:
+    """Assemble one window's fused features (physio/motion already extracted)."""
     all_features = {}
     embeddings = {}
     modalities_present = []
     
     # Extract features from each modality
     if request.physio:
-        physio_feat = extract_physio_features(request.physio)
         all_features.update(physio_feat)
         modalities_present.append('physio')
     
     if request.motion:
-        motion_feat = extract_motion_features(request.motion)
         all_features.update(motion_feat)
         modalities_present.append('motion')
     
@@ -320,3 +337,95 @@ def fuse_multimodal_features(request: CAVRequestV2) -> Dict[str, Any]:
         'modalities_present': modalities_present
     }
 
+
+
+# Physio signal → (feature prefix, statistics), in extract_physio_features order
+_PHYSIO_STATS = (
+    ('EDA', 'eda', ('mean', 'std', 'max')),
+    ('BVP', 'bvp', ('mean', 'std')),
+    ('TEMP', 'temp', ('mean', 'std')),
+)
+_REDUCERS = {'mean': np.nanmean, 'std': np.nanstd, 'max': np.nanmax}
+
+
+def _stacked_stats(rows: List[Optional[np.ndarray]], stats) -> List[Optional[Dict[str, float]]]:
+    """
+    Per-row nan-statistics of 1-D signals, one reduction per statistic.
+
+    Rows of equal length are stacked into an (n, length) matrix and reduced
+    along axis 1; None rows stay None.
+    """
+    out: List[Optional[Dict[str, float]]] = [None] * len(rows)
+    groups: Dict[int, List[int]] = {}
+    for i, row in enumerate(rows):
+        if row is not None:
+            groups.setdefault(len(row), []).append(i)
+    for idx in groups.values():
+        mat = np.stack([rows[i] for i in idx])
+        columns = [_REDUCERS[name](mat, axis=1).tolist() for name in stats]
+        for j, i in enumerate(idx):
+            out[i] = {name: col[j] for name, col in zip(stats, columns)}
+    return out
+
+
+def _acc_magnitude(motion: Optional[MotionInput]) -> Optional[np.ndarray]:
+    if motion is None or not (motion.ACC_x and motion.ACC_y and motion.ACC_z):
+        return None
+    acc_x = np.array(motion.ACC_x)
+    acc_y = np.array(motion.ACC_y)
+    acc_z = np.array(motion.ACC_z)
+    return np.sqrt(acc_x**2 + acc_y**2 + acc_z**2)
+
+
+def fuse_multimodal_features_batch(requests: List[CAVRequestV2]) -> List[Union[Dict[str, Any], Exception]]:
+    """
+    fuse_multimodal_features for N windows at once.
+
+    The physio signals and accelerometer magnitudes of all windows are
+    stacked into (N, 240) matrices and their mean/std/max computed
+    column-wise, instead of one NumPy call per statistic per window. Output
+    is identical to calling fuse_multimodal_features per window; a window
+    that fails (e.g. mismatched ACC lengths) gets its Exception instead.
+    """
+    n = len(requests)
+    out: List[Union[Dict[str, Any], Exception]] = [None] * n  # type: ignore[list-item]
+
+    physio_stats = {}
+    for key, _, stats in _PHYSIO_STATS:
+        rows = [
+            np.array(getattr(r.physio, key)) if r.physio and getattr(r.physio, key) else None
+            for r in requests
+        ]
+        physio_stats[key] = _stacked_stats(rows, stats)
+
+    acc_rows: List[Optional[np.ndarray]] = [None] * n
+    for i, r in enumerate(requests):
+        try:
+            acc_rows[i] = _acc_magnitude(r.motion)
+        except Exception as e:
+            out[i] = e
+    acc_stats = _stacked_stats(acc_rows, ('mean', 'std', 'max'))
+
+    for i, r in enumerate(requests):
+        if out[i] is not None:
+            continue
+        try:
+            physio_feat = None
+            if r.physio:
+                physio_feat = {}
+                for key, prefix, stats in _PHYSIO_STATS:
+                    row = physio_stats[key][i]
+                    if row is not None:
+                        for name in stats:
+                            physio_feat[f'{prefix}_{name}'] = row[name]
+            motion_feat = None
+            if r.motion:
+                motion_feat = {}
+                if acc_stats[i] is not None:
+                    for name in ('mean', 'std', 'max'):
+                        motion_feat[f'acc_{name}'] = acc_stats[i][name]
+                _add_motion_extras(r.motion, motion_feat)
+            out[i] = _fuse_window(r, physio_feat, motion_feat)
+        except Exception as e:
+            out[i] = e
+    return out
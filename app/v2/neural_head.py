@@ -1,18 +1,74 @@
-"""Neural head MLP for state classification and action recommendations."""
+"""
+Neural head MLP for state classification and action recommendations.
 
+Backends (NeuralHeadMLP.set_backend, EDON_NEURAL_BACKEND):
+- "torch": the torch modules (needed to train or fine-tune)
+- "numpy": float32 NumPy forward pass; weights exported from the torch model
+  or loaded from a torch checkpoint / .npz export, so serving with it never
+  imports torch
+- "int8": as "numpy" with per-output-channel int8 weights (4x smaller;
+  activations stay float32)
+
+All backends run the shared hidden layers once and both output layers on top.
+"""
+
+import importlib.util
+import os
+import sys
 import numpy as np
 from typing import Dict, Any, List, Tuple, Optional
 import warnings
 
 warnings.filterwarnings("ignore")
 
-# Try to import PyTorch, fallback to numpy-based implementation
-try:
-    import torch
-    import torch.nn as nn
-    HAS_TORCH = True
-except ImportError:
-    HAS_TORCH = False
+# PyTorch is optional and imported only when a torch model is built
+HAS_TORCH = importlib.util.find_spec("torch") is not None
+
+BACKENDS = ("torch", "numpy", "int8")
+ACTION_DIM = 7
+
+# Intra-op thread cap set by configure_threads (None: library defaults)
+_INTRA_OP_THREADS: Optional[int] = None
+
+
+def configure_threads(num_threads: Optional[int] = None) -> Optional[int]:
+    """
+    Cap the intra-op threads of torch and of NumPy's BLAS.
+    
+    Every inference worker runs its own forward passes, so letting each one
+    fan out over all cores oversubscribes the machine; with N workers on N
+    cores, 1 is usually right.
+    
+    Args:
+        num_threads: Thread cap (default: EDON_INTRA_OP_THREADS; unset leaves
+            the library defaults alone)
+    
+    Returns:
+        The cap applied, or None
+    """
+    global _INTRA_OP_THREADS
+    if num_threads is None:
+        env = os.getenv("EDON_INTRA_OP_THREADS", "").strip()
+        if not env:
+            return None
+        num_threads = int(env)
+    _INTRA_OP_THREADS = max(1, int(num_threads))
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(_INTRA_OP_THREADS)
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=_INTRA_OP_THREADS, user_api="blas")
+    except ImportError:
+        pass
+    return _INTRA_OP_THREADS
+
+
+def _quantize_int8(W: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-output-column int8 quantization: W ≈ q * scale."""
+    scale = np.abs(W).max(axis=0) / 127.0
+    scale[scale == 0] = 1.0
+    q = np.clip(np.rint(W / scale), -127, 127).astype(np.int8)
+    return q, scale.astype(np.float32)
 
 
 class NeuralHeadMLP:
@@ -24,7 +80,8 @@ class NeuralHeadMLP:
         hidden_dims: List[int] = [64, 32],
         num_states: int = 6,
         dropout: float = 0.1,
-        use_torch: bool = True
+        use_torch: bool = True,
+        backend: Optional[str] = None,
     ):
         """
         Initialize neural head.
@@ -34,21 +91,37 @@ class NeuralHeadMLP:
             hidden_dims: Hidden layer dimensions
             num_states: Number of state classes (6: restorative, focus, balanced, overload, alert, emergency)
             dropout: Dropout rate
-            use_torch: Whether to use PyTorch (if available)
+            use_torch: Whether to build a PyTorch model (if available)
+            backend: "torch", "numpy" or "int8" (default: "torch" when a
+                torch model was built, else "numpy")
         """
         self.input_dim = input_dim
-        self.hidden_dims = hidden_dims
+        self.hidden_dims = list(hidden_dims)
         self.num_states = num_states
         self.dropout = dropout
         self.use_torch = use_torch and HAS_TORCH
+        self.loaded = False  # True once trained weights were loaded
+        self.weights: Dict[str, np.ndarray] = {}
+        self.biases: Dict[str, np.ndarray] = {}
+        self._int8: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
         
         if self.use_torch:
             self._build_torch_model()
+            self.backend = "torch"
         else:
             self._build_numpy_model()
+            self.backend = "numpy"
+        if backend is not None:
+            self.set_backend(backend)
     
     def _build_torch_model(self):
         """Build PyTorch model."""
+        import torch
+        import torch.nn as nn
+        self._torch = torch
+        if _INTRA_OP_THREADS is not None:
+            torch.set_num_threads(_INTRA_OP_THREADS)
+        
         layers = []
         prev_dim = self.input_dim
         
@@ -64,7 +137,7 @@ class NeuralHeadMLP:
         
         # Action recommendation head (7 outputs: speed_scale, torque_scale, safety_scale, etc.)
         action_layers = layers.copy()  # Share hidden layers
-        action_layers.append(nn.Linear(prev_dim, 7))
+        action_layers.append(nn.Linear(prev_dim, ACTION_DIM))
         self.action_head = nn.Sequential(*action_layers)
         
         # Initialize weights
@@ -83,13 +156,12 @@ class NeuralHeadMLP:
             'action_head': self.action_head
         })
         self.model.eval()  # Set to eval mode
+        
+        # The hidden layers both heads share (ReLU/Dropout included)
+        self.trunk = self.state_head[:-1]
     
     def _build_numpy_model(self):
         """Build numpy-based model (simple feedforward)."""
-        # Store weights as numpy arrays
-        self.weights = {}
-        self.biases = {}
-        
         prev_dim = self.input_dim
         layer_idx = 0
         
@@ -105,38 +177,208 @@ class NeuralHeadMLP:
         self.biases['state'] = np.zeros(self.num_states)
         
         # Action head
-        self.weights['action'] = np.random.randn(prev_dim, 7) * np.sqrt(2.0 / prev_dim)
-        self.biases['action'] = np.zeros(7)
+        self.weights['action'] = np.random.randn(prev_dim, ACTION_DIM) * np.sqrt(2.0 / prev_dim)
+        self.biases['action'] = np.zeros(ACTION_DIM)
+        
+        for name in self.weights:
+            self.weights[name] = self.weights[name].astype(np.float32)
+            self.biases[name] = self.biases[name].astype(np.float32)
+    
+    def _layer_shapes(self) -> Dict[str, Tuple[int, int]]:
+        """NumPy layer name → (in, out) weight shape, in forward order."""
+        shapes = {}
+        prev_dim = self.input_dim
+        for i, hidden_dim in enumerate(self.hidden_dims):
+            shapes[f'hidden_{i}'] = (prev_dim, hidden_dim)
+            prev_dim = hidden_dim
+        shapes['state'] = (prev_dim, self.num_states)
+        shapes['action'] = (prev_dim, ACTION_DIM)
+        return shapes
+    
+    def _linear(self, h: np.ndarray, name: str) -> np.ndarray:
+        if self.backend == "int8":
+            q, scale = self._int8[name]
+            return (h @ q) * scale + self.biases[name]
+        return h @ self.weights[name] + self.biases[name]
     
     def _forward_numpy(self, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
-        """Forward pass using numpy."""
-        # Hidden layers
+        """Forward pass using numpy: (N, input_dim) → state probs (N, S), raw actions (N, 7)."""
+        # Hidden layers (shared by both heads)
         h = x
         for i in range(len(self.hidden_dims)):
-            h = h @ self.weights[f'hidden_{i}'] + self.biases[f'hidden_{i}']
+            h = self._linear(h, f'hidden_{i}')
             h = np.maximum(0, h)  # ReLU
         
         # State head
-        state_logits = h @ self.weights['state'] + self.biases['state']
+        state_logits = self._linear(h, 'state')
         state_probs = self._softmax(state_logits)
         
         # Action head
-        action_outputs = h @ self.weights['action'] + self.biases['action']
-        # Apply activation functions
-        action_outputs[0] = np.clip(action_outputs[0], 0.0, 2.0)  # speed_scale
-        action_outputs[1] = np.clip(action_outputs[1], 0.0, 2.0)  # torque_scale
-        action_outputs[2] = np.clip(action_outputs[2], 0.0, 1.0)  # safety_scale
-        action_outputs[3] = 1.0 / (1.0 + np.exp(-action_outputs[3]))  # caution_flag (sigmoid)
-        action_outputs[4] = 1.0 / (1.0 + np.exp(-action_outputs[4]))  # emergency_flag (sigmoid)
-        action_outputs[5] = np.clip(action_outputs[5], 0.0, 1.0)  # focus_boost
-        action_outputs[6] = 1.0 / (1.0 + np.exp(-action_outputs[6]))  # recovery_recommended (sigmoid)
-        
+        action_outputs = self._linear(h, 'action')
         return state_probs, action_outputs
     
+    def _forward_torch(self, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Forward pass using torch, with the shared trunk run once."""
+        torch = self._torch
+        with torch.no_grad():
+            h = self.trunk(torch.from_numpy(x))
+            state_probs = torch.softmax(self.state_head[-1](h), dim=1).numpy()
+            action_outputs = self.action_head[-1](h).numpy()
+        return state_probs, action_outputs
+    
+    # ------------------------------------------------------------------
+    # Backends and weights
+    # ------------------------------------------------------------------
+    
+    def set_backend(self, backend: str) -> None:
+        """
+        Switch the inference backend.
+        
+        "numpy"/"int8" export the current torch weights (if there is a torch
+        model), so call it again after loading new weights into self.model.
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown neural head backend {backend!r} (expected one of {BACKENDS})")
+        if backend == "torch":
+            if not self.use_torch:
+                raise ValueError("The torch backend needs a torch model (use_torch=True with torch installed)")
+        else:
+            if self.use_torch:
+                self.export_numpy()
+            if backend == "int8":
+                self._quantize()
+        self.backend = backend
+    
+    def _quantize(self) -> None:
+        self._int8 = {name: _quantize_int8(self.weights[name]) for name in self._layer_shapes()}
+    
+    def _torch_linears(self) -> Dict[str, Tuple[str, ...]]:
+        """NumPy layer name → state_dict prefixes of the torch Linear it corresponds to."""
+        step = 3 if self.dropout > 0 else 2  # Linear, ReLU(, Dropout) per hidden layer
+        names = {}
+        for i in range(len(self.hidden_dims)):
+            # Shared module: listed under both heads (the action head's copy loads last)
+            names[f'hidden_{i}'] = (f'state_head.{step * i}', f'action_head.{step * i}')
+        last = step * len(self.hidden_dims)
+        names['state'] = (f'state_head.{last}',)
+        names['action'] = (f'action_head.{last}',)
+        return names
+    
+    def export_numpy(self) -> None:
+        """Copy the torch model's weights into the float32 NumPy backend."""
+        state = self.model.state_dict()
+        for name, prefixes in self._torch_linears().items():
+            prefix = prefixes[-1]
+            self.weights[name] = np.ascontiguousarray(
+                state[f'{prefix}.weight'].detach().cpu().numpy().T, dtype=np.float32
+            )
+            self.biases[name] = state[f'{prefix}.bias'].detach().cpu().numpy().astype(np.float32)
+    
+    def load_state_dict(self, state: Dict[str, Any], strict: bool = True) -> int:
+        """
+        Load a torch state_dict (the model's ModuleDict layout) into any backend.
+        
+        Args:
+            state: Parameter name → tensor or array
+            strict: Raise RuntimeError on missing/unexpected keys or shape
+                mismatches (as torch does); otherwise load the matching ones
+        
+        Returns:
+            Number of tensors loaded
+        """
+        if self.use_torch:
+            model_state = self.model.state_dict()
+            if strict:
+                self.model.load_state_dict(state, strict=True)
+                loaded = len(state)
+            else:
+                filtered = {k: v for k, v in state.items() if k in model_state and model_state[k].shape == v.shape}
+                model_state.update(filtered)
+                self.model.load_state_dict(model_state, strict=False)
+                loaded = len(filtered)
+            self.model.eval()
+            if self.backend != "torch":
+                self.set_backend(self.backend)
+        else:
+            shapes = self._layer_shapes()
+            expected = {}
+            for name, prefixes in self._torch_linears().items():
+                n_in, n_out = shapes[name]
+                for prefix in prefixes:
+                    expected[f'{prefix}.weight'] = (name, (n_out, n_in))
+                    expected[f'{prefix}.bias'] = (name, (n_out,))
+            arrays = {
+                k: np.asarray(v.detach().cpu().numpy() if hasattr(v, 'detach') else v, dtype=np.float32)
+                for k, v in state.items()
+            }
+            matching = {k: a for k, a in arrays.items() if k in expected and expected[k][1] == a.shape}
+            if strict and (set(arrays) != set(expected) or len(matching) != len(expected)):
+                raise RuntimeError(
+                    f"state_dict does not match the neural head: missing {sorted(set(expected) - set(arrays))}, "
+                    f"unexpected {sorted(set(arrays) - set(expected))}, "
+                    f"mismatched {sorted(k for k in arrays if k in expected and k not in matching)}"
+                )
+            for key, array in matching.items():  # state_dict order: action head's shared copy last
+                name = expected[key][0]
+                if key.endswith('.weight'):
+                    self.weights[name] = np.ascontiguousarray(array.T)
+                else:
+                    self.biases[name] = array
+            loaded = len(matching)
+            if self.backend == "int8":
+                self._quantize()
+        if loaded:
+            self.loaded = True
+        return loaded
+    
+    def save_npz(self, path: str) -> None:
+        """Export the float32 weights to an .npz that load_npz reads without torch."""
+        if self.use_torch:
+            self.export_numpy()
+        arrays = {}
+        for name in self._layer_shapes():
+            arrays[f'{name}.weight'] = self.weights[name]
+            arrays[f'{name}.bias'] = self.biases[name]
+        arrays['hidden_dims'] = np.array(self.hidden_dims)
+        np.savez(path, **arrays)
+    
+    def load_npz(self, path: str) -> None:
+        """
+        Load weights written by save_npz (no torch needed).
+        
+        Serving switches to the NumPy backend ("int8" stays "int8"); a torch
+        model, if any, keeps its own weights.
+        """
+        weights, biases = {}, {}
+        with np.load(path) as data:
+            for name, shape in self._layer_shapes().items():
+                weight = data[f'{name}.weight'].astype(np.float32)
+                if weight.shape != shape:
+                    raise ValueError(f"{path}: {name} has shape {weight.shape}, expected {shape}")
+                weights[name] = weight
+                biases[name] = data[f'{name}.bias'].astype(np.float32)
+        self.weights, self.biases = weights, biases
+        self.loaded = True
+        if self.backend == "int8":
+            self._quantize()
+        else:
+            self.backend = "numpy"
+    
     def _softmax(self, x: np.ndarray) -> np.ndarray:
-        """Softmax function."""
-        exp_x = np.exp(x - np.max(x))
-        return exp_x / np.sum(exp_x)
+        """Softmax function (over the last axis)."""
+        exp_x = np.exp(x - np.max(x, axis=-1, keepdims=True))
+        return exp_x / np.sum(exp_x, axis=-1, keepdims=True)
+    
+    @staticmethod
+    def _constrain_actions(action_outputs: np.ndarray) -> np.ndarray:
+        """Apply the per-output activations to (N, 7) raw action outputs, in place."""
+        action_outputs[:, 0] = np.clip(action_outputs[:, 0], 0.0, 2.0)  # speed_scale
+        action_outputs[:, 1] = np.clip(action_outputs[:, 1], 0.0, 2.0)  # torque_scale
+        action_outputs[:, 2] = np.clip(action_outputs[:, 2], 0.0, 1.0)  # safety_scale
+        # caution_flag, emergency_flag, recovery_recommended (sigmoid)
+        action_outputs[:, [3, 4, 6]] = 1.0 / (1.0 + np.exp(-action_outputs[:, [3, 4, 6]]))
+        action_outputs[:, 5] = np.clip(action_outputs[:, 5], 0.0, 1.0)  # focus_boost
+        return action_outputs
     
     def predict(self, cav_embedding) -> Dict[str, Any]:
         """
@@ -158,57 +400,72 @@ class NeuralHeadMLP:
         if len(cav_embedding) != self.input_dim:
             raise ValueError(f"Expected input dimension {self.input_dim}, got {len(cav_embedding)}")
         
-        if self.use_torch:
-            with torch.no_grad():
-                x = torch.FloatTensor(cav_embedding).unsqueeze(0)
-                state_logits = self.state_head(x)
-                action_outputs = self.action_head(x)
-                
-                state_probs = torch.softmax(state_logits, dim=1).numpy()[0]
-                action_outputs = action_outputs.numpy()[0]
-                
-                # Apply constraints to action outputs
-                action_outputs[0] = np.clip(action_outputs[0], 0.0, 2.0)  # speed_scale
-                action_outputs[1] = np.clip(action_outputs[1], 0.0, 2.0)  # torque_scale
-                action_outputs[2] = np.clip(action_outputs[2], 0.0, 1.0)  # safety_scale
-                action_outputs[3] = 1.0 / (1.0 + np.exp(-action_outputs[3]))  # caution_flag
-                action_outputs[4] = 1.0 / (1.0 + np.exp(-action_outputs[4]))  # emergency_flag
-                action_outputs[5] = np.clip(action_outputs[5], 0.0, 1.0)  # focus_boost
-                action_outputs[6] = 1.0 / (1.0 + np.exp(-action_outputs[6]))  # recovery_recommended
+        return self.predict_batch(np.asarray(cav_embedding)[None, :])[0]
+    
+    def predict_batch(self, cav_embeddings: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Predict for N embeddings: one pass through the shared layers, then both heads.
+        
+        Args:
+            cav_embeddings: (N, input_dim) array of CAV embeddings
+            
+        Returns:
+            One predict()-style dictionary per row
+        """
+        x = np.array(cav_embeddings, dtype=np.float32)
+        if x.ndim != 2 or x.shape[1] != self.input_dim:
+            raise ValueError(f"Expected shape (N, {self.input_dim}), got {x.shape}")
+        
+        if self.backend == "torch":
+            state_probs, action_outputs = self._forward_torch(x)
         else:
-            state_probs, action_outputs = self._forward_numpy(cav_embedding)
+            state_probs, action_outputs = self._forward_numpy(x)
+        action_outputs = self._constrain_actions(action_outputs)
         
         # Map state indices to class names
         state_names = ['restorative', 'focus', 'balanced', 'overload', 'alert', 'emergency']
-        state_idx = np.argmax(state_probs)
-        state_class = state_names[state_idx]
-        
-        # Build action recommendations
-        action_recommendations = {
-            'speed_scale': float(action_outputs[0]),
-            'torque_scale': float(action_outputs[1]),
-            'safety_scale': float(action_outputs[2]),
-            'caution_flag': bool(action_outputs[3] > 0.5),
-            'emergency_flag': bool(action_outputs[4] > 0.5),
-            'focus_boost': float(action_outputs[5]),
-            'recovery_recommended': bool(action_outputs[6] > 0.5)
-        }
-        
-        return {
-            'state_probs': {name: float(prob) for name, prob in zip(state_names, state_probs)},
-            'state_class': state_class,
-            'action_recommendations': action_recommendations,
-            'confidence': float(state_probs[state_idx])
-        }
-
-
-def create_default_neural_head(input_dim: int = 128) -> NeuralHeadMLP:
-    """Create a default neural head."""
+        state_idx = np.argmax(state_probs, axis=1)
+        
+        out = []
+        for probs, actions, idx in zip(state_probs.tolist(), action_outputs.tolist(), state_idx.tolist()):
+            # Build action recommendations
+            action_recommendations = {
+                'speed_scale': actions[0],
+                'torque_scale': actions[1],
+                'safety_scale': actions[2],
+                'caution_flag': actions[3] > 0.5,
+                'emergency_flag': actions[4] > 0.5,
+                'focus_boost': actions[5],
+                'recovery_recommended': actions[6] > 0.5
+            }
+            out.append({
+                'state_probs': dict(zip(state_names, probs)),
+                'state_class': state_names[idx],
+                'action_recommendations': action_recommendations,
+                'confidence': probs[idx]
+            })
+        return out
+
+
+def create_default_neural_head(input_dim: int = 128, backend: Optional[str] = None) -> NeuralHeadMLP:
+    """
+    Create a default neural head.
+    
+    Args:
+        input_dim: Input dimension
+        backend: "torch", "numpy" or "int8" (default: EDON_NEURAL_BACKEND, else
+            "torch"); only the torch backend imports torch
+    """
+    backend = backend or os.getenv("EDON_NEURAL_BACKEND", "torch").strip().lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown neural head backend {backend!r} (expected one of {BACKENDS})")
+    use_torch = backend == "torch"  # falls back to numpy without torch installed
     return NeuralHeadMLP(
         input_dim=input_dim,
         hidden_dims=[64, 32],
         num_states=6,
         dropout=0.1,
-        use_torch=True
+        use_torch=use_torch,
+        backend=None if use_torch else backend,
     )
 
@@ -0,0 +1,348 @@
+"""
+Background PCA fitting for the v2 CAV embedding basis.
+
+The request path only records each window's fused features into a
+preallocated ring buffer (PCAFitter.observe). A fitter thread periodically
+folds the rows it has not seen yet into a StandardScaler/IncrementalPCA pair
+(partial_fit), freezes a copy of the result into an immutable PCASnapshot,
+writes it to disk and then publishes it with a single reference assignment.
+A request reads PCAFitter.current once and projects with that snapshot, so it
+always sees one consistent basis even while a newer one is being swapped in.
+
+Snapshots are versioned joblib files in the artifact directory:
+
+    pca_v000001.joblib, pca_v000002.joblib, ...   (newest `keep` kept)
+    LATEST                                        (name of the newest file)
+
+Both are written to a temporary file and os.replace()d, so a crash never
+leaves a half-written basis behind. On startup load_latest() restores the
+newest snapshot and resumes fitting from it. The file is a dict with
+'pca'/'scaler'/'feature_order' keys, so EDON_PCA_PATH can also point at it.
+
+Configured with EDON_PCA_FIT (0 disables the fitter thread),
+EDON_PCA_FIT_DIR (default models/pca_fits; empty disables persistence),
+EDON_PCA_FIT_INTERVAL_S (default 30), EDON_PCA_FIT_MIN_SAMPLES (default 256)
+and EDON_PCA_BUFFER (ring buffer rows, default 4096).
+"""
+
+import copy
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import joblib
+import numpy as np
+from sklearn.decomposition import IncrementalPCA
+from sklearn.preprocessing import StandardScaler
+from sklearn.random_projection import GaussianRandomProjection
+
+from app.v2.pca_fusion import PCAFusion
+
+LOGGER = logging.getLogger(__name__)
+
+LATEST_NAME = "LATEST"
+_SNAPSHOT_PATTERN = "pca_v*.joblib"
+
+
+@dataclass(frozen=True)
+class PCASnapshot:
+    """One published embedding basis. Never mutated after publication."""
+
+    version: int
+    fusion: PCAFusion
+    n_samples: int
+    created_at: float
+
+
+def _build_fusion(
+    scaler: StandardScaler,
+    pca: IncrementalPCA,
+    feature_order: List[str],
+    n_components: int,
+    random_state: int,
+    rproj: Optional[GaussianRandomProjection] = None,
+) -> PCAFusion:
+    """A fitted PCAFusion over (copies of) scaler and pca, padded to n_components."""
+    fusion = PCAFusion(n_components=n_components, random_state=random_state)
+    fusion.scaler = copy.deepcopy(scaler)
+    fusion.pca = copy.deepcopy(pca)
+    fusion.feature_order = list(feature_order)
+    pca_dim = pca.n_components_
+    if rproj is None and n_components > pca_dim:
+        # Same as PCAFusion.fit: random projection up to the target dimension
+        rproj = GaussianRandomProjection(n_components=n_components, random_state=random_state)
+        rproj.fit(np.zeros((1, pca_dim)))
+    fusion.rproj = rproj
+    fusion.is_fitted = True
+    fusion.compile()  # here, not on the first request that uses the basis
+    return fusion
+
+
+class PCAFitter:
+    """
+    Ring buffer of fused feature vectors plus an off-request-path PCA fit.
+
+    Args:
+        n_components: Embedding dimensionality of the published bases
+        capacity: Ring buffer rows (oldest rows are overwritten)
+        min_samples: New rows required before a fitting round runs
+        interval_s: Seconds between fitting rounds of the background thread
+        artifact_dir: Where versioned snapshots are written (None: memory only)
+        keep: Snapshot files kept on disk
+        random_state: Seed of the padding random projection
+
+    Example:
+        >>> fitter = PCAFitter(artifact_dir="models/pca_fits")
+        >>> fitter.observe(fused["features"])   # request path: O(features)
+        >>> fitter.start()                      # fits and swaps in the background
+        >>> basis = fitter.current              # Optional[PCASnapshot]
+    """
+
+    def __init__(
+        self,
+        n_components: int = 128,
+        capacity: int = 4096,
+        min_samples: int = 256,
+        interval_s: float = 30.0,
+        artifact_dir: Optional[str] = None,
+        keep: int = 3,
+        random_state: int = 42,
+    ):
+        self.n_components = n_components
+        self.capacity = max(2, int(capacity))
+        self.min_samples = max(2, int(min_samples))
+        self.interval_s = max(0.01, float(interval_s))
+        self.artifact_dir = Path(artifact_dir) if artifact_dir else None
+        self.keep = max(1, int(keep))
+        self.random_state = random_state
+
+        # Ring buffer; columns follow self._columns (first-seen order) and grow
+        # when a feature name appears for the first time
+        self._lock = threading.Lock()
+        self._buf = np.zeros((self.capacity, 32))
+        self._columns: Dict[str, int] = {}
+        self._observed = 0
+        self._consumed = 0
+        self._columns_changed = False
+
+        # Running fit state; only touched while holding _fit_lock
+        self._fit_lock = threading.Lock()
+        self._scaler: Optional[StandardScaler] = None
+        self._pca: Optional[IncrementalPCA] = None
+        self._fit_order: List[str] = []
+
+        self._current: Optional[PCASnapshot] = None
+        self._version = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @classmethod
+    def from_env(cls) -> "PCAFitter":
+        return cls(
+            capacity=int(os.getenv("EDON_PCA_BUFFER", "4096")),
+            min_samples=int(os.getenv("EDON_PCA_FIT_MIN_SAMPLES", "256")),
+            interval_s=float(os.getenv("EDON_PCA_FIT_INTERVAL_S", "30")),
+            artifact_dir=os.getenv("EDON_PCA_FIT_DIR", "models/pca_fits") or None,
+        )
+
+    @staticmethod
+    def enabled_from_env() -> bool:
+        return os.getenv("EDON_PCA_FIT", "1").lower() not in ("0", "false", "no")
+
+    @property
+    def current(self) -> Optional[PCASnapshot]:
+        """The latest published basis (read it once per request)."""
+        return self._current
+
+    # ------------------------------------------------------------------
+    # Request path
+    # ------------------------------------------------------------------
+
+    def observe(self, features: Dict[str, float]) -> None:
+        """Record one window's fused features. Never fits."""
+        with self._lock:
+            for name in features:
+                if name not in self._columns:
+                    self._add_column(name)
+            row = self._buf[self._observed % self.capacity]
+            row[:] = 0.0
+            for name, value in features.items():
+                row[self._columns[name]] = value
+            self._observed += 1
+
+    def _add_column(self, name: str) -> None:
+        index = len(self._columns)
+        if index == self._buf.shape[1]:
+            grown = np.zeros((self.capacity, 2 * self._buf.shape[1]))
+            grown[:, :index] = self._buf
+            self._buf = grown
+        self._columns[name] = index
+        self._columns_changed = True
+
+    # ------------------------------------------------------------------
+    # Fitting (background thread, or explicit calls)
+    # ------------------------------------------------------------------
+
+    def fit_now(self) -> bool:
+        """
+        Run one fitting round; returns True if a new basis was published.
+
+        Folds the rows observed since the last round into the running fit. When
+        new feature names have appeared the fit restarts from the whole buffer.
+        """
+        with self._fit_lock:
+            with self._lock:
+                width = len(self._columns)
+                pca_dim = min(self.n_components, width)
+                restart = self._columns_changed or self._pca is None
+                buffered = min(self._observed, self.capacity)
+                pending = buffered if restart else min(self._observed - self._consumed, self.capacity)
+                if width == 0 or pending < max(self.min_samples, pca_dim):
+                    return False
+                end = self._observed % self.capacity
+                rows = [(end - k - 1) % self.capacity for k in range(pending)]
+                X = self._buf[rows, :width].copy()
+                feature_order = sorted(self._columns, key=self._columns.get)
+                self._consumed = self._observed
+                self._columns_changed = False
+
+            if restart:
+                self._scaler = StandardScaler()
+                self._pca = IncrementalPCA(n_components=pca_dim)
+                self._fit_order = feature_order
+            self._scaler.partial_fit(X)
+            X_scaled = np.nan_to_num(self._scaler.transform(X), nan=0.0, posinf=0.0, neginf=0.0)
+            self._pca.partial_fit(X_scaled)
+
+            fusion = _build_fusion(
+                self._scaler, self._pca, self._fit_order, self.n_components, self.random_state
+            )
+            snapshot = PCASnapshot(
+                version=self._version + 1,
+                fusion=fusion,
+                n_samples=int(self._pca.n_samples_seen_),
+                created_at=time.time(),
+            )
+            self._save(snapshot)
+            self._version = snapshot.version
+            self._current = snapshot  # atomic swap
+            LOGGER.info(
+                f"[EDON] PCA basis v{snapshot.version} published "
+                f"({snapshot.n_samples} samples, {len(self._fit_order)} features)"
+            )
+            return True
+
+    def start(self) -> None:
+        """Start the background fitting thread (idempotent)."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="pca-fitter", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """Stop the background thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.fit_now()
+            except Exception:
+                LOGGER.exception("[EDON] PCA fitting round failed")
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._current
+        return {
+            "observed": self._observed,
+            "buffered": min(self._observed, self.capacity),
+            "features": len(self._columns),
+            "version": snapshot.version if snapshot else None,
+            "samples_fitted": snapshot.n_samples if snapshot else 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Artifacts
+    # ------------------------------------------------------------------
+
+    def _save(self, snapshot: PCASnapshot) -> None:
+        if self.artifact_dir is None:
+            return
+        try:
+            self.artifact_dir.mkdir(parents=True, exist_ok=True)
+            name = f"pca_v{snapshot.version:06d}.joblib"
+            fusion = snapshot.fusion
+            payload = {
+                "version": snapshot.version,
+                "n_samples": snapshot.n_samples,
+                "created_at": snapshot.created_at,
+                "n_components": fusion.n_components,
+                "feature_order": fusion.feature_order,
+                "scaler": fusion.scaler,
+                "pca": fusion.pca,
+                "rproj": fusion.rproj,
+            }
+            _atomic_write(self.artifact_dir / name, lambda tmp: joblib.dump(payload, tmp))
+            _atomic_write(self.artifact_dir / LATEST_NAME, lambda tmp: Path(tmp).write_text(name + "\n"))
+            for old in sorted(self.artifact_dir.glob(_SNAPSHOT_PATTERN))[:-self.keep]:
+                old.unlink()
+        except Exception as e:
+            LOGGER.warning(f"[EDON] Failed to write PCA snapshot v{snapshot.version}: {e}")
+
+    def load_latest(self) -> bool:
+        """Restore the newest snapshot from artifact_dir and resume fitting from it."""
+        if self.artifact_dir is None:
+            return False
+        latest = self.artifact_dir / LATEST_NAME
+        try:
+            name = latest.read_text().strip()
+            data = joblib.load(self.artifact_dir / name)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            LOGGER.warning(f"[EDON] Failed to load PCA snapshot from {self.artifact_dir}: {e}")
+            return False
+
+        fusion = _build_fusion(
+            data["scaler"], data["pca"], data["feature_order"],
+            data.get("n_components", self.n_components), self.random_state, rproj=data.get("rproj"),
+        )
+        snapshot = PCASnapshot(
+            version=int(data["version"]),
+            fusion=fusion,
+            n_samples=int(data.get("n_samples", 0)),
+            created_at=float(data.get("created_at", 0.0)),
+        )
+        with self._fit_lock:
+            with self._lock:
+                self._columns = {}
+                self._buf = np.zeros((self.capacity, max(32, len(fusion.feature_order))))
+                for feature in fusion.feature_order:
+                    self._add_column(feature)
+                self._observed = self._consumed = 0
+                self._columns_changed = False
+            self._scaler = copy.deepcopy(data["scaler"])
+            self._pca = copy.deepcopy(data["pca"])
+            self._fit_order = list(fusion.feature_order)
+            self._version = snapshot.version
+            self._current = snapshot
+        LOGGER.info(f"[EDON] Loaded PCA basis v{snapshot.version}: {self.artifact_dir / name}")
+        return True
+
+
+def _atomic_write(path: Path, write) -> None:
+    """Write via a temporary file in the same directory, then os.replace()."""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        write(str(tmp))
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
@@ -6,6 +6,7 @@ from sklearn.decomposition import PCA
 from sklearn.preprocessing import StandardScaler
 from sklearn.random_projection import GaussianRandomProjection
 import warnings
+from src.projector import AffineProjector
 
 warnings.filterwarnings("ignore")
 
@@ -28,6 +29,10 @@ class PCAFusion:
         self.rproj: Optional[GaussianRandomProjection] = None
         self.feature_order: Optional[List[str]] = None
         self.is_fitted = False
+        
+        # scaler/PCA/rproj folded into one float32 affine map (see compile())
+        self.projector: Optional[AffineProjector] = None
+        self._compiled_from: Optional[tuple] = None
     
     def fit(self, feature_vectors: List[Dict[str, float]]) -> None:
         """
@@ -93,6 +98,7 @@ class PCAFusion:
             self.rproj.fit(X_scaled)
         
         self.is_fitted = True
+        self.compile()
     
     def transform(self, feature_dict: Dict[str, float]) -> np.ndarray:
         """
@@ -116,6 +122,55 @@ class PCAFusion:
                 feature_dict.get(feat, 0.0) for feat in self.feature_order
             ]])
         
+        return self._project(X)[0]  # Return first (and only) row
+    
+    def transform_batch(self, feature_dicts: List[Dict[str, float]]) -> np.ndarray:
+        """
+        Transform N feature dictionaries at once.
+        
+        Args:
+            feature_dicts: Feature dictionaries
+            
+        Returns:
+            (N, 128) embeddings; one scaler/PCA/projection call for the batch
+        """
+        if not self.is_fitted:
+            raise ValueError("PCA fusion not fitted. Call fit() first.")
+        if self.feature_order is None:
+            # Column order depends on each dict's keys
+            return np.array([self.transform(fd) for fd in feature_dicts])
+        X = np.array([
+            [fd.get(feat, 0.0) for feat in self.feature_order]
+            for fd in feature_dicts
+        ], dtype=float)
+        return self._project(X)
+    
+    def compile(self) -> AffineProjector:
+        """
+        Fold scaler → PCA → (random projection) into self.projector.
+        
+        Called by fit(); bases assembled attribute by attribute (e.g. loaded
+        from EDON_PCA_PATH) are compiled on first use instead.
+        """
+        self.projector = AffineProjector.compile(
+            self.scaler, self.pca, self.rproj, n_components=self.n_components
+        )
+        self._compiled_from = (self.scaler, self.pca, self.rproj)
+        return self.projector
+    
+    def _project(self, X: np.ndarray) -> np.ndarray:
+        """Standardize → PCA → (random projection) → L2 normalize, row-wise (compiled)."""
+        compiled_from = self._compiled_from
+        if (
+            self.projector is None
+            or compiled_from is None
+            or any(a is not b for a, b in zip(compiled_from, (self.scaler, self.pca, self.rproj)))
+        ):
+            self.compile()
+        return self.projector.transform(X)
+    
+    def _project_sklearn(self, X: np.ndarray) -> np.ndarray:
+        """_project through the individual sklearn stages (reference for the compiled path)."""
         # Standardize
         X_scaled = self.scaler.transform(X)
         X_scaled = np.nan_to_num(X_scaled, nan=0.0, posinf=0.0, neginf=0.0)
@@ -134,7 +189,7 @@ class PCAFusion:
         else:
             # Fallback: pad or truncate to target dimension
             if X_scaled.shape[1] < self.n_components:
-                padding = np.zeros((1, self.n_components - X_scaled.shape[1]))
+                padding = np.zeros((X_scaled.shape[0], self.n_components - X_scaled.shape[1]))
                 X_embed = np.hstack([X_scaled, padding])
             else:
                 X_embed = X_scaled[:, :self.n_components]
@@ -144,7 +199,7 @@ class PCAFusion:
         norm = np.where(norm == 0, 1.0, norm)
         X_embed = X_embed / norm
         
-        return X_embed[0]  # Return first (and only) row
+        return X_embed
     
     def fit_transform(self, feature_vectors: List[Dict[str, float]]) -> np.ndarray:
         """Fit and transform in one step."""
@@ -1,6 +1,10 @@
 """Pydantic schemas for EDON v2 multimodal API."""
 
+import base64
+import binascii
+
 from pydantic import BaseModel, Field, validator, model_validator
+from pydantic_core import core_schema
 from typing import List, Dict, Optional, Any
 import numpy as np
 
@@ -8,6 +12,72 @@ import numpy as np
 # Window length for physiological signals (240 samples = 4 seconds @ 60Hz)
 WINDOW_LEN = 240
 
+# Largest accepted vision/audio embedding
+MAX_EMBEDDING_LEN = 10000
+
+
+def as_float32_embedding(value: Any) -> np.ndarray:
+    """
+    Coerce an embedding to a 1-D float32 array.
+    
+    Accepts a list of numbers, a base64 string of little-endian float32 bytes
+    (REST), raw bytes (gRPC embedding_f32, binary frames) or an array. Bytes and
+    float32 arrays are wrapped without copying.
+    """
+    if isinstance(value, np.ndarray):
+        arr = value.astype(np.float32, copy=False).reshape(-1)
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        arr = _float32_from_buffer(value)
+    elif isinstance(value, str):
+        try:
+            raw = base64.b64decode(value, validate=True)
+        except (binascii.Error, ValueError) as e:
+            raise ValueError(f"Embedding string must be base64 float32 bytes: {e}")
+        arr = _float32_from_buffer(raw)
+    elif isinstance(value, (list, tuple)):
+        try:
+            arr = np.asarray(value, dtype=np.float32)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Embedding must be a list of numbers: {e}")
+        if arr.ndim != 1:
+            raise ValueError("Embedding must be a flat list of numbers")
+    else:
+        raise ValueError("Embedding must be a list of numbers or a base64 float32 string")
+    if len(arr) > MAX_EMBEDDING_LEN:
+        raise ValueError(f"Embedding vector too large: {len(arr)} elements (max {MAX_EMBEDDING_LEN})")
+    return arr
+
+
+def _float32_from_buffer(buf) -> np.ndarray:
+    if len(buf) % 4:
+        raise ValueError(f"Embedding bytes must be a multiple of 4 (float32), got {len(buf)}")
+    return np.frombuffer(buf, dtype="<f4")
+
+
+class Float32Embedding:
+    """
+    Field type of vision/audio embeddings: validated into a float32 ndarray.
+    
+    Serializes back to a list of floats; the JSON schema documents both the
+    list and the base64 form.
+    """
+    
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source, handler):
+        return core_schema.no_info_plain_validator_function(
+            as_float32_embedding,
+            serialization=core_schema.plain_serializer_function_ser_schema(lambda arr: arr.tolist()),
+        )
+    
+    @classmethod
+    def __get_pydantic_json_schema__(cls, schema, handler):
+        return {
+            "anyOf": [
+                {"type": "array", "items": {"type": "number"}, "maxItems": MAX_EMBEDDING_LEN},
+                {"type": "string", "contentEncoding": "base64", "description": "little-endian float32 bytes"},
+            ]
+        }
+
 
 class PhysioInput(BaseModel):
     """Physiological signal inputs."""
@@ -67,33 +137,19 @@ class EnvInput(BaseModel):
 class VisionInput(BaseModel):
     """Vision/visual context inputs."""
     
-    embedding: Optional[List[float]] = Field(None, description="Vision embedding vector (e.g., CLIP, ResNet)")
+    embedding: Optional[Float32Embedding] = Field(None, description="Vision embedding vector (e.g., CLIP, ResNet): floats, or base64 float32")
     objects: Optional[List[str]] = Field(None, description="Detected objects")
     scene_type: Optional[str] = Field(None, description="Scene classification (e.g., 'indoor', 'outdoor', 'vehicle')")
     activity_context: Optional[str] = Field(None, description="Activity context (e.g., 'walking', 'sitting', 'operating')")
-    
-    @validator('embedding')
-    def validate_embedding(cls, v):
-        """Validate embedding is reasonable size if provided."""
-        if v is not None and len(v) > 10000:
-            raise ValueError(f"Embedding vector too large: {len(v)} elements (max 10000)")
-        return v
 
 
 class AudioInput(BaseModel):
     """Audio context inputs."""
     
-    embedding: Optional[List[float]] = Field(None, description="Audio embedding vector (e.g., Wav2Vec, VGGish)")
+    embedding: Optional[Float32Embedding] = Field(None, description="Audio embedding vector (e.g., Wav2Vec, VGGish): floats, or base64 float32")
     keywords: Optional[List[str]] = Field(None, description="Detected keywords/phrases")
     speech_activity: Optional[float] = Field(None, ge=0.0, le=1.0, description="Speech activity level [0-1]")
     emotion: Optional[str] = Field(None, description="Detected emotion (e.g., 'calm', 'stressed', 'excited')")
-    
-    @validator('embedding')
-    def validate_embedding(cls, v):
-        """Validate embedding is reasonable size if provided."""
-        if v is not None and len(v) > 10000:
-            raise ValueError(f"Embedding vector too large: {len(v)} elements (max 10000)")
-        return v
 
 
 class TaskInput(BaseModel):
@@ -199,6 +255,7 @@ class V2CavBatchRequest(BaseModel):
     """Batch request for v2 CAV computation."""
     
     windows: List[V2CavWindow] = Field(..., description="List of multimodal windows to process", min_items=1, max_items=10)
+    session_id: Optional[str] = Field(None, description="Stream whose embedding EMA these windows continue (default: X-Session-ID header, else a shared default)")
 
 
 # Alias for backward compatibility
@@ -24,21 +24,27 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\nedon.proto\x12\x04\x65\x64on\"\xc0\x01\n\x11StreamDataRequest\x12\x0b\n\x03\x65\x64\x61\x18\x01 \x03(\x02\x12\x0c\n\x04temp\x18\x02 \x03(\x02\x12\x0b\n\x03\x62vp\x18\x03 \x03(\x02\x12\r\n\x05\x61\x63\x63_x\x18\x04 \x03(\x02\x12\r\n\x05\x61\x63\x63_y\x18\x05 \x03(\x02\x12\r\n\x05\x61\x63\x63_z\x18\x06 \x03(\x02\x12\x0e\n\x06temp_c\x18\x07 \x01(\x02\x12\x10\n\x08humidity\x18\x08 \x01(\x02\x12\x0b\n\x03\x61qi\x18\t \x01(\x05\x12\x12\n\nlocal_hour\x18\n \x01(\x05\x12\x13\n\x0bstream_mode\x18\x0b \x01(\x08\"\xac\x01\n\x13StreamStateResponse\x12\x0f\n\x07\x63\x61v_raw\x18\x01 \x01(\x05\x12\x12\n\ncav_smooth\x18\x02 \x01(\x05\x12\r\n\x05state\x18\x03 \x01(\t\x12$\n\x05parts\x18\x04 \x01(\x0b\x32\x15.edon.ComponentScores\x12%\n\x08\x63ontrols\x18\x05 \x01(\x0b\x32\x13.edon.ControlScales\x12\x14\n\x0ctimestamp_ms\x18\x06 \x01(\x03\"P\n\x0f\x43omponentScores\x12\x0b\n\x03\x62io\x18\x01 \x01(\x02\x12\x0b\n\x03\x65nv\x18\x02 \x01(\x02\x12\x11\n\tcircadian\x18\x03 \x01(\x02\x12\x10\n\x08p_stress\x18\x04 \x01(\x02\">\n\rControlScales\x12\r\n\x05speed\x18\x01 \x01(\x02\x12\x0e\n\x06torque\x18\x02 \x01(\x02\x12\x0e\n\x06safety\x18\x03 \x01(\x02\x32\x92\x01\n\x0b\x45\x64onService\x12>\n\x08GetState\x12\x17.edon.StreamDataRequest\x1a\x19.edon.StreamStateResponse\x12\x43\n\x0bStreamState\x12\x17.edon.StreamDataRequest\x1a\x19.edon.StreamStateResponse0\x01\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\nedon.proto\x12\x07\x65\x64on.v1\"\xa4\x01\n\nCavRequest\x12\x0b\n\x03\x65\x64\x61\x18\x01 \x03(\x02\x12\x0c\n\x04temp\x18\x02 \x03(\x02\x12\x0b\n\x03\x62vp\x18\x03 \x03(\x02\x12\r\n\x05\x61\x63\x63_x\x18\x04 \x03(\x02\x12\r\n\x05\x61\x63\x63_y\x18\x05 \x03(\x02\x12\r\n\x05\x61\x63\x63_z\x18\x06 \x03(\x02\x12\x0e\n\x06temp_c\x18\x07 \x01(\x02\x12\x10\n\x08humidity\x18\x08 \x01(\x02\x12\x0b\n\x03\x61qi\x18\t \x01(\x05\x12\x12\n\nlocal_hour\x18\n \x01(\x05\"\xaa\x01\n\x0b\x43\x61vResponse\x12\x0f\n\x07\x63\x61v_raw\x18\x01 \x01(\x05\x12\x12\n\ncav_smooth\x18\x02 \x01(\x05\x12\r\n\x05state\x18\x03 \x01(\t\x12\'\n\x05parts\x18\x04 \x01(\x0b\x32\x18.edon.v1.ComponentScores\x12(\n\x08\x63ontrols\x18\x05 \x01(\x0b\x32\x16.edon.v1.ControlScales\x12\x14\n\x0ctimestamp_ms\x18\x06 \x01(\x03\"\xc1\x01\n\x12StateStreamRequest\x12\x0b\n\x03\x65\x64\x61\x18\x01 \x03(\x02\x12\x0c\n\x04temp\x18\x02 \x03(\x02\x12\x0b\n\x03\x62vp\x18\x03 \x03(\x02\x12\r\n\x05\x61\x63\x63_x\x18\x04 \x03(\x02\x12\r\n\x05\x61\x63\x63_y\x18\x05 \x03(\x02\x12\r\n\x05\x61\x63\x63_z\x18\x06 \x03(\x02\x12\x0e\n\x06temp_c\x18\x07 \x01(\x02\x12\x10\n\x08humidity\x18\x08 \x01(\x02\x12\x0b\n\x03\x61qi\x18\t \x01(\x05\x12\x12\n\nlocal_hour\x18\n \x01(\x05\x12\x13\n\x0bstream_mode\x18\x0b \x01(\x08\"\xb2\x01\n\x13StateStreamResponse\x12\x0f\n\x07\x63\x61v_raw\x18\x01 \x01(\x05\x12\x12\n\ncav_smooth\x18\x02 \x01(\x05\x12\r\n\x05state\x18\x03 \x01(\t\x12\'\n\x05parts\x18\x04 \x01(\x0b\x32\x18.edon.v1.ComponentScores\x12(\n\x08\x63ontrols\x18\x05 \x01(\x0b\x32\x16.edon.v1.ControlScales\x12\x14\n\x0ctimestamp_ms\x18\x06 \x01(\x03\"\xb2\x01\n\x0bSampleChunk\x12\x0b\n\x03\x65\x64\x61\x18\x01 \x03(\x02\x12\x0c\n\x04temp\x18\x02 \x03(\x02\x12\x0b\n\x03\x62vp\x18\x03 \x03(\x02\x12\r\n\x05\x61\x63\x63_x\x18\x04 \x03(\x02\x12\r\n\x05\x61\x63\x63_y\x18\x05 \x03(\x02\x12\r\n\x05\x61\x63\x63_z\x18\x06 \x03(\x02\x12\x0e\n\x06temp_c\x18\x07 \x01(\x02\x12\x10\n\x08humidity\x18\x08 \x01(\x02\x12\x0b\n\x03\x61qi\x18\t \x01(\x05\x12\x12\n\nlocal_hour\x18\n \x01(\x05\x12\x0b\n\x03hop\x18\x0b \x01(\x05\"P\n\x0f\x43omponentScores\x12\x0b\n\x03\x62io\x18\x01 \x01(\x02\x12\x0b\n\x03\x65nv\x18\x02 \x01(\x02\x12\x11\n\tcircadian\x18\x03 \x01(\x02\x12\x10\n\x08p_stress\x18\x04 \x01(\x02\">\n\rControlScales\x12\r\n\x05speed\x18\x01 \x01(\x02\x12\x0e\n\x06torque\x18\x02 \x01(\x02\x12\x0e\n\x06safety\x18\x03 \x01(\x02\x32\xd9\x01\n\x0b\x45\x64onService\x12\x35\n\x08GetState\x12\x13.edon.v1.CavRequest\x1a\x14.edon.v1.CavResponse\x12J\n\x0bStreamState\x12\x1b.edon.v1.StateStreamRequest\x1a\x1c.edon.v1.StateStreamResponse0\x01\x12G\n\rStreamSamples\x12\x14.edon.v1.SampleChunk\x1a\x1c.edon.v1.StateStreamResponse(\x01\x30\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'edon_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
-  _globals['_STREAMDATAREQUEST']._serialized_start=21
-  _globals['_STREAMDATAREQUEST']._serialized_end=213
-  _globals['_STREAMSTATERESPONSE']._serialized_start=216
-  _globals['_STREAMSTATERESPONSE']._serialized_end=388
-  _globals['_COMPONENTSCORES']._serialized_start=390
-  _globals['_COMPONENTSCORES']._serialized_end=470
-  _globals['_CONTROLSCALES']._serialized_start=472
-  _globals['_CONTROLSCALES']._serialized_end=534
-  _globals['_EDONSERVICE']._serialized_start=537
-  _globals['_EDONSERVICE']._serialized_end=683
+  _globals['_CAVREQUEST']._serialized_start=24
+  _globals['_CAVREQUEST']._serialized_end=188
+  _globals['_CAVRESPONSE']._serialized_start=191
+  _globals['_CAVRESPONSE']._serialized_end=361
+  _globals['_STATESTREAMREQUEST']._serialized_start=364
+  _globals['_STATESTREAMREQUEST']._serialized_end=557
+  _globals['_STATESTREAMRESPONSE']._serialized_start=560
+  _globals['_STATESTREAMRESPONSE']._serialized_end=738
+  _globals['_SAMPLECHUNK']._serialized_start=741
+  _globals['_SAMPLECHUNK']._serialized_end=919
+  _globals['_COMPONENTSCORES']._serialized_start=921
+  _globals['_COMPONENTSCORES']._serialized_end=1001
+  _globals['_CONTROLSCALES']._serialized_start=1003
+  _globals['_CONTROLSCALES']._serialized_end=1065
+  _globals['_EDONSERVICE']._serialized_start=1068
+  _globals['_EDONSERVICE']._serialized_end=1285
 # @@protoc_insertion_point(module_scope)
@@ -26,7 +26,7 @@ if _version_not_supported:
 
 
 class EdonServiceStub(object):
-    """gRPC Service Definition
+    """EdonService - EDON CAV Engine gRPC Service (v1)
     """
 
     def __init__(self, channel):
@@ -36,30 +36,42 @@ class EdonServiceStub(object):
             channel: A grpc.Channel.
         """
         self.GetState = channel.unary_unary(
-                '/edon.EdonService/GetState',
-                request_serializer=edon__pb2.StreamDataRequest.SerializeToString,
-                response_deserializer=edon__pb2.StreamStateResponse.FromString,
+                '/edon.v1.EdonService/GetState',
+                request_serializer=edon__pb2.CavRequest.SerializeToString,
+                response_deserializer=edon__pb2.CavResponse.FromString,
                 _registered_method=True)
         self.StreamState = channel.unary_stream(
-                '/edon.EdonService/StreamState',
-                request_serializer=edon__pb2.StreamDataRequest.SerializeToString,
-                response_deserializer=edon__pb2.StreamStateResponse.FromString,
+                '/edon.v1.EdonService/StreamState',
+                request_serializer=edon__pb2.StateStreamRequest.SerializeToString,
+                response_deserializer=edon__pb2.StateStreamResponse.FromString,
+                _registered_method=True)
+        self.StreamSamples = channel.stream_stream(
+                '/edon.v1.EdonService/StreamSamples',
+                request_serializer=edon__pb2.SampleChunk.SerializeToString,
+                response_deserializer=edon__pb2.StateStreamResponse.FromString,
                 _registered_method=True)
 
 
 class EdonServiceServicer(object):
-    """gRPC Service Definition
+    """EdonService - EDON CAV Engine gRPC Service (v1)
     """
 
     def GetState(self, request, context):
-        """GetState - Single request/response
+        """GetState - Single request/response for CAV computation
         """
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
     def StreamState(self, request, context):
-        """StreamState - Server-side streaming (push updates)
+        """StreamState - Server-side streaming (push updates continuously)
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StreamSamples(self, request_iterator, context):
+        """StreamSamples - Bidirectional: push samples, receive a state every `hop` samples
         """
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
@@ -70,24 +82,29 @@ def add_EdonServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
             'GetState': grpc.unary_unary_rpc_method_handler(
                     servicer.GetState,
-                    request_deserializer=edon__pb2.StreamDataRequest.FromString,
-                    response_serializer=edon__pb2.StreamStateResponse.SerializeToString,
+                    request_deserializer=edon__pb2.CavRequest.FromString,
+                    response_serializer=edon__pb2.CavResponse.SerializeToString,
             ),
             'StreamState': grpc.unary_stream_rpc_method_handler(
                     servicer.StreamState,
-                    request_deserializer=edon__pb2.StreamDataRequest.FromString,
-                    response_serializer=edon__pb2.StreamStateResponse.SerializeToString,
+                    request_deserializer=edon__pb2.StateStreamRequest.FromString,
+                    response_serializer=edon__pb2.StateStreamResponse.SerializeToString,
+            ),
+            'StreamSamples': grpc.stream_stream_rpc_method_handler(
+                    servicer.StreamSamples,
+                    request_deserializer=edon__pb2.SampleChunk.FromString,
+                    response_serializer=edon__pb2.StateStreamResponse.SerializeToString,
             ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
-            'edon.EdonService', rpc_method_handlers)
+            'edon.v1.EdonService', rpc_method_handlers)
     server.add_generic_rpc_handlers((generic_handler,))
-    server.add_registered_method_handlers('edon.EdonService', rpc_method_handlers)
+    server.add_registered_method_handlers('edon.v1.EdonService', rpc_method_handlers)
 
 
  # This class is part of an EXPERIMENTAL API.
 class EdonService(object):
-    """gRPC Service Definition
+    """EdonService - EDON CAV Engine gRPC Service (v1)
     """
 
     @staticmethod
@@ -104,9 +121,9 @@ class EdonService(object):
         return grpc.experimental.unary_unary(
             request,
             target,
-            '/edon.EdonService/GetState',
-            edon__pb2.StreamDataRequest.SerializeToString,
-            edon__pb2.StreamStateResponse.FromString,
+            '/edon.v1.EdonService/GetState',
+            edon__pb2.CavRequest.SerializeToString,
+            edon__pb2.CavResponse.FromString,
             options,
             channel_credentials,
             insecure,
@@ -131,9 +148,36 @@ class EdonService(object):
         return grpc.experimental.unary_stream(
             request,
             target,
-            '/edon.EdonService/StreamState',
-            edon__pb2.StreamDataRequest.SerializeToString,
-            edon__pb2.StreamStateResponse.FromString,
+            '/edon.v1.EdonService/StreamState',
+            edon__pb2.StateStreamRequest.SerializeToString,
+            edon__pb2.StateStreamResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def StreamSamples(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/edon.v1.EdonService/StreamSamples',
+            edon__pb2.SampleChunk.SerializeToString,
+            edon__pb2.StateStreamResponse.FromString,
             options,
             channel_credentials,
             insecure,
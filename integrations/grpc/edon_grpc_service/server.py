@@ -13,14 +13,17 @@ from pathlib import Path
 project_root = Path(__file__).resolve().parent.parent.parent
 sys.path.insert(0, str(project_root))
 
+import os
 import time
-import threading
 from concurrent import futures
-from typing import Iterator
+from typing import Iterator, Optional
 import grpc
+import numpy as np
 
 # Import EDON engine
-from app.engine import CAVEngine, WINDOW_LEN
+from app.engine import CAVEngine, EngineSession, SIGNAL_KEYS, WINDOW_LEN
+from app.rolling_features import RollingWindowFeaturizer
+from app.session_store import DEFAULT_SESSION_ID, SessionStore
 
 # Import generated protobuf code
 try:
@@ -42,9 +45,18 @@ class EdonServiceServicer(edon_pb2_grpc.EdonServiceServicer):
     def __init__(self):
         """Initialize the service with CAV engine."""
         self.engine = CAVEngine()
-        self._lock = threading.Lock()
+        # Per-device EMA/hysteresis state, keyed by x-session-id call metadata
+        self.sessions = SessionStore(EngineSession)
         print("EDON gRPC Service initialized")
     
+    @staticmethod
+    def _session_id(context) -> str:
+        """Session key from 'x-session-id' invocation metadata (default session otherwise)."""
+        for key, value in context.invocation_metadata() or ():
+            if key == 'x-session-id' and value:
+                return value
+        return DEFAULT_SESSION_ID
+    
     def GetState(self, request, context):
         """Single request/response for CAV computation."""
         try:
@@ -66,13 +78,14 @@ class EdonServiceServicer(edon_pb2_grpc.EdonServiceServicer):
                     return edon_pb2.CavResponse()
             
             # Compute CAV
-            with self._lock:
+            with self.sessions.acquire(self._session_id(context)) as session:
                 cav_raw, cav_smooth, state, parts = self.engine.cav_from_window(
                     window=window,
                     temp_c=request.temp_c if request.temp_c > 0 else None,
                     humidity=request.humidity if request.humidity > 0 else None,
                     aqi=request.aqi if request.aqi > 0 else None,
                     local_hour=request.local_hour if request.local_hour >= 0 else 12,
+                    session=session,
                 )
             
             # Compute control scales
@@ -126,6 +139,19 @@ class EdonServiceServicer(edon_pb2_grpc.EdonServiceServicer):
                 context.set_details(f'Invalid window length for {key}')
                 return
         
+        session_id = self._session_id(context)
+        env = {
+            'temp_c': request.temp_c if request.temp_c > 0 else None,
+            'humidity': request.humidity if request.humidity > 0 else None,
+            'aqi': request.aqi if request.aqi > 0 else None,
+            'local_hour': request.local_hour if request.local_hour >= 0 else 12,
+        }
+        
+        # The window never changes during the stream: featurize it once
+        features, valid = self.engine.featurize_windows(
+            np.asarray([[window[k] for k in SIGNAL_KEYS]], dtype=float)
+        )
+        
         # Stream updates every 5 seconds
         update_interval = 5.0
         last_update = time.time()
@@ -136,34 +162,12 @@ class EdonServiceServicer(edon_pb2_grpc.EdonServiceServicer):
                 
                 if current_time - last_update >= update_interval:
                     # Compute CAV
-                    with self._lock:
-                        cav_raw, cav_smooth, state, parts = self.engine.cav_from_window(
-                            window=window,
-                            temp_c=request.temp_c if request.temp_c > 0 else None,
-                            humidity=request.humidity if request.humidity > 0 else None,
-                            aqi=request.aqi if request.aqi > 0 else None,
-                            local_hour=request.local_hour if request.local_hour >= 0 else 12,
-                        )
-                    
-                    controls = self._compute_controls(state, parts)
-                    
-                    # Build and yield response
-                    response = edon_pb2.StateStreamResponse()
-                    response.cav_raw = cav_raw
-                    response.cav_smooth = cav_smooth
-                    response.state = state
-                    response.timestamp_ms = int(time.time() * 1000)
-                    
-                    response.parts.bio = parts.get('bio', 0.0)
-                    response.parts.env = parts.get('env', 0.0)
-                    response.parts.circadian = parts.get('circadian', 0.0)
-                    response.parts.p_stress = parts.get('p_stress', 0.0)
+                    with self.sessions.acquire(session_id) as session:
+                        result = self.engine.cav_from_features_batch(
+                            features, valid=valid, session=session, **env
+                        )[0]
                     
-                    response.controls.speed = controls['speed']
-                    response.controls.torque = controls['torque']
-                    response.controls.safety = controls['safety']
-                    
-                    yield response
+                    yield self._stream_response(*result)
                     last_update = current_time
                 
                 time.sleep(0.1)
@@ -172,6 +176,72 @@ class EdonServiceServicer(edon_pb2_grpc.EdonServiceServicer):
             context.set_code(grpc.StatusCode.INTERNAL)
             context.set_details(f'Streaming failed: {str(e)}')
     
+    def StreamSamples(self, request_iterator, context):
+        """Bidirectional streaming: clients push samples, server emits a state every hop."""
+        session_id = self._session_id(context)
+        roller = None
+        env = {'temp_c': None, 'humidity': None, 'aqi': None, 'local_hour': 12}
+        
+        try:
+            for chunk in request_iterator:
+                if roller is None:
+                    roller = RollingWindowFeaturizer(hop=chunk.hop or 4)
+                
+                # Env values are sticky; zero (or -1 for local_hour) keeps the previous value
+                if chunk.temp_c > 0:
+                    env['temp_c'] = chunk.temp_c
+                if chunk.humidity > 0:
+                    env['humidity'] = chunk.humidity
+                if chunk.aqi > 0:
+                    env['aqi'] = chunk.aqi
+                if chunk.local_hour >= 0:
+                    env['local_hour'] = chunk.local_hour
+                
+                cols = [chunk.eda, chunk.temp, chunk.bvp, chunk.acc_x, chunk.acc_y, chunk.acc_z]
+                if len({len(c) for c in cols}) != 1:
+                    context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+                    context.set_details('All signals in a SampleChunk must have the same number of samples')
+                    return
+                if not len(chunk.eda):
+                    continue
+                
+                emitted = roller.extend(np.column_stack([np.asarray(c, dtype=float) for c in cols]))
+                if not emitted:
+                    continue
+                
+                features = self.engine.to_schema_order(np.stack([e[0] for e in emitted]))
+                valid = np.array([e[1] for e in emitted], dtype=bool)
+                with self.sessions.acquire(session_id) as session:
+                    results = self.engine.cav_from_features_batch(
+                        features, valid=valid, session=session, **env
+                    )
+                for result in results:
+                    yield self._stream_response(*result)
+                
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f'Streaming failed: {str(e)}')
+    
+    def _stream_response(self, cav_raw: int, cav_smooth: int, state: str, parts: dict):
+        """Build a StateStreamResponse from an engine result."""
+        controls = self._compute_controls(state, parts)
+        
+        response = edon_pb2.StateStreamResponse()
+        response.cav_raw = cav_raw
+        response.cav_smooth = cav_smooth
+        response.state = state
+        response.timestamp_ms = int(time.time() * 1000)
+        
+        response.parts.bio = parts.get('bio', 0.0)
+        response.parts.env = parts.get('env', 0.0)
+        response.parts.circadian = parts.get('circadian', 0.0)
+        response.parts.p_stress = parts.get('p_stress', 0.0)
+        
+        response.controls.speed = controls['speed']
+        response.controls.torque = controls['torque']
+        response.controls.safety = controls['safety']
+        return response
+    
     def _compute_controls(self, state: str, parts: dict) -> dict:
         """Compute robot control scales based on state."""
         if state == 'overload':
@@ -184,9 +254,19 @@ class EdonServiceServicer(edon_pb2_grpc.EdonServiceServicer):
             return {'speed': 1.0, 'torque': 1.0, 'safety': 0.5}
 
 
-def serve(port: int = 50051, max_workers: int = 10):
-    """Start the gRPC server."""
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers))
+def serve(port: int = 50051, max_workers: int = 10, max_queue: Optional[int] = None):
+    """Start the gRPC server.
+
+    At most max_workers + max_queue RPCs are admitted at once (max_queue
+    defaults to EDON_GRPC_MAX_QUEUE, 64); beyond that gRPC rejects new calls
+    with RESOURCE_EXHAUSTED instead of queueing them without bound.
+    """
+    if max_queue is None:
+        max_queue = int(os.getenv("EDON_GRPC_MAX_QUEUE", "64"))
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=max_workers),
+        maximum_concurrent_rpcs=max_workers + max_queue,
+    )
     edon_pb2_grpc.add_EdonServiceServicer_to_server(EdonServiceServicer(), server)
     
     listen_addr = f'0.0.0.0:{port}'
@@ -208,7 +288,9 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='EDON gRPC Server')
     parser.add_argument('--port', type=int, default=50051, help='gRPC server port')
     parser.add_argument('--workers', type=int, default=10, help='Max worker threads')
+    parser.add_argument('--max-queue', type=int, default=None,
+                        help='RPCs allowed to wait for a worker before RESOURCE_EXHAUSTED (default: EDON_GRPC_MAX_QUEUE or 64)')
     args = parser.parse_args()
     
-    serve(port=args.port, max_workers=args.workers)
+    serve(port=args.port, max_workers=args.workers, max_queue=args.max_queue)
 
@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\redon_v2.proto\x12\x07\x65\x64on.v2\"\x0f\n\rHealthRequest\"\x88\x01\n\x0eHealthResponse\x12\n\n\x02ok\x18\x01 \x01(\x08\x12\x0c\n\x04mode\x18\x02 \x01(\t\x12\x0e\n\x06\x65ngine\x18\x03 \x01(\t\x12\x15\n\rneural_loaded\x18\x04 \x01(\x08\x12\x12\n\npca_loaded\x18\x05 \x01(\x08\x12\x10\n\x08uptime_s\x18\x06 \x01(\x01\x12\x0f\n\x07version\x18\x07 \x01(\t\"5\n\x0bPhysioInput\x12\x0b\n\x03\x45\x44\x41\x18\x01 \x03(\x02\x12\x0b\n\x03\x42VP\x18\x02 \x03(\x02\x12\x0c\n\x04TEMP\x18\x03 \x03(\x02\"\\\n\x0bMotionInput\x12\r\n\x05\x41\x43\x43_x\x18\x01 \x03(\x02\x12\r\n\x05\x41\x43\x43_y\x18\x02 \x03(\x02\x12\r\n\x05\x41\x43\x43_z\x18\x03 \x03(\x02\x12\x10\n\x08velocity\x18\x04 \x03(\x02\x12\x0e\n\x06torque\x18\x05 \x03(\x02\"M\n\x08\x45nvInput\x12\x0e\n\x06temp_c\x18\x01 \x01(\x02\x12\x10\n\x08humidity\x18\x02 \x01(\x02\x12\x0b\n\x03\x61qi\x18\x03 \x01(\x02\x12\x12\n\nlocal_hour\x18\x04 \x01(\x05\"1\n\x0bVisionInput\x12\x11\n\tembedding\x18\x01 \x03(\x02\x12\x0f\n\x07objects\x18\x02 \x03(\t\"1\n\nAudioInput\x12\x11\n\tembedding\x18\x01 \x03(\x02\x12\x10\n\x08keywords\x18\x02 \x03(\t\"?\n\tTaskInput\x12\n\n\x02id\x18\x01 \x01(\t\x12\x12\n\ncomplexity\x18\x02 \x01(\x02\x12\x12\n\ndifficulty\x18\x03 \x01(\x02\"K\n\x0bSystemInput\x12\x11\n\tcpu_usage\x18\x01 \x01(\x02\x12\x15\n\rbattery_level\x18\x02 \x01(\x02\x12\x12\n\nerror_rate\x18\x03 \x01(\x02\"\xab\x02\n\x0b\x43\x61vWindowV2\x12$\n\x06physio\x18\x01 \x01(\x0b\x32\x14.edon.v2.PhysioInput\x12$\n\x06motion\x18\x02 \x01(\x0b\x32\x14.edon.v2.MotionInput\x12&\n\x0b\x65nvironment\x18\x03 \x01(\x0b\x32\x11.edon.v2.EnvInput\x12$\n\x06vision\x18\x04 \x01(\x0b\x32\x14.edon.v2.VisionInput\x12\"\n\x05\x61udio\x18\x05 \x01(\x0b\x32\x13.edon.v2.AudioInput\x12 \n\x04task\x18\x06 \x01(\x0b\x32\x12.edon.v2.TaskInput\x12$\n\x06system\x18\x07 \x01(\x0b\x32\x14.edon.v2.SystemInput\x12\x16\n\x0e\x64\x65vice_profile\x18\x08 \x01(\t\"R\n\x11\x43\x61vBatchV2Request\x12%\n\x07windows\x18\x01 \x03(\x0b\x32\x14.edon.v2.CavWindowV2\x12\x16\n\x0e\x64\x65vice_profile\x18\x02 \x01(\t\"\xae\x01\n\nInfluences\x12\x13\n\x0bspeed_scale\x18\x01 \x01(\x01\x12\x14\n\x0ctorque_scale\x18\x02 \x01(\x01\x12\x14\n\x0csafety_scale\x18\x03 \x01(\x01\x12\x14\n\x0c\x63\x61ution_flag\x18\x04 \x01(\x08\x12\x16\n\x0e\x65mergency_flag\x18\x05 \x01(\x08\x12\x13\n\x0b\x66ocus_boost\x18\x06 \x01(\x01\x12\x1c\n\x14recovery_recommended\x18\x07 \x01(\x08\"\xf7\x02\n\x08Metadata\x12\x1a\n\x12modalities_present\x18\x01 \x03(\t\x12\x14\n\x0cnum_features\x18\x02 \x01(\x05\x12\x16\n\x0ehas_embeddings\x18\x03 \x01(\x08\x12-\n\x06scores\x18\x04 \x03(\x0b\x32\x1d.edon.v2.Metadata.ScoresEntry\x12\x16\n\x0e\x64\x65vice_profile\x18\x05 \x01(\t\x12\x12\n\npca_fitted\x18\x06 \x01(\x08\x12\x19\n\x11neural_confidence\x18\x07 \x01(\x01\x12\x43\n\x12neural_state_probs\x18\x08 \x03(\x0b\x32\'.edon.v2.Metadata.NeuralStateProbsEntry\x1a-\n\x0bScoresEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x01:\x02\x38\x01\x1a\x37\n\x15NeuralStateProbsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x01:\x02\x38\x01\"\xd6\x01\n\x0b\x43\x61vResultV2\x12\n\n\x02ok\x18\x01 \x01(\x08\x12\r\n\x05\x65rror\x18\x02 \x01(\t\x12\x12\n\ncav_vector\x18\x03 \x03(\x02\x12\x13\n\x0bstate_class\x18\x04 \x01(\t\x12\x10\n\x08p_stress\x18\x05 \x01(\x01\x12\x0f\n\x07p_chaos\x18\x06 \x01(\x01\x12\'\n\ninfluences\x18\x07 \x01(\x0b\x32\x13.edon.v2.Influences\x12\x12\n\nconfidence\x18\x08 \x01(\x01\x12#\n\x08metadata\x18\t \x01(\x0b\x32\x11.edon.v2.Metadata\"g\n\x12\x43\x61vBatchV2Response\x12%\n\x07results\x18\x01 \x03(\x0b\x32\x14.edon.v2.CavResultV2\x12\x12\n\nlatency_ms\x18\x02 \x01(\x01\x12\x16\n\x0eserver_version\x18\x03 \x01(\t\"T\n\x11\x43\x61vStreamResponse\x12\n\n\x02ok\x18\x01 \x01(\x08\x12\r\n\x05\x65rror\x18\x02 \x01(\t\x12$\n\x06result\x18\x03 \x01(\x0b\x32\x14.edon.v2.CavResultV22\xe4\x01\n\rEdonV2Service\x12\x39\n\x06Health\x12\x16.edon.v2.HealthRequest\x1a\x17.edon.v2.HealthResponse\x12L\n\x11\x43omputeCavBatchV2\x12\x1a.edon.v2.CavBatchV2Request\x1a\x1b.edon.v2.CavBatchV2Response\x12J\n\x12StreamCavWindowsV2\x12\x14.edon.v2.CavWindowV2\x1a\x1a.edon.v2.CavStreamResponse(\x01\x30\x01\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\redon_v2.proto\x12\x07\x65\x64on.v2\"\x0f\n\rHealthRequest\"\xe0\x01\n\x0eHealthResponse\x12\n\n\x02ok\x18\x01 \x01(\x08\x12\x0c\n\x04mode\x18\x02 \x01(\t\x12\x0e\n\x06\x65ngine\x18\x03 \x01(\t\x12\x15\n\rneural_loaded\x18\x04 \x01(\x08\x12\x12\n\npca_loaded\x18\x05 \x01(\x08\x12\x10\n\x08uptime_s\x18\x06 \x01(\x01\x12\x0f\n\x07version\x18\x07 \x01(\t\x12\x12\n\nmodel_name\x18\x08 \x01(\t\x12\x14\n\x0cmodel_sha256\x18\t \x01(\t\x12\x16\n\x0emodel_features\x18\n \x01(\x05\x12\x14\n\x0cmodel_window\x18\x0b \x01(\x05\"5\n\x0bPhysioInput\x12\x0b\n\x03\x45\x44\x41\x18\x01 \x03(\x02\x12\x0b\n\x03\x42VP\x18\x02 \x03(\x02\x12\x0c\n\x04TEMP\x18\x03 \x03(\x02\"\\\n\x0bMotionInput\x12\r\n\x05\x41\x43\x43_x\x18\x01 \x03(\x02\x12\r\n\x05\x41\x43\x43_y\x18\x02 \x03(\x02\x12\r\n\x05\x41\x43\x43_z\x18\x03 \x03(\x02\x12\x10\n\x08velocity\x18\x04 \x03(\x02\x12\x0e\n\x06torque\x18\x05 \x03(\x02\"M\n\x08\x45nvInput\x12\x0e\n\x06temp_c\x18\x01 \x01(\x02\x12\x10\n\x08humidity\x18\x02 \x01(\x02\x12\x0b\n\x03\x61qi\x18\x03 \x01(\x02\x12\x12\n\nlocal_hour\x18\x04 \x01(\x05\"H\n\x0bVisionInput\x12\x11\n\tembedding\x18\x01 \x03(\x02\x12\x0f\n\x07objects\x18\x02 \x03(\t\x12\x15\n\rembedding_f32\x18\x03 \x01(\x0c\"H\n\nAudioInput\x12\x11\n\tembedding\x18\x01 \x03(\x02\x12\x10\n\x08keywords\x18\x02 \x03(\t\x12\x15\n\rembedding_f32\x18\x03 \x01(\x0c\"M\n\tTaskInput\x12\n\n\x02id\x18\x01 \x01(\t\x12\x12\n\ncomplexity\x18\x02 \x01(\x02\x12\x12\n\ndifficulty\x18\x03 \x01(\x02\x12\x0c\n\x04goal\x18\x04 \x01(\t\"K\n\x0bSystemInput\x12\x11\n\tcpu_usage\x18\x01 \x01(\x02\x12\x15\n\rbattery_level\x18\x02 \x01(\x02\x12\x12\n\nerror_rate\x18\x03 \x01(\x02\"\xab\x02\n\x0b\x43\x61vWindowV2\x12$\n\x06physio\x18\x01 \x01(\x0b\x32\x14.edon.v2.PhysioInput\x12$\n\x06motion\x18\x02 \x01(\x0b\x32\x14.edon.v2.MotionInput\x12&\n\x0b\x65nvironment\x18\x03 \x01(\x0b\x32\x11.edon.v2.EnvInput\x12$\n\x06vision\x18\x04 \x01(\x0b\x32\x14.edon.v2.VisionInput\x12\"\n\x05\x61udio\x18\x05 \x01(\x0b\x32\x13.edon.v2.AudioInput\x12 \n\x04task\x18\x06 \x01(\x0b\x32\x12.edon.v2.TaskInput\x12$\n\x06system\x18\x07 \x01(\x0b\x32\x14.edon.v2.SystemInput\x12\x16\n\x0e\x64\x65vice_profile\x18\x08 \x01(\t\"R\n\x11\x43\x61vBatchV2Request\x12%\n\x07windows\x18\x01 \x03(\x0b\x32\x14.edon.v2.CavWindowV2\x12\x16\n\x0e\x64\x65vice_profile\x18\x02 \x01(\t\"\xae\x01\n\nInfluences\x12\x13\n\x0bspeed_scale\x18\x01 \x01(\x01\x12\x14\n\x0ctorque_scale\x18\x02 \x01(\x01\x12\x14\n\x0csafety_scale\x18\x03 \x01(\x01\x12\x14\n\x0c\x63\x61ution_flag\x18\x04 \x01(\x08\x12\x16\n\x0e\x65mergency_flag\x18\x05 \x01(\x08\x12\x13\n\x0b\x66ocus_boost\x18\x06 \x01(\x01\x12\x1c\n\x14recovery_recommended\x18\x07 \x01(\x08\"\xf7\x02\n\x08Metadata\x12\x1a\n\x12modalities_present\x18\x01 \x03(\t\x12\x14\n\x0cnum_features\x18\x02 \x01(\x05\x12\x16\n\x0ehas_embeddings\x18\x03 \x01(\x08\x12-\n\x06scores\x18\x04 \x03(\x0b\x32\x1d.edon.v2.Metadata.ScoresEntry\x12\x16\n\x0e\x64\x65vice_profile\x18\x05 \x01(\t\x12\x12\n\npca_fitted\x18\x06 \x01(\x08\x12\x19\n\x11neural_confidence\x18\x07 \x01(\x01\x12\x43\n\x12neural_state_probs\x18\x08 \x03(\x0b\x32\'.edon.v2.Metadata.NeuralStateProbsEntry\x1a-\n\x0bScoresEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x01:\x02\x38\x01\x1a\x37\n\x15NeuralStateProbsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x01:\x02\x38\x01\"\xd6\x01\n\x0b\x43\x61vResultV2\x12\n\n\x02ok\x18\x01 \x01(\x08\x12\r\n\x05\x65rror\x18\x02 \x01(\t\x12\x12\n\ncav_vector\x18\x03 \x03(\x02\x12\x13\n\x0bstate_class\x18\x04 \x01(\t\x12\x10\n\x08p_stress\x18\x05 \x01(\x01\x12\x0f\n\x07p_chaos\x18\x06 \x01(\x01\x12\'\n\ninfluences\x18\x07 \x01(\x0b\x32\x13.edon.v2.Influences\x12\x12\n\nconfidence\x18\x08 \x01(\x01\x12#\n\x08metadata\x18\t \x01(\x0b\x32\x11.edon.v2.Metadata\"g\n\x12\x43\x61vBatchV2Response\x12%\n\x07results\x18\x01 \x03(\x0b\x32\x14.edon.v2.CavResultV2\x12\x12\n\nlatency_ms\x18\x02 \x01(\x01\x12\x16\n\x0eserver_version\x18\x03 \x01(\t\"T\n\x11\x43\x61vStreamResponse\x12\n\n\x02ok\x18\x01 \x01(\x08\x12\r\n\x05\x65rror\x18\x02 \x01(\t\x12$\n\x06result\x18\x03 \x01(\x0b\x32\x14.edon.v2.CavResultV22\xe4\x01\n\rEdonV2Service\x12\x39\n\x06Health\x12\x16.edon.v2.HealthRequest\x1a\x17.edon.v2.HealthResponse\x12L\n\x11\x43omputeCavBatchV2\x12\x1a.edon.v2.CavBatchV2Request\x1a\x1b.edon.v2.CavBatchV2Response\x12J\n\x12StreamCavWindowsV2\x12\x14.edon.v2.CavWindowV2\x1a\x1a.edon.v2.CavStreamResponse(\x01\x30\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -38,39 +38,39 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_HEALTHREQUEST']._serialized_start=26
   _globals['_HEALTHREQUEST']._serialized_end=41
   _globals['_HEALTHRESPONSE']._serialized_start=44
-  _globals['_HEALTHRESPONSE']._serialized_end=180
-  _globals['_PHYSIOINPUT']._serialized_start=182
-  _globals['_PHYSIOINPUT']._serialized_end=235
-  _globals['_MOTIONINPUT']._serialized_start=237
-  _globals['_MOTIONINPUT']._serialized_end=329
-  _globals['_ENVINPUT']._serialized_start=331
-  _globals['_ENVINPUT']._serialized_end=408
-  _globals['_VISIONINPUT']._serialized_start=410
-  _globals['_VISIONINPUT']._serialized_end=459
-  _globals['_AUDIOINPUT']._serialized_start=461
-  _globals['_AUDIOINPUT']._serialized_end=510
-  _globals['_TASKINPUT']._serialized_start=512
-  _globals['_TASKINPUT']._serialized_end=575
-  _globals['_SYSTEMINPUT']._serialized_start=577
-  _globals['_SYSTEMINPUT']._serialized_end=652
-  _globals['_CAVWINDOWV2']._serialized_start=655
-  _globals['_CAVWINDOWV2']._serialized_end=954
-  _globals['_CAVBATCHV2REQUEST']._serialized_start=956
-  _globals['_CAVBATCHV2REQUEST']._serialized_end=1038
-  _globals['_INFLUENCES']._serialized_start=1041
-  _globals['_INFLUENCES']._serialized_end=1215
-  _globals['_METADATA']._serialized_start=1218
-  _globals['_METADATA']._serialized_end=1593
-  _globals['_METADATA_SCORESENTRY']._serialized_start=1491
-  _globals['_METADATA_SCORESENTRY']._serialized_end=1536
-  _globals['_METADATA_NEURALSTATEPROBSENTRY']._serialized_start=1538
-  _globals['_METADATA_NEURALSTATEPROBSENTRY']._serialized_end=1593
-  _globals['_CAVRESULTV2']._serialized_start=1596
-  _globals['_CAVRESULTV2']._serialized_end=1810
-  _globals['_CAVBATCHV2RESPONSE']._serialized_start=1812
-  _globals['_CAVBATCHV2RESPONSE']._serialized_end=1915
-  _globals['_CAVSTREAMRESPONSE']._serialized_start=1917
-  _globals['_CAVSTREAMRESPONSE']._serialized_end=2001
-  _globals['_EDONV2SERVICE']._serialized_start=2004
-  _globals['_EDONV2SERVICE']._serialized_end=2232
+  _globals['_HEALTHRESPONSE']._serialized_end=268
+  _globals['_PHYSIOINPUT']._serialized_start=270
+  _globals['_PHYSIOINPUT']._serialized_end=323
+  _globals['_MOTIONINPUT']._serialized_start=325
+  _globals['_MOTIONINPUT']._serialized_end=417
+  _globals['_ENVINPUT']._serialized_start=419
+  _globals['_ENVINPUT']._serialized_end=496
+  _globals['_VISIONINPUT']._serialized_start=498
+  _globals['_VISIONINPUT']._serialized_end=570
+  _globals['_AUDIOINPUT']._serialized_start=572
+  _globals['_AUDIOINPUT']._serialized_end=644
+  _globals['_TASKINPUT']._serialized_start=646
+  _globals['_TASKINPUT']._serialized_end=723
+  _globals['_SYSTEMINPUT']._serialized_start=725
+  _globals['_SYSTEMINPUT']._serialized_end=800
+  _globals['_CAVWINDOWV2']._serialized_start=803
+  _globals['_CAVWINDOWV2']._serialized_end=1102
+  _globals['_CAVBATCHV2REQUEST']._serialized_start=1104
+  _globals['_CAVBATCHV2REQUEST']._serialized_end=1186
+  _globals['_INFLUENCES']._serialized_start=1189
+  _globals['_INFLUENCES']._serialized_end=1363
+  _globals['_METADATA']._serialized_start=1366
+  _globals['_METADATA']._serialized_end=1741
+  _globals['_METADATA_SCORESENTRY']._serialized_start=1639
+  _globals['_METADATA_SCORESENTRY']._serialized_end=1684
+  _globals['_METADATA_NEURALSTATEPROBSENTRY']._serialized_start=1686
+  _globals['_METADATA_NEURALSTATEPROBSENTRY']._serialized_end=1741
+  _globals['_CAVRESULTV2']._serialized_start=1744
+  _globals['_CAVRESULTV2']._serialized_end=1958
+  _globals['_CAVBATCHV2RESPONSE']._serialized_start=1960
+  _globals['_CAVBATCHV2RESPONSE']._serialized_end=2063
+  _globals['_CAVSTREAMRESPONSE']._serialized_start=2065
+  _globals['_CAVSTREAMRESPONSE']._serialized_end=2149
+  _globals['_EDONV2SERVICE']._serialized_start=2152
+  _globals['_EDONV2SERVICE']._serialized_end=2380
 # @@protoc_insertion_point(module_scope)
@@ -15,14 +15,14 @@ sys.path.insert(0, str(project_root))
 
 import os
 import time
-import threading
 from concurrent import futures
-from typing import Iterator
+from typing import Iterator, Optional
 import grpc
 import logging
 
 # Import v2 engine
-from app.v2.engine_v2 import CAVEngineV2
+from app.v2.engine_v2 import CAVEngineV2, EngineSessionV2
+from app.model_manifest import MANIFEST
 from app.v2.schemas_v2 import V2CavWindow, InfluenceFields
 from app.v2 import __version__ as v2_version
 from app import __version__ as app_version
@@ -52,9 +52,9 @@ logger = logging.getLogger(__name__)
 # Track startup time for uptime
 _start_time = time.time()
 
-# Global engine instance (will be set by main or created here)
+# Global engine instance (will be set by main or created here). Scoring only
+# reads it; each RPC smooths embeddings in its own EngineSessionV2.
 _engine_v2 = None
-_engine_lock = threading.Lock()
 
 
 def get_engine() -> CAVEngineV2:
@@ -93,7 +93,10 @@ class EdonV2ServiceServicer(edon_v2_pb2_grpc.EdonV2ServiceServicer):
             
             # Check if PCA and neural are loaded
             pca_loaded = getattr(self.engine, 'pca_fitted', False)
-            neural_loaded = hasattr(self.engine, 'neural_head') and hasattr(self.engine.neural_head, 'model')
+            neural_loaded = hasattr(self.engine, 'neural_head') and getattr(self.engine.neural_head, 'loaded', False)
+            
+            # Cached manifest: one stat() per probe, no re-hashing
+            manifest = MANIFEST.get()
             
             return edon_v2_pb2.HealthResponse(
                 ok=True,
@@ -102,7 +105,11 @@ class EdonV2ServiceServicer(edon_v2_pb2_grpc.EdonV2ServiceServicer):
                 neural_loaded=neural_loaded,
                 pca_loaded=pca_loaded,
                 uptime_s=uptime_s,
-                version=f"EDON CAV Engine v{app_version} (v2 API: {v2_version})"
+                version=f"EDON CAV Engine v{app_version} (v2 API: {v2_version})",
+                model_name=manifest.name,
+                model_sha256=manifest.sha256,
+                model_features=manifest.features,
+                model_window=manifest.window
             )
         except Exception as e:
             logger.exception(f"Health check failed: {e}")
@@ -135,32 +142,32 @@ class EdonV2ServiceServicer(edon_v2_pb2_grpc.EdonV2ServiceServicer):
                 return edon_v2_pb2.CavBatchV2Response()
             
             results = []
+            session = EngineSessionV2()  # EMA across this request's windows
             
-            with _engine_lock:
-                for window_proto in request.windows:
-                    try:
-                        # Convert proto window to Pydantic model
-                        window_dict = self._proto_window_to_dict(window_proto)
-                        window = V2CavWindow(**window_dict)
-                        
-                        # Get device profile (from window or request)
-                        device_profile = window_proto.device_profile or request.device_profile or None
-                        
-                        # Compute CAV v2
-                        result = self.engine.compute_cav_v2(window, device_profile=device_profile)
-                        
-                        # Convert result to proto
-                        result_proto = self._dict_result_to_proto(result)
-                        results.append(result_proto)
-                        
-                    except Exception as e:
-                        logger.exception(f"Error processing v2 window: {e}")
-                        # Per-window error: return ok=false
-                        error_result = edon_v2_pb2.CavResultV2(
-                            ok=False,
-                            error=str(e)
-                        )
-                        results.append(error_result)
+            for window_proto in request.windows:
+                try:
+                    # Convert proto window to Pydantic model
+                    window_dict = self._proto_window_to_dict(window_proto)
+                    window = V2CavWindow(**window_dict)
+                    
+                    # Get device profile (from window or request)
+                    device_profile = window_proto.device_profile or request.device_profile or None
+                    
+                    # Compute CAV v2
+                    result = self.engine.compute_cav_v2(window, device_profile=device_profile, session=session)
+                    
+                    # Convert result to proto
+                    result_proto = self._dict_result_to_proto(result)
+                    results.append(result_proto)
+                    
+                except Exception as e:
+                    logger.exception(f"Error processing v2 window: {e}")
+                    # Per-window error: return ok=false
+                    error_result = edon_v2_pb2.CavResultV2(
+                        ok=False,
+                        error=str(e)
+                    )
+                    results.append(error_result)
             
             latency_ms = (time.time() - start_time) * 1000.0
             
@@ -187,6 +194,7 @@ class EdonV2ServiceServicer(edon_v2_pb2_grpc.EdonV2ServiceServicer):
                 context.set_details(f"License validation failed: {e}")
                 return
         
+        session = EngineSessionV2()  # EMA private to this stream
         try:
             for window_proto in request_iterator:
                 try:
@@ -198,8 +206,7 @@ class EdonV2ServiceServicer(edon_v2_pb2_grpc.EdonV2ServiceServicer):
                     device_profile = window_proto.device_profile or None
                     
                     # Compute CAV v2
-                    with _engine_lock:
-                        result = self.engine.compute_cav_v2(window, device_profile=device_profile)
+                    result = self.engine.compute_cav_v2(window, device_profile=device_profile, session=session)
                     
                     # Convert result to proto
                     result_proto = self._dict_result_to_proto(result)
@@ -274,7 +281,10 @@ class EdonV2ServiceServicer(edon_v2_pb2_grpc.EdonV2ServiceServicer):
         # Vision
         if window_proto.HasField('vision'):
             vision = {}
-            if window_proto.vision.embedding:
+            if window_proto.vision.embedding_f32:
+                # Packed float32 bytes: validated into an array without a copy
+                vision['embedding'] = window_proto.vision.embedding_f32
+            elif window_proto.vision.embedding:
                 vision['embedding'] = list(window_proto.vision.embedding)
             if window_proto.vision.objects:
                 vision['objects'] = list(window_proto.vision.objects)
@@ -284,7 +294,10 @@ class EdonV2ServiceServicer(edon_v2_pb2_grpc.EdonV2ServiceServicer):
         # Audio
         if window_proto.HasField('audio'):
             audio = {}
-            if window_proto.audio.embedding:
+            if window_proto.audio.embedding_f32:
+                # Packed float32 bytes: validated into an array without a copy
+                audio['embedding'] = window_proto.audio.embedding_f32
+            elif window_proto.audio.embedding:
                 audio['embedding'] = list(window_proto.audio.embedding)
             if window_proto.audio.keywords:
                 audio['keywords'] = list(window_proto.audio.keywords)
@@ -366,9 +379,19 @@ class EdonV2ServiceServicer(edon_v2_pb2_grpc.EdonV2ServiceServicer):
         )
 
 
-def serve(port: int = 50052, max_workers: int = 10):
-    """Start the v2 gRPC server."""
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers))
+def serve(port: int = 50052, max_workers: int = 10, max_queue: Optional[int] = None):
+    """Start the v2 gRPC server.
+
+    At most max_workers + max_queue RPCs are admitted at once (max_queue
+    defaults to EDON_GRPC_MAX_QUEUE, 64); beyond that gRPC rejects new calls
+    with RESOURCE_EXHAUSTED instead of queueing them without bound.
+    """
+    if max_queue is None:
+        max_queue = int(os.getenv("EDON_GRPC_MAX_QUEUE", "64"))
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=max_workers),
+        maximum_concurrent_rpcs=max_workers + max_queue,
+    )
     edon_v2_pb2_grpc.add_EdonV2ServiceServicer_to_server(EdonV2ServiceServicer(), server)
     
     listen_addr = f'0.0.0.0:{port}'
@@ -395,7 +418,9 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='EDON v2 gRPC Server')
     parser.add_argument('--port', type=int, default=50052, help='gRPC server port (default: 50052)')
     parser.add_argument('--workers', type=int, default=10, help='Max worker threads (default: 10)')
+    parser.add_argument('--max-queue', type=int, default=None,
+                        help='RPCs allowed to wait for a worker before RESOURCE_EXHAUSTED (default: EDON_GRPC_MAX_QUEUE or 64)')
     args = parser.parse_args()
     
-    serve(port=args.port, max_workers=args.workers)
+    serve(port=args.port, max_workers=args.workers, max_queue=args.max_queue)
 
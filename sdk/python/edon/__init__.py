@@ -6,6 +6,7 @@ Supports both REST and gRPC transports.
 """
 
 from .client import EdonClient, TransportType
+from .features import compute_features, to_feature_map
 from .exceptions import (
     EdonError,
     EdonHTTPError,
@@ -17,6 +18,8 @@ __version__ = "2.0.0"
 __all__ = [
     "EdonClient",
     "TransportType",
+    "compute_features",
+    "to_feature_map",
     "EdonError",
     "EdonHTTPError",
     "EdonAuthError",
@@ -5,6 +5,7 @@ from typing import Dict, List, Optional, Any, Iterator
 
 from .transport import TransportType
 from .rest_transport import RESTTransport
+from .features import to_feature_map
 from .grpc_transport import GRPCTransport
 from .exceptions import EdonError, EdonHTTPError
 
@@ -55,6 +56,8 @@ class EdonClient:
         grpc_host: str = "localhost",
         grpc_port: int = 50051,
         grpc_version: str = "v1",
+        featurize: bool = False,
+        session_id: Optional[str] = None,
     ):
         """
         Initialize the EDON client.
@@ -71,8 +74,13 @@ class EdonClient:
             grpc_host: gRPC server host (default: localhost)
             grpc_port: gRPC server port (default: 50051 for v1, 50052 for v2)
             grpc_version: gRPC API version - "v1" or "v2" (default: "v1")
+            featurize: If True, compute the six model features locally and send
+                      feature maps instead of raw windows (REST only, default: False)
+            session_id: Device/session key for server-side EMA smoothing, sent as
+                       X-Session-ID (REST only, default: server's shared session)
         """
         self.transport_type = transport
+        self.featurize = featurize
         self.verbose = verbose
         self.grpc_version = grpc_version
         
@@ -85,6 +93,8 @@ class EdonClient:
                 api_key=api_key,
                 timeout=timeout,
                 max_retries=max_retries,
+                featurize=featurize,
+                session_id=session_id,
             )
         elif transport == TransportType.GRPC:
             self.transport = GRPCTransport(host=grpc_host, port=grpc_port, version=grpc_version)
@@ -119,12 +129,18 @@ class EdonClient:
                     raise
                 raise EdonError(f"CAV computation failed: {str(e)}") from e
     
-    def cav_batch(self, windows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def cav_batch(
+        self,
+        windows: List[Dict[str, Any]],
+        featurize: Optional[bool] = None,
+    ) -> List[Dict[str, Any]]:
         """
         Compute CAV for multiple sensor windows in batch (REST only, v1 API).
         
         Args:
             windows: List of sensor window dicts (same format as cav())
+            featurize: Override the client's featurize setting for this call.
+                      When enabled, raw windows are reduced to feature maps locally.
         
         Returns:
             List of CAV results, each with 'ok', 'cav_raw', 'cav_smooth', 'state', 'parts'
@@ -140,6 +156,8 @@ class EdonClient:
         import requests
         url = f"{self.transport.base_url}/oem/cav/batch"
         headers = self.transport._get_headers()
+        if self.featurize if featurize is None else featurize:
+            windows = [to_feature_map(w) for w in windows]
         
         try:
             response = requests.post(
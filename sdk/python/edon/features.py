@@ -0,0 +1,112 @@
+"""Client-side featurization for the EDON CAV Engine.
+
+Computes the six v3.2 model features from a raw 240-sample window so the
+client can send a small feature map instead of 1,440 raw floats. The math
+mirrors ``compute_window_features`` in the engine (non-finite samples are
+dropped, population std/variance) and needs no dependency beyond the
+standard library.
+"""
+
+import math
+from typing import Any, Dict, List, Sequence
+
+FEATURE_NAMES = (
+    "eda_mean",
+    "eda_deriv_std",
+    "eda_deriv_pos_rate",
+    "bvp_std",
+    "acc_magnitude_mean",
+    "acc_var",
+)
+
+SIGNAL_KEYS = ("EDA", "TEMP", "BVP", "ACC_x", "ACC_y", "ACC_z")
+ENV_KEYS = ("temp_c", "humidity", "aqi", "local_hour")
+
+# Same missing-data threshold the engine applies to raw windows
+MAX_MISSING_RATIO = 0.2
+
+
+def _signal(window: Dict[str, Any], key: str) -> List[float]:
+    for variant in (key, key.lower(), key.upper()):
+        if variant in window and window[variant] is not None:
+            return [float(x) for x in window[variant]]
+    return []
+
+
+def _finite(values: Sequence[float]) -> List[float]:
+    return [x for x in values if math.isfinite(x)]
+
+
+def _mean(values: Sequence[float]) -> float:
+    return math.fsum(values) / len(values) if values else 0.0
+
+
+def _var(values: Sequence[float]) -> float:
+    if not values:
+        return 0.0
+    m = _mean(values)
+    return math.fsum((x - m) * (x - m) for x in values) / len(values)
+
+
+def is_featurizable(window: Dict[str, Any]) -> bool:
+    """True if the window passes the engine's missing-data guard."""
+    samples = [_signal(window, k) for k in SIGNAL_KEYS]
+    total = sum(len(s) for s in samples)
+    if total == 0:
+        return False
+    missing = sum(1 for s in samples for x in s if not math.isfinite(x))
+    return missing <= total * MAX_MISSING_RATIO
+
+
+def compute_features(window: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Compute the v3.2 model features for one raw window.
+
+    Args:
+        window: Dict with EDA, BVP, ACC_x, ACC_y, ACC_z sample lists
+
+    Returns:
+        Dict keyed by FEATURE_NAMES
+    """
+    eda = _finite(_signal(window, "EDA"))
+    bvp = _finite(_signal(window, "BVP"))
+    acc_mag = _finite([
+        math.sqrt(x * x + y * y + z * z)
+        for x, y, z in zip(
+            _signal(window, "ACC_x"), _signal(window, "ACC_y"), _signal(window, "ACC_z")
+        )
+    ])
+
+    if len(eda) >= 2:
+        eda_diff = [b - a for a, b in zip(eda, eda[1:])]
+        eda_deriv_std = math.sqrt(_var(eda_diff))
+        eda_deriv_pos_rate = sum(1 for d in eda_diff if d > 0) / len(eda_diff)
+    else:
+        eda_deriv_std = 0.0
+        eda_deriv_pos_rate = 0.5
+
+    return {
+        "eda_mean": _mean(eda),
+        "eda_deriv_std": eda_deriv_std,
+        "eda_deriv_pos_rate": eda_deriv_pos_rate,
+        "bvp_std": math.sqrt(_var(bvp)),
+        "acc_magnitude_mean": _mean(acc_mag),
+        "acc_var": _var(acc_mag),
+    }
+
+
+def to_feature_map(window: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a raw window to a feature-map window for /oem/cav/batch.
+
+    Environmental fields (temp_c, humidity, aqi, local_hour) are carried over.
+    Windows that fail the missing-data guard are returned unchanged so the
+    server can report them exactly as it would for raw uploads.
+    """
+    if not is_featurizable(window):
+        return window
+    fmap: Dict[str, Any] = compute_features(window)
+    for key in ENV_KEYS:
+        if key in window:
+            fmap[key] = window[key]
+    return fmap
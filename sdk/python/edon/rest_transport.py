@@ -6,6 +6,7 @@ from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
 from .transport import Transport
+from .features import to_feature_map
 from .exceptions import EdonHTTPError, EdonAuthError, EdonConnectionError
 
 
@@ -17,11 +18,15 @@ class RESTTransport(Transport):
         base_url: str,
         api_key: Optional[str] = None,
         timeout: float = 5.0,
-        max_retries: int = 2
+        max_retries: int = 2,
+        featurize: bool = False,
+        session_id: Optional[str] = None,
     ):
         self.base_url = base_url.rstrip("/")
         self.api_key = api_key
         self.timeout = timeout
+        self.featurize = featurize
+        self.session_id = session_id
         
         self.session = requests.Session()
         retry_strategy = Retry(
@@ -39,11 +44,15 @@ class RESTTransport(Transport):
         headers = {"Content-Type": "application/json"}
         if self.api_key:
             headers["Authorization"] = f"Bearer {self.api_key}"
+        if self.session_id:
+            headers["X-Session-ID"] = self.session_id
         return headers
     
     def compute_cav(self, window: Dict[str, Any]) -> Dict[str, Any]:
         """Compute CAV via REST API."""
         url = f"{self.base_url}/oem/cav/batch"
+        if self.featurize:
+            window = to_feature_map(window)
         try:
             response = self.session.post(
                 url,
@@ -10,6 +10,8 @@ from sklearn.preprocessing import StandardScaler, Normalizer
 from sklearn.decomposition import PCA
 from sklearn.random_projection import GaussianRandomProjection
 
+from src.projector import AffineProjector
+
 
 FEATURE_COLS = [
     "hr", "hrv_rmssd", "eda_mean", "eda_var", "resp_bpm", "accel_mag",
@@ -32,6 +34,9 @@ class CAVEmbedder:
         self.feature_order: Optional[List[str]] = None
         self.is_fitted = False
 
+        # scaler -> PCA -> rproj folded into one float32 affine map
+        self.projector: Optional[AffineProjector] = None
+
         os.makedirs(model_dir, exist_ok=True)
 
     # ------------------------
@@ -40,6 +45,9 @@ class CAVEmbedder:
     def _model_path(self):
         return os.path.join(self.model_dir, "cav_embedder.joblib")
 
+    def _projector_path(self):
+        return os.path.join(self.model_dir, "cav_embedder_projector.npy")
+
     def _legacy_paths(self):
         return (
             os.path.join(self.model_dir, "scaler.joblib"),
@@ -94,26 +102,29 @@ class CAVEmbedder:
         _ = self.post_normalizer.fit(X_embed)
 
         self.is_fitted = True
+        self.compile()
         self.save()
 
+    def compile(self) -> AffineProjector:
+        """
+        Fold scaler -> PCA -> rproj into one affine map (self.projector).
+
+        The L2 normalization between PCA and the random projection only
+        rescales each row before a linear map, so the final normalization
+        alone gives the same embedding.
+        """
+        self.projector = AffineProjector.compile(self.scaler, self.pca, self.rproj)
+        return self.projector
+
     def transform(self, features_df: pd.DataFrame) -> np.ndarray:
         """Transform features to n_components-D embeddings (default 128)."""
         if not self.is_fitted or self.pca is None:
             raise ValueError("Embedder must be fitted (load() or fit()) before transform")
 
+        if self.projector is None:
+            self.compile()
         X_df = self._select_and_order(features_df)
-        X_scaled = self.scaler.transform(X_df.values)
-
-        X_pca = self.pca.transform(X_scaled)
-        X_pca = self.post_normalizer.transform(X_pca)
-
-        if self.rproj is not None:
-            X_embed = self.rproj.transform(X_pca)
-        else:
-            X_embed = X_pca
-
-        X_embed = self.post_normalizer.transform(X_embed)
-        return X_embed
+        return self.projector.transform(X_df.values)
 
     def fit_transform(self, features_df: pd.DataFrame) -> np.ndarray:
         self.fit(features_df)
@@ -131,6 +142,9 @@ class CAVEmbedder:
             "is_fitted": self.is_fitted,
         }
         joblib.dump(obj, self._model_path())
+        if self.projector is not None:
+            # Standalone, memory-mappable projection (AffineProjector.load)
+            self.projector.save(self._projector_path())
 
     def load(self) -> None:
         """Load from single file, or fall back to legacy separate files if present."""
@@ -144,6 +158,7 @@ class CAVEmbedder:
             self.post_normalizer = obj["post_normalizer"]
             self.feature_order = obj["feature_order"]
             self.is_fitted = bool(obj.get("is_fitted", True))
+            self.projector = None  # recompiled from the loaded stages on first transform
             return
 
         # legacy fallback
@@ -158,6 +173,7 @@ class CAVEmbedder:
             else:
                 self.feature_order = FEATURE_COLS  # best effort
             self.is_fitted = True
+            self.projector = None
             # also write the unified file for next time
             self.save()
             return
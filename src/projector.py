@@ -0,0 +1,190 @@
+"""
+Compiled affine projection for CAV embeddings.
+
+PCAFusion (v2) and CAVEmbedder (v1 pipeline) both embed a feature row as
+
+    StandardScaler -> PCA -> (GaussianRandomProjection) -> L2 normalize
+
+(CAVEmbedder also L2-normalizes between PCA and the random projection, which
+does not change the final direction because the projection is linear). Every
+stage before the final normalization is affine, so the chain folds into
+
+    y = normalize((x - center) @ weight + bias)
+
+with one float32 (F, D) matrix. AffineProjector.compile() does the folding;
+transform() is then a single matmul for one row or a whole batch, without
+sklearn's per-call validation and intermediate arrays.
+
+Non-finite inputs are replaced by `center` (the scaler mean), i.e. they map to
+a standardized 0, as PCAFusion's nan_to_num after scaling did.
+
+A projector is stored as one .npy file holding the augmented float32 matrix
+
+    [[weight, center[:, None]],
+     [bias,   0             ]]      shape (F + 1, D + 1)
+
+so AffineProjector.load(path, mmap_mode="r") memory-maps it and processes
+(e.g. forked inference workers) share the pages.
+"""
+
+from typing import BinaryIO, Optional, Union
+
+import numpy as np
+
+_F32 = np.float32
+
+
+class AffineProjector:
+    """
+    y = normalize((x - center) @ weight + bias), in float32.
+
+    Args:
+        weight: (F, D) projection matrix
+        bias: (D,) output offset
+        center: (F,) input offset (also the substitute for non-finite inputs)
+        normalize: L2-normalize each output row (zero rows stay zero)
+    """
+
+    def __init__(
+        self,
+        weight: np.ndarray,
+        bias: np.ndarray,
+        center: np.ndarray,
+        normalize: bool = True,
+    ):
+        self.weight = weight
+        self.bias = bias
+        self.center = center
+        self.normalize = normalize
+
+    @property
+    def n_features(self) -> int:
+        return self.weight.shape[0]
+
+    @property
+    def n_components(self) -> int:
+        return self.weight.shape[1]
+
+    @classmethod
+    def compile(
+        cls,
+        scaler=None,
+        pca=None,
+        rproj=None,
+        n_features: Optional[int] = None,
+        n_components: Optional[int] = None,
+    ) -> "AffineProjector":
+        """
+        Fold fitted sklearn stages into one affine map.
+
+        Args:
+            scaler: Fitted StandardScaler (None: identity)
+            pca: Fitted PCA/IncrementalPCA (None: skipped)
+            rproj: Fitted GaussianRandomProjection (None: skipped)
+            n_features: Input width; needed only when no stage records it
+            n_components: Without pca and rproj, the scaled features are
+                zero-padded or truncated to this width (PCAFusion's fallback)
+
+        Raises:
+            sklearn.exceptions.NotFittedError: if a given stage is not fitted
+        """
+        from sklearn.utils.validation import check_is_fitted
+
+        for stage in (scaler, pca, rproj):
+            if stage is not None:
+                check_is_fitted(stage)
+        if n_features is None:
+            n_features = next(
+                (s.n_features_in_ for s in (scaler, pca, rproj) if hasattr(s, "n_features_in_")), None
+            )
+        if n_features is None:
+            raise ValueError("n_features is required when no stage records its input width")
+
+        # Standardization: s = (x - mean) / scale
+        center = np.zeros(n_features)
+        inv_scale = np.ones(n_features)
+        if scaler is not None:
+            if getattr(scaler, "with_mean", True) and scaler.mean_ is not None:
+                center = np.asarray(scaler.mean_, dtype=float)
+            if getattr(scaler, "with_std", True) and scaler.scale_ is not None:
+                inv_scale = 1.0 / np.asarray(scaler.scale_, dtype=float)
+        weight = np.diag(inv_scale)
+        bias = np.zeros(n_features)
+
+        # PCA: p = (s - mean) @ components.T  [/ sqrt(explained_variance)]
+        if pca is not None:
+            components = np.asarray(pca.components_, dtype=float).T
+            if getattr(pca, "whiten", False):
+                components = components / np.sqrt(pca.explained_variance_)
+            weight = weight @ components
+            bias = (bias - np.asarray(pca.mean_, dtype=float)) @ components
+
+        # Random projection: r = p @ components.T
+        if rproj is not None:
+            components = rproj.components_
+            components = components.toarray() if hasattr(components, "toarray") else np.asarray(components)
+            weight = weight @ components.T
+            bias = bias @ components.T
+        elif pca is None and n_components is not None:
+            # Pad or truncate the scaled features
+            width = weight.shape[1]
+            if width < n_components:
+                weight = np.hstack([weight, np.zeros((n_features, n_components - width))])
+                bias = np.concatenate([bias, np.zeros(n_components - width)])
+            else:
+                weight = weight[:, :n_components]
+                bias = bias[:n_components]
+
+        return cls(weight.astype(_F32), bias.astype(_F32), center.astype(_F32))
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        """
+        Project one row (F,) or a batch (N, F).
+
+        Returns:
+            float32 (D,) or (N, D), matching the input's rank
+        """
+        X = np.asarray(X, dtype=_F32)
+        single = X.ndim == 1
+        if single:
+            X = X[None, :]
+        if not np.isfinite(X).all():
+            X = np.where(np.isfinite(X), X, self.center)
+        Y = (X - self.center) @ self.weight
+        Y += self.bias
+        if self.normalize:
+            norm = np.linalg.norm(Y, axis=1, keepdims=True)
+            norm[norm == 0] = 1.0
+            Y /= norm
+        return Y[0] if single else Y
+
+    # ------------------------------------------------------------------
+    # Serialization
+    # ------------------------------------------------------------------
+
+    def to_array(self) -> np.ndarray:
+        """The augmented (F + 1, D + 1) float32 matrix stored on disk."""
+        F, D = self.weight.shape
+        packed = np.zeros((F + 1, D + 1), dtype=_F32)
+        packed[:F, :D] = self.weight
+        packed[:F, D] = self.center
+        packed[F, :D] = self.bias
+        return packed
+
+    @classmethod
+    def from_array(cls, packed: np.ndarray, normalize: bool = True) -> "AffineProjector":
+        """Inverse of to_array(); the parts are views (no copy) into `packed`."""
+        F, D = packed.shape[0] - 1, packed.shape[1] - 1
+        return cls(packed[:F, :D], packed[F, :D], packed[:F, D], normalize=normalize)
+
+    def save(self, file: Union[str, BinaryIO]) -> None:
+        """Write the projector as one .npy file (path or open binary file)."""
+        np.save(file, self.to_array())
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: Optional[str] = "r") -> "AffineProjector":
+        """Load a saved projector, memory-mapped read-only by default."""
+        packed = np.load(path, mmap_mode=mmap_mode)
+        if packed.dtype != _F32 or packed.ndim != 2:
+            raise ValueError(f"{path}: expected a 2-D float32 projector, got {packed.dtype} {packed.shape}")
+        return cls.from_array(packed)
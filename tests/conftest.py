@@ -0,0 +1,93 @@
+"""Shared fixtures for engine tests."""
+
+import json
+
+import numpy as np
+import pytest
+
+from app.engine import V32_FEATURE_NAMES, SIGNAL_KEYS, WINDOW_LEN
+
+
+@pytest.fixture(scope="session")
+def v32_model_dir(tmp_path_factory):
+    """Train a small v3.2-shaped LightGBM model + scaler and write the artifacts."""
+    lgb = pytest.importorskip("lightgbm")
+    joblib = pytest.importorskip("joblib")
+    from sklearn.preprocessing import StandardScaler
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(600, len(V32_FEATURE_NAMES)))
+    y = (X[:, 0] + 0.5 * X[:, 3] > 0).astype(int) + (X[:, 4] > 0.5).astype(int)
+
+    scaler = StandardScaler().fit(X)
+    model = lgb.LGBMClassifier(n_estimators=20, num_leaves=8, verbose=-1)
+    model.fit(scaler.transform(X), y)
+
+    model_dir = tmp_path_factory.mktemp("cav_engine_v3_2")
+    joblib.dump(model, model_dir / "cav_state_v3_2.joblib")
+    joblib.dump(scaler, model_dir / "cav_state_scaler_v3_2.joblib")
+    with open(model_dir / "cav_state_schema_v3_2.json", "w", encoding="utf-8") as f:
+        json.dump({"feature_names": list(V32_FEATURE_NAMES)}, f)
+    return model_dir
+
+
+@pytest.fixture
+def v32_engine(v32_model_dir, monkeypatch):
+    """Fresh CAVEngine loaded from the test artifacts."""
+    from app.engine import CAVEngine
+
+    monkeypatch.setenv("EDON_MODEL_DIR", str(v32_model_dir))
+    return CAVEngine()
+
+
+def make_window(rng, stress: float = 0.0) -> dict:
+    """Synthetic raw window with the six engine signals."""
+    return {
+        "EDA": rng.normal(0.2 + stress, 0.2, WINDOW_LEN),
+        "TEMP": rng.normal(32, 0.2, WINDOW_LEN),
+        "BVP": rng.normal(0, 0.5 + stress, WINDOW_LEN),
+        "ACC_x": rng.normal(0, 0.05, WINDOW_LEN),
+        "ACC_y": rng.normal(0, 0.05, WINDOW_LEN),
+        "ACC_z": rng.normal(1, 0.05, WINDOW_LEN),
+    }
+
+
+def stack_windows(windows) -> np.ndarray:
+    """Stack window dicts into an (N, 6, WINDOW_LEN) array."""
+    return np.stack([[w[k] for k in SIGNAL_KEYS] for w in windows])
+
+
+def make_v2_windows(seed: int, n: int):
+    """Random multimodal windows with every modality (and profile) sometimes missing."""
+    from app.v2.schemas_v2 import V2CavWindow
+
+    rng = np.random.default_rng(seed)
+    out = []
+    for _ in range(n):
+        w = {}
+        if rng.random() < 0.8:
+            w["physio"] = {
+                k: rng.normal(rng.uniform(0, 2), rng.uniform(0.05, 1), 240).tolist()
+                for k in ("EDA", "TEMP", "BVP") if rng.random() < 0.8
+            }
+        if rng.random() < 0.6:
+            w["motion"] = {k: rng.normal(0, rng.uniform(0.1, 3), 240).tolist() for k in ("ACC_x", "ACC_y", "ACC_z")}
+            if rng.random() < 0.5:
+                w["motion"]["torque"] = rng.normal(50, 30, 20).tolist()
+        if rng.random() < 0.7:
+            w["env"] = {
+                "temp_c": float(rng.uniform(5, 40)), "humidity": float(rng.uniform(10, 90)),
+                "aqi": int(rng.integers(0, 200)), "local_hour": int(rng.integers(0, 24)),
+            }
+        if rng.random() < 0.3:
+            w["task"] = {"complexity": float(rng.random()), "deadline_proximity": float(rng.random())}
+        if rng.random() < 0.3:
+            w["system"] = {"cpu_usage": float(rng.random()), "error_rate": float(rng.random() * 0.3)}
+        if rng.random() < 0.3:
+            w["audio"] = {"keywords": [str(rng.choice(["help", "ok"]))], "emotion": str(rng.choice(["calm", "stressed"]))}
+        if rng.random() < 0.2:
+            w["vision"] = {"embedding": rng.normal(0, 1, 64).tolist()}
+        if rng.random() < 0.3:
+            w["device_profile"] = str(rng.choice(["humanoid_full", "wearable_limited", "drone_nav"]))
+        out.append(V2CavWindow(**w))
+    return out
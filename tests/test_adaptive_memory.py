@@ -0,0 +1,104 @@
+"""Tests for the windowed statistics of AdaptiveMemoryEngine (app.adaptive_memory)."""
+
+import math
+import random
+import statistics
+from datetime import datetime
+
+import pytest
+
+from app import adaptive_memory
+from app.adaptive_memory import AdaptiveMemoryEngine
+
+PARTS = {"bio": 0.4, "env": 0.6, "circadian": 0.5, "p_stress": 0.3}
+
+
+class _Clock:
+    """Stands in for adaptive_memory.datetime; `t` is the current timestamp."""
+
+    t = 1_700_000_000.0
+
+    @classmethod
+    def now(cls):
+        return datetime.fromtimestamp(cls.t)
+
+
+@pytest.fixture
+def memory(tmp_path, monkeypatch):
+    monkeypatch.setattr(_Clock, "t", 1_700_000_000.0)
+    monkeypatch.setattr(adaptive_memory, "datetime", _Clock)
+    engine = AdaptiveMemoryEngine(db_path=str(tmp_path / "memory.db"), buffer_size=50)
+    yield engine
+    engine.close()
+
+
+def _feed(memory, n, step_s=60.0, seed=0):
+    rng = random.Random(seed)
+    records = []
+    for _ in range(n):
+        _Clock.t += step_s
+        record = dict(
+            t=_Clock.t, cav=rng.randint(0, 10000), state=rng.choice(adaptive_memory.STATES),
+            aqi=rng.choice([20, 150]), hour=rng.randrange(24),
+        )
+        memory.record(record["cav"], record["cav"], record["state"], PARTS, 22.0, 45.0, record["aqi"], record["hour"])
+        records.append(record)
+    return records
+
+
+def test_window_statistics_match_a_full_rescan(memory):
+    records = _feed(memory, 2000)  # ~33 h: the first ~9 h have expired
+    summary = memory.get_summary()
+    window = [r for r in records if r["t"] >= _Clock.t - 24 * 3600]
+
+    # Bucketed expiry is exact to within one 60 s bucket
+    assert abs(summary["total_records"] - len(window)) <= 1
+    window = records[-summary["total_records"]:]
+    cavs = [r["cav"] for r in window]
+    assert summary["overall_stats"]["cav_mean"] == pytest.approx(round(statistics.mean(cavs), 1), abs=0.1)
+    assert summary["overall_stats"]["cav_std"] == pytest.approx(round(statistics.stdev(cavs), 1), abs=0.1)
+    for state, p in summary["overall_stats"]["state_distribution"].items():
+        assert p == round(sum(r["state"] == state for r in window) / len(window), 3)
+
+    for hour in range(24):
+        values = [r["cav"] for r in window if r["hour"] == hour]
+        acc = memory._hour_totals[hour]
+        assert acc.n == len(values)
+        if len(values) > 1:
+            assert acc.mean == pytest.approx(statistics.mean(values))
+            assert acc.variance() == pytest.approx(statistics.variance(values))
+
+    # Statistics cover the whole window, not just the (small) raw buffer
+    assert len(memory.buffer) == 50 < summary["total_records"]
+
+
+def test_aqi_ratio_uses_the_last_six_hours(memory):
+    for aqi in [150] * 40 + [20] * 10:
+        _Clock.t += 60
+        memory.record(5000, 5000, "balanced", PARTS, 22.0, 45.0, aqi, 10)
+    assert memory.compute_adaptive(5000, "balanced", 20, 10)["env_weight_adj"] == 0.8
+
+    _Clock.t += 7 * 3600  # all recent readings expired: falls back to the current AQI
+    assert memory.compute_adaptive(5000, "balanced", 20, 10)["env_weight_adj"] == 1.0
+    assert memory.compute_adaptive(5000, "balanced", 150, 10)["env_weight_adj"] == 0.9
+
+
+def test_hourly_baseline_and_expiry(memory):
+    for cav in [3000, 3100, 2900] * 10:
+        _Clock.t += 10
+        memory.record(cav, cav, "focus", PARTS, 22.0, 45.0, 20, 8)
+    # Three refreshes (every 10 records), each an EWMA step from the 5000 default
+    cavs, mu, var = [3000, 3100, 2900] * 10, 5000.0, 2.5e6
+    for n in (10, 20, 30):
+        mu = 0.3 * statistics.mean(cavs[:n]) + 0.7 * mu
+        var = max(0.3 * statistics.variance(cavs[:n]) + 0.7 * var, 1e5)
+    stats = memory.hourly_stats[8]
+    assert stats["mu"] == pytest.approx(mu) and stats["var"] == pytest.approx(var)
+    assert stats["state_probs"]["focus"] == 1.0
+    assert memory.compute_adaptive(round(stats["mu"]), "focus", 20, 8)["z_cav"] == 0.0
+    assert memory.compute_adaptive(round(stats["mu"] + 3 * math.sqrt(stats["var"])), "focus", 20, 8)["z_cav"] == 3.0
+
+    _Clock.t += 25 * 3600
+    assert memory.get_summary()["total_records"] == 0
+    memory._update_hourly_stats()
+    assert memory.hourly_stats[8] == stats  # no data: previous baseline kept
@@ -0,0 +1,62 @@
+"""Tests for the bounded inference executor and 429 load shedding."""
+
+import asyncio
+import threading
+
+import pytest
+
+from app.admission import BoundedExecutor, Overloaded
+
+
+def _blocked(executor, n):
+    gate = threading.Event()
+    futures = [executor.submit(gate.wait, 5) for _ in range(n)]
+    return gate, futures
+
+
+def test_rejects_when_queue_full():
+    executor = BoundedExecutor(workers=2, max_queue=1)
+    gate, futures = _blocked(executor, 3)
+    with pytest.raises(Overloaded) as exc:
+        executor.submit(lambda: None)
+    assert exc.value.retry_after_s >= 1
+
+    stats = executor.stats()
+    assert stats["queue_depth"] + stats["in_flight"] == 3
+    assert stats["rejected"] == 1
+
+    gate.set()
+    assert all(f.result(timeout=5) for f in futures)
+    assert executor.submit(lambda: 42).result(timeout=5) == 42
+    assert executor.stats()["queue_depth"] == 0
+    executor.shutdown()
+
+
+def test_run_awaits_off_the_event_loop():
+    executor = BoundedExecutor(workers=1, max_queue=0)
+
+    async def main():
+        return await executor.run(threading.current_thread), threading.current_thread()
+
+    worker, loop_thread = asyncio.run(main())
+    assert worker is not loop_thread
+    assert executor.stats()["completed"] == 1
+    executor.shutdown()
+
+
+def test_batch_route_returns_429_with_retry_after(v32_model_dir, monkeypatch):
+    monkeypatch.setenv("EDON_MODEL_DIR", str(v32_model_dir))
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.routes import batch
+
+    executor = BoundedExecutor(workers=1, max_queue=0)
+    gate, _ = _blocked(executor, 1)
+    monkeypatch.setattr(batch, "INFERENCE", executor)
+    try:
+        resp = TestClient(app).post("/oem/cav/batch", json={"windows": [{"eda_mean": 1.0}]})
+    finally:
+        gate.set()
+        executor.shutdown()
+    assert resp.status_code == 429
+    assert int(resp.headers["Retry-After"]) >= 1
@@ -0,0 +1,99 @@
+"""Tests for binary batch frames (app.binary_codec) and their use by the batch routes."""
+
+import numpy as np
+import pytest
+
+from app.binary_codec import (
+    MEDIA_TYPE, FrameError, decode_frame, encode_frame, is_frame, wants_frame,
+)
+from app.engine import SIGNAL_KEYS
+from tests.conftest import make_window, stack_windows
+
+
+def test_round_trip_is_float32_and_zero_copy():
+    raw = np.arange(2 * 6 * 5, dtype=float).reshape(2, 6, 5)
+    body = encode_frame({"session_id": "s1"}, {"windows": raw, "aqi": np.array([40.0, np.nan])})
+
+    meta, arrays = decode_frame(body)
+    assert meta == {"session_id": "s1"}
+    assert arrays["windows"].dtype == np.float32
+    np.testing.assert_array_equal(arrays["windows"], raw)
+    assert np.isnan(arrays["aqi"][1])
+    # Views into the request body, not copies
+    assert not arrays["windows"].flags.writeable
+    assert arrays["windows"].flags.aligned
+
+
+@pytest.mark.parametrize("mutate", [
+    lambda b: b"XXXX" + b[4:],          # bad magic
+    lambda b: b[:-3],                   # truncated data
+    lambda b: b + b"\0\0\0\0",          # trailing bytes
+    lambda b: b[:6],                    # truncated header
+])
+def test_malformed_frames_raise(mutate):
+    body = encode_frame({}, {"features": np.ones((3, 6))})
+    with pytest.raises(FrameError):
+        decode_frame(mutate(body))
+
+
+def test_media_type_negotiation():
+    assert is_frame(f"{MEDIA_TYPE}; charset=binary")
+    assert not is_frame("application/json")
+    assert wants_frame(f"application/json;q=0.5, {MEDIA_TYPE}")
+    assert not wants_frame(f"{MEDIA_TYPE};q=0")
+    assert not wants_frame(None)
+
+
+def test_v1_frame_request_matches_json(v32_model_dir, monkeypatch):
+    monkeypatch.setenv("EDON_MODEL_DIR", str(v32_model_dir))
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    rng = np.random.default_rng(3)
+    raw = stack_windows([make_window(rng, stress=s) for s in (0.0, 1.0, 0.3)]).astype(np.float32)
+    env = {"temp_c": 22.0, "humidity": 45.0, "aqi": 30, "local_hour": 14}
+    client = TestClient(app)
+
+    windows = [dict({k: w[i].tolist() for i, k in enumerate(SIGNAL_KEYS)}, **env) for w in raw]
+    expected = client.post("/oem/cav/batch", json={"session_id": "codec-json", "windows": windows})
+    assert expected.status_code == 200
+    expected = expected.json()["results"]
+
+    resp = client.post(
+        "/oem/cav/batch",
+        content=encode_frame({"session_id": "codec-frame", "env": env}, {"windows": raw}),
+        headers={"Content-Type": MEDIA_TYPE, "Accept": MEDIA_TYPE},
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == MEDIA_TYPE
+    meta, arrays = decode_frame(resp.content)
+
+    assert [r["state"] for r in meta["results"]] == [r["state"] for r in expected]
+    np.testing.assert_array_equal(arrays["cav_raw"], [r["cav_raw"] for r in expected])
+    np.testing.assert_array_equal(arrays["cav_smooth"], [r["cav_smooth"] for r in expected])
+    parts = [[r["parts"][k] for k in meta["parts"]] for r in expected]
+    np.testing.assert_allclose(arrays["parts"], parts, rtol=1e-6)
+
+
+def test_v1_frame_request_shape_errors(v32_model_dir, monkeypatch):
+    monkeypatch.setenv("EDON_MODEL_DIR", str(v32_model_dir))
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    resp = TestClient(app).post(
+        "/oem/cav/batch",
+        content=encode_frame({}, {"windows": np.zeros((2, 6, 10))}),
+        headers={"Content-Type": MEDIA_TYPE},
+    )
+    assert resp.status_code == 422
+    assert "windows" in resp.json()["detail"]
+
+
+def test_v2_frame_arrays_fill_windows():
+    from app.routes.v2_batch import _frame_to_payload
+
+    eda = np.ones((2, 240), dtype=np.float32)
+    eda[1] = np.nan
+    payload = _frame_to_payload({"windows": [{"task": {"id": "a"}}, {}]}, {"physio.EDA": eda})
+    assert payload["windows"][0] == {"task": {"id": "a"}, "physio": {"EDA": [1.0] * 240}}
+    assert payload["windows"][1] == {}
@@ -0,0 +1,106 @@
+"""Tests for the compiled NumPy tree evaluator."""
+
+import shutil
+
+import numpy as np
+import pytest
+
+from app.compiled_trees import (
+    COMPILED_MODEL_NAME,
+    CompiledTreeModel,
+    compile_model,
+    max_abs_error,
+)
+from tests.conftest import make_window, stack_windows
+
+lgb = pytest.importorskip("lightgbm")
+from sklearn.preprocessing import StandardScaler  # noqa: E402
+
+
+def _data(seed=0, n=1500):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(2.0, 3.0, size=(n, 6))
+    X[rng.random(X.shape) < 0.05] = 0.0  # exact zeros exercise LightGBM's zero bin
+    y = (X[:, 0] + 0.5 * X[:, 3] > 2).astype(int) + (X[:, 4] > 3).astype(int)
+    return X, y, StandardScaler().fit(X)
+
+
+def _probe(X, scaler):
+    P = np.vstack([X[:200], X[:200] + 0.37])
+    P[0] = scaler.mean_  # scaled zero
+    P[1, 2] = np.nan  # engine maps to scaled 0 via nan_to_num
+    return P
+
+
+@pytest.mark.parametrize(
+    "params, binary",
+    [
+        ({"num_leaves": 31}, False),
+        ({"num_leaves": 31}, True),
+        ({"num_leaves": 100}, False),  # > 64 leaves: level-wise traversal path
+        ({"zero_as_missing": True}, False),
+    ],
+)
+def test_lightgbm_matches_predict_proba(params, binary):
+    X, y, scaler = _data()
+    if binary:
+        y = (y > 0).astype(int)
+    model = lgb.LGBMClassifier(n_estimators=40, verbose=-1, **params)
+    model.fit(scaler.transform(X), y)
+
+    compiled = compile_model(model, scaler)
+
+    assert list(compiled.classes_) == list(model.classes_)
+    assert max_abs_error(compiled, model, scaler, _probe(X, scaler)) < 1e-12
+
+
+def test_xgboost_matches_predict_proba():
+    xgb = pytest.importorskip("xgboost")
+    X, y, scaler = _data(1)
+    model = xgb.XGBClassifier(n_estimators=40, max_depth=4)
+    model.fit(scaler.transform(X), y)
+
+    compiled = compile_model(model, scaler)
+
+    # XGBoost accumulates leaf values in float32
+    assert max_abs_error(compiled, model, scaler, _probe(X, scaler)) < 1e-5
+
+
+def test_save_load_roundtrip(tmp_path):
+    X, y, scaler = _data(2)
+    model = lgb.LGBMClassifier(n_estimators=10, verbose=-1).fit(scaler.transform(X), y)
+    compiled = compile_model(model, scaler)
+
+    loaded = CompiledTreeModel.load(compiled.save(tmp_path / COMPILED_MODEL_NAME))
+
+    assert np.array_equal(loaded.predict_proba(X[:50]), compiled.predict_proba(X[:50]))
+
+
+def test_engine_uses_compiled_artifact(v32_model_dir, tmp_path, monkeypatch):
+    """CAVEngine loads the compiled artifact (no scaler) and scores identically."""
+    from joblib import load
+
+    from app.engine import CAVEngine
+
+    model_dir = tmp_path / "models"
+    shutil.copytree(v32_model_dir, model_dir)
+    monkeypatch.setenv("EDON_MODEL_DIR", str(model_dir))
+    reference = CAVEngine()
+
+    compile_model(
+        load(model_dir / "cav_state_v3_2.joblib"),
+        load(model_dir / "cav_state_scaler_v3_2.joblib"),
+    ).save(model_dir / COMPILED_MODEL_NAME)
+    engine = CAVEngine()
+
+    assert isinstance(engine.model, CompiledTreeModel) and engine.scaler is None
+    rng = np.random.default_rng(6)
+    windows = stack_windows([make_window(rng, stress=i * 0.2) for i in range(10)])
+    expected = reference.cav_from_windows_batch(windows, temp_c=22.0, humidity=40.0, aqi=20)
+    got = engine.cav_from_windows_batch(windows, temp_c=22.0, humidity=40.0, aqi=20)
+    for (raw_e, smooth_e, state_e, parts_e), (raw_g, smooth_g, state_g, parts_g) in zip(expected, got):
+        assert (raw_g, smooth_g, state_g) == (raw_e, smooth_e, state_e)
+        assert parts_g == pytest.approx(parts_e, abs=1e-12)
+
+    monkeypatch.setenv("EDON_COMPILED_MODEL", "0")
+    assert not isinstance(CAVEngine().model, CompiledTreeModel)
@@ -0,0 +1,111 @@
+"""Tests for vectorized CAVEngine inference paths."""
+
+import numpy as np
+import pytest
+
+from app.engine import (
+    CAVEngine,
+    V32_FEATURE_NAMES,
+    compute_window_features,
+    compute_window_features_batch,
+)
+from tests.conftest import make_window, stack_windows
+
+
+def test_batch_features_match_scalar():
+    """Vectorized featurization matches compute_window_features row for row."""
+    rng = np.random.default_rng(1)
+    windows = [make_window(rng, stress=i * 0.1) for i in range(8)]
+    windows[3]["EDA"][10:20] = np.nan  # exercises the non-finite fallback
+    windows[5]["ACC_y"][0] = np.inf
+
+    batch = compute_window_features_batch(stack_windows(windows))
+
+    assert batch.shape == (8, len(V32_FEATURE_NAMES))
+    for i, w in enumerate(windows):
+        expected = compute_window_features(w).iloc[0]
+        assert np.allclose(batch[i], [expected[k] for k in V32_FEATURE_NAMES])
+
+
+def test_windows_batch_matches_sequential(v32_model_dir, monkeypatch):
+    """Batch scoring gives the same results and EMA trajectory as per-window calls."""
+    monkeypatch.setenv("EDON_MODEL_DIR", str(v32_model_dir))
+    rng = np.random.default_rng(2)
+    windows = [make_window(rng, stress=(i % 4) * 0.3) for i in range(12)]
+    windows[4]["EDA"][:] = np.nan  # >20% missing: invalid, must not touch EMA
+    windows[4]["BVP"][:] = np.nan
+    temps = [18.0 + i for i in range(12)]
+
+    sequential = CAVEngine()
+    expected = [
+        sequential.cav_from_window(w, temp_c=t, humidity=45.0, aqi=30, local_hour=10)
+        for w, t in zip(windows, temps)
+    ]
+
+    batched = CAVEngine()
+    got = batched.cav_from_windows_batch(
+        stack_windows(windows), temp_c=temps, humidity=45.0, aqi=30, local_hour=10
+    )
+
+    assert len(got) == len(expected)
+    for (raw_e, smooth_e, state_e, parts_e), (raw_g, smooth_g, state_g, parts_g) in zip(expected, got):
+        assert (raw_g, smooth_g, state_g) == (raw_e, smooth_e, state_e)
+        assert parts_g == pytest.approx(parts_e)
+    assert got[4] == (0, 0, "overload", {"bio": 0.0, "env": 0.0, "circadian": 0.0, "p_stress": 0.0})
+    assert batched.cav_smooth == pytest.approx(sequential.cav_smooth)
+
+
+def test_windows_batch_rejects_bad_shape(v32_engine):
+    """Batch input must be (N, 6, 240)."""
+    with pytest.raises(ValueError):
+        v32_engine.cav_from_windows_batch(np.zeros((2, 6, 100)))
+
+
+def test_features_batch_matches_windows_batch(v32_model_dir, monkeypatch):
+    """Precomputed feature vectors score exactly like the raw-window path."""
+    monkeypatch.setenv("EDON_MODEL_DIR", str(v32_model_dir))
+    rng = np.random.default_rng(3)
+    windows = [make_window(rng, stress=(i % 3) * 0.4) for i in range(9)]
+    stacked = stack_windows(windows)
+
+    from_windows = CAVEngine().cav_from_windows_batch(stacked, temp_c=21.0, local_hour=9)
+
+    engine = CAVEngine()
+    features = compute_window_features_batch(stacked)
+    assert engine.cav_from_features_batch(features, temp_c=21.0, local_hour=9) == from_windows
+
+    single = CAVEngine()
+    named = [dict(zip(V32_FEATURE_NAMES, row)) for row in features]
+    assert [single.cav_from_features(f, temp_c=21.0, local_hour=9) for f in named] == from_windows
+    assert single.cav_smooth == pytest.approx(engine.cav_smooth)
+
+
+def test_features_batch_rejects_bad_width(v32_engine):
+    """Feature rows must match the schema width."""
+    with pytest.raises(ValueError):
+        v32_engine.cav_from_features_batch(np.zeros((2, 4)))
+
+
+def test_sdk_features_match_engine():
+    """SDK featurization (pure Python) agrees with the engine featurizer."""
+    import sys
+    from pathlib import Path
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "sdk" / "python"))
+    from edon.features import FEATURE_NAMES, to_feature_map
+
+    assert tuple(FEATURE_NAMES) == tuple(V32_FEATURE_NAMES)
+    rng = np.random.default_rng(4)
+    window = make_window(rng, stress=0.5)
+    window["EDA"][5] = np.nan
+    payload = {k: v.tolist() for k, v in window.items()}
+    payload["temp_c"] = 23.0
+
+    fmap = to_feature_map(payload)
+    expected = compute_window_features(window).iloc[0]
+    assert [fmap[k] for k in FEATURE_NAMES] == pytest.approx([expected[k] for k in FEATURE_NAMES])
+    assert fmap["temp_c"] == 23.0
+
+    payload["BVP"] = [float("nan")] * len(payload["BVP"])
+    payload["EDA"] = [float("nan")] * len(payload["EDA"])
+    assert to_feature_map(payload) is payload  # too much missing data: sent raw
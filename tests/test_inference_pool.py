@@ -0,0 +1,60 @@
+"""Tests for the process-pool inference workers."""
+
+import numpy as np
+import pytest
+
+from app.engine import EngineSession, SIGNAL_KEYS, WINDOW_LEN
+from app.inference_pool import InferencePool
+
+
+@pytest.fixture
+def pool(v32_engine):
+    pool = InferencePool(workers=2, min_chunk=4)
+    if not pool.start(engine=v32_engine):
+        pytest.skip("fork start method not available")
+    yield pool
+    pool.close()
+
+
+def _inputs(v32_engine, n=23, seed=0):
+    rng = np.random.default_rng(seed)
+    features = rng.normal(size=(n, len(v32_engine.feature_names)))
+    valid = np.ones(n, dtype=bool)
+    valid[5] = False
+    raw_index = [1, 2, 9, 17, 22]
+    raw = rng.normal(size=(len(raw_index), len(SIGNAL_KEYS), WINDOW_LEN))
+    raw[-1, :, :60] = np.nan  # 25% missing → invalid
+    return features, valid, raw_index, raw
+
+
+def test_pool_matches_in_process(v32_engine, pool):
+    features, valid, raw_index, raw = _inputs(v32_engine)
+
+    got_f, got_v, got_p = pool.featurize_predict(features, valid, raw_index, raw)
+
+    exp_f, exp_v = features.copy(), valid.copy()
+    exp_f[raw_index], exp_v[raw_index] = v32_engine.featurize_windows(raw)
+    np.testing.assert_allclose(got_f, exp_f)
+    np.testing.assert_array_equal(got_v, exp_v)
+    assert not got_v[22]
+    np.testing.assert_allclose(got_p, v32_engine.predict_p_stress(exp_f, exp_v), atol=1e-12)
+
+
+def test_pool_results_fuse_like_features_batch(v32_engine, pool):
+    features, valid, raw_index, raw = _inputs(v32_engine, seed=1)
+    got_f, got_v, got_p = pool.featurize_predict(features, valid, raw_index, raw)
+
+    pooled = v32_engine.cav_from_p_stress_batch(got_p, 22.0, 40.0, 20, 14, valid=got_v, session=EngineSession())
+    direct = v32_engine.cav_from_features_batch(got_f, 22.0, 40.0, 20, 14, valid=got_v, session=EngineSession())
+    assert pooled == direct
+
+
+def test_disabled_pool_runs_in_process(v32_engine, monkeypatch):
+    from app import inference_pool
+
+    monkeypatch.setitem(inference_pool._SHARED, "engine", v32_engine)
+    pool = InferencePool(workers=0)
+    assert not pool.start(engine=v32_engine) and not pool.running
+    features, valid, raw_index, raw = _inputs(v32_engine, n=6)
+    _, _, p = pool.featurize_predict(features, valid, raw_index[:2], raw[:2])
+    assert p.shape == (6,)
@@ -0,0 +1,75 @@
+"""Tests for the latency histograms."""
+
+import threading
+
+import numpy as np
+import pytest
+
+from app.latency import (
+    LOWER_BOUNDS, N_BUCKETS, UPPER_BOUNDS, Histogram, HistogramFamily, bucket_index,
+)
+
+
+@pytest.mark.parametrize("seconds", [3e-7, 2 ** -20, 1e-6, 1.23e-3, 0.5, 1.0, 63.9])
+def test_bucket_contains_value(seconds):
+    idx = bucket_index(seconds)
+    assert idx < N_BUCKETS
+    assert seconds < UPPER_BOUNDS[idx]
+    assert idx == 0 or seconds >= LOWER_BOUNDS[idx]
+
+    hist = Histogram()
+    hist.observe(seconds)
+    assert hist.counts[idx] == 1
+
+
+def test_overflow_and_non_positive():
+    assert bucket_index(1000.0) == N_BUCKETS
+    assert bucket_index(0.0) == 0
+    assert bucket_index(-1.0) == 0
+
+
+def test_quantiles_within_bucket_width():
+    rng = np.random.default_rng(0)
+    xs = rng.lognormal(mean=-6, sigma=1, size=20000)
+    hist = Histogram()
+    for x in xs:
+        hist.observe(float(x))
+    for q in (0.5, 0.95, 0.99):
+        assert hist.quantile(q) == pytest.approx(np.quantile(xs, q), rel=0.25)
+
+
+def test_concurrent_observations_are_not_lost():
+    hist = Histogram()
+
+    def work():
+        for _ in range(5000):
+            hist.observe(1e-3)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert hist.count == 40000
+    assert sum(hist.counts) == 40000
+
+
+def test_family_summary_and_prometheus():
+    family = HistogramFamily("edon_test_seconds", "test", "stage")
+    with family.time("predict"):
+        pass
+    family.observe("predict", 0.002)
+    family.observe("decode", 0.0001)
+
+    summary = family.summary()
+    assert set(summary) == {"decode", "predict"}
+    assert summary["predict"]["count"] == 2
+    assert {"p50_ms", "p95_ms", "p99_ms", "mean_ms"} <= set(summary["predict"])
+
+    text = family.prometheus()
+    assert "# TYPE edon_test_seconds histogram" in text
+    assert 'edon_test_seconds_bucket{stage="predict",le="+Inf"} 2' in text
+    assert 'edon_test_seconds_count{stage="decode"} 1' in text
+    buckets = [int(line.rsplit(" ", 1)[1]) for line in text.splitlines()
+               if line.startswith('edon_test_seconds_bucket{stage="predict"')]
+    assert buckets == sorted(buckets)  # cumulative
@@ -0,0 +1,81 @@
+"""Tests for per-tenant adaptive memory (app.memory_manager, /memory routes)."""
+
+import sqlite3
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.memory_manager import MemoryManager
+
+PARTS = {"bio": 0.4, "env": 0.6, "circadian": 0.5, "p_stress": 0.3}
+
+
+def _record(memory, tenant, n, cav, state="focus"):
+    engine = memory.get(tenant)
+    for _ in range(n):
+        engine.record(cav, cav, state, PARTS, 22.0, 45.0, 20, 9)
+
+
+@pytest.fixture
+def manager(tmp_path):
+    memory = MemoryManager(root=str(tmp_path / "memory"), shards=4, max_tenants=2)
+    yield memory
+    memory.close()
+
+
+def test_tenants_have_separate_baselines_and_shards(manager, tmp_path):
+    _record(manager, "robot-1", 20, 2000, "focus")
+    _record(manager, "robot-2", 10, 8000, "overload")
+    one, two = manager.get("robot-1").get_summary(), manager.get("robot-2").get_summary()
+    assert one["total_records"] == 20 and one["overall_stats"]["cav_mean"] == 2000.0
+    assert two["total_records"] == 10 and two["overall_stats"]["state_distribution"]["overload"] == 1.0
+
+    manager.close()
+    for tenant, n in (("robot-1", 20), ("robot-2", 10)):
+        path = tmp_path / "memory" / f"shard-{manager.shard_of(tenant):02d}.db"
+        conn = sqlite3.connect(str(path))
+        assert conn.execute("SELECT COUNT(*) FROM cav_memory WHERE tenant = ?", (tenant,)).fetchone()[0] == n
+        conn.close()
+
+
+def test_lru_evicts_and_reloads_from_disk(manager):
+    _record(manager, "a", 15, 3000)
+    _record(manager, "b", 5, 4000)
+    a = manager.get("a")
+    _record(manager, "c", 5, 5000)  # evicts b, the least recently used
+    assert manager.stats()["resident"] == 2 and manager.stats()["evictions"] == 1
+    assert manager.get("a") is a
+
+    reloaded = manager.get("b")  # evicts c; b's rows may still have been queued
+    assert reloaded.get_summary()["total_records"] == 5
+    assert reloaded.buffer[-1]["cav"] == 4000
+    assert manager.stats()["loads"] == 4
+
+
+def test_clear_removes_only_one_tenant(tmp_path):
+    manager = MemoryManager(root=str(tmp_path / "memory"), shards=1)
+    _record(manager, "x", 5, 1000)
+    _record(manager, "y", 5, 2000)
+    manager.clear("x")
+    manager.close()
+
+    fresh = MemoryManager(root=str(tmp_path / "memory"), shards=1)
+    assert fresh.get("x").get_summary()["total_records"] == 0
+    assert fresh.get("y").get_summary()["total_records"] == 5
+    fresh.close()
+
+
+def test_summary_route_takes_a_tenant(manager, monkeypatch):
+    from app.routes import memory
+
+    monkeypatch.setattr(memory, "MEMORY", manager)
+    _record(manager, "robot-9", 3, 6000)
+    app = FastAPI()
+    app.include_router(memory.router)
+    client = TestClient(app)
+
+    body = client.get("/memory/summary", params={"tenant": "robot-9"}).json()
+    assert body["total_records"] == 3 and body["overall_stats"]["cav_mean"] == 6000.0
+    assert client.post("/memory/clear", params={"tenant": "robot-9"}).json()["status"] == "success"
+    assert client.get("/memory/summary", params={"tenant": "robot-9"}).json()["total_records"] == 0
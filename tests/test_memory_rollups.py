@@ -0,0 +1,134 @@
+"""Tests for the long-horizon rollup tables (app.memory_rollups)."""
+
+import random
+import sqlite3
+import statistics
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import memory_rollups
+from app.memory_rollups import DAY, HOUR, MINUTE
+from app.memory_store import MemoryStore
+
+STATES = ("overload", "balanced", "focus", "restorative")
+
+
+def _rows(start, n, step_s, tenant="", seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for k in range(n):
+        ts = start + k * step_s
+        cav = rng.randint(0, 10000)
+        rows.append((
+            ts, cav, cav, rng.choice(STATES), 0.5, 0.5, 0.5, 0.2,
+            rng.uniform(15, 30), rng.uniform(20, 80), rng.randint(0, 200), int(ts // HOUR) % 24, tenant,
+        ))
+    return rows
+
+
+def test_tiles_cover_the_range_with_coarse_buckets_inside():
+    start, end = DAY + 30 * MINUTE + 15, 4 * DAY + 2 * HOUR + 5 * MINUTE + 59
+    tiles = memory_rollups.tiles(start, end)
+    assert tiles[0][1] == DAY + 30 * MINUTE and tiles[-1][2] == 4 * DAY + 2 * HOUR + 6 * MINUTE
+    assert all(a[2] == b[1] for a, b in zip(tiles, tiles[1:]))  # contiguous
+    assert [t[0] for t in tiles] == [MINUTE, HOUR, DAY, HOUR, MINUTE]
+    assert all(lo % res == 0 and hi % res == 0 for res, lo, hi in tiles)
+    assert memory_rollups.tiles(100, 100) == []
+
+
+def test_rollup_queries_match_the_raw_rows(tmp_path):
+    store = MemoryStore(str(tmp_path / "memory.db"))
+    base = (time.time() // DAY - 3) * DAY
+    rows = _rows(base, 3 * 24 * 60, 60.0, tenant="r1") + _rows(base, 100, 60.0, tenant="r2", seed=1)
+    for row in rows:
+        store.enqueue(row)
+    store.flush(timeout=30)
+
+    start, end = base + 5 * HOUR + 17 * MINUTE, base + 2 * DAY + 3 * HOUR + 44 * MINUTE
+    window = [r for r in rows if r[-1] == "r1" and start <= r[0] < end]
+    stats = store.rollup_summary(start, end, tenant="r1")
+    assert stats["n"] == len(window)
+    assert stats["cav_mean"] == pytest.approx(statistics.mean(r[2] for r in window))
+    assert stats["cav_var"] == pytest.approx(statistics.variance(r[2] for r in window))
+    assert stats["aqi"] == pytest.approx(statistics.mean(r[10] for r in window))
+    assert stats["state_probs"]["focus"] == pytest.approx(sum(r[3] == "focus" for r in window) / len(window))
+
+    by_hour = store.rollup_summary(start, end, tenant="r1", by_hour=True)
+    assert sum(s["n"] for s in by_hour.values()) == len(window)
+    assert by_hour[7]["cav_mean"] == pytest.approx(statistics.mean(r[2] for r in window if r[11] == 7))
+
+    days = store.rollup_series(base, base + 3 * DAY, DAY, tenant="r1")
+    assert [d["start"] for d in days] == [base, base + DAY, base + 2 * DAY]
+    assert [d["n"] for d in days] == [1440, 1440, 1440]
+    assert store.rollup_summary(base, base + 3 * DAY, tenant="nobody") == {"n": 0}
+    store.close()
+
+
+def test_history_survives_raw_retention(tmp_path):
+    path = tmp_path / "memory.db"
+    store = MemoryStore(str(path), retention_s=DAY, cleanup_interval_s=0.05, minute_rollup_s=2 * DAY)
+    old = (time.time() // DAY - 5) * DAY
+    for row in _rows(old, 120, 60.0):
+        store.enqueue(row)
+    store.flush(timeout=10)
+    deadline = time.monotonic() + 5
+    while store.stats()["cleaned"] < 120 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    conn = sqlite3.connect(str(path))
+    assert conn.execute("SELECT COUNT(*) FROM cav_memory").fetchone()[0] == 0
+    counts = dict(conn.execute("SELECT resolution, COUNT(*) FROM cav_rollup GROUP BY resolution").fetchall())
+    conn.close()
+    assert MINUTE not in counts and counts[HOUR] == 2 and counts[DAY] == 2  # 2 local hours
+    # Downsampled: the whole day is still answered, from hour/day rollups
+    assert store.rollup_summary(old, old + DAY)["n"] == 120
+    store.clear()
+    assert store.rollup_summary(old, old + DAY)["n"] == 0
+    store.close()
+
+
+def test_existing_raw_rows_are_backfilled(tmp_path):
+    path = tmp_path / "memory.db"
+    MemoryStore(str(path)).close()
+    conn = sqlite3.connect(str(path))
+    conn.execute("DROP TABLE cav_rollup")
+    rows = _rows(time.time() - HOUR, 30, 60.0)
+    conn.executemany(
+        "INSERT INTO cav_memory (timestamp, cav_raw, cav_smooth, state, parts_bio, parts_env, parts_circadian, "
+        "parts_p_stress, temp_c, humidity, aqi, local_hour, tenant) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+    conn.commit()
+    conn.close()
+
+    store = MemoryStore(str(path))
+    stats = store.rollup_summary(time.time() - DAY, time.time() + MINUTE)
+    assert stats["n"] == 30 and stats["cav_mean"] == pytest.approx(statistics.mean(r[2] for r in rows))
+    store.close()
+
+
+def test_history_route(tmp_path, monkeypatch):
+    from app.memory_manager import MemoryManager
+    from app.routes import memory
+
+    manager = MemoryManager(root=str(tmp_path / "memory"), shards=2)
+    monkeypatch.setattr(memory, "MEMORY", manager)
+    engine = manager.get("robot-3")
+    for cav in (4000, 6000):
+        engine.record(cav, cav, "focus", {}, 22.0, 45.0, 20, 9)
+    engine.flush()
+    app = FastAPI()
+    app.include_router(memory.router)
+    client = TestClient(app)
+
+    body = client.get("/memory/history", params={"tenant": "robot-3", "days": 1}).json()
+    assert body["stats"]["n"] == 2 and body["stats"]["cav_mean"] == 5000.0
+    baseline = client.get("/memory/history", params={"tenant": "robot-3", "by_hour": True}).json()["stats"]
+    assert baseline["9"]["n"] == 2
+    series = client.get("/memory/history", params={"tenant": "robot-3", "resolution": "day"}).json()["series"]
+    assert len(series) == 1 and series[0]["n"] == 2
+    assert client.get("/memory/history", params={"resolution": "week"}).status_code == 400
+    manager.close()
@@ -0,0 +1,93 @@
+"""Tests for batched adaptive-memory persistence (app.memory_store)."""
+
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from app.adaptive_memory import AdaptiveMemoryEngine
+from app.memory_store import MemoryStore
+
+
+def _row(ts=None, cav=5000, hour=14):
+    return (ts if ts is not None else time.time(), cav, cav, "balanced", 0.5, 0.5, 0.5, 0.2, 22.0, 45.0, 20, hour, "")
+
+
+def _count(path):
+    conn = sqlite3.connect(str(path))
+    try:
+        return conn.execute("SELECT COUNT(*) FROM cav_memory").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_rows_are_written_in_batched_transactions(tmp_path):
+    path = tmp_path / "memory.db"
+    store = MemoryStore(str(path), batch_size=100)
+    for k in range(500):
+        assert store.enqueue(_row(cav=k))
+    assert store.flush(timeout=10)
+    stats = store.stats()
+    assert stats["written"] == 500 and 5 <= stats["transactions"] < 500
+    assert _count(path) == 500
+    conn = sqlite3.connect(str(path))
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    conn.close()
+    store.close()
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    store = MemoryStore(str(tmp_path / "memory.db"), max_queue=2)
+    entered, release = threading.Event(), threading.Event()
+    write = store._write
+
+    def slow_write(conn, rows):
+        entered.set()
+        release.wait(5)
+        write(conn, rows)
+
+    store._write = slow_write
+    assert store.enqueue(_row())
+    assert entered.wait(5)  # the writer holds the first row
+    assert store.enqueue(_row()) and store.enqueue(_row())
+    start = time.perf_counter()
+    assert not store.enqueue(_row())
+    assert time.perf_counter() - start < 0.1
+    release.set()
+    store.flush(timeout=10)
+    assert store.stats()["written"] == 3 and store.stats()["dropped"] == 1
+    store.close()
+
+
+def test_retention_cleanup_runs_on_a_timer(tmp_path):
+    path = tmp_path / "memory.db"
+    store = MemoryStore(str(path), retention_s=3600, cleanup_interval_s=0.05)
+    store.enqueue(_row(ts=time.time() - 7200))
+    store.enqueue(_row())
+    store.flush(timeout=10)
+    deadline = time.monotonic() + 5
+    while store.stats()["cleaned"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert store.stats()["cleaned"] == 1 and _count(path) == 1
+    store.close()
+
+
+def test_close_writes_queued_records(tmp_path):
+    path = tmp_path / "memory.db"
+    memory = AdaptiveMemoryEngine(db_path=str(path))
+    parts = {"bio": 0.4, "env": 0.6, "circadian": 0.5, "p_stress": 0.3}
+    for k in range(200):
+        memory.record(4000 + k, 4000 + k, "focus", parts, 22.0, 45.0, 20, 9)
+    memory.close()
+    assert _count(path) == 200
+    assert not memory.store.enqueue(_row())  # closed: dropped, not blocked
+
+    reloaded = AdaptiveMemoryEngine(db_path=str(path))
+    assert len(reloaded.buffer) == 200
+    assert reloaded.buffer[-1]["cav"] == 4199 and reloaded.buffer[-1]["parts"] == pytest.approx(parts)
+    assert reloaded.get_summary()["total_records"] == 200
+
+    reloaded.clear()
+    assert _count(path) == 0 and reloaded.get_summary()["total_records"] == 0
+    reloaded.close()
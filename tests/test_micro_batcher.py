@@ -0,0 +1,140 @@
+"""Tests for the micro-batching scheduler."""
+
+import threading
+
+import numpy as np
+import pytest
+
+from app.engine import EngineSession, SIGNAL_KEYS, WINDOW_LEN
+from app.micro_batcher import MicroBatcher
+from app.session_store import SessionStore
+
+
+def test_coalesces_concurrent_jobs_in_order():
+    calls = []
+
+    def process(jobs):
+        calls.append(list(jobs))
+        return [job * 10 for job in jobs]
+
+    batcher = MicroBatcher(process, max_delay_ms=50, max_batch=100)
+    start = threading.Barrier(8)
+    results = {}
+
+    def client(i):
+        start.wait()
+        results[i] = batcher.submit(i).result(timeout=5)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    batcher.close()
+
+    assert results == {i: i * 10 for i in range(8)}
+    assert len(calls) < 8
+    assert batcher.stats()["jobs"] == 8
+
+
+def test_max_batch_and_per_job_errors():
+    def process(jobs):
+        return [ValueError("bad") if job < 0 else job for job in jobs]
+
+    batcher = MicroBatcher(process, max_delay_ms=20, max_batch=3, rows=lambda job: 2)
+    futures = [batcher.submit(j) for j in (1, -1, 2, 3)]
+    assert futures[0].result(timeout=5) == 1
+    with pytest.raises(ValueError):
+        futures[1].result(timeout=5)
+    assert [f.result(timeout=5) for f in futures[2:]] == [2, 3]
+    batcher.close()
+    assert batcher.stats()["batches"] >= 2  # at most 2 jobs (4 rows) per batch
+
+
+def test_batch_exception_fails_every_job():
+    def process(jobs):
+        raise RuntimeError("model down")
+
+    batcher = MicroBatcher(process, max_delay_ms=1)
+    with pytest.raises(RuntimeError):
+        batcher.submit(1).result(timeout=5)
+    batcher.close()
+    with pytest.raises(RuntimeError):
+        batcher.submit(2)
+
+
+def test_from_env_disabled_by_default(monkeypatch):
+    monkeypatch.delenv("EDON_MICROBATCH_MS", raising=False)
+    assert MicroBatcher.from_env(lambda jobs: jobs) is None
+    monkeypatch.setenv("EDON_MICROBATCH_MS", "2")
+    assert MicroBatcher.from_env(lambda jobs: jobs) is not None
+
+
+def test_coalesced_jobs_score_like_separate_requests(v32_engine, monkeypatch):
+    from app.routes import batch
+
+    monkeypatch.setattr(batch, "ENGINE", v32_engine)
+    monkeypatch.setattr(batch, "POOL", None)
+    rng = np.random.default_rng(0)
+
+    def job(session_id, n):
+        raw = rng.normal(size=(2, len(SIGNAL_KEYS), WINDOW_LEN))
+        return batch._ScoreJob(
+            session_id=session_id,
+            features=rng.normal(size=(n, len(v32_engine.feature_names))),
+            valid=np.ones(n, dtype=bool),
+            raw_index=[0, n - 1],
+            raw=raw,
+            env={"temp_c": [22.0] * n, "humidity": [40.0] * n, "aqi": [20] * n, "local_hour": [14] * n},
+        )
+
+    jobs = [job("a", 3), job("b", 4), job("a", 2)]
+
+    monkeypatch.setattr(batch, "SESSIONS", SessionStore(EngineSession))
+    together = batch._score_jobs(jobs)
+    monkeypatch.setattr(batch, "SESSIONS", SessionStore(EngineSession))
+    separate = [batch._score_jobs([j])[0] for j in jobs]
+    assert together == separate
+
+
+def test_one_bad_job_does_not_fail_its_batch(v32_engine, monkeypatch):
+    from app.routes import batch
+
+    monkeypatch.setattr(batch, "ENGINE", v32_engine)
+    monkeypatch.setattr(batch, "POOL", None)
+    monkeypatch.setattr(batch, "SESSIONS", SessionStore(EngineSession))
+    n_features = len(v32_engine.feature_names)
+
+    def job(session_id, features):
+        n = len(features)
+        return batch._ScoreJob(
+            session_id=session_id,
+            features=features,
+            valid=np.ones(n, dtype=bool),
+            raw_index=[],
+            raw=None,
+            env={"temp_c": [22.0] * n, "humidity": [40.0] * n, "aqi": [20] * n, "local_hour": [14] * n},
+        )
+
+    bad = np.zeros((2, n_features))
+    bad[1, 0] = np.inf  # what JSON 1e400 parses to; the scaler rejects it
+    good, poison = batch._score_jobs([job("a", np.zeros((3, n_features))), job("b", bad)])
+    assert len(good) == 3 and not isinstance(good, Exception)
+    assert isinstance(poison, Exception)
+
+
+def test_non_finite_feature_rows_are_rejected(v32_engine, monkeypatch):
+    import json
+
+    from app.routes import batch
+
+    monkeypatch.setattr(batch, "ENGINE", v32_engine)
+    monkeypatch.setattr(batch, "POOL", None)
+    monkeypatch.setattr(batch, "BATCHER", None)
+    monkeypatch.setattr(batch, "SESSIONS", SessionStore(EngineSession))
+    window = json.dumps({name: 0.0 for name in v32_engine.feature_names})
+    poison = window.replace("0.0", "1e400", 1)  # json.loads parses it to inf
+    body = '{"windows": [%s, %s]}' % (window, poison)
+    results = json.loads(batch._cav_batch(body.encode(), "s1").body)["results"]
+    assert results[0]["ok"] is True
+    assert results[1] == {**results[1], "ok": False, "error": "feature values must be finite"}
@@ -0,0 +1,69 @@
+"""Tests for the cached model manifest and the livez/readyz probes."""
+
+import hashlib
+import time
+
+import pytest
+
+from app import model_manifest
+from app.model_manifest import ManifestCache
+
+
+@pytest.fixture
+def counted_hash(monkeypatch):
+    calls = []
+    real = model_manifest._sha256_file
+
+    def counting(path):
+        calls.append(path)
+        return real(path)
+
+    monkeypatch.setattr(model_manifest, "_sha256_file", counting)
+    return calls
+
+
+def test_manifest_fingerprints_loaded_model(v32_model_dir, monkeypatch, counted_hash):
+    monkeypatch.setenv("EDON_MODEL_DIR", str(v32_model_dir))
+    manifest = ManifestCache().get()
+
+    model_file = v32_model_dir / "cav_state_v3_2.joblib"
+    assert manifest.name == "cav_state_v3_2"
+    assert manifest.path == str(model_file)
+    assert manifest.sha256 == hashlib.sha256(model_file.read_bytes()).hexdigest()
+    assert manifest.features == 6 and manifest.window == 240
+    assert manifest.info()["feature_names"] == list(manifest.feature_names)
+
+
+def test_manifest_cached_until_file_changes(v32_model_dir, tmp_path, monkeypatch, counted_hash):
+    model_dir = tmp_path / "models"
+    model_dir.mkdir()
+    for f in v32_model_dir.iterdir():
+        (model_dir / f.name).write_bytes(f.read_bytes())
+    monkeypatch.setenv("EDON_MODEL_DIR", str(model_dir))
+
+    cache = ManifestCache()
+    first = cache.get()
+    assert cache.get() is first
+    assert len(counted_hash) == 1
+
+    with open(model_dir / "cav_state_v3_2.joblib", "ab") as f:
+        f.write(b"\0")
+    second = cache.get()
+    assert second is not first and second.size == first.size + 1
+    assert second.sha256 != first.sha256
+    assert len(counted_hash) == 2
+
+
+def test_livez_and_readyz(v32_model_dir, monkeypatch):
+    from fastapi.testclient import TestClient
+    from app import main
+
+    monkeypatch.setenv("EDON_MODEL_DIR", str(v32_model_dir))
+    with TestClient(main.app) as client:
+        assert client.get("/livez").json() == {"ok": True}
+        deadline = time.time() + 10
+        while not main.READY.is_set() and time.time() < deadline:
+            time.sleep(0.01)
+        resp = client.get("/readyz")
+        assert resp.status_code == 200 and resp.json()["ready"] is True
+        assert client.get("/models/info").json()["features"] == main.MANIFEST.get().features
@@ -0,0 +1,101 @@
+"""Tests for the compiled affine projector (src.projector) against the sklearn chains."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.decomposition import PCA
+from sklearn.preprocessing import StandardScaler, normalize
+
+from app.v2.pca_fusion import PCAFusion
+from src.embedding import FEATURE_COLS, CAVEmbedder
+from src.projector import AffineProjector
+
+
+def _feature_dicts(seed, n, width=10):
+    rng = np.random.default_rng(seed)
+    scales = np.logspace(-2, 2, width)  # raw features on very different scales
+    return [
+        {f"f{k}": float(v) for k, v in enumerate(row)}
+        for row in rng.normal(size=(n, width)) * scales + scales
+    ]
+
+
+@pytest.mark.parametrize("n_samples,width", [
+    (60, 10),    # PCA + random projection up to 128
+    (300, 200),  # PCA only (pca_dim == 128)
+    (1, 10),     # too few samples to fit: pad/truncate fallback
+])
+def test_pca_fusion_matches_sklearn_chain(n_samples, width):
+    fusion = PCAFusion(n_components=128)
+    if n_samples == 1:
+        # fit() leaves the scaler unfitted with one sample; fit it as main.py's loader would
+        rows = _feature_dicts(0, 20, width)
+        fusion.fit(rows[:1])
+        fusion.scaler.fit(np.array([[r[f] for f in fusion.feature_order] for r in rows]))
+    else:
+        fusion.fit(_feature_dicts(0, n_samples, width))
+    probe = _feature_dicts(1, 25, width)
+    X = np.array([[d[f] for f in fusion.feature_order] for d in probe])
+
+    expected = fusion._project_sklearn(X)
+    batch = fusion.transform_batch(probe)
+    assert batch.dtype == np.float32 and batch.shape == (25, 128)
+    np.testing.assert_allclose(batch, expected, atol=2e-6)
+    np.testing.assert_allclose(fusion.transform(probe[0]), batch[0], atol=1e-7)
+
+
+def test_pca_fusion_non_finite_inputs_match():
+    fusion = PCAFusion()
+    fusion.fit(_feature_dicts(0, 60))
+    X = np.array([[d[f] for f in fusion.feature_order] for d in _feature_dicts(1, 4)])
+    X[0, 3] = np.nan
+    X[2, 0] = np.nan
+    np.testing.assert_allclose(fusion._project(X), fusion._project_sklearn(X), atol=2e-6)
+    # sklearn's scaler rejects inf; the projector treats it like NaN
+    X_inf = np.where(np.isnan(X), np.inf, X)
+    np.testing.assert_array_equal(fusion._project(X_inf), fusion._project(X))
+
+
+def test_stages_replaced_after_fit_are_recompiled():
+    fusion = PCAFusion()
+    fusion.fit(_feature_dicts(0, 60))
+    rows = _feature_dicts(2, 60)
+    X = np.array([[d[f] for f in fusion.feature_order] for d in rows])
+    # Assigned attribute by attribute, as main.py does for EDON_PCA_PATH
+    fusion.scaler = StandardScaler().fit(X)
+    fusion.pca = PCA(n_components=5, whiten=True).fit(fusion.scaler.transform(X))
+    fusion.rproj = None
+    out = fusion.transform_batch(rows[:5])
+    assert out.shape == (5, 5)
+    np.testing.assert_allclose(out, fusion._project_sklearn(X[:5]), atol=2e-6)
+
+
+def test_cav_embedder_matches_sklearn_chain(tmp_path):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(80, len(FEATURE_COLS))) * 10 + 50, columns=FEATURE_COLS)
+    embedder = CAVEmbedder(n_components=128, model_dir=str(tmp_path))
+    embedder.fit(df)
+
+    X = df.values[:20]
+    # The original chain: scaler -> PCA -> L2 -> random projection -> L2
+    X_pca = normalize(embedder.pca.transform(embedder.scaler.transform(X)))
+    expected = normalize(embedder.rproj.transform(X_pca))
+    out = embedder.transform(df.iloc[:20])
+    np.testing.assert_allclose(out, expected, atol=2e-6)
+
+    # Reloaded embedders recompile to the same projection
+    reloaded = CAVEmbedder(n_components=128, model_dir=str(tmp_path))
+    reloaded.load()
+    np.testing.assert_array_equal(reloaded.transform(df.iloc[:20]), out)
+
+
+def test_saved_projector_is_memory_mapped(tmp_path):
+    embedder = CAVEmbedder(model_dir=str(tmp_path))
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame(rng.normal(size=(50, len(FEATURE_COLS))), columns=FEATURE_COLS)
+    embedder.fit(df)
+
+    loaded = AffineProjector.load(str(tmp_path / "cav_embedder_projector.npy"))
+    assert isinstance(loaded.weight, np.memmap)
+    assert (loaded.n_features, loaded.n_components) == (len(FEATURE_COLS), 128)
+    np.testing.assert_array_equal(loaded.transform(df.values), embedder.projector.transform(df.values))
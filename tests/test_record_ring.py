@@ -0,0 +1,55 @@
+"""Tests for the structured-array record ring (app.record_ring)."""
+
+import numpy as np
+import pytest
+
+from app.record_ring import RECORD_DTYPE, UNKNOWN_STATE, RecordRing
+
+PARTS = {"bio": 0.25, "env": 0.5, "circadian": 0.75, "p_stress": 0.125}
+
+
+def _fill(ring, n, t0=1000.0):
+    for k in range(n):
+        ring.append(t0 + k, 100 + k, "focus" if k % 2 else "overload", PARTS, 22.5, 45.0, 20 + k, k % 24)
+
+
+def test_records_are_compact_and_round_trip_as_dicts():
+    assert RECORD_DTYPE.itemsize == 40
+    ring = RecordRing(8)
+    _fill(ring, 3)
+    assert ring[0] == {
+        "timestamp": 1000.0, "cav": 100, "state": "overload", "parts": PARTS,
+        "temp_c": 22.5, "humidity": 45.0, "aqi": 20, "local_hour": 0,
+    }
+    assert [r["cav"] for r in ring] == [100, 101, 102]
+    ring.append(2000.0, 1, "dreaming", {}, 20.0, 40.0, 0, 3)
+    assert ring.array()["state"][-1] == UNKNOWN_STATE and ring[-1]["state"] == "unknown"
+    with pytest.raises(IndexError):
+        ring[4]
+
+
+def test_wraparound_keeps_the_newest_in_order():
+    ring = RecordRing(5)
+    _fill(ring, 12)
+    assert len(ring) == 5
+    np.testing.assert_array_equal(ring.array()["cav"], np.arange(107, 112))
+    assert ring[0]["cav"] == 107 and ring[-1]["cav"] == 111
+
+    rows = RecordRing(20)
+    _fill(rows, 7, t0=5000.0)
+    ring.extend(rows.array())  # wraps mid-copy
+    np.testing.assert_array_equal(ring.array()["timestamp"], 5000.0 + np.arange(2, 7))
+    ring.extend(rows.array()[:2])
+    np.testing.assert_array_equal(ring.array()["cav"], [104, 105, 106, 100, 101])
+
+
+def test_time_range_queries_are_masks():
+    ring = RecordRing(100)
+    _fill(ring, 50)
+    recent = ring.since(1040.0)
+    assert len(recent) == 10 and recent["cav"][0] == 140
+    mask = ring.time_mask(1010.0, 1020.0)
+    assert mask.sum() == 10
+    assert (ring.array()[mask]["aqi"] > 35).sum() == 4
+    ring.clear()
+    assert len(ring) == 0 and len(ring.since(0.0)) == 0
@@ -0,0 +1,71 @@
+"""Tests for the O(1) rolling-window featurizer."""
+
+import numpy as np
+import pytest
+
+from app.engine import SIGNAL_KEYS, V32_FEATURE_NAMES, WINDOW_LEN, compute_window_features
+from app.rolling_features import RollingWindowFeaturizer
+
+
+def _stream(n, seed=0):
+    rng = np.random.default_rng(seed)
+    samples = rng.normal(size=(n, len(SIGNAL_KEYS)))
+    samples[:, 0] += 2.0
+    return samples
+
+
+def _reference(window):
+    feats = compute_window_features({k: window[:, i] for i, k in enumerate(SIGNAL_KEYS)})
+    return feats[list(V32_FEATURE_NAMES)].to_numpy(dtype=float)[0]
+
+
+def test_matches_full_recompute_every_sample():
+    samples = _stream(WINDOW_LEN + 300)
+    roller = RollingWindowFeaturizer(hop=1, resync_every=10_000)
+    for i, row in enumerate(samples):
+        emitted = roller.push(row)
+        assert emitted == (i >= WINDOW_LEN - 1)
+        if emitted:
+            window = samples[i - WINDOW_LEN + 1 : i + 1]
+            np.testing.assert_allclose(roller.features(), _reference(window), rtol=1e-9, atol=1e-9)
+
+
+def test_non_finite_samples_and_validity():
+    samples = _stream(WINDOW_LEN * 3, seed=1)
+    samples[::7, 0] = np.nan
+    samples[::11, 2] = np.inf
+    samples[WINDOW_LEN : WINDOW_LEN + 200, :] = np.nan  # long dropout
+    roller = RollingWindowFeaturizer(hop=5)
+    for features, valid, seen in roller.extend(samples):
+        window = samples[seen - WINDOW_LEN : seen]
+        np.testing.assert_allclose(features, _reference(window), rtol=1e-9, atol=1e-9)
+        missing = np.count_nonzero(~np.isfinite(window))
+        assert valid == (missing <= window.size * 0.2)
+
+
+def test_hop_and_resync():
+    samples = _stream(WINDOW_LEN + 100, seed=2)
+    roller = RollingWindowFeaturizer(hop=4, resync_every=37)
+    emitted = roller.extend(samples)
+    seen = [s for _, _, s in emitted]
+    assert seen[0] == WINDOW_LEN
+    assert np.all(np.diff(seen) == 4)
+    np.testing.assert_allclose(emitted[-1][0], _reference(samples[seen[-1] - WINDOW_LEN : seen[-1]]), atol=1e-12)
+    np.testing.assert_array_equal(roller.window(), samples[-WINDOW_LEN:])
+
+
+def test_rejects_bad_sample_width():
+    with pytest.raises(ValueError):
+        RollingWindowFeaturizer().push([1.0, 2.0])
+
+
+def test_rolling_features_score_like_windows(v32_engine):
+    samples = _stream(WINDOW_LEN + 40, seed=3)
+    emitted = RollingWindowFeaturizer(hop=8).extend(samples)
+    features = v32_engine.to_schema_order(np.stack([f for f, _, _ in emitted]))
+    windows = np.stack([samples[s - WINDOW_LEN : s].T for _, _, s in emitted])
+
+    by_features = v32_engine.cav_from_features_batch(features, 22.0, 40.0, 20, 14, valid=[v for _, v, _ in emitted])
+    by_windows = v32_engine.cav_from_windows_batch(windows, 22.0, 40.0, 20, 14)
+    assert [r[0] for r in by_features] == [r[0] for r in by_windows]
+    assert [r[2] for r in by_features] == [r[2] for r in by_windows]
@@ -0,0 +1,73 @@
+"""Tests for the per-session engine state store."""
+
+import threading
+
+import numpy as np
+import pytest
+
+from app.engine import EngineSession
+from app.session_store import SessionStore
+from tests.conftest import make_window, stack_windows
+
+
+def test_get_creates_and_reuses_state():
+    store = SessionStore(EngineSession, max_sessions=16, ttl_s=0, shards=4)
+    a = store.get("robot-1")
+    assert store.get("robot-1") is a
+    assert store.get("robot-2") is not a
+    assert len(store) == 2
+    assert store.discard("robot-1") and "robot-1" not in store
+
+
+def test_lru_eviction_per_shard():
+    store = SessionStore(EngineSession, max_sessions=2, ttl_s=0, shards=1)
+    store.get("a")
+    store.get("b")
+    store.get("a")  # touch: "b" is now least recently used
+    store.get("c")
+    assert "a" in store and "c" in store and "b" not in store
+
+
+def test_ttl_eviction(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("app.session_store.time.monotonic", lambda: clock[0])
+    store = SessionStore(EngineSession, max_sessions=100, ttl_s=60, shards=1)
+    store.get("idle")
+    clock[0] += 61
+    store.get("active")
+    assert "idle" not in store and "active" in store
+
+
+def test_acquire_serializes_same_session():
+    store = SessionStore(lambda: {"n": 0}, max_sessions=8, ttl_s=0)
+
+    def bump():
+        for _ in range(500):
+            with store.acquire("shared") as state:
+                n = state["n"]
+                state["n"] = n + 1
+
+    threads = [threading.Thread(target=bump) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert store.get("shared")["n"] == 2000
+
+
+def test_sessions_do_not_share_ema(v32_engine):
+    """Interleaving two devices on one engine matches running them separately."""
+    rng = np.random.default_rng(5)
+    calm = stack_windows([make_window(rng, stress=0.0) for _ in range(4)])
+    busy = stack_windows([make_window(rng, stress=1.0) for _ in range(4)])
+
+    s1, s2 = EngineSession(), EngineSession()
+    out1, out2 = [], []
+    for i in range(4):
+        out1 += v32_engine.cav_from_windows_batch(calm[i:i + 1], session=s1)
+        out2 += v32_engine.cav_from_windows_batch(busy[i:i + 1], session=s2)
+
+    ref = EngineSession()
+    assert v32_engine.cav_from_windows_batch(calm, session=ref) == out1
+    assert s1.cav_smooth == pytest.approx(ref.cav_smooth)
+    assert v32_engine.cav_smooth is None  # default session untouched
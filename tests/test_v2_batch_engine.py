@@ -0,0 +1,82 @@
+"""Tests for the vectorized v2 batch path (CAVEngineV2.compute_cav_v2_batch)."""
+
+import numpy as np
+import pytest
+
+from app.v2.engine_v2 import CAVEngineV2
+from app.v2.multimodal_fusion import fuse_multimodal_features, fuse_multimodal_features_batch
+from tests.conftest import make_v2_windows
+
+
+def test_batch_fusion_matches_per_window():
+    windows = make_v2_windows(1, 30)
+    for b, s in zip(fuse_multimodal_features_batch(windows), [fuse_multimodal_features(w) for w in windows]):
+        assert b["embeddings"].keys() == s["embeddings"].keys()
+        for source, vector in b["embeddings"].items():
+            np.testing.assert_array_equal(vector, s["embeddings"][source])
+        assert {**b, "embeddings": None} == {**s, "embeddings": None}
+
+
+def test_batch_matches_sequential_scoring():
+    windows = make_v2_windows(0, 40)
+    single_engine = CAVEngineV2()
+    batch_engine = CAVEngineV2()
+    batch_engine.neural_head = single_engine.neural_head  # same neural head weights
+
+    single = [single_engine.compute_cav_v2(w) for w in windows]
+    batch = []
+    for start in range(0, len(windows), 7):  # EMA carries across batches
+        batch += batch_engine.compute_cav_v2_batch(windows[start:start + 7])
+
+    for s, b in zip(single, batch):
+        for key in ("state_class", "p_stress", "p_chaos", "confidence"):
+            assert s[key] == b[key]
+        for key in ("scores", "modalities_present", "device_profile", "pca_fitted", "num_features"):
+            assert s["metadata"][key] == b["metadata"][key]
+        np.testing.assert_allclose(b["cav_vector"], s["cav_vector"], atol=1e-12)
+        assert b["influences"] == pytest.approx(s["influences"], abs=1e-6)
+        assert b["metadata"]["neural_state_probs"] == pytest.approx(s["metadata"]["neural_state_probs"], abs=1e-6)
+    np.testing.assert_allclose(batch_engine.cav_smooth, single_engine.cav_smooth, atol=1e-12)
+    assert batch_engine.pca_fitter.stats() == single_engine.pca_fitter.stats()
+
+
+def test_failed_windows_do_not_touch_state():
+    engine = CAVEngineV2()
+    windows = make_v2_windows(2, 3)
+    fused = [fuse_multimodal_features(w) for w in windows]
+    fused[1] = ValueError("bad window")
+
+    out = engine.compute_cav_v2_batch(windows, fused=fused)
+    assert out[1] is fused[1]
+    assert out[0]["cav_vector"] and out[2]["cav_vector"]
+    assert engine.pca_fitter.stats()["observed"] == 2
+
+
+def test_neural_head_predict_batch_matches_predict():
+    head = CAVEngineV2().neural_head
+    x = np.random.default_rng(0).normal(size=(5, head.input_dim)).astype(np.float32)
+    for row, pred in zip(x, head.predict_batch(x)):
+        single = head.predict(row.tolist())
+        assert pred["state_class"] == single["state_class"]
+        assert pred["action_recommendations"] == pytest.approx(single["action_recommendations"], abs=1e-6)
+
+
+def test_one_bad_job_does_not_fail_its_batch(monkeypatch):
+    from app.routes import v2_batch
+    from app.session_store import SessionStore
+    from app.v2.engine_v2 import EngineSessionV2
+
+    good, bad = make_v2_windows(3, 2), make_v2_windows(4, 1)
+
+    class FragileEngine(CAVEngineV2):
+        def compute_cav_v2_batch(self, windows, **kwargs):
+            if any(w is bad[0] for w in windows):
+                raise ValueError("poisoned window")
+            return super().compute_cav_v2_batch(windows, **kwargs)
+
+    monkeypatch.setattr(v2_batch, "ENGINE_V2", FragileEngine())
+    monkeypatch.setattr(v2_batch, "POOL", None)
+    monkeypatch.setattr(v2_batch, "SESSIONS", SessionStore(EngineSessionV2))
+    ok, failed = v2_batch._score_jobs([v2_batch._ScoreJob("a", good), v2_batch._ScoreJob("b", bad)])
+    assert [r.ok for r in ok] == [True, True]
+    assert [r.ok for r in failed] == [False] and "poisoned" in failed[0].error
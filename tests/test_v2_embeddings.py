@@ -0,0 +1,91 @@
+"""Tests for float32 vision/audio embeddings (schemas_v2, app.v2.embedding_projector)."""
+
+import base64
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from app.v2.embedding_projector import EmbeddingProjector
+from app.v2.multimodal_fusion import fuse_multimodal_features
+from app.v2.schemas_v2 import V2CavWindow
+
+
+def _embedding(n=2048, seed=0):
+    return np.random.default_rng(seed).normal(size=n).astype(np.float32)
+
+
+def test_list_base64_and_bytes_inputs_agree():
+    emb = _embedding()
+    raw = emb.astype("<f4").tobytes()
+    from_list = V2CavWindow(vision={"embedding": emb.tolist()}).vision.embedding
+    from_b64 = V2CavWindow(vision={"embedding": base64.b64encode(raw).decode()}).vision.embedding
+    from_bytes = V2CavWindow(audio={"embedding": raw}).audio.embedding
+    for arr in (from_list, from_b64, from_bytes):
+        assert arr.dtype == np.float32
+        np.testing.assert_array_equal(arr, emb)
+    assert np.shares_memory(V2CavWindow(vision={"embedding": emb}).vision.embedding, emb)
+    # Serialized back as plain floats
+    assert V2CavWindow(vision={"embedding": raw}).model_dump()["vision"]["embedding"] == emb.tolist()
+
+
+@pytest.mark.parametrize("bad", [
+    [0.0] * 10001,            # too large
+    "not base64!",
+    base64.b64encode(b"\x00" * 6).decode(),  # not whole float32s
+    [[1.0, 2.0]],
+    {"x": 1},
+])
+def test_invalid_embeddings_are_rejected(bad):
+    with pytest.raises(ValidationError):
+        V2CavWindow(vision={"embedding": bad})
+
+
+def test_reduction_is_fixed_width_and_deterministic():
+    projector = EmbeddingProjector(dim=16, cache_size=0)
+    emb = _embedding()
+    reduced = projector.reduce("vision", emb)
+    assert reduced.vector.shape == (16,) and reduced.vector.dtype == np.float32
+    assert not reduced.vector.flags.writeable
+    assert np.linalg.norm(reduced.vector) == pytest.approx(1.0, abs=1e-6)
+    assert reduced.norm == pytest.approx(float(np.linalg.norm(emb.astype(np.float64))))
+
+    # Same projection in another process/instance; different per source
+    other = EmbeddingProjector(dim=16, cache_size=0)
+    np.testing.assert_array_equal(other.reduce("vision", emb).vector, reduced.vector)
+    assert not np.array_equal(other.reduce("audio", emb).vector, reduced.vector)
+
+    # Narrow embeddings are zero-padded
+    small = projector.reduce("audio", np.array([3.0, 4.0], dtype=np.float32))
+    np.testing.assert_allclose(small.vector[:3], [0.6, 0.8, 0.0])
+    assert small.norm == pytest.approx(5.0)
+
+
+def test_repeated_embeddings_hit_the_cache():
+    projector = EmbeddingProjector(dim=8, cache_size=2)
+    a, b, c = _embedding(seed=1), _embedding(seed=2), _embedding(seed=3)
+    first = projector.reduce("vision", a)
+    assert projector.reduce("vision", a.copy()) is first  # keyed by content, not identity
+    projector.reduce("vision", b)
+    projector.reduce("vision", c)  # evicts a
+    assert projector.stats() == {"hits": 1, "misses": 3, "cached": 2}
+    assert projector.reduce("vision", a) is not first
+
+
+def test_fused_embeddings_are_small_float32_vectors():
+    window = V2CavWindow(vision={"embedding": _embedding(4096)}, audio={"embedding": _embedding(512, seed=1)})
+    fused = fuse_multimodal_features(window)
+    for source in ("vision", "audio"):
+        vector = fused["embeddings"][source]
+        assert vector.dtype == np.float32 and vector.shape == (32,)
+    assert fused["features"]["vision_embedding_norm"] > 0
+
+
+def test_frame_embedding_rows_are_not_copied():
+    from app.routes.v2_batch import _frame_to_payload
+
+    vectors = np.stack([_embedding(256, seed=k) for k in range(2)])
+    payload = _frame_to_payload({}, {"vision.embedding": vectors})
+    window = V2CavWindow(**payload["windows"][1])
+    assert np.shares_memory(window.vision.embedding, vectors)
+    np.testing.assert_array_equal(window.vision.embedding, vectors[1])
@@ -0,0 +1,104 @@
+"""Tests for the neural head backends (app.v2.neural_head)."""
+
+import numpy as np
+import pytest
+
+from app.v2.neural_head import NeuralHeadMLP, configure_threads, create_default_neural_head
+
+
+def _embeddings(n=16, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, 128)).astype(np.float32)
+
+
+def _torch_state(head):
+    """head's NumPy weights as a state_dict in the torch ModuleDict layout."""
+    state = {}
+    for name, prefixes in head._torch_linears().items():
+        for prefix in prefixes:
+            state[f"{prefix}.weight"] = head.weights[name].T.copy()
+            state[f"{prefix}.bias"] = head.biases[name].copy()
+    return state
+
+
+def _probs(preds):
+    return np.array([list(p["state_probs"].values()) for p in preds])
+
+
+def test_numpy_backend_runs_the_trunk_once_in_float32():
+    head = create_default_neural_head(backend="numpy")
+    assert head.backend == "numpy" and not head.use_torch
+    assert all(w.dtype == np.float32 for w in head.weights.values())
+
+    x = _embeddings()
+    h = x
+    for i in range(len(head.hidden_dims)):
+        h = np.maximum(0, h @ head.weights[f"hidden_{i}"] + head.biases[f"hidden_{i}"])
+    logits = h @ head.weights["state"] + head.biases["state"]
+    expected = np.exp(logits - logits.max(axis=1, keepdims=True))
+    expected /= expected.sum(axis=1, keepdims=True)
+    np.testing.assert_allclose(_probs(head.predict_batch(x)), expected, rtol=1e-5)
+
+
+def test_int8_backend_tracks_float32():
+    head = create_default_neural_head(backend="numpy")
+    x = _embeddings(64)
+    reference = head.predict_batch(x)
+
+    head.set_backend("int8")
+    assert all(q.dtype == np.int8 for q, _ in head._int8.values())
+    quantized = head.predict_batch(x)
+    np.testing.assert_allclose(_probs(quantized), _probs(reference), atol=0.02)
+    speeds = [p["action_recommendations"]["speed_scale"] for p in quantized]
+    assert speeds == pytest.approx([p["action_recommendations"]["speed_scale"] for p in reference], abs=0.05)
+
+
+def test_npz_round_trip(tmp_path):
+    head = create_default_neural_head(backend="numpy")
+    path = str(tmp_path / "neural_head.npz")
+    head.save_npz(path)
+
+    restored = create_default_neural_head(backend="numpy")
+    restored.load_npz(path)
+    assert restored.loaded
+    x = _embeddings()
+    assert restored.predict_batch(x) == head.predict_batch(x)
+
+    with pytest.raises(ValueError):
+        NeuralHeadMLP(input_dim=64, use_torch=False).load_npz(path)
+
+
+def test_torch_layout_state_dict_loads_without_torch():
+    source = NeuralHeadMLP(use_torch=False)
+    head = NeuralHeadMLP(use_torch=False)
+    assert head.load_state_dict(_torch_state(source)) == 12  # (2 shared Linear under both heads + 2 outputs) x weight/bias
+    x = _embeddings()
+    assert head.predict_batch(x) == source.predict_batch(x)
+
+    partial = _torch_state(source)
+    partial["state_head.6.weight"] = np.zeros((3, 32), dtype=np.float32)  # wrong shape
+    with pytest.raises(RuntimeError):
+        NeuralHeadMLP(use_torch=False).load_state_dict(partial)
+    assert NeuralHeadMLP(use_torch=False).load_state_dict(partial, strict=False) == 11
+
+
+def test_torch_export_matches_torch_forward():
+    pytest.importorskip("torch")
+    head = NeuralHeadMLP(use_torch=True)
+    x = _embeddings()
+    torch_preds = head.predict_batch(x)
+
+    head.set_backend("numpy")
+    numpy_preds = head.predict_batch(x)
+    np.testing.assert_allclose(_probs(numpy_preds), _probs(torch_preds), atol=1e-6)
+    assert [p["state_class"] for p in numpy_preds] == [p["state_class"] for p in torch_preds]
+
+
+def test_configure_threads(monkeypatch):
+    pytest.importorskip("threadpoolctl")
+    from threadpoolctl import threadpool_info, threadpool_limits
+
+    monkeypatch.delenv("EDON_INTRA_OP_THREADS", raising=False)
+    assert configure_threads() is None
+    with threadpool_limits(limits=None):  # restore the original limits afterwards
+        assert configure_threads(1) == 1
+        assert all(pool["num_threads"] == 1 for pool in threadpool_info() if pool["user_api"] == "blas")
@@ -0,0 +1,119 @@
+"""Tests for background PCA fitting and basis swaps (app.v2.pca_fitter)."""
+
+import time
+
+import numpy as np
+
+from app.v2.engine_v2 import CAVEngineV2
+from app.v2.multimodal_fusion import fuse_multimodal_features
+from app.v2.pca_fitter import LATEST_NAME, PCAFitter
+from tests.conftest import make_v2_windows
+
+
+def _features(seed, n):
+    return [fuse_multimodal_features(w)["features"] for w in make_v2_windows(seed, n)]
+
+
+def _uniform_features(seed, n):
+    """Feature dicts that all share one key set (no column growth between rounds)."""
+    rng = np.random.default_rng(seed)
+    return [{f"f{k}": float(v) for k, v in enumerate(row)} for row in rng.normal(size=(n, 12))]
+
+
+def test_request_path_never_fits():
+    engine = CAVEngineV2(pca_fitter=PCAFitter(min_samples=8))
+    results = [engine.compute_cav_v2(w) for w in make_v2_windows(0, 60)]
+    assert not any(r["metadata"]["pca_fitted"] for r in results)
+    assert engine.pca_fitter.current is None
+    assert engine.pca_fitter.stats()["observed"] == 60
+
+    assert engine.pca_fitter.fit_now()
+    result = engine.compute_cav_v2(make_v2_windows(1, 1)[0])
+    assert result["metadata"]["pca_fitted"]
+    assert result["metadata"]["pca_version"] == 1
+    assert len(result["cav_vector"]) == 128
+
+
+def test_fit_waits_for_min_samples():
+    fitter = PCAFitter(min_samples=16)
+    for features in _uniform_features(0, 15):
+        fitter.observe(features)
+    assert not fitter.fit_now()
+    fitter.observe(_uniform_features(1, 1)[0])
+    assert fitter.fit_now()
+    assert not fitter.fit_now()  # nothing new to fold in
+
+
+def test_published_snapshots_are_immutable():
+    fitter = PCAFitter(min_samples=16)
+    for features in _uniform_features(0, 32):
+        fitter.observe(features)
+    fitter.fit_now()
+    first = fitter.current
+    probe = _uniform_features(9, 1)[0]
+    before = first.fusion.transform(probe)
+
+    for features in _uniform_features(1, 32):
+        fitter.observe(features)
+    assert fitter.fit_now()
+    assert fitter.current.version == 2
+    assert fitter.current.n_samples == 64
+    # An in-flight request holding the old snapshot keeps its basis
+    np.testing.assert_array_equal(first.fusion.transform(probe), before)
+
+
+def test_new_features_restart_the_fit():
+    fitter = PCAFitter(min_samples=16)
+    for features in _uniform_features(0, 20):
+        fitter.observe(features)
+    fitter.fit_now()
+    widened = [dict(f, extra=1.0) for f in _uniform_features(1, 20)]
+    for features in widened:
+        fitter.observe(features)
+    assert fitter.fit_now()
+    assert fitter.current.fusion.feature_order[-1] == "extra"
+    assert fitter.current.n_samples == 40  # refit from the whole buffer
+
+
+def test_snapshots_persist_and_reload(tmp_path):
+    fitter = PCAFitter(min_samples=16, artifact_dir=str(tmp_path), keep=2)
+    for round_seed in range(3):
+        for features in _features(round_seed, 40):
+            fitter.observe(features)
+        assert fitter.fit_now()
+    assert sorted(p.name for p in tmp_path.glob("pca_v*.joblib")) == ["pca_v000002.joblib", "pca_v000003.joblib"]
+    assert (tmp_path / LATEST_NAME).read_text().strip() == "pca_v000003.joblib"
+
+    restored = PCAFitter(min_samples=16, artifact_dir=str(tmp_path))
+    assert restored.load_latest()
+    assert restored.current.version == 3
+    probe = _features(5, 1)[0]
+    np.testing.assert_allclose(restored.current.fusion.transform(probe), fitter.current.fusion.transform(probe))
+
+    # Fitting resumes from the restored state with the next version
+    for features in _features(3, 40):
+        restored.observe(features)
+    assert restored.fit_now()
+    assert restored.current.version == 4
+    assert restored.current.n_samples == fitter.current.n_samples + 40
+
+
+def test_background_thread_publishes():
+    fitter = PCAFitter(min_samples=16, interval_s=0.01)
+    for features in _uniform_features(0, 16):
+        fitter.observe(features)
+    fitter.start()
+    try:
+        for _ in range(500):
+            if fitter.current is not None:
+                break
+            time.sleep(0.01)
+    finally:
+        fitter.close()
+    assert fitter.current is not None and fitter.current.version == 1
+
+
+def test_missing_artifact_dir_is_not_an_error(tmp_path):
+    fitter = PCAFitter(artifact_dir=str(tmp_path / "absent"))
+    assert not fitter.load_latest()
+    assert fitter.current is None
@@ -0,0 +1,95 @@
+"""Tests for the read-only v2 engine: precomputed profile weights and per-stream sessions."""
+
+import threading
+
+import numpy as np
+import pytest
+
+from app.v2.device_profiles import (
+    ALL_MODALITIES_MASK, DEFAULT_MODALITY_WEIGHTS, DEVICE_PROFILES, MODALITIES, PROFILE_INDEX,
+    WEIGHT_TABLE, modality_mask, modality_weights,
+)
+from app.v2.engine_v2 import CAVEngineV2, EngineSessionV2
+from app.v2.schemas_v2 import V2CavWindow
+from tests.conftest import make_v2_windows
+
+
+def test_weight_table_matches_renormalized_profiles():
+    assert WEIGHT_TABLE.shape == (len(DEVICE_PROFILES) + 1, ALL_MODALITIES_MASK + 1, len(MODALITIES))
+    assert not WEIGHT_TABLE.flags.writeable
+    for profile in DEVICE_PROFILES.values():
+        for present in (["physio"], ["physio", "env", "vision"], list(MODALITIES)):
+            weights = modality_weights(profile, present)
+            total = sum(profile.modality_weights[m] for m in present)
+            for m in MODALITIES:
+                expected = profile.modality_weights[m] / total if m in present and total > 0 else profile.modality_weights[m]
+                assert weights[m] == pytest.approx(expected)
+            row = WEIGHT_TABLE[PROFILE_INDEX[profile.name], modality_mask(present)]
+            np.testing.assert_array_equal(row, [weights[m] for m in MODALITIES])
+            with pytest.raises(TypeError):
+                weights["physio"] = 1.0
+    assert modality_weights(None, ["physio"]) is DEFAULT_MODALITY_WEIGHTS
+
+
+def test_profiled_requests_do_not_leak_weights():
+    # No stress component present: p_stress falls back to the profile-weighted scores
+    window = V2CavWindow(vision={"embedding": [0.5] * 64})
+    engine = CAVEngineV2()
+    before = engine.compute_cav_v2(window)["p_stress"]
+    drone = engine.compute_cav_v2(window, device_profile="drone_nav")["p_stress"]
+    assert drone != before
+    assert engine.compute_cav_v2(window)["p_stress"] == before
+    assert [r["p_stress"] for r in engine.compute_cav_v2_batch([window] * 2, device_profile="drone_nav")] == [drone] * 2
+
+
+def test_sessions_do_not_share_ema():
+    """Interleaving two streams on one engine matches running them separately."""
+    engine = CAVEngineV2()
+    a_windows, b_windows = make_v2_windows(3, 5), make_v2_windows(4, 5)
+    a, b = EngineSessionV2(), EngineSessionV2()
+    out_a, out_b = [], []
+    for wa, wb in zip(a_windows, b_windows):
+        out_a.append(engine.compute_cav_v2(wa, session=a)["cav_vector"])
+        out_b.append(engine.compute_cav_v2(wb, session=b)["cav_vector"])
+
+    ref = EngineSessionV2()
+    assert [engine.compute_cav_v2(w, session=ref)["cav_vector"] for w in a_windows] == out_a
+    np.testing.assert_array_equal(a.cav_smooth, ref.cav_smooth)
+    assert engine.cav_smooth is None  # default session untouched
+
+    # The batch path takes one session per window
+    interleaved = [w for pair in zip(a_windows, b_windows) for w in pair]
+    a2, b2 = EngineSessionV2(), EngineSessionV2()
+    batch = engine.compute_cav_v2_batch(interleaved, sessions=[a2, b2] * len(a_windows))
+    np.testing.assert_allclose([r["cav_vector"] for r in batch[0::2]], out_a, atol=1e-12)
+    np.testing.assert_allclose([r["cav_vector"] for r in batch[1::2]], out_b, atol=1e-12)
+
+
+def test_concurrent_streams_without_a_lock():
+    engine = CAVEngineV2()
+    streams = [make_v2_windows(seed, 12) for seed in range(6)]
+    for seed, windows in enumerate(streams):  # different profiles race on one engine
+        profile = list(PROFILE_INDEX)[seed % len(PROFILE_INDEX)]
+        for w in windows:
+            w.device_profile = profile
+    expected = []
+    for windows in streams:
+        session = EngineSessionV2()
+        expected.append([engine.compute_cav_v2(w, session=session) for w in windows])
+
+    results = [None] * len(streams)
+    barrier = threading.Barrier(len(streams))
+
+    def run(k):
+        session = EngineSessionV2()
+        barrier.wait()
+        results[k] = [engine.compute_cav_v2(w, session=session) for w in streams[k]]
+
+    threads = [threading.Thread(target=run, args=(k,)) for k in range(len(streams))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for got, want in zip(results, expected):
+        assert [r["p_stress"] for r in got] == [r["p_stress"] for r in want]
+        assert [r["cav_vector"] for r in got] == [r["cav_vector"] for r in want]
@@ -0,0 +1,105 @@
+"""Tests for the pipelined /v2/stream/cav WebSocket (app.routes.v2_stream)."""
+
+import json
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.admission import BoundedExecutor
+from app.routes import v2_stream
+from app.v2.engine_v2 import CAVEngineV2, EngineSessionV2
+from app.v2.schemas_v2 import V2CavWindow
+
+
+def _window(eda_start=0.0, n=240):
+    return {
+        "physio": {"EDA": [eda_start + 0.001 * i for i in range(n)], "BVP": [0.5] * n},
+        "motion": {"ACC_x": [0.0] * n, "ACC_y": [0.0] * n, "ACC_z": [1.0] * n},
+        "env": {"temp_c": 22.0, "humidity": 45.0, "aqi": 20},
+    }
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(v2_stream, "LICENSING_AVAILABLE", False)
+    monkeypatch.setattr(v2_stream, "ENGINE_V2", CAVEngineV2())
+    executor = BoundedExecutor(workers=2, max_queue=8)
+    monkeypatch.setattr(v2_stream, "INFERENCE", executor)
+    app = FastAPI()
+    app.include_router(v2_stream.router)
+    yield TestClient(app)
+    executor.shutdown()
+
+
+def test_lossless_answers_every_frame_in_order(client):
+    with client.websocket_connect("/v2/stream/cav") as ws:
+        for k in range(4):
+            ws.send_text(json.dumps(_window(k * 0.1)))
+        frames = [ws.receive_json() for _ in range(4)]
+    assert [f["seq"] for f in frames] == [1, 2, 3, 4]
+    assert all(f["ok"] and f["dropped"] == 0 for f in frames)
+
+
+def test_latest_policy_drops_stale_windows(client, monkeypatch):
+    release = threading.Event()
+    compute = v2_stream._compute
+
+    def slow_compute(*args):
+        release.wait(5)  # hold the first window until the rest are queued
+        return compute(*args)
+
+    monkeypatch.setattr(v2_stream, "_compute", slow_compute)
+    with client.websocket_connect("/v2/stream/cav?policy=latest") as ws:
+        for k in range(5):
+            ws.send_text(json.dumps(_window(k * 0.1)))
+        # Unparseable frames are answered by the receiver, ahead of the stuck window
+        ws.send_text("{not json")
+        error = ws.receive_json()
+        release.set()
+        frames = [ws.receive_json() for _ in range(2)]
+    assert error["seq"] == 6 and not error["ok"] and error["error"].startswith("Invalid JSON")
+    assert [f["seq"] for f in frames] == [1, 5]
+    assert frames[1]["dropped"] == 3
+
+
+def test_delta_frames_extend_the_previous_window(client):
+    full = _window()
+    delta = {"delta": True, "physio": {"EDA": [1.0] * 40}, "env": {"temp_c": 30.0, "humidity": 45.0, "aqi": 20}}
+    with client.websocket_connect("/v2/stream/cav") as ws:
+        ws.send_text(json.dumps(full))
+        ws.send_text(json.dumps(delta))
+        frames = [ws.receive_json() for _ in range(2)]
+
+    expanded = v2_stream.apply_delta(full, delta)
+    assert expanded["physio"]["EDA"] == full["physio"]["EDA"][40:] + [1.0] * 40
+    assert expanded["physio"]["BVP"] == full["physio"]["BVP"]
+    assert expanded["env"]["temp_c"] == 30.0 and expanded["motion"] == full["motion"]
+
+    engine, session = CAVEngineV2(), EngineSessionV2()
+    expected = [engine.compute_cav_v2(V2CavWindow(**w), session=session) for w in (full, expanded)]
+    assert [f["p_stress"] for f in frames] == pytest.approx([r["p_stress"] for r in expected])
+    assert frames[1]["cav_vector"] == pytest.approx(expected[1]["cav_vector"])
+
+
+def test_bad_delta_and_window_frames_keep_the_stream_open(client):
+    with pytest.raises(ValueError):
+        v2_stream.apply_delta(None, {"delta": True})
+    with pytest.raises(ValueError):
+        v2_stream.apply_delta({"physio": {"EDA": [0.1]}}, {"delta": True, "physio": {"BVP": [0.5]}})
+
+    with client.websocket_connect("/v2/stream/cav") as ws:
+        ws.send_text(json.dumps({"delta": True, "physio": {"EDA": [0.1]}}))
+        ws.send_text(json.dumps({"physio": {"EDA": "nope"}}))
+        ws.send_text(json.dumps(_window()))
+        frames = [ws.receive_json() for _ in range(3)]
+    assert [(f["seq"], f["ok"]) for f in frames] == [(1, False), (2, False), (3, True)]
+    assert "before any full window" in frames[0]["error"]
+    assert frames[1]["error"].startswith("Invalid window format")
+
+
+def test_unknown_policy_is_rejected(client):
+    with client.websocket_connect("/v2/stream/cav?policy=newest") as ws:
+        frame = ws.receive_json()
+    assert not frame["ok"] and "policy" in frame["error"]
@@ -0,0 +1,75 @@
+"""Export the v3.2 CAV model to a compiled NumPy tree artifact.
+
+Loads cav_state_v3_2.joblib + cav_state_scaler_v3_2.joblib through the normal
+artifact discovery (EDON_MODEL_DIR, ./models, cav_engine_v3_2_*), flattens the
+LightGBM/XGBoost booster with the scaler folded into the thresholds, checks it
+against predict_proba and writes cav_state_v3_2.compiled.npz next to the model.
+The engine picks it up automatically on the next start (EDON_COMPILED_MODEL=0
+disables it).
+
+Usage:
+    python tools/export_compiled_model.py [--out PATH] [--samples 5000]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from joblib import load
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from app.compiled_trees import COMPILED_MODEL_NAME, compile_model, max_abs_error
+from app.engine_loader_patch import _find_artifact
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", type=str, default=None, help="Output path (default: next to the model)")
+    parser.add_argument("--samples", type=int, default=5000, help="Random rows used for verification")
+    parser.add_argument("--tolerance", type=float, default=1e-6, help="Max allowed |proba| difference")
+    args = parser.parse_args()
+
+    model_path = _find_artifact("cav_state_v3_2.joblib")
+    scaler_path = _find_artifact("cav_state_scaler_v3_2.joblib")
+    model, scaler = load(model_path), load(scaler_path)
+    print(f"[export] model:  {model_path}")
+    print(f"[export] scaler: {scaler_path}")
+
+    compiled = compile_model(model, scaler)
+    print(
+        f"[export] {len(compiled.roots)} trees, {len(compiled.feature)} nodes, "
+        f"max depth {compiled.max_depth}, classes {compiled.classes_.tolist()}"
+    )
+
+    # Verify on points spread around the training distribution
+    rng = np.random.default_rng(0)
+    mean = np.asarray(getattr(scaler, "mean_", np.zeros(compiled.n_features)))
+    scale = np.asarray(getattr(scaler, "scale_", np.ones(compiled.n_features)))
+    X = mean + scale * rng.normal(size=(args.samples, compiled.n_features)) * 1.5
+    X[::97, 0] = np.nan
+    err = max_abs_error(compiled, model, scaler, X)
+    print(f"[export] max |proba - reference| = {err:.3e}")
+    if err > args.tolerance:
+        print(f"[export] ERROR: exceeds tolerance {args.tolerance:g}; not writing artifact")
+        sys.exit(1)
+
+    t0 = time.perf_counter()
+    for row in X[:1000]:
+        compiled.predict_proba(row.reshape(1, -1))
+    single_us = (time.perf_counter() - t0) * 1e6 / 1000
+    t0 = time.perf_counter()
+    compiled.predict_proba(X)
+    batch_us = (time.perf_counter() - t0) * 1e6 / len(X)
+    print(f"[export] single-row {single_us:.1f} us, batch {batch_us:.2f} us/row")
+
+    out = Path(args.out) if args.out else model_path.with_name(COMPILED_MODEL_NAME)
+    compiled.save(out)
+    print(f"[export] wrote {out}")
+
+
+if __name__ == "__main__":
+    main()